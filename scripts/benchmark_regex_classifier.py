@@ -0,0 +1,113 @@
+"""
+Benchmark do RegexClassifier em uma lei sintética grande.
+
+Gera N artigos (com parágrafos, incisos, alíneas, headers de browser e
+blocos órfãos de continuação cross-page) no formato de páginas que o
+pipeline passa ao classifier, e compara:
+
+- legado: classify_document() + classify_to_devices() (duas classificações)
+- atual:  classify_with_devices() (passe único)
+
+Uso:
+    python scripts/benchmark_regex_classifier.py [--articles 3000] [--runs 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adiciona raiz do repo ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.extraction.regex_classifier import (  # noqa: E402
+    classify_document,
+    classify_to_devices,
+    classify_with_devices,
+)
+
+ROMANS = ["I", "II", "III", "IV", "V"]
+BLOCKS_PER_PAGE = 40
+
+
+def make_synthetic_law(n_articles: int) -> list:
+    """Páginas no formato do classifier, com offsets contíguos."""
+    texts = []
+    for a in range(1, n_articles + 1):
+        texts.append(f"Art. {a}º Fica estabelecido o disposto neste artigo para os fins de")
+        # Órfão: continuação do caput após quebra de página
+        texts.append("aplicação das normas gerais de licitação e contratação pública.")
+        for i in ROMANS[: a % 4 + 1]:
+            texts.append(f"{i} - hipótese prevista no inciso {i} do artigo {a};")
+        if a % 3 == 0:
+            texts.append("a) primeira alínea do último inciso;")
+            texts.append("b) segunda alínea do último inciso.")
+        if a % 2 == 0:
+            texts.append(f"§ 1º O disposto no art. {a} aplica-se também aos contratos.")
+        if a % 50 == 0:
+            texts.append(
+                "12/03/2024, 10:15 L14133\nhttps://www.planalto.gov.br/ccivil_03/lei.htm\n"
+                f"{a // 50}/{n_articles // 50}\ncontinuação do parágrafo anterior com texto legal."
+            )
+
+    pages = []
+    offset = 0
+    for start in range(0, len(texts), BLOCKS_PER_PAGE):
+        blocks = []
+        for idx, text in enumerate(texts[start:start + BLOCKS_PER_PAGE]):
+            blocks.append({
+                "block_index": idx,
+                "text": text,
+                "char_start": offset,
+                "char_end": offset + len(text),
+                "bbox": [72.0, 72.0 + idx * 15, 520.0, 84.0 + idx * 15],
+                "lines": [],
+                "has_strikethrough": False,
+            })
+            offset += len(text) + 1
+        pages.append({"page_number": len(pages) + 1, "blocks": blocks})
+    return pages
+
+
+def _best_of(fn, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=3000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = make_synthetic_law(args.articles)
+    total_blocks = sum(len(p["blocks"]) for p in pages)
+    print(f"Lei sintética: {args.articles} artigos, {len(pages)} páginas, {total_blocks} blocos")
+
+    def legacy():
+        classify_document(pages)
+        classify_to_devices(pages)
+
+    def single_pass():
+        classify_with_devices(pages)
+
+    result, devices = classify_with_devices(pages)
+    stats = result["stats"]
+    print(
+        f"Dispositivos: {len(devices)} | órfãos mergeados: {stats['orphans_merged']} | "
+        f"não classificados: {stats['unclassified']}"
+    )
+
+    t_legacy = _best_of(legacy, args.runs)
+    t_single = _best_of(single_pass, args.runs)
+    print(f"legado (2 classificações): {t_legacy * 1000:8.1f} ms")
+    print(f"passe único:               {t_single * 1000:8.1f} ms")
+    print(f"speedup:                   {t_legacy / t_single:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 from .citation_extractor import (
     CitationExtractor,
     extract_citations_from_chunk,
+    extract_citations_batch,
     NormativeReference,
 )
 
@@ -18,6 +19,7 @@ from .canonical_offsets import (
 __all__ = [
     "CitationExtractor",
     "extract_citations_from_chunk",
+    "extract_citations_batch",
     "NormativeReference",
     "normalize_canonical_text",
     "compute_canonical_hash",
@@ -35,6 +35,7 @@ import re
 import json
 import logging
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional, Callable
 from enum import Enum
 
@@ -155,6 +156,41 @@ NORMATIVE_CONTEXT_PATTERNS = [
 ]
 
 
+# Padrões auxiliares compilados uma única vez (antes recompilados a cada chamada)
+_RE_INTERNAL_ARTICLE = re.compile(
+    r"(?:arts?\.?|artigos?)\s*(\d+)[ºo°]?"
+    r"(?:\s*,?\s*(?:§|par[aá]grafo)\s*(\d+|[úu]nico)[ºo°]?)?"
+    r"(?:\s*,?\s*inciso\s+([IVXLCDM]+))?"
+    r"(?:\s*,?\s*al[ií]nea\s+['\"]?([a-z])['\"]?)?",
+    re.IGNORECASE
+)
+_RE_DEVICE_BEFORE = re.compile(
+    r"(?:arts?\.?|artigos?)\s*(\d+)[ºo°]?"
+    r"(?:\s*(?:,\s*\d+[ºo°]?)*(?:\s+(?:e|a)\s+\d+[ºo°]?)?)?"
+    r"(?:\s*,?\s*(?:§|par[aá]grafo)\s*(\d+|[úu]nico)[ºo°]?)?"
+    r"(?:\s*,?\s*inciso\s+([IVXLCDM]+))?"
+    r"(?:\s*,?\s*al[ií]nea\s+['\"]?([a-z])['\"]?)?"
+    r"\s*(?:,\s*)?(?:d[aoe]s?|n[aoe]s?)\s*$",
+    re.IGNORECASE
+)
+_RE_MULTI_REFS_BEFORE = re.compile(
+    r"(?:arts?\.?|artigos?)\s*(\d+)[ºo°]?"
+    r"((?:\s*,\s*\d+[ºo°]?)*(?:\s+(?:e|a)\s+\d+[ºo°]?)?)"
+    r"\s*(?:,\s*)?(?:d[aoe]s?|n[aoe]s?)\s*$",
+    re.IGNORECASE
+)
+_RE_RANGE_AFTER = re.compile(r'\s+a\s+(\d+)[ºo°]?')
+_RE_COMMA_NUMBER = re.compile(r'\s*,\s*(\d+)[ºo°]?')
+_RE_AND_NUMBER = re.compile(r'\s+e\s+(\d+)[ºo°]?')
+_RE_RANGE_IN_LIST = re.compile(r'\s+a\s+(\d+)')
+_RE_NUMBER = re.compile(r'(\d+)')
+
+
+# Caracteres fora do Latin-1 que casam com letras ASCII sob re.IGNORECASE
+# (ou cujo lower() gera uma). Na presença deles o pré-filtro usa a regex.
+_RE_CASEFOLD_EXTRA = re.compile("[\u0130\u0131\u017f\u212a]")
+
+
 class NormativeType(str, Enum):
     """Tipos de normas reconhecidas."""
     LEI = "LEI"
@@ -269,12 +305,36 @@ class CitationExtractor:
     # Padrão para capturar ano
     YEAR_PATTERN = r"[/\s](\d{2,4})"
 
+    # Pré-filtro: âncoras que TODO match de uma família de NORM_PATTERNS
+    # contém (mesmas flags, IGNORECASE). Uma varredura barata do texto decide
+    # quais famílias rodar; a maioria dos chunks não cita norma alguma.
+    # Família sem entrada aqui roda sempre. Cada âncora começa por um literal
+    # ASCII minúsculo (checado com `in` sobre text.lower()); o resto, se
+    # houver, é confirmado com a própria regex da âncora.
+    NORM_ANCHORS = {
+        NormativeType.LEI_COMPLEMENTAR: [r"lei", r"lc\s"],
+        NormativeType.LEI: [r"lei"],
+        NormativeType.DECRETO_LEI: [r"decreto", r"dl\s"],
+        NormativeType.DECRETO: [r"decreto"],
+        NormativeType.INSTRUCAO_NORMATIVA: [r"instru", r"in\s"],
+        NormativeType.PORTARIA: [r"portaria"],
+        NormativeType.RESOLUCAO: [r"resolu"],
+        NormativeType.ACORDAO: [r"ac[oó]rd"],
+        NormativeType.MEDIDA_PROVISORIA: [r"medida", r"mp\s"],
+        NormativeType.EMENDA_CONSTITUCIONAL: [r"emenda", r"ec\s"],
+        NormativeType.CONSTITUICAO: [r"constitui", r"cf"],
+    }
+
+    # Âncora necessária para referências internas (_RE_INTERNAL_ARTICLE)
+    INTERNAL_ANCHOR = r"art"
+
     def __init__(
         self,
         current_document_id: Optional[str] = None,
         known_documents: Optional[dict[str, str]] = None,
         llm_resolver: Optional[Callable[[str, list[str]], Optional[str]]] = None,
         enable_llm_fallback: bool = False,
+        use_prefilter: bool = True,
     ):
         """
         Args:
@@ -283,11 +343,14 @@ class CitationExtractor:
             llm_resolver: Função callback para resolver via LLM
                           Assinatura: (text: str, candidates: list[str]) -> Optional[str]
             enable_llm_fallback: Se True, usa LLM para resolver referências ambíguas
+            use_prefilter: Se True, roda apenas as famílias de NORM_PATTERNS cujas
+                           âncoras aparecem no texto (mesmo resultado, mais rápido)
         """
         self.current_document_id = current_document_id
         self.known_documents = {**KNOWN_DOCUMENTS, **(known_documents or {})}
         self.llm_resolver = llm_resolver
         self.enable_llm_fallback = enable_llm_fallback
+        self.use_prefilter = use_prefilter
         self._compile_patterns()
 
         # Métricas de telemetria
@@ -299,17 +362,79 @@ class CitationExtractor:
         }
 
     def _compile_patterns(self):
-        """Compila padrões regex para melhor performance."""
-        self._compiled_norms = {}
-        for norm_type, patterns in self.NORM_PATTERNS.items():
-            self._compiled_norms[norm_type] = [
-                re.compile(p, re.IGNORECASE) for p in patterns
-            ]
+        """
+        Compila padrões regex uma única vez por classe e compartilha entre
+        instâncias (o extrator é criado por documento/chunk).
+        """
+        cls = type(self)
+        compiled = cls.__dict__.get("_compiled_cache")
+        if compiled is None:
+            compiled = (
+                {
+                    norm_type: [re.compile(p, re.IGNORECASE) for p in patterns]
+                    for norm_type, patterns in cls.NORM_PATTERNS.items()
+                },
+                {
+                    k: re.compile(v, re.IGNORECASE)
+                    for k, v in cls.DEVICE_PATTERNS.items()
+                },
+                re.compile(cls.YEAR_PATTERN),
+                cls._compile_anchors(),
+            )
+            cls._compiled_cache = compiled
+        (
+            self._compiled_norms,
+            self._compiled_devices,
+            self._compiled_year,
+            (self._anchors, self._anchor_fallback, self._unanchored),
+        ) = compiled
+
+    @classmethod
+    def _compile_anchors(cls):
+        """
+        Compila as âncoras do pré-filtro.
 
-        self._compiled_devices = {
-            k: re.compile(v, re.IGNORECASE)
-            for k, v in self.DEVICE_PATTERNS.items()
-        }
+        Returns:
+            (anchors, fallback, unanchored): anchors é uma lista de
+            (literal, regex de confirmação ou None, famílias); fallback é uma
+            regex única (lookahead, vê âncoras sobrepostas) com um grupo por
+            âncora, usada quando text.lower() não é equivalente ao IGNORECASE.
+        """
+        families_by_anchor: dict[str, set] = {}
+        for norm_type, anchors in cls.NORM_ANCHORS.items():
+            for anchor in anchors:
+                families_by_anchor.setdefault(anchor, set()).add(norm_type)
+        families_by_anchor[cls.INTERNAL_ANCHOR] = set()
+
+        anchors = []
+        for anchor, families in families_by_anchor.items():
+            literal = re.match(r"[a-z]*", anchor).group()
+            confirm = None if literal == anchor else re.compile(anchor, re.IGNORECASE)
+            anchors.append((literal, confirm, frozenset(families)))
+
+        alternation = "|".join(f"(?P<a{i}>{anchor})" for i, anchor in enumerate(families_by_anchor))
+        fallback = re.compile(f"(?=(?:{alternation}))", re.IGNORECASE)
+        unanchored = frozenset(t for t in cls.NORM_PATTERNS if t not in cls.NORM_ANCHORS)
+        return anchors, fallback, unanchored
+
+    def _active_families(self, text: str) -> tuple[set, bool]:
+        """Famílias de NORM_PATTERNS que podem casar no texto + se há 'art'."""
+        families = set(self._unanchored)
+        internal = False
+        if _RE_CASEFOLD_EXTRA.search(text):
+            # ı, ſ, İ, K casam com letras ASCII sob IGNORECASE: usa a regex
+            groups = {m.lastgroup for m in self._anchor_fallback.finditer(text)}
+            hits = [self._anchors[int(g[1:])] for g in groups]
+        else:
+            lowered = text.lower()
+            hits = [
+                anchor for anchor in self._anchors
+                if anchor[0] in lowered and (anchor[1] is None or anchor[1].search(text))
+            ]
+        for literal, _confirm, anchor_families in hits:
+            families |= anchor_families
+            internal = internal or literal == self.INTERNAL_ANCHOR
+        return families, internal
 
     def extract(self, text: str) -> list[NormativeReference]:
         """
@@ -328,8 +453,15 @@ class CitationExtractor:
         seen_raw = set()  # Evita duplicatas por texto
         seen_doc_ids = set()  # Evita duplicatas por doc_id + span_ref
 
+        if self.use_prefilter:
+            active, has_articles = self._active_families(text)
+        else:
+            active, has_articles = None, True
+
         # 1. Extrai referências a normas externas
         for norm_type, patterns in self._compiled_norms.items():
+            if active is not None and norm_type not in active:
+                continue
             for pattern in patterns:
                 for match in pattern.finditer(text):
                     raw = match.group(0)
@@ -378,8 +510,9 @@ class CitationExtractor:
                                     ))
 
         # 2. Extrai referências internas (artigos/parágrafos/incisos)
-        internal_refs = self._extract_internal_references(text, seen_raw)
-        references.extend(internal_refs)
+        if has_articles:
+            internal_refs = self._extract_internal_references(text, seen_raw, active)
+            references.extend(internal_refs)
 
         return references
 
@@ -401,7 +534,7 @@ class CitationExtractor:
         year = None
         # Busca ano logo após o match
         remaining_text = full_text[match.end():match.end() + 20]
-        year_match = re.search(self.YEAR_PATTERN, remaining_text)
+        year_match = self._compiled_year.search(remaining_text)
         if year_match:
             year = year_match.group(1)
             if len(year) == 2:
@@ -514,21 +647,13 @@ class CitationExtractor:
     def _extract_internal_references(
         self,
         text: str,
-        seen_raw: set
+        seen_raw: set,
+        active_families: Optional[set] = None,
     ) -> list[NormativeReference]:
         """Extrai referências internas (art. 9º, inciso III)."""
         references = []
 
-        # Padrão para artigo com contexto opcional de documento
-        art_pattern = re.compile(
-            r"(?:arts?\.?|artigos?)\s*(\d+)[ºo°]?"
-            r"(?:\s*,?\s*(?:§|par[aá]grafo)\s*(\d+|[úu]nico)[ºo°]?)?"
-            r"(?:\s*,?\s*inciso\s+([IVXLCDM]+))?"
-            r"(?:\s*,?\s*al[ií]nea\s+['\"]?([a-z])['\"]?)?",
-            re.IGNORECASE
-        )
-
-        for match in art_pattern.finditer(text):
+        for match in _RE_INTERNAL_ARTICLE.finditer(text):
             raw = match.group(0)
             if raw.lower() in seen_raw or len(raw) < 4:
                 continue
@@ -550,7 +675,9 @@ class CitationExtractor:
             if is_external and "desta" not in after_match[:30]:
                 # Verifica se os padrões de norma já capturaram este artigo.
                 # Se sim, pula (será tratado como externo). Se não, fallback interno.
-                norm_captured = self._is_captured_by_norm_patterns(text, match)
+                norm_captured = self._is_captured_by_norm_patterns(
+                    text, match, active_families
+                )
                 if norm_captured:
                     continue
                 # Fallback: assume documento atual com confiança reduzida
@@ -621,7 +748,12 @@ class CitationExtractor:
 
         return references
 
-    def _is_captured_by_norm_patterns(self, text: str, art_match: re.Match) -> bool:
+    def _is_captured_by_norm_patterns(
+        self,
+        text: str,
+        art_match: re.Match,
+        active_families: Optional[set] = None,
+    ) -> bool:
         """
         Verifica se algum NORM_PATTERN captura uma norma que inclui a posição deste artigo.
 
@@ -634,7 +766,10 @@ class CitationExtractor:
         art_end = art_match.end()
 
         # Busca normas no texto completo que estejam próximas deste artigo
-        for _norm_type, patterns in self._compiled_norms.items():
+        # (famílias sem âncora no texto não podem casar — ver NORM_ANCHORS)
+        for norm_type, patterns in self._compiled_norms.items():
+            if active_families is not None and norm_type not in active_families:
+                continue
             for pattern in patterns:
                 for norm_match in pattern.finditer(text):
                     # A norma deve estar logo após o artigo (dentro de ~60 chars)
@@ -659,7 +794,7 @@ class CitationExtractor:
         remaining = after
 
         # Range: " a 70" (expande intervalo)
-        range_m = re.match(r'\s+a\s+(\d+)[ºo°]?', remaining)
+        range_m = _RE_RANGE_AFTER.match(remaining)
         if range_m:
             start_num = int(primary_num)
             end_num = int(range_m.group(1))
@@ -670,13 +805,13 @@ class CitationExtractor:
 
         while remaining:
             # Captura: ", 42", ", 43"
-            m = re.match(r'\s*,\s*(\d+)[ºo°]?', remaining)
+            m = _RE_COMMA_NUMBER.match(remaining)
             if m:
                 extra_nums.append(m.group(1))
                 remaining = remaining[m.end():]
                 continue
             # Captura: " e 42" (último da lista)
-            m = re.match(r'\s+e\s+(\d+)[ºo°]?', remaining)
+            m = _RE_AND_NUMBER.match(remaining)
             if m:
                 extra_nums.append(m.group(1))
                 break
@@ -821,17 +956,7 @@ class CitationExtractor:
 
         # Padrão para "art. X, inciso Y, alínea Z da/do" - busca artigo próximo do final
         # Ex: "art. 9º da Lei", "art. 75, inciso II, alínea 'a', da Lei"
-        art_pattern = re.compile(
-            r"(?:arts?\.?|artigos?)\s*(\d+)[ºo°]?"
-            r"(?:\s*(?:,\s*\d+[ºo°]?)*(?:\s+(?:e|a)\s+\d+[ºo°]?)?)?"
-            r"(?:\s*,?\s*(?:§|par[aá]grafo)\s*(\d+|[úu]nico)[ºo°]?)?"
-            r"(?:\s*,?\s*inciso\s+([IVXLCDM]+))?"
-            r"(?:\s*,?\s*al[ií]nea\s+['\"]?([a-z])['\"]?)?"
-            r"\s*(?:,\s*)?(?:d[aoe]s?|n[aoe]s?)\s*$",
-            re.IGNORECASE
-        )
-
-        match = art_pattern.search(search_text)
+        match = _RE_DEVICE_BEFORE.search(search_text)
         if not match:
             return None
 
@@ -855,14 +980,7 @@ class CitationExtractor:
         start = max(0, end_pos - 100)
         search_text = text[start:end_pos]
 
-        pattern = re.compile(
-            r"(?:arts?\.?|artigos?)\s*(\d+)[ºo°]?"
-            r"((?:\s*,\s*\d+[ºo°]?)*(?:\s+(?:e|a)\s+\d+[ºo°]?)?)"
-            r"\s*(?:,\s*)?(?:d[aoe]s?|n[aoe]s?)\s*$",
-            re.IGNORECASE
-        )
-
-        match = pattern.search(search_text)
+        match = _RE_MULTI_REFS_BEFORE.search(search_text)
         if not match or not match.group(2).strip():
             return []
 
@@ -871,7 +989,7 @@ class CitationExtractor:
         extra_nums = []
 
         # Range: "a 70"
-        range_m = re.search(r'\s+a\s+(\d+)', rest)
+        range_m = _RE_RANGE_IN_LIST.search(rest)
         if range_m:
             end_num = int(range_m.group(1))
             start_num = int(primary_num)
@@ -880,7 +998,7 @@ class CitationExtractor:
                     extra_nums.append(str(n))
         else:
             # Vírgula e "e" separados
-            for m in re.finditer(r'(\d+)', rest):
+            for m in _RE_NUMBER.finditer(rest):
                 extra_nums.append(m.group(1))
 
         return extra_nums
@@ -1114,6 +1232,41 @@ def normalize_citations_with_rel_type(
     return normalized
 
 
+@lru_cache(maxsize=64)
+def _get_extractor(document_id: Optional[str]) -> CitationExtractor:
+    """Extrator compartilhado por documento (sem known_documents customizados)."""
+    return CitationExtractor(current_document_id=document_id)
+
+
+def _citations_for_text(
+    extractor: CitationExtractor,
+    text: str,
+    chunk_node_id: Optional[str],
+    parent_chunk_id: Optional[str],
+    document_type: Optional[str],
+) -> list[dict]:
+    refs = extractor.extract(text)
+
+    # PR5: Retorna dicts com rel_type info (sem None)
+    citations = [
+        {
+            "target_node_id": ref.target_node_id,
+            "rel_type": ref.rel_type,
+            "rel_type_confidence": ref.rel_type_confidence,
+        }
+        for ref in refs if ref.target_node_id
+    ]
+
+    if chunk_node_id:
+        citations = normalize_citations_with_rel_type(
+            citations=citations,
+            chunk_node_id=chunk_node_id,
+            parent_chunk_id=parent_chunk_id,
+            document_type=document_type,
+        )
+    return citations
+
+
 def extract_citations_from_chunk(
     text: str,
     document_id: Optional[str] = None,
@@ -1139,28 +1292,84 @@ def extract_citations_from_chunk(
         Lista de dicts com citações:
         [{"target_node_id": "...", "rel_type": "CITA", "rel_type_confidence": 0.85}, ...]
     """
-    extractor = CitationExtractor(
-        current_document_id=document_id,
-        known_documents=known_documents,
+    if known_documents:
+        extractor = CitationExtractor(
+            current_document_id=document_id,
+            known_documents=known_documents,
+        )
+    else:
+        extractor = _get_extractor(document_id)
+
+    return _citations_for_text(
+        extractor, text, chunk_node_id, parent_chunk_id, document_type,
     )
 
-    refs = extractor.extract(text)
 
-    # PR5: Retorna dicts com rel_type info (sem None)
-    citations = [
-        {
-            "target_node_id": ref.target_node_id,
-            "rel_type": ref.rel_type,
-            "rel_type_confidence": ref.rel_type_confidence,
-        }
-        for ref in refs if ref.target_node_id
+def _extract_citations_slice(
+    chunks: list[dict],
+    document_id: Optional[str],
+    document_type: Optional[str],
+) -> list[list[dict]]:
+    """Worker do pool: extrai citações de uma fatia de chunks."""
+    extractor = _get_extractor(document_id)
+    return [
+        _citations_for_text(
+            extractor,
+            chunk.get("text") or "",
+            chunk.get("chunk_node_id"),
+            chunk.get("parent_chunk_id"),
+            document_type,
+        )
+        for chunk in chunks
     ]
 
-    if chunk_node_id:
-        citations = normalize_citations_with_rel_type(
-            citations=citations,
-            chunk_node_id=chunk_node_id,
-            parent_chunk_id=parent_chunk_id,
-            document_type=document_type,
+
+def extract_citations_batch(
+    chunks: list[dict],
+    document_id: Optional[str] = None,
+    document_type: Optional[str] = None,
+    workers: int = 1,
+    parallel_min_chunks: int = 2000,
+) -> list[list[dict]]:
+    """
+    Extrai citações de todos os chunks de um documento.
+
+    Mesmo resultado de chamar extract_citations_from_chunk() por chunk, com um
+    único extrator por documento. Para documentos grandes (>= parallel_min_chunks)
+    e workers > 1, as fatias são distribuídas num pool de processos.
+
+    Args:
+        chunks: [{"text": ..., "chunk_node_id": ..., "parent_chunk_id": ...}, ...]
+        document_id: ID do documento atual
+        document_type: Tipo do documento (LEI, DECRETO, etc.)
+        workers: Processos do pool (1 = sequencial)
+        parallel_min_chunks: Mínimo de chunks para usar o pool
+
+    Returns:
+        Lista de citações por chunk, na mesma ordem da entrada
+    """
+    if workers <= 1 or len(chunks) < parallel_min_chunks:
+        return _extract_citations_slice(chunks, document_id, document_type)
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Fatias contíguas (~4 por worker) para balancear chunks de tamanhos variados
+    n_slices = min(len(chunks), workers * 4)
+    size = -(-len(chunks) // n_slices)
+    slices = [chunks[i:i + size] for i in range(0, len(chunks), size)]
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        results = pool.map(
+            _extract_citations_slice,
+            slices,
+            [document_id] * len(slices),
+            [document_type] * len(slices),
         )
+        citations = [c for part in results for c in part]
+
+    logger.info(
+        f"Citações: {len(chunks)} chunks em {len(slices)} fatias ({workers} processos)"
+    )
     return citations
@@ -37,11 +37,15 @@ class RelTypePattern:
         rel_type: Tipo de relacionamento a atribuir
         confidence: Confiança base do padrão (0.0 a 1.0)
         description: Descrição do padrão para debug
+        keywords: Literais (minúsculos) dos quais ao menos um aparece em todo
+                  match do padrão. Sem nenhum deles no contexto, o padrão
+                  nem é executado. Vazio = sempre executa.
     """
     pattern: re.Pattern
     rel_type: str
     confidence: float
     description: str = ""
+    keywords: tuple[str, ...] = ()
 
 
 # =============================================================================
@@ -62,7 +66,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REVOGA_EXPRESSAMENTE",
         confidence=0.95,
-        description="Revogação expressa: 'fica revogado', 'ficam revogados'"
+        description="Revogação expressa: 'fica revogado', 'ficam revogados'",
+        keywords=("revogad",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -71,7 +76,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REVOGA_EXPRESSAMENTE",
         confidence=0.90,
-        description="Revogação direta: 'revoga o art.', 'revogam-se'"
+        description="Revogação direta: 'revoga o art.', 'revogam-se'",
+        keywords=("revoga",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -80,7 +86,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REVOGA_EXPRESSAMENTE",
         confidence=0.92,
-        description="Revogação nominal: 'revogação expressa'"
+        description="Revogação nominal: 'revogação expressa'",
+        keywords=("revoga",)
     ),
 
     # -------------------------------------------------------------------------
@@ -94,7 +101,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="ALTERA_EXPRESSAMENTE",
         confidence=0.95,
-        description="Alteração com nova redação: 'passa a vigorar com a seguinte redação'"
+        description="Alteração com nova redação: 'passa a vigorar com a seguinte redação'",
+        keywords=("vigorar",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -103,7 +111,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="ALTERA_EXPRESSAMENTE",
         confidence=0.90,
-        description="Alteração direta: 'altera o art.', 'alteram-se'"
+        description="Alteração direta: 'altera o art.', 'alteram-se'",
+        keywords=("altera",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -112,7 +121,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="ALTERA_EXPRESSAMENTE",
         confidence=0.88,
-        description="Nova redação: 'nova redação do art.'"
+        description="Nova redação: 'nova redação do art.'",
+        keywords=("reda",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -121,7 +131,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="ALTERA_EXPRESSAMENTE",
         confidence=0.85,
-        description="Dá nova redação: 'dá nova redação ao'"
+        description="Dá nova redação: 'dá nova redação ao'",
+        keywords=("reda",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -130,7 +141,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="ALTERA_EXPRESSAMENTE",
         confidence=0.85,
-        description="Alteração nominal: 'alteração do art.'"
+        description="Alteração nominal: 'alteração do art.'",
+        keywords=("altera",)
     ),
 
     # -------------------------------------------------------------------------
@@ -144,7 +156,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REGULAMENTA",
         confidence=0.90,
-        description="Regulamentação: 'regulamenta a Lei', 'regulamentar o art.'"
+        description="Regulamentação: 'regulamenta a Lei', 'regulamentar o art.'",
+        keywords=("regulamenta",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -153,7 +166,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REGULAMENTA",
         confidence=0.95,
-        description="Regulamentação no preâmbulo: 'Este Decreto regulamenta'"
+        description="Regulamentação no preâmbulo: 'Este Decreto regulamenta'",
+        keywords=("regulamenta",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -162,7 +176,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REGULAMENTA",
         confidence=0.85,
-        description="Fins de regulamentação"
+        description="Fins de regulamentação",
+        keywords=("regulamenta",)
     ),
 
     # -------------------------------------------------------------------------
@@ -176,7 +191,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="EXCEPCIONA",
         confidence=0.92,
-        description="Exceção: 'salvo o disposto', 'salvo previsto'"
+        description="Exceção: 'salvo o disposto', 'salvo previsto'",
+        keywords=("salvo",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -185,7 +201,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="EXCEPCIONA",
         confidence=0.90,
-        description="Exceção: 'exceto o disposto', 'exceto quando'"
+        description="Exceção: 'exceto o disposto', 'exceto quando'",
+        keywords=("exceto",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -194,7 +211,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="EXCEPCIONA",
         confidence=0.88,
-        description="Ressalva: 'ressalvado o disposto'"
+        description="Ressalva: 'ressalvado o disposto'",
+        keywords=("ressalvad",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -203,7 +221,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="EXCEPCIONA",
         confidence=0.85,
-        description="Com exceção de"
+        description="Com exceção de",
+        keywords=("exce",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -212,7 +231,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="EXCEPCIONA",
         confidence=0.75,
-        description="Excepcionalmente"
+        description="Excepcionalmente",
+        keywords=("excepcionalmente",)
     ),
 
     # -------------------------------------------------------------------------
@@ -226,7 +246,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="DEPENDE_DE",
         confidence=0.85,
-        description="Nos termos: 'nos termos do art.', 'nos termos da Lei'"
+        description="Nos termos: 'nos termos do art.', 'nos termos da Lei'",
+        keywords=("termos",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -235,7 +256,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="DEPENDE_DE",
         confidence=0.85,
-        description="Na forma: 'na forma do art.', 'na forma da Lei'"
+        description="Na forma: 'na forma do art.', 'na forma da Lei'",
+        keywords=("forma",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -244,7 +266,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="DEPENDE_DE",
         confidence=0.82,
-        description="Observado: 'observado o disposto'"
+        description="Observado: 'observado o disposto'",
+        keywords=("observad",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -253,7 +276,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="DEPENDE_DE",
         confidence=0.80,
-        description="Atendido: 'atendido o disposto'"
+        description="Atendido: 'atendido o disposto'",
+        keywords=("atendid",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -262,7 +286,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="DEPENDE_DE",
         confidence=0.78,
-        description="Em consonância com"
+        description="Em consonância com",
+        keywords=("conson",)
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -271,7 +296,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="DEPENDE_DE",
         confidence=0.80,
-        description="De acordo com: 'de acordo com o art.'"
+        description="De acordo com: 'de acordo com o art.'",
+        keywords=("acordo",)
     ),
 
     # -------------------------------------------------------------------------
@@ -285,7 +311,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REFERENCIA",
         confidence=0.75,
-        description="Referência: 'conforme o art.', 'vide art.', 'ver art.'"
+        description="Referência: 'conforme o art.', 'vide art.', 'ver art.'",
+        keywords=("conforme", "vide", "ver")
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -294,7 +321,8 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REFERENCIA",
         confidence=0.70,
-        description="Menção: 'mencionado no art.', 'referido no §'"
+        description="Menção: 'mencionado no art.', 'referido no §'",
+        keywords=("mencionad", "referid", "citad")
     ),
     RelTypePattern(
         pattern=re.compile(
@@ -303,11 +331,40 @@ REL_TYPE_PATTERNS: list[RelTypePattern] = [
         ),
         rel_type="REFERENCIA",
         confidence=0.72,
-        description="A que se refere: 'a que se refere o art.'"
+        description="A que se refere: 'a que se refere o art.'",
+        keywords=("refere",)
     ),
 ]
 
 
+# "ı" e "ſ" casam com "i"/"s" sob IGNORECASE mesmo após lower(): na presença
+# deles o filtro por keywords não é seguro e todos os padrões são executados.
+_RE_CASEFOLD_EXTRA = re.compile("[\u0131\u017f]")
+
+
+def _candidate_patterns(lowered: str) -> list[RelTypePattern]:
+    """Padrões (em ordem de precedência) que podem casar no texto minúsculo."""
+    if _RE_CASEFOLD_EXTRA.search(lowered):
+        return REL_TYPE_PATTERNS
+    return [
+        p for p in REL_TYPE_PATTERNS
+        if not p.keywords or any(k in lowered for k in p.keywords)
+    ]
+
+
+def _result_for(pattern_def: Optional[RelTypePattern]) -> tuple[str, float]:
+    """(rel_type, confiança) do padrão vencedor, ou CITA se nenhum casou."""
+    if pattern_def is None:
+        # Default: CITA genérico com baixa confiança de classificação
+        # (a citação existe, mas não sabemos o tipo específico)
+        return "CITA", 0.5
+    logger.debug(
+        f"Classificado como {pattern_def.rel_type} "
+        f"(conf={pattern_def.confidence:.2f}): {pattern_def.description}"
+    )
+    return pattern_def.rel_type, pattern_def.confidence
+
+
 def classify_rel_type(
     text: str,
     start: int,
@@ -347,19 +404,13 @@ def classify_rel_type(
     ctx_end = min(len(text), end + context_window)
     context = text[ctx_start:ctx_end].lower()
 
-    # Procura match nos padrões (primeiro match ganha)
-    for pattern_def in REL_TYPE_PATTERNS:
-        match = pattern_def.pattern.search(context)
-        if match:
-            logger.debug(
-                f"Classificado como {pattern_def.rel_type} "
-                f"(conf={pattern_def.confidence:.2f}): {pattern_def.description}"
-            )
-            return pattern_def.rel_type, pattern_def.confidence
-
-    # Default: CITA genérico com baixa confiança de classificação
-    # (a citação existe, mas não sabemos o tipo específico)
-    return "CITA", 0.5
+    # Procura match nos padrões (primeiro match ganha); padrões sem
+    # nenhuma keyword no contexto não podem casar e são pulados
+    for pattern_def in _candidate_patterns(context):
+        if pattern_def.pattern.search(context):
+            return _result_for(pattern_def)
+
+    return _result_for(None)
 
 
 def classify_rel_type_from_match(
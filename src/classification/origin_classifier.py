@@ -10,6 +10,7 @@ Dependências: re (stdlib).
 
 import logging
 import re
+from bisect import bisect_left
 from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
@@ -90,6 +91,9 @@ _RE_ANNEX_HEADER = re.compile(r'^\s*ANEXO\s+[IVXLCDM\d]+', re.IGNORECASE | re.MU
 _RE_NR_MARKER = re.compile(r'["\u201D]\s*\(NR\)')
 _RE_QUOTE_CLOSE = re.compile(r'["\u201D]\s*$', re.MULTILINE)
 _RE_TARGET_NAME = re.compile(r'\(([^)]{3,60})\)')
+# Início possível de qualquer REFERENCE_PATTERNS (lookahead: posições sobrepostas)
+_RE_REFERENCE_ANCHOR = re.compile(r'(?=d[ao] (?:lei|decreto|medida))', re.IGNORECASE)
+_REFERENCE_SPAN = 4 * CTX_WINDOW
 
 
 # ── Dataclass ───────────────────────────────────────────────────────────
@@ -150,19 +154,27 @@ def compute_enter_score(
     ctx_after: str,
     host_doc_id: str,
     max_host_article: float = 0.0,
+    *,
+    has_trigger: bool | None = None,
+    ref_matches: list | None = None,
 ) -> tuple[float, list[str]]:
-    """Calcula score de entrada com features E1-E7. Retorna (score, reasons)."""
+    """
+    Calcula score de entrada com features E1-E7. Retorna (score, reasons).
+
+    has_trigger/ref_matches, quando informados (índice do documento), substituem
+    a busca de TRIGGER_PHRASES e REFERENCE_PATTERNS em ctx_before + text.
+    """
     score = 0.0
     reasons: list[str] = []
-    search_area = ctx_before + text
+    search_area = ctx_before + text if has_trigger is None or ref_matches is None else ""
 
     # E1 — Trigger phrases
-    search_lower = search_area.lower()
-    for phrase in TRIGGER_PHRASES:
-        if phrase in search_lower:
-            score += W_TRIGGER_PHRASE
-            reasons.append("trigger_phrase")
-            break
+    if has_trigger is None:
+        search_lower = search_area.lower()
+        has_trigger = any(phrase in search_lower for phrase in TRIGGER_PHRASES)
+    if has_trigger:
+        score += W_TRIGGER_PHRASE
+        reasons.append("trigger_phrase")
 
     # E2 — Aspas abrindo
     quote_zone = ctx_before[-200:] + text[:200] if ctx_before else text[:200]
@@ -182,20 +194,21 @@ def compute_enter_score(
         score += W_CHAPTER_IN_QUOTES
         reasons.append("chapter_in_quotes")
 
-    # E5 — Target reference
-    for pat in REFERENCE_PATTERNS:
-        if pat.search(search_area):
-            score += W_TARGET_REF
-            reasons.append("target_ref")
-            break
+    # E5 — Target reference (generators: para no primeiro match, como antes)
+    if ref_matches is None:
+        has_ref = any(pat.search(search_area) for pat in REFERENCE_PATTERNS)
+    else:
+        has_ref = any(ref_matches)
+    if has_ref:
+        score += W_TARGET_REF
+        reasons.append("target_ref")
 
     # E6 — Target name (nome legível entre parênteses após referência)
-    for pat in REFERENCE_PATTERNS:
-        m = pat.search(search_area)
-        if m and m.lastindex and m.lastindex >= 3:
-            score += W_TARGET_NAME
-            reasons.append("target_name")
-            break
+    if ref_matches is None:
+        ref_matches = (pat.search(search_area) for pat in REFERENCE_PATTERNS)
+    if any(m and m.lastindex and m.lastindex >= 3 for m in ref_matches):
+        score += W_TARGET_NAME
+        reasons.append("target_name")
 
     # E7 — Annex header
     if _RE_ANNEX_HEADER.search(text):
@@ -210,8 +223,15 @@ def compute_exit_score(
     ctx_before: str,
     ctx_after: str,
     host_doc_id: str,
+    *,
+    has_new_trigger: bool | None = None,
 ) -> tuple[float, list[str]]:
-    """Calcula score de saída com features S1-S4. Retorna (score, reasons)."""
+    """
+    Calcula score de saída com features S1-S4. Retorna (score, reasons).
+
+    Só os primeiros 400 chars de ctx_after são usados. has_new_trigger, quando
+    informado (índice do documento), substitui a busca de TRIGGER_PHRASES neles.
+    """
     score = 0.0
     reasons: list[str] = []
     exit_zone = text + ctx_after[:200]
@@ -219,8 +239,9 @@ def compute_exit_score(
     # Detect complementary signals first (needed by S1 discount logic)
     has_quote_close = _RE_QUOTE_CLOSE.search(text) or _RE_QUOTE_CLOSE.search(ctx_after[:100])
     after_art = _parse_article_number(ctx_after[:400])
-    after_lower = ctx_after[:400].lower()
-    has_new_trigger = any(phrase in after_lower for phrase in TRIGGER_PHRASES)
+    if has_new_trigger is None:
+        after_lower = ctx_after[:400].lower()
+        has_new_trigger = any(phrase in after_lower for phrase in TRIGGER_PHRASES)
     # Complementary = evidence that the transcription block truly ended:
     # host-law article resumption, OR a new trigger opening another zone.
     # Note: _RE_NR_MARKER already requires closing quotes in its pattern,
@@ -252,12 +273,10 @@ def compute_exit_score(
             score += W_RESUME_SEQUENCE
             reasons.append("resume_sequence")
 
-    # S4 — New trigger phrase (after_lower already computed above)
-    for phrase in TRIGGER_PHRASES:
-        if phrase in after_lower:
-            score += W_NEW_TRIGGER
-            reasons.append("new_trigger")
-            break
+    # S4 — New trigger phrase (has_new_trigger already computed above)
+    if has_new_trigger:
+        score += W_NEW_TRIGGER
+        reasons.append("new_trigger")
 
     return (score, reasons)
 
@@ -266,12 +285,20 @@ def resolve_reference(
     text: str,
     ctx_before: str,
     ctx_after: str,
+    *,
+    ref_matches: list | None = None,
 ) -> tuple[str, str]:
-    """Extrai referência normativa (ref_id, ref_name). Retorna ('', '') se não encontrar."""
-    search_area = ctx_before + text
+    """
+    Extrai referência normativa (ref_id, ref_name). Retorna ('', '') se não encontrar.
+
+    ref_matches: primeiro match de cada REFERENCE_PATTERNS em ctx_before + text,
+    se já computado (índice do documento).
+    """
+    if ref_matches is None:
+        search_area = ctx_before + text
+        ref_matches = (pat.search(search_area) for pat in REFERENCE_PATTERNS)
 
-    for pat in REFERENCE_PATTERNS:
-        m = pat.search(search_area)
+    for pat, m in zip(REFERENCE_PATTERNS, ref_matches):
         if not m:
             continue
 
@@ -321,6 +348,93 @@ def resolve_reference(
     return ("", "")
 
 
+class DocumentContextIndex:
+    """
+    Índice por documento das posições de TRIGGER_PHRASES e de possíveis
+    inícios de REFERENCE_PATTERNS no texto canônico.
+
+    Construído uma vez (custo linear no tamanho do documento). Para chunks
+    cujo texto é exatamente canonical_text[start:end], ctx_before + text é uma
+    fatia contígua do canônico, e as features de contexto saem de bisect no
+    índice + regex com pos/endpos — sem fatiar/re-varrer 800 chars por chunk.
+    O resultado é idêntico ao de get_context + busca nas janelas.
+    """
+
+    def __init__(self, canonical_text: str):
+        self.text = canonical_text
+        lowered = canonical_text.lower()
+        # lower() que muda o comprimento (ex: "İ") desalinha as posições
+        self.usable = len(lowered) == len(canonical_text)
+
+        self._trigger_starts: list[int] = []
+        self._trigger_ends: list[int] = []
+        self._reference_starts: list[int] = []
+        self._reference_hits: list[list] = []
+        if not self.usable:
+            return
+
+        occurrences: list[tuple[int, int]] = []
+        for phrase in TRIGGER_PHRASES:
+            pos = lowered.find(phrase)
+            while pos >= 0:
+                occurrences.append((pos, pos + len(phrase)))
+                pos = lowered.find(phrase, pos + 1)
+        occurrences.sort()
+        self._trigger_starts = [start for start, _ in occurrences]
+        self._trigger_ends = [end for _, end in occurrences]
+
+        # Match de cada padrão em cada início possível, limitado a
+        # _REFERENCE_SPAN chars (os grupos (.+?) varreriam até o fim da linha)
+        for anchor in _RE_REFERENCE_ANCHOR.finditer(canonical_text):
+            pos = anchor.start()
+            self._reference_starts.append(pos)
+            self._reference_hits.append([
+                pat.match(canonical_text, pos, pos + _REFERENCE_SPAN)
+                for pat in REFERENCE_PATTERNS
+            ])
+
+    def covers(self, text: str, start: int, end: int) -> bool:
+        """True se o chunk pode usar o índice (texto == fatia do canônico)."""
+        return self.usable and 0 <= start <= end and self.text[start:end] == text
+
+    def has_trigger(self, start: int, end: int) -> bool:
+        """Alguma TRIGGER_PHRASE inteiramente dentro de [start, end)?"""
+        i = bisect_left(self._trigger_starts, start)
+        while i < len(self._trigger_starts) and self._trigger_starts[i] < end:
+            if self._trigger_ends[i] <= end:
+                return True
+            i += 1
+        return False
+
+    def reference_matches(self, start: int, end: int) -> list:
+        """
+        Primeiro match de cada REFERENCE_PATTERNS em text[start:end] (ou None).
+
+        Os padrões não têm âncoras (^, $, lookbehind): truncar o texto só
+        elimina caminhos de match, nunca cria. Logo o match pré-computado (com
+        endpos = início + _REFERENCE_SPAN) vale para qualquer end entre o fim
+        dele e esse limite — e nenhum match nesse limite implica nenhum para
+        end menor. Fora disso, o match é refeito com endpos = end.
+        """
+        starts = self._reference_starts
+        first = bisect_left(starts, start)
+        result = []
+        for k, pat in enumerate(REFERENCE_PATTERNS):
+            found = None
+            i = first
+            while i < len(starts) and starts[i] < end:
+                pos = starts[i]
+                m = self._reference_hits[i][k]
+                if end > pos + _REFERENCE_SPAN or (m is not None and m.end() > end):
+                    m = pat.match(self.text, pos, end)
+                if m:
+                    found = m
+                    break
+                i += 1
+            result.append(found)
+        return result
+
+
 def compute_confidence(state: "ClassifierState") -> str:
     """Calcula confidence baseada na riqueza de evidências da zona."""
     # TTL forced close always returns low
@@ -394,6 +508,7 @@ def classify_document(
     state = ClassifierState()
     zones_detected: list[dict] = []
     forced_closes = 0
+    index = DocumentContextIndex(canonical_text)
 
     # Ordena por posição canônica
     chunks_sorted = sorted(chunks, key=lambda c: getattr(c, "canonical_start", -1))
@@ -412,24 +527,44 @@ def classify_document(
             assign_origin(chunk, ClassifierState(), [])
             continue
 
-        ctx_before, ctx_after = get_context(canonical_text, c_start, c_end)
-
         # Track max host article in SELF mode
         if state.mode == "SELF":
             art_num = _parse_article_number(text)
             if art_num is not None and art_num > max_host_article:
                 max_host_article = art_num
 
-        # Calcular scores
-        enter_score, enter_reasons = compute_enter_score(
-            text, ctx_before, ctx_after, host_doc_id, max_host_article
-        )
-        exit_score, exit_reasons = compute_exit_score(
-            text, ctx_before, ctx_after, host_doc_id
-        )
-
-        # Resolver referência (independente do estado)
-        ref_id, ref_name = resolve_reference(text, ctx_before, ctx_after)
+        if index.covers(text, c_start, c_end):
+            # Janelas via índice: só as fatias curtas usadas por E2/S1-S3
+            before_start = max(0, c_start - CTX_WINDOW)
+            after_end = min(len(canonical_text), c_end + CTX_WINDOW)
+            ctx_before = canonical_text[max(before_start, c_start - 200):c_start]
+            ctx_after = canonical_text[c_end:min(after_end, c_end + 400)]
+            ref_matches = index.reference_matches(before_start, c_end)
+            enter_score, enter_reasons = compute_enter_score(
+                text, ctx_before, ctx_after, host_doc_id, max_host_article,
+                has_trigger=index.has_trigger(before_start, c_end),
+                ref_matches=ref_matches,
+            )
+            exit_score, exit_reasons = compute_exit_score(
+                text, ctx_before, ctx_after, host_doc_id,
+                has_new_trigger=index.has_trigger(c_end, min(after_end, c_end + 400)),
+            )
+            ref_id, ref_name = resolve_reference(
+                text, ctx_before, ctx_after, ref_matches=ref_matches,
+            )
+        else:
+            ctx_before, ctx_after = get_context(canonical_text, c_start, c_end)
+
+            # Calcular scores
+            enter_score, enter_reasons = compute_enter_score(
+                text, ctx_before, ctx_after, host_doc_id, max_host_article
+            )
+            exit_score, exit_reasons = compute_exit_score(
+                text, ctx_before, ctx_after, host_doc_id
+            )
+
+            # Resolver referência (independente do estado)
+            ref_id, ref_name = resolve_reference(text, ctx_before, ctx_after)
 
         # Transições
         if state.mode == "SELF":
@@ -5,6 +5,9 @@ Configurações do GPU Server.
 import os
 from dataclasses import dataclass
 
+# Dados locais do servidor (caches, checkpoints): privado ao usuário, não /tmp
+DEFAULT_DATA_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "rag-gpu-server")
+
 
 @dataclass
 class Config:
@@ -26,15 +29,71 @@ class Config:
 
     # vLLM (container separado)
     vllm_base_url: str = "http://localhost:8002/v1"
+    vllm_base_urls: str = ""           # Réplicas vLLM separadas por vírgula (vazio = só vllm_base_url)
+    vllm_endpoint_cooloff: float = 30.0  # Segundos fora do pool após falhas seguidas
     vllm_model: str = "/workspace/models/Qwen3.5-27B-AWQ"
 
     # VLM Pipeline
     use_vlm_pipeline: bool = True      # Legacy removido, sempre VLM
     vlm_page_dpi: int = 300            # DPI para renderização de páginas
     vlm_max_retries: int = 3           # Retries por página no VLM
+    vlm_concurrency: int = 4           # Páginas em voo simultaneamente no vLLM
+    vlm_image_max_pixels: int = 0      # Orçamento de pixels por página (0 = só o DPI)
+    vlm_image_grayscale: bool = False  # Renderiza páginas em tons de cinza
+    vlm_image_format: str = "png"      # png | jpeg | webp
+    vlm_image_quality: int = 85        # Qualidade JPEG/WebP
+    vlm_release_images: bool = True    # Libera as imagens das páginas após o snapshot de inspeção
+    vlm_ocr_stream: bool = True        # OCR em streaming, abortando loops de repetição
+    vlm_ocr_max_tokens: int = 8192     # Teto de max_tokens do OCR por página
+    vlm_ocr_token_budget: bool = True  # max_tokens por página (densidade do texto/área)
+    vlm_structured_output: str = "response_format"  # JSON schema no extract_page: response_format|guided_json|off
+    ocr_cache_enabled: bool = True     # Cache em disco do OCR por página
+    ocr_cache_dir: str = os.path.join(DEFAULT_DATA_DIR, "ocr_page_cache")
+    ocr_cache_max_mb: int = 512        # Tamanho máximo do cache OCR em disco
+
+    # Checkpoints de fase (retomada de ingestões falhas/repetidas)
+    checkpoint_enabled: bool = True
+    checkpoint_dir: str = os.path.join(DEFAULT_DATA_DIR, "ingest_checkpoints")
+    checkpoint_max_mb: int = 2048      # Tamanho máximo dos checkpoints em disco
+    chunk_registry_enabled: bool = True  # Última versão por documento (re-ingestão incremental)
+    chunk_registry_dir: str = os.path.join(DEFAULT_DATA_DIR, "chunk_registry")
+    chunk_registry_max_mb: int = 2048
+
+    # PyMuPDF
+    pymupdf_workers: int = 1           # Processos para extração paralela (1 = sequencial)
+    pymupdf_parallel_min_pages: int = 32  # Mínimo de páginas para usar o pool
+    pymupdf_profile: str = "lean"      # "full" = spans completos por bloco (inspeção de fontes)
+    repeated_lines_filter: bool = True  # Remove header/footer repetidos entre páginas
+
+    # Fila de jobs do /ingest (ver ingestion/job_queue.py)
+    ingest_workers: int = 1            # Jobs de ingestão rodando ao mesmo tempo
+    ingest_queue_max: int = 100        # Jobs aguardando na fila (além disso: 503)
+
+    # Status/resultado das tasks de /ingest (ver ingestion/task_store.py)
+    task_store_backend: str = "sqlite"  # sqlite | redis
+    task_store_path: str = os.path.join(DEFAULT_DATA_DIR, "ingest_tasks", "tasks.sqlite3")
+    task_store_ttl_seconds: int = 86400  # Task some após 24h sem escrita
+    task_store_max_mb: int = 2048        # Tamanho máximo dos resultados (sqlite)
+    task_store_evict_interval_s: float = 300.0  # Limpeza de tasks vencidas (sqlite)
+    task_store_redis_url: str = "redis://localhost:6379"
+    task_store_redis_db: int = 3
+
+    # Ingestão em estágios (StagedIngestExecutor, vários documentos em voo)
+    ingest_staged_executor: bool = False
+    ingest_cpu_workers: int = 2        # Documentos em extração/classificação ao mesmo tempo
+    ingest_vlm_documents: int = 2      # Documentos em OCR VLM ao mesmo tempo
+    ingest_sink_workers: int = 1       # Uploads de artefatos em paralelo
+    ingest_stage_queue_size: int = 4   # Fila entre estágios (backpressure)
+    ingest_embed_batch_size: int = 32  # Textos por encode() de um documento
+    ingest_gpu_batch_size: int = 128   # Textos por batch de GPU (vários documentos)
+    ingest_gpu_batch_wait_ms: float = 20.0  # Espera por mais textos antes do batch
+
+    # Citações
+    citation_workers: int = 1          # Processos para extração de citações (1 = sequencial)
+    citation_parallel_min_chunks: int = 2000  # Mínimo de chunks para usar o pool
 
     # Pipeline versioning & debug
-    pipeline_version: str = "1.1.0"    # Incrementar em mudanças de normalização/extração
+    pipeline_version: str = "1.2.0"    # Incrementar em mudanças de normalização/extração
     debug_artifacts: bool = False      # Salvar raw VLM JSON + resolution_map
 
     # Hardware
@@ -43,10 +102,12 @@ class Config:
 
     # Cache
     cache_dir: str = "/root/.cache/huggingface"
+    data_dir: str = DEFAULT_DATA_DIR   # Base dos caches locais (OCR, checkpoints, registry)
 
     @classmethod
     def from_env(cls) -> "Config":
         """Carrega configuração de variáveis de ambiente."""
+        data_dir = os.getenv("APP_DATA_DIR", DEFAULT_DATA_DIR)
         return cls(
             host=os.getenv("HOST", "0.0.0.0"),
             port=int(os.getenv("PORT", "8000")),
@@ -55,15 +116,62 @@ class Config:
             embedding_model=os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3"),
             reranker_model=os.getenv("RERANKER_MODEL", "BAAI/bge-reranker-v2-m3"),
             vllm_base_url=os.getenv("VLLM_BASE_URL", "http://localhost:8002/v1"),
+            vllm_base_urls=os.getenv("VLLM_BASE_URLS", ""),
+            vllm_endpoint_cooloff=float(os.getenv("VLLM_ENDPOINT_COOLOFF", "30")),
             vllm_model=os.getenv("VLLM_MODEL", "/workspace/models/Qwen3.5-27B-AWQ"),
             use_vlm_pipeline=True,  # Legacy removido, sempre VLM
             vlm_page_dpi=int(os.getenv("VLM_PAGE_DPI", "300")),
             vlm_max_retries=int(os.getenv("VLM_MAX_RETRIES", "3")),
-            pipeline_version=os.getenv("PIPELINE_VERSION", "1.1.0"),
+            vlm_concurrency=int(os.getenv("VLM_CONCURRENCY", "4")),
+            vlm_image_max_pixels=int(os.getenv("VLM_IMAGE_MAX_PIXELS", "0")),
+            vlm_image_grayscale=os.getenv("VLM_IMAGE_GRAYSCALE", "false").lower() == "true",
+            vlm_image_format=os.getenv("VLM_IMAGE_FORMAT", "png").lower(),
+            vlm_image_quality=int(os.getenv("VLM_IMAGE_QUALITY", "85")),
+            vlm_release_images=os.getenv("VLM_RELEASE_IMAGES", "true").lower() == "true",
+            vlm_ocr_stream=os.getenv("VLM_OCR_STREAM", "true").lower() == "true",
+            vlm_ocr_max_tokens=int(os.getenv("VLM_OCR_MAX_TOKENS", "8192")),
+            vlm_ocr_token_budget=os.getenv("VLM_OCR_TOKEN_BUDGET", "true").lower() == "true",
+            vlm_structured_output=os.getenv("VLM_STRUCTURED_OUTPUT", "response_format"),
+            ocr_cache_enabled=os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true",
+            ocr_cache_dir=os.getenv("OCR_CACHE_DIR", os.path.join(data_dir, "ocr_page_cache")),
+            ocr_cache_max_mb=int(os.getenv("OCR_CACHE_MAX_MB", "512")),
+            checkpoint_enabled=os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true",
+            checkpoint_dir=os.getenv("CHECKPOINT_DIR", os.path.join(data_dir, "ingest_checkpoints")),
+            checkpoint_max_mb=int(os.getenv("CHECKPOINT_MAX_MB", "2048")),
+            chunk_registry_enabled=os.getenv("CHUNK_REGISTRY_ENABLED", "true").lower() == "true",
+            chunk_registry_dir=os.getenv("CHUNK_REGISTRY_DIR", os.path.join(data_dir, "chunk_registry")),
+            chunk_registry_max_mb=int(os.getenv("CHUNK_REGISTRY_MAX_MB", "2048")),
+            pymupdf_workers=int(os.getenv("PYMUPDF_WORKERS", "1")),
+            pymupdf_parallel_min_pages=int(os.getenv("PYMUPDF_PARALLEL_MIN_PAGES", "32")),
+            pymupdf_profile=os.getenv("PYMUPDF_PROFILE", "lean").lower(),
+            repeated_lines_filter=os.getenv("REPEATED_LINES_FILTER", "true").lower() == "true",
+            ingest_workers=int(os.getenv("INGEST_WORKERS", "1")),
+            ingest_queue_max=int(os.getenv("INGEST_QUEUE_MAX", "100")),
+            task_store_backend=os.getenv("TASK_STORE_BACKEND", "sqlite").lower(),
+            task_store_path=os.getenv(
+                "TASK_STORE_PATH", os.path.join(data_dir, "ingest_tasks", "tasks.sqlite3"),
+            ),
+            task_store_ttl_seconds=int(os.getenv("TASK_STORE_TTL_SECONDS", "86400")),
+            task_store_max_mb=int(os.getenv("TASK_STORE_MAX_MB", "2048")),
+            task_store_evict_interval_s=float(os.getenv("TASK_STORE_EVICT_INTERVAL_S", "300")),
+            task_store_redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
+            task_store_redis_db=int(os.getenv("TASK_STORE_REDIS_DB", "3")),
+            ingest_staged_executor=os.getenv("INGEST_STAGED_EXECUTOR", "false").lower() == "true",
+            ingest_cpu_workers=int(os.getenv("INGEST_CPU_WORKERS", "2")),
+            ingest_vlm_documents=int(os.getenv("INGEST_VLM_DOCUMENTS", "2")),
+            ingest_sink_workers=int(os.getenv("INGEST_SINK_WORKERS", "1")),
+            ingest_stage_queue_size=int(os.getenv("INGEST_STAGE_QUEUE_SIZE", "4")),
+            ingest_embed_batch_size=int(os.getenv("INGEST_EMBED_BATCH_SIZE", "32")),
+            ingest_gpu_batch_size=int(os.getenv("INGEST_GPU_BATCH_SIZE", "128")),
+            ingest_gpu_batch_wait_ms=float(os.getenv("INGEST_GPU_BATCH_WAIT_MS", "20")),
+            citation_workers=int(os.getenv("CITATION_WORKERS", "1")),
+            citation_parallel_min_chunks=int(os.getenv("CITATION_PARALLEL_MIN_CHUNKS", "2000")),
+            pipeline_version=os.getenv("PIPELINE_VERSION", "1.2.0"),
             debug_artifacts=os.getenv("DEBUG_ARTIFACTS", "false").lower() == "true",
             use_fp16=os.getenv("USE_FP16", "true").lower() == "true",
             device=os.getenv("DEVICE", "cuda"),
             cache_dir=os.getenv("HF_HOME", "/root/.cache/huggingface"),
+            data_dir=data_dir,
         )
 
 
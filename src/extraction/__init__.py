@@ -9,7 +9,7 @@ Módulos:
     vlm_prompts: Prompts para o Qwen3-VL
 """
 
-from .vlm_models import DocumentExtraction, PageExtraction, DeviceExtraction, PageData, BlockData
+from .vlm_models import DocumentExtraction, PageExtraction, DeviceExtraction, PageData, BlockData, ImagePolicy
 from .vlm_client import VLMClient
 from .vlm_service import VLMExtractionService
 from .pymupdf_extractor import PyMuPDFExtractor
@@ -21,6 +21,7 @@ __all__ = [
     "DeviceExtraction",
     "PageData",
     "BlockData",
+    "ImagePolicy",
     "VLMClient",
     "VLMExtractionService",
     "PyMuPDFExtractor",
@@ -14,6 +14,8 @@ import logging
 from dataclasses import dataclass, field
 from typing import List, Optional
 
+from ..utils.canonical_utils import PageMap
+
 logger = logging.getLogger(__name__)
 
 
@@ -221,8 +223,14 @@ class AcordaoChunker:
         document_id: str,
         canonical_hash: str,
         metadata: dict,
+        pages: Optional[PageMap] = None,
     ) -> List[AcordaoChunk]:
-        """Divide seções em chunks com overlap. Returns ~15-25 AcordaoChunk."""
+        """
+        Divide seções em chunks com overlap. Returns ~15-25 AcordaoChunk.
+
+        Com pages (PageMap do canonical), page_number é exato; sem ele,
+        cai na estimativa por ~3500 chars/página.
+        """
         all_chunks: List[AcordaoChunk] = []
 
         for section in sections:
@@ -244,8 +252,11 @@ class AcordaoChunker:
                 else:
                     span_id = f"{span_prefix}-P{part_number:02d}"
 
-                # Estimate page number (rough: ~3500 chars per page)
-                page_number = max(1, (abs_start // 3500) + 1)
+                if pages is not None:
+                    page_number = pages.page_for_offset(abs_start)
+                else:
+                    # Estimate page number (rough: ~3500 chars per page)
+                    page_number = max(1, (abs_start // 3500) + 1)
 
                 retrieval_text = self._build_retrieval_text(
                     text, sec_type, part_number, total_parts, metadata,
@@ -10,7 +10,9 @@ Opera sobre canonical_text (não sobre blocos PyMuPDF).
 import re
 import logging
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+
+from ..utils.canonical_utils import PageMap
 
 logger = logging.getLogger(__name__)
 
@@ -96,7 +98,7 @@ class AcordaoParser:
     def parse(
         self,
         canonical_text: str,
-        page_boundaries: list,
+        page_boundaries: Union[list, PageMap],
     ) -> List[AcordaoDevice]:
         """
         Pipeline completo: detecta seções → parágrafos → itens → hierarquia.
@@ -105,11 +107,16 @@ class AcordaoParser:
             canonical_text: Texto integral normalizado do acórdão.
             page_boundaries: Lista de (char_start, char_end) por página (1-indexed).
                              page_boundaries[0] = (start, end) da página 1.
+                             Aceita também um PageMap já construído.
 
         Returns:
             List[AcordaoDevice] com hierarquia completa.
         """
         devices: List[AcordaoDevice] = []
+        pages = (
+            page_boundaries if isinstance(page_boundaries, PageMap)
+            else PageMap(page_boundaries)
+        )
 
         # 1. Detecta seções primárias
         sections = self._detect_primary_sections(canonical_text)
@@ -127,15 +134,15 @@ class AcordaoParser:
 
             if sec_type == "RELATORIO":
                 sec_devices = self._parse_relatorio(
-                    sec_text, sec_start, page_boundaries,
+                    sec_text, sec_start, pages,
                 )
             elif sec_type == "VOTO":
                 sec_devices = self._parse_voto(
-                    sec_text, sec_start, page_boundaries,
+                    sec_text, sec_start, pages,
                 )
             elif sec_type == "ACORDAO":
                 sec_devices = self._parse_acordao_items(
-                    sec_text, sec_start, page_boundaries,
+                    sec_text, sec_start, pages,
                 )
             else:
                 continue
@@ -221,7 +228,7 @@ class AcordaoParser:
         self,
         text: str,
         base_offset: int,
-        page_boundaries: list,
+        pages: PageMap,
     ) -> List[AcordaoDevice]:
         """Seções dinâmicas (headings) + parágrafos numerados do RELATÓRIO."""
         devices: List[AcordaoDevice] = []
@@ -241,7 +248,7 @@ class AcordaoParser:
             hierarchy_depth=0,
             char_start=sec_cs,
             char_end=sec_ce,
-            page_number=self._page_for_offset(sec_cs, page_boundaries),
+            page_number=self._page_for_offset(sec_cs, pages),
         )
         devices.append(sec_device)
 
@@ -288,7 +295,7 @@ class AcordaoParser:
                     hierarchy_depth=sub.get("depth", 1),
                     char_start=abs_start,
                     char_end=abs_end,
-                    page_number=self._page_for_offset(abs_start, page_boundaries),
+                    page_number=self._page_for_offset(abs_start, pages),
                 )
                 devices.append(sub_device)
 
@@ -298,7 +305,7 @@ class AcordaoParser:
                     sub_text_for_paras, base_offset + sub_start, "relatorio",
                     section_path=f"RELATÓRIO > {heading_name}",
                     parent_span_id=span_id,
-                    page_boundaries=page_boundaries,
+                    pages=pages,
                 )
                 devices.extend(paras)
         else:
@@ -307,7 +314,7 @@ class AcordaoParser:
                 text, base_offset, "relatorio",
                 section_path="RELATÓRIO",
                 parent_span_id="SEC-RELATORIO",
-                page_boundaries=page_boundaries,
+                pages=pages,
             )
             devices.extend(paras)
 
@@ -317,7 +324,7 @@ class AcordaoParser:
         self,
         text: str,
         base_offset: int,
-        page_boundaries: list,
+        pages: PageMap,
     ) -> List[AcordaoDevice]:
         """Parágrafos numerados do VOTO."""
         devices: List[AcordaoDevice] = []
@@ -337,7 +344,7 @@ class AcordaoParser:
             hierarchy_depth=0,
             char_start=sec_cs,
             char_end=sec_ce,
-            page_number=self._page_for_offset(sec_cs, page_boundaries),
+            page_number=self._page_for_offset(sec_cs, pages),
         )
         devices.append(sec_device)
 
@@ -346,7 +353,7 @@ class AcordaoParser:
             text, base_offset, "voto",
             section_path="VOTO",
             parent_span_id="SEC-VOTO",
-            page_boundaries=page_boundaries,
+            pages=pages,
         )
         devices.extend(paras)
 
@@ -356,7 +363,7 @@ class AcordaoParser:
         self,
         text: str,
         base_offset: int,
-        page_boundaries: list,
+        pages: PageMap,
     ) -> List[AcordaoDevice]:
         """Itens decimais do ACÓRDÃO: 9.1, 9.4.1, etc."""
         devices: List[AcordaoDevice] = []
@@ -376,7 +383,7 @@ class AcordaoParser:
             hierarchy_depth=0,
             char_start=sec_cs,
             char_end=sec_ce,
-            page_number=self._page_for_offset(sec_cs, page_boundaries),
+            page_number=self._page_for_offset(sec_cs, pages),
         )
         devices.append(sec_device)
 
@@ -421,7 +428,7 @@ class AcordaoParser:
                 hierarchy_depth=depth,
                 char_start=abs_start,
                 char_end=abs_end,
-                page_number=self._page_for_offset(abs_start, page_boundaries),
+                page_number=self._page_for_offset(abs_start, pages),
             )
             devices.append(device)
 
@@ -508,7 +515,7 @@ class AcordaoParser:
         section_type: str,
         section_path: str,
         parent_span_id: str,
-        page_boundaries: list,
+        pages: PageMap,
     ) -> List[AcordaoDevice]:
         """
         Extrai parágrafos numerados (1., 2., 3., ...) de um trecho de texto.
@@ -578,21 +585,15 @@ class AcordaoParser:
                 hierarchy_depth=2,
                 char_start=abs_start,
                 char_end=abs_end,
-                page_number=self._page_for_offset(abs_start, page_boundaries),
+                page_number=self._page_for_offset(abs_start, pages),
             )
             paragraphs.append(device)
 
         return paragraphs
 
-    def _page_for_offset(self, offset: int, page_boundaries: list) -> int:
-        """Retorna page_number (1-indexed) para um offset no canonical_text."""
-        if not page_boundaries:
-            return 1
-        for i, (start, end) in enumerate(page_boundaries):
-            if start <= offset < end:
-                return i + 1
-        # Se offset está além da última boundary, retorna última página
-        return len(page_boundaries)
+    def _page_for_offset(self, offset: int, pages: PageMap) -> int:
+        """Retorna page_number (1-indexed) para um offset no canonical_text (bisect)."""
+        return pages.page_for_offset(offset)
 
     def _deduplicate_span_ids(self, devices: List[AcordaoDevice]) -> List[AcordaoDevice]:
         """
@@ -0,0 +1,68 @@
+"""
+OCR Page Cache - Cache em disco do texto OCR por página.
+
+Chave endereçada por conteúdo:
+    sha256(imagem renderizada da página) + modelo VLM + versão do prompt OCR
+
+A imagem renderizada já incorpora DPI, formato e cor (ImagePolicy), então
+mudanças de renderização invalidam o cache naturalmente. Mudanças no prompt
+OCR invalidam via OCR_PROMPT_VERSION (hash dos prompts).
+
+Ganhos:
+- Ingestão VLM que falhou no meio retoma sem re-OCR das páginas já feitas
+- Re-run após mudança independente do OCR (classifier, chunking) não chama o vLLM
+- Páginas idênticas (em branco, capas repetidas) são OCR'd uma única vez
+
+Armazenamento via DiskCache (utils/disk_cache.py): escrita atômica e
+eviction LRU por tamanho total.
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+from ..config import DEFAULT_DATA_DIR
+from ..utils.disk_cache import DiskCache
+
+OCR_CACHE_DIR = os.path.join(DEFAULT_DATA_DIR, "ocr_page_cache")
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """SHA256 da imagem renderizada da página."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class OCRPageCache:
+    """Cache em disco de texto OCR por página, com eviction por tamanho (LRU)."""
+
+    def __init__(
+        self,
+        model: str,
+        prompt_version: str,
+        cache_dir: str = OCR_CACHE_DIR,
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        """
+        Args:
+            model: Modelo VLM que produziu o OCR (parte da chave)
+            prompt_version: Versão dos prompts OCR (parte da chave)
+            cache_dir: Diretório local do cache
+            max_bytes: Tamanho máximo total das entradas em disco
+        """
+        self.model = model
+        self.prompt_version = prompt_version
+        self._store = DiskCache(cache_dir, max_bytes, suffix=".txt")
+
+    def make_key(self, digest: str) -> str:
+        """Chave do cache a partir do digest da imagem da página."""
+        raw = f"{digest}\0{self.model}\0{self.prompt_version}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna o texto OCR em cache ou None se ausente."""
+        data = self._store.get(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def put(self, key: str, text: str) -> None:
+        """Grava o texto OCR (escrita atômica). Falhas apenas logam warning."""
+        self._store.put(key, text.encode("utf-8"))
@@ -0,0 +1,90 @@
+"""
+Page Routing - Decide por página entre texto nativo (PyMuPDF) e OCR (Qwen3-VL).
+
+Modo híbrido (extraction_mode="hybrid"): muitos PDFs são majoritariamente
+texto nativo com algumas páginas escaneadas (anexos, assinaturas, tabelas
+coladas como imagem). Em vez de OCR no documento inteiro (Entrada 2) ou
+nenhum OCR (Entrada 1), cada página é avaliada pelos blocos PyMuPDF e só
+as que falham na verificação vão para o VLM.
+
+Critérios (sobre o texto nativo já extraído da página):
+- Escaneada: quase nenhum texto nativo e imagem cobrindo boa parte da página
+- Corrompida: proporção baixa de caracteres válidos (fontes sem ToUnicode
+  geram U+FFFD, caracteres de controle ou Private Use Area)
+
+Páginas em branco (sem texto e sem imagem) ficam nativas: não há o que OCR.
+"""
+
+import unicodedata
+from dataclasses import dataclass
+
+from .vlm_models import PageData
+
+# Abaixo disso a página é considerada "sem texto nativo"
+MIN_NATIVE_CHARS = 40
+
+# Fração da área da página coberta por imagens para caracterizar escaneamento
+MIN_IMAGE_COVERAGE = 0.3
+
+# Proporção mínima de caracteres válidos no texto nativo
+MIN_VALID_CHAR_RATIO = 0.85
+
+# Densidade mínima (chars por 10.000 pt²) quando a página é dominada por imagem.
+# Página de lei em A4 tem ~60; página escaneada com cabeçalho nativo tem < 5.
+MIN_DENSITY_WITH_IMAGE = 5.0
+
+
+@dataclass
+class NativePageQuality:
+    """Métricas do texto nativo de uma página e a decisão de roteamento."""
+
+    page_number: int
+    chars: int
+    density: float             # chars por 10.000 pt² de página
+    valid_ratio: float         # fração de caracteres válidos
+    image_coverage: float      # fração da área coberta por imagens
+    needs_ocr: bool
+    reason: str = ""
+
+
+def _is_valid_char(ch: str) -> bool:
+    if ch.isspace():
+        return True
+    if ch == "\ufffd":
+        return False
+    category = unicodedata.category(ch)
+    # Cc/Cf = controle/formatação, Co = Private Use, Cn = não atribuído
+    return category[0] != "C"
+
+
+def assess_native_page(page: PageData) -> NativePageQuality:
+    """Avalia o texto nativo da página e decide se ela precisa de OCR."""
+    text = page.text
+    chars = len(text.strip())
+    area = max(page.width * page.height, 1.0)
+    density = chars / area * 10_000
+    valid = sum(1 for ch in text if _is_valid_char(ch))
+    valid_ratio = valid / len(text) if text else 1.0
+    coverage = page.image_coverage
+
+    needs_ocr = False
+    reason = ""
+    if chars < MIN_NATIVE_CHARS and coverage >= MIN_IMAGE_COVERAGE:
+        needs_ocr = True
+        reason = f"escaneada ({chars} chars nativos, imagem cobre {coverage:.0%})"
+    elif coverage >= MIN_IMAGE_COVERAGE and density < MIN_DENSITY_WITH_IMAGE:
+        needs_ocr = True
+        reason = f"dominada por imagem (densidade {density:.1f}, imagem {coverage:.0%})"
+    elif chars >= MIN_NATIVE_CHARS and valid_ratio < MIN_VALID_CHAR_RATIO:
+        needs_ocr = True
+        reason = f"texto nativo corrompido ({valid_ratio:.0%} caracteres válidos)"
+
+    return NativePageQuality(
+        page_number=page.page_number,
+        chars=chars,
+        density=round(density, 2),
+        valid_ratio=round(valid_ratio, 3),
+        image_coverage=round(coverage, 3),
+        needs_ocr=needs_ocr,
+        reason=reason,
+    )
@@ -2,7 +2,8 @@
 PyMuPDF Extractor - Extração determinística de texto e imagens de PDFs.
 
 Usa PyMuPDF (fitz) para:
-1. Renderizar páginas como PNG (para envio ao VLM)
+1. Renderizar páginas como imagem (para envio ao VLM), conforme ImagePolicy:
+   DPI limitado ao orçamento de pixels do modelo, cor/cinza, PNG/JPEG/WebP
 2. Extrair blocos de texto via get_text("dict") com bboxes em PDF space
 3. Construir canonical_text a partir dos blocos em reading order
 4. Normalizar cada linha DURANTE a construção (NFC + rstrip) para que
@@ -18,39 +19,372 @@ canonical_text retornado já está no formato final, tornando a chamada
 normalize_canonical_text() no pipeline uma operação idempotente (no-op).
 
 Offsets são consequência natural da concatenação, não mapeamento posterior.
+
+Modo paralelo (workers > 1): o range de páginas é dividido entre processos
+de um pool. Cada worker abre o PDF uma única vez a partir dos bytes recebidos
+no initializer e devolve PageData com offsets LOCAIS à página (iniciando em 0).
+O merge em ordem de página desloca os offsets exatamente como a concatenação
+sequencial faria — o canonical_text é byte-idêntico ao modo sequencial.
 """
 
-import base64
+import io
 import logging
+import math
+import multiprocessing
 import unicodedata
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
 
-from .vlm_models import BlockData, PageData
+from .repeated_lines import DEFAULT_EDGE_LINES
+from .vlm_models import BlockData, ImagePolicy, PageData
 
 logger = logging.getLogger(__name__)
 
 
+# Perfis de extração: "full" guarda linhas/spans completos de cada bloco
+# (inspeção/depuração); "lean" guarda só o necessário ao pipeline
+PROFILE_FULL = "full"
+PROFILE_LEAN = "lean"
+PROFILES = (PROFILE_FULL, PROFILE_LEAN)
+# Linhas do bloco com o 1º span no perfil lean: se strip_repeated_block_lines
+# remove as linhas de cabeçalho do topo, a primeira que sobra ainda tem span
+LEAN_LINES = DEFAULT_EDGE_LINES + 1
+
+# Documento aberto por worker do pool (um por processo, reutilizado entre ranges)
+_worker_doc = None
+
+
+def _init_worker(pdf_bytes: bytes) -> None:
+    """Initializer do pool: abre o PDF uma vez por processo worker."""
+    import fitz
+
+    global _worker_doc
+    _worker_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+
+
+def _extract_page_range(
+    start: int, end: int, dpi: int, policy: ImagePolicy, profile: str = PROFILE_FULL,
+) -> list[PageData]:
+    """Extrai as páginas [start, end) do documento aberto no worker."""
+    return [
+        _extract_page(_worker_doc[page_idx], page_idx + 1, dpi, policy, profile)
+        for page_idx in range(start, end)
+    ]
+
+
+def _extract_page(
+    page, page_number: int, dpi: int, policy: ImagePolicy, profile: str = PROFILE_FULL,
+) -> PageData:
+    """
+    Extrai uma página com offsets LOCAIS (char_start da página = 0).
+
+    O chamador desloca os offsets para a posição global da página no
+    canonical_text (ver _shift_page).
+
+    profile "full" guarda linhas e spans (fonte, tamanho, flags, bbox) de
+    cada bloco; "lean" guarda só o primeiro span das primeiras LEAN_LINES
+    linhas (flags usadas pelo RegexClassifier) e lê os desenhos via
+    get_cdrawings(). Texto, offsets e has_strikethrough são idênticos nos
+    dois perfis.
+    """
+    import fitz
+
+    # Dimensões da página em pontos PDF
+    rect = page.rect
+    page_width = rect.width
+    page_height = rect.height
+    page_area = page_width * page_height
+
+    # Renderiza no DPI configurado, limitado ao orçamento de pixels do VLM
+    zoom = _render_zoom(page_width, page_height, dpi, policy.max_pixels)
+    matrix = fitz.Matrix(zoom, zoom)
+    colorspace = fitz.csGRAY if policy.grayscale else fitz.csRGB
+    pixmap = page.get_pixmap(matrix=matrix, colorspace=colorspace)
+    image_bytes = _encode_pixmap(pixmap, policy)
+    img_width = pixmap.width
+    img_height = pixmap.height
+    del pixmap  # libera o raster antes da extração de texto
+
+    lean = profile == PROFILE_LEAN
+    # Índice de linhas de strikethrough: montado no primeiro bloco de texto
+    # (páginas sem texto não pagam get_drawings())
+    strike_index = None
+
+    # Extrai blocos com bbox via dict (reading order com sort=True)
+    page_dict = page.get_text("dict", sort=True)
+    raw_blocks = page_dict.get("blocks", [])
+
+    # Processa apenas blocos de texto (type=0), ignora imagens (type=1)
+    current_offset = 0
+    page_text_parts: list[str] = []
+    block_data_list: list[BlockData] = []
+
+    image_area = 0.0
+
+    for blk_idx, block in enumerate(raw_blocks):
+        if block.get("type", 0) != 0:
+            # Imagem: só contabiliza a área (roteamento nativo/OCR no modo híbrido)
+            ix0, iy0, ix1, iy1 = block.get("bbox", (0, 0, 0, 0))
+            ix0, iy0 = max(ix0, rect.x0), max(iy0, rect.y0)
+            ix1, iy1 = min(ix1, rect.x1), min(iy1, rect.y1)
+            if ix1 > ix0 and iy1 > iy0:
+                image_area += (ix1 - ix0) * (iy1 - iy0)
+            continue
+
+        # Extrai texto de todas as linhas/spans do bloco
+        # NFC em cada span + rstrip em cada linha para que os offsets
+        # sejam computados contra o texto já normalizado (idêntico ao
+        # resultado de normalize_canonical_text()).
+        lines_text: list[str] = []
+        block_lines: list[dict] = []
+        for line in block.get("lines", []):
+            spans = line.get("spans", [])
+            span_texts = [unicodedata.normalize("NFC", span.get("text", "")) for span in spans]
+            lines_text.append("".join(span_texts).rstrip())
+            if lean and len(block_lines) >= LEAN_LINES:
+                # Perfil lean: só o início do bloco (_get_first_span do classifier)
+                continue
+            line_spans = []
+            for span, span_text in zip(spans, span_texts):
+                line_spans.append(_span_metadata(span, span_text))
+                if lean:
+                    break
+            block_lines.append({
+                "bbox": [round(c, 1) for c in line.get("bbox", [0, 0, 0, 0])],
+                "spans": line_spans,
+            })
+
+        block_text = "\n".join(lines_text)
+        if not block_text.strip():
+            continue
+
+        # Separador newline entre blocos (gap de 1 char, não incluído no range do bloco)
+        if page_text_parts:
+            page_text_parts.append("\n")
+            current_offset += 1
+
+        block_char_start = current_offset
+        current_offset += len(block_text)
+        block_char_end = current_offset
+
+        page_text_parts.append(block_text)
+
+        # bbox do bloco já está em PDF points (72 DPI)
+        bbox_pdf = list(block.get("bbox", [0, 0, 0, 0]))
+
+        # Detecta strikethrough: verifica se linhas horizontais cruzam
+        # a área vertical do bloco (entre y0 e y1 do bbox).
+        if strike_index is None:
+            strike_index = _page_strikethrough_index(page, page_number, lean)
+        block_has_strikethrough = strike_index.crosses(bbox_pdf)
+
+        block_data_list.append(BlockData(
+            block_index=blk_idx,
+            char_start=block_char_start,
+            char_end=block_char_end,
+            bbox_pdf=bbox_pdf,
+            text=block_text,
+            page_number=page_number,
+            lines=block_lines,
+            has_strikethrough=block_has_strikethrough,
+        ))
+
+    page_text = "".join(page_text_parts)
+
+    return PageData(
+        page_number=page_number,
+        image_bytes=image_bytes,
+        image_format=policy.image_format,
+        text=page_text,
+        width=page_width,
+        height=page_height,
+        img_width=img_width,
+        img_height=img_height,
+        blocks=block_data_list,
+        char_start=0,
+        char_end=current_offset,
+        image_coverage=min(1.0, image_area / page_area) if page_area > 0 else 0.0,
+    )
+
+
+def _span_metadata(span: dict, span_text: str) -> dict:
+    """Metadados de um span (texto já em NFC) guardados em BlockData.lines."""
+    return {
+        "text": span_text,
+        "font": span.get("font", ""),
+        "size": round(span.get("size", 0), 1),
+        "flags": span.get("flags", 0),
+        "bbox": [round(c, 1) for c in span.get("bbox", [0, 0, 0, 0])],
+    }
+
+
+def _strikethrough_lines(drawings) -> list[tuple]:
+    """
+    Linhas horizontais candidatas a strikethrough em (x0, y, x1, y).
+
+    Aceita tanto get_drawings() (Point/Rect) quanto get_cdrawings()
+    (tuplas cruas), com os mesmos critérios.
+    """
+    lines = []
+    for drawing in drawings:
+        for item in drawing.get("items", []):
+            kind = item[0]
+            if kind == "l":
+                # Line: item = ("l", (x0, y0), (x1, y1))
+                (x0, y0), (x1, y1) = item[1], item[2]
+                # Horizontal se diferença em y < 2 pontos
+                if abs(y0 - y1) < 2.0:
+                    min_x = min(x0, x1)
+                    max_x = max(x0, x1)
+                    # Linha mínima de 20 pontos (ignora artefatos)
+                    if max_x - min_x > 20:
+                        lines.append((min_x, y0, max_x, y0))
+            elif kind == "re":
+                # Rect fino (height < 3pt) = strikethrough line
+                x0, y0, x1, y1 = item[1]
+                if max(y1 - y0, 0.0) < 3.0 and max(x1 - x0, 0.0) > 20:
+                    lines.append((x0, y0, x1, y0))
+    return lines
+
+
+def _page_strikethrough_index(page, page_number: int, lean: bool) -> "_StrikethroughIndex":
+    """
+    Detecta linhas de strikethrough (riscado) na página.
+
+    PDFs do Planalto mostram versões revogadas com texto riscado.
+    Strikethrough é renderizado como linhas horizontais desenhadas
+    sobre o texto. Coletamos essas linhas para marcar blocos afetados.
+    No perfil lean usa get_cdrawings(): mesmos itens, como tuplas cruas,
+    sem construir Point/Rect por item.
+    """
+    try:
+        drawings = page.get_cdrawings() if lean else page.get_drawings()
+        lines = _strikethrough_lines(drawings)
+    except Exception as e:
+        lines = []
+        logger.debug(f"get_drawings() falhou na página {page_number}: {e}")
+    return _StrikethroughIndex(lines)
+
+
+class _StrikethroughIndex:
+    """
+    Linhas de strikethrough ordenadas por y: cada bloco só testa as linhas
+    dentro da sua faixa vertical (bisect), em vez de todas as da página.
+    """
+
+    __slots__ = ("_ys", "_lines")
+
+    def __init__(self, lines: list[tuple]):
+        ordered = sorted(lines, key=lambda line: line[1])
+        self._ys = [line[1] for line in ordered]
+        self._lines = ordered
+
+    def crosses(self, bbox: list) -> bool:
+        """True se alguma linha cruza o bloco (faixa vertical + overlap > 30%)."""
+        if not self._lines:
+            return False
+        bx0, by0, bx1, by1 = bbox
+        block_width = bx1 - bx0
+        if block_width <= 0:
+            return False
+        # Linha deve estar dentro da faixa vertical do bloco
+        lo = bisect_left(self._ys, by0)
+        hi = bisect_right(self._ys, by1)
+        for lx0, _, lx1, _ in self._lines[lo:hi]:
+            # Linha deve ter overlap horizontal significativo
+            overlap = min(bx1, lx1) - max(bx0, lx0)
+            if overlap / block_width > 0.3:
+                return True
+        return False
+
+
+def _render_zoom(width: float, height: float, dpi: int, max_pixels: int) -> float:
+    """Zoom do pixmap: dpi/72, reduzido se width*height exceder max_pixels."""
+    zoom = dpi / 72.0  # 72 DPI é o padrão do PDF
+    if max_pixels > 0 and width > 0 and height > 0:
+        budget_zoom = math.sqrt(max_pixels / (width * height))
+        zoom = min(zoom, budget_zoom)
+    return zoom
+
+
+def _encode_pixmap(pixmap, policy: ImagePolicy) -> bytes:
+    """Codifica o pixmap no formato da política (PNG/JPEG nativos, WebP via Pillow)."""
+    if policy.image_format == "png":
+        return pixmap.tobytes("png")
+    if policy.image_format == "jpeg":
+        return pixmap.tobytes("jpg", jpg_quality=policy.quality)
+
+    from PIL import Image
+
+    mode = "L" if pixmap.n == 1 else "RGB"
+    image = Image.frombytes(mode, (pixmap.width, pixmap.height), pixmap.samples)
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=policy.quality)
+    return buffer.getvalue()
+
+
+def _shift_page(page: PageData, base_offset: int) -> None:
+    """Desloca offsets locais da página para a posição global no canonical_text."""
+    if base_offset == 0:
+        return
+    page.char_start += base_offset
+    page.char_end += base_offset
+    for block in page.blocks:
+        block.char_start += base_offset
+        block.char_end += base_offset
+
+
 class PyMuPDFExtractor:
     """Extrai páginas do PDF: imagens (para VLM) + blocos de texto com offsets."""
 
-    def __init__(self, dpi: int = 300):
+    def __init__(
+        self,
+        dpi: int = 300,
+        workers: int = 1,
+        parallel_min_pages: int = 32,
+        image_policy: Optional[ImagePolicy] = None,
+        profile: str = PROFILE_FULL,
+    ):
         """
         Args:
-            dpi: Resolução para renderização de imagens (default 300 DPI).
+            dpi: Resolução máxima para renderização de imagens (default 300 DPI).
+            workers: Processos para extração paralela (1 = sequencial).
+            parallel_min_pages: Abaixo deste número de páginas a extração é
+                sequencial mesmo com workers > 1 (custo de spawn do pool).
+            image_policy: Orçamento de pixels, cor e formato das imagens
+                (default: PNG colorido no DPI configurado).
+            profile: "full" (linhas/spans completos por bloco) ou "lean"
+                (só o primeiro span de cada bloco). Texto e offsets não mudam.
+
+        Raises:
+            ValueError: Se profile não for um dos PROFILES
         """
+        if profile not in PROFILES:
+            raise ValueError(f"profile PyMuPDF inválido: {profile!r} (esperado {PROFILES})")
         self.dpi = dpi
-
-    def extract_pages(self, pdf_bytes: bytes) -> tuple[list[PageData], str]:
+        self.image_policy = image_policy or ImagePolicy()
+        self.workers = max(1, workers)
+        self.parallel_min_pages = parallel_min_pages
+        self.profile = profile
+
+    def extract_pages(
+        self,
+        pdf_bytes: bytes,
+        workers: Optional[int] = None,
+    ) -> tuple[list[PageData], str]:
         """
         Extrai dados de todas as páginas do PDF.
 
         Para cada página:
-        - Renderiza como PNG no DPI configurado (para envio ao VLM)
+        - Renderiza a imagem conforme a ImagePolicy (para envio ao VLM)
         - Extrai blocos de texto via get_text("dict", sort=True) com bboxes
         - Concatena blocos em reading order calculando offsets incrementais
         - Coleta dimensões (width, height) em pontos PDF e pixmap em pixels
 
         Args:
             pdf_bytes: Conteúdo binário do PDF
+            workers: Override de self.workers para esta chamada
 
         Returns:
             Tupla (pages, canonical_text):
@@ -62,10 +396,80 @@ class PyMuPDFExtractor:
         """
         import fitz
 
+        try:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        except Exception as e:
+            raise RuntimeError(f"PyMuPDF não conseguiu abrir o PDF: {e}") from e
+
+        workers = max(1, workers if workers is not None else self.workers)
+
+        try:
+            total_pages = len(doc)
+            parallel = workers > 1 and total_pages >= self.parallel_min_pages
+            logger.info(
+                f"PyMuPDF: extraindo {total_pages} páginas (DPI={self.dpi}"
+                f"{f', workers={workers}' if parallel else ''})"
+            )
+
+            if parallel:
+                doc.close()
+                doc = None
+                local_pages = self._extract_parallel(pdf_bytes, total_pages, workers)
+            else:
+                local_pages = [
+                    _extract_page(
+                        doc[page_idx], page_idx + 1, self.dpi, self.image_policy, self.profile,
+                    )
+                    for page_idx in range(total_pages)
+                ]
+        finally:
+            if doc is not None:
+                doc.close()
+
+        # Merge em ordem de página: offsets locais → globais
         pages: list[PageData] = []
-        canonical_parts: list[str] = []
         current_offset = 0
 
+        for page in local_pages:
+            _shift_page(page, current_offset)
+            # Separador "\n" entre páginas
+            current_offset = page.char_end + 1
+            pages.append(page)
+            self._log_page(page, total_pages)
+
+        canonical_text = self.canonical_text_from_pages(pages)
+
+        total_blocks = sum(len(p.blocks) for p in pages)
+        logger.info(
+            f"PyMuPDF: {len(pages)} páginas, {total_blocks} blocos, "
+            f"{len(canonical_text)} chars de canonical_text"
+        )
+        return pages, canonical_text
+
+    def count_pages(self, pdf_bytes: bytes) -> int:
+        """Retorna o número de páginas do PDF sem extrair conteúdo."""
+        import fitz
+
+        try:
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                return len(doc)
+        except Exception as e:
+            raise RuntimeError(f"PyMuPDF não conseguiu abrir o PDF: {e}") from e
+
+    def iter_pages(self, pdf_bytes: bytes) -> Iterator[PageData]:
+        """
+        Extrai páginas sequencialmente, uma por vez, com offsets globais.
+
+        Permite que o consumidor (ex: OCR VLM) processe a página N enquanto
+        a página N+1 é renderizada. Os offsets são idênticos aos de
+        extract_pages(); o canonical_text pode ser montado ao final com
+        canonical_text_from_pages().
+
+        Raises:
+            RuntimeError: Se PyMuPDF não conseguir abrir o PDF
+        """
+        import fitz
+
         try:
             doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         except Exception as e:
@@ -73,183 +477,91 @@ class PyMuPDFExtractor:
 
         try:
             total_pages = len(doc)
-            logger.info(f"PyMuPDF: extraindo {total_pages} páginas (DPI={self.dpi})")
-
+            current_offset = 0
             for page_idx in range(total_pages):
-                page = doc[page_idx]
-                page_number = page_idx + 1  # 1-indexed
-
-                # Renderiza como PNG
-                zoom = self.dpi / 72.0  # 72 DPI é o padrão do PDF
-                matrix = fitz.Matrix(zoom, zoom)
-                pixmap = page.get_pixmap(matrix=matrix)
-                image_png = pixmap.tobytes("png")
-                image_b64 = base64.b64encode(image_png).decode("ascii")
-
-                # Dimensões da página em pontos PDF e do pixmap em pixels
-                rect = page.rect
-                page_width = rect.width
-                page_height = rect.height
-                img_width = pixmap.width
-                img_height = pixmap.height
-
-                # Detecta linhas de strikethrough (riscado) na página.
-                # PDFs do Planalto mostram versões revogadas com texto riscado.
-                # Strikethrough é renderizado como linhas horizontais desenhadas
-                # sobre o texto. Coletamos essas linhas para marcar blocos afetados.
-                strikethrough_lines = []
-                try:
-                    for drawing in page.get_drawings():
-                        # Strikethrough = linha reta horizontal (rect ou line)
-                        if drawing.get("type") not in ("l", "re"):
-                            # "l" = line, "re" = rect (thin rect = line)
-                            pass
-                        for item in drawing.get("items", []):
-                            kind = item[0]
-                            if kind == "l":
-                                # Line: item = ("l", Point(x0,y0), Point(x1,y1))
-                                p1, p2 = item[1], item[2]
-                                # Horizontal se diferença em y < 2 pontos
-                                if abs(p1.y - p2.y) < 2.0:
-                                    min_x = min(p1.x, p2.x)
-                                    max_x = max(p1.x, p2.x)
-                                    # Linha mínima de 20 pontos (ignora artefatos)
-                                    if max_x - min_x > 20:
-                                        strikethrough_lines.append((min_x, p1.y, max_x, p1.y))
-                            elif kind == "re":
-                                # Rect fino (height < 3pt) = strikethrough line
-                                r = item[1]  # Rect
-                                if hasattr(r, 'height') and r.height < 3.0 and r.width > 20:
-                                    strikethrough_lines.append((r.x0, r.y0, r.x1, r.y0))
-                except Exception as e:
-                    logger.debug(f"get_drawings() falhou na página {page_number}: {e}")
-
-                # Extrai blocos com bbox via dict (reading order com sort=True)
-                page_dict = page.get_text("dict", sort=True)
-                raw_blocks = page_dict.get("blocks", [])
-
-                # Processa apenas blocos de texto (type=0), ignora imagens (type=1)
-                page_char_start = current_offset
-                page_text_parts: list[str] = []
-                block_data_list: list[BlockData] = []
-
-                for blk_idx, block in enumerate(raw_blocks):
-                    if block.get("type", 0) != 0:
-                        continue  # skip image blocks
-
-                    # Extrai texto de todas as linhas/spans do bloco
-                    # NFC em cada span + rstrip em cada linha para que os offsets
-                    # sejam computados contra o texto já normalizado (idêntico ao
-                    # resultado de normalize_canonical_text()).
-                    lines_text: list[str] = []
-                    block_lines: list[dict] = []
-                    for line in block.get("lines", []):
-                        span_texts = []
-                        line_spans = []
-                        for span in line.get("spans", []):
-                            span_text = unicodedata.normalize("NFC", span.get("text", ""))
-                            span_texts.append(span_text)
-                            line_spans.append({
-                                "text": span_text,
-                                "font": span.get("font", ""),
-                                "size": round(span.get("size", 0), 1),
-                                "flags": span.get("flags", 0),
-                                "bbox": [round(c, 1) for c in span.get("bbox", [0, 0, 0, 0])],
-                            })
-                        lines_text.append("".join(span_texts).rstrip())
-                        block_lines.append({
-                            "bbox": [round(c, 1) for c in line.get("bbox", [0, 0, 0, 0])],
-                            "spans": line_spans,
-                        })
-
-                    block_text = "\n".join(lines_text)
-                    if not block_text.strip():
-                        continue
-
-                    # Separador newline entre blocos (gap de 1 char, não incluído no range do bloco)
-                    if page_text_parts:
-                        page_text_parts.append("\n")
-                        current_offset += 1
-
-                    block_char_start = current_offset
-                    current_offset += len(block_text)
-                    block_char_end = current_offset
-
-                    page_text_parts.append(block_text)
-
-                    # bbox do bloco já está em PDF points (72 DPI)
-                    bbox_pdf = list(block.get("bbox", [0, 0, 0, 0]))
-
-                    # Detecta strikethrough: verifica se linhas horizontais cruzam
-                    # a área vertical do bloco (entre y0 e y1 do bbox).
-                    block_has_strikethrough = False
-                    if strikethrough_lines:
-                        bx0, by0, bx1, by1 = bbox_pdf
-                        for lx0, ly, lx1, _ in strikethrough_lines:
-                            # Linha deve estar dentro da faixa vertical do bloco
-                            if by0 <= ly <= by1:
-                                # Linha deve ter overlap horizontal significativo
-                                overlap = min(bx1, lx1) - max(bx0, lx0)
-                                block_width = bx1 - bx0
-                                if block_width > 0 and overlap / block_width > 0.3:
-                                    block_has_strikethrough = True
-                                    break
-
-                    block_data_list.append(BlockData(
-                        block_index=blk_idx,
-                        char_start=block_char_start,
-                        char_end=block_char_end,
-                        bbox_pdf=bbox_pdf,
-                        text=block_text,
-                        page_number=page_number,
-                        lines=block_lines,
-                        has_strikethrough=block_has_strikethrough,
-                    ))
-
-                page_text = "".join(page_text_parts)
-                page_char_end = current_offset
-                canonical_parts.append(page_text)
-
-                # Separador entre páginas
-                if page_idx < total_pages - 1:
-                    canonical_parts.append("\n")
-                    current_offset += 1
-
-                pages.append(PageData(
-                    page_number=page_number,
-                    image_png=image_png,
-                    image_base64=image_b64,
-                    text=page_text,
-                    width=page_width,
-                    height=page_height,
-                    img_width=img_width,
-                    img_height=img_height,
-                    blocks=block_data_list,
-                    char_start=page_char_start,
-                    char_end=page_char_end,
-                ))
-
-                logger.debug(
-                    f"Página {page_number}/{total_pages}: "
-                    f"{len(block_data_list)} blocos, {len(page_text)} chars, "
-                    f"{len(image_png)} bytes PNG, "
-                    f"{page_width:.0f}x{page_height:.0f} pts, "
-                    f"{img_width}x{img_height} px"
+                page = _extract_page(
+                    doc[page_idx], page_idx + 1, self.dpi, self.image_policy, self.profile,
                 )
-
+                _shift_page(page, current_offset)
+                current_offset = page.char_end + 1
+                self._log_page(page, total_pages)
+                yield page
         finally:
             doc.close()
 
-        canonical_text = "".join(canonical_parts)
+    @staticmethod
+    def relayout_pages(pages: list[PageData]) -> str:
+        """
+        Recalcula offsets globais de páginas cujo texto mudou e retorna o
+        canonical_text.
+
+        Cada página é deslocada para logo após a anterior (separador \\n),
+        preservando os offsets relativos dos seus blocos. Usado no modo
+        híbrido, onde páginas OCR substituem o texto nativo.
+        """
+        current_offset = 0
+        for page in pages:
+            _shift_page(page, current_offset - page.char_start)
+            current_offset = page.char_end + 1
+        return PyMuPDFExtractor.canonical_text_from_pages(pages)
+
+    @staticmethod
+    def canonical_text_from_pages(pages: list[PageData]) -> str:
+        """Concatena o texto das páginas (separador \\n) no formato canônico."""
+        canonical_text = "\n".join(p.text for p in pages)
 
         # Garante exatamente um \n no final (mesma regra de normalize_canonical_text)
         canonical_text = canonical_text.rstrip("\n")
         if canonical_text:
             canonical_text += "\n"
-
-        total_blocks = sum(len(p.blocks) for p in pages)
-        logger.info(
-            f"PyMuPDF: {len(pages)} páginas, {total_blocks} blocos, "
-            f"{len(canonical_text)} chars de canonical_text"
+        return canonical_text
+
+    @staticmethod
+    def _log_page(page: PageData, total_pages: int) -> None:
+        logger.debug(
+            f"Página {page.page_number}/{total_pages}: "
+            f"{len(page.blocks)} blocos, {len(page.text)} chars, "
+            f"{len(page.image_bytes)} bytes {page.image_format.upper()}, "
+            f"{page.width:.0f}x{page.height:.0f} pts, "
+            f"{page.img_width}x{page.img_height} px"
         )
-        return pages, canonical_text
+
+    def _extract_parallel(
+        self,
+        pdf_bytes: bytes,
+        total_pages: int,
+        workers: int,
+    ) -> list[PageData]:
+        """
+        Divide o range de páginas entre processos e retorna PageData em ordem.
+
+        Usa contexto "spawn": o servidor roda o pipeline em threads, e fork
+        após threads pode herdar locks do MuPDF em estado inconsistente.
+        """
+        workers = min(workers, total_pages)
+        # Mais ranges que workers para balancear páginas densas vs. vazias
+        n_ranges = min(total_pages, workers * 4)
+        step, remainder = divmod(total_pages, n_ranges)
+        ranges = []
+        start = 0
+        for i in range(n_ranges):
+            end = start + step + (1 if i < remainder else 0)
+            ranges.append((start, end))
+            start = end
+
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(pdf_bytes,),
+        ) as pool:
+            results = pool.map(
+                _extract_page_range,
+                [s for s, _ in ranges],
+                [e for _, e in ranges],
+                [self.dpi] * len(ranges),
+                [self.image_policy] * len(ranges),
+                [self.profile] * len(ranges),
+            )
+            return [page for chunk in results for page in chunk]
@@ -6,7 +6,9 @@ Origem: app de testes PyMuPDF (validado com IN 65/2021 e IN 58/2022)
 Integrado ao rag-gpu-server como src/extraction/regex_classifier.py
 """
 
+import bisect
 import re
+from collections import defaultdict
 from dataclasses import dataclass, field
 
 # ============================================================
@@ -99,6 +101,15 @@ def _children_sort_key(span_id: str) -> tuple:
 # Detecta linhas de índice/sumário (ex: "Art. 1º ..................... Pág 12")
 RE_SUMMARY_LINE = re.compile(r"(\.{5,}|\s_\s|\s-\s{2,})")
 
+RE_DATE_TIME_PREFIX = re.compile(r"^\d{2}/\d{2}/\d{4},?\s+\d{2}:\d{2}")
+RE_PAGINATION = re.compile(
+    r"^(p[áa]ginas?|p[áa]g\.?|fls?\.?)?\s*\d+(?:\s*(?:/|de)\s*\d+)?\s*$", re.IGNORECASE
+)
+RE_WHITESPACE = re.compile(r"\s+")
+RE_FIRST_NUMBER = re.compile(r"(\d+)")
+RE_ARTICLE_PARTS = re.compile(r"(\d+(?:\.\d+)*)(?:[º°o])?(-[A-Za-z]+)?")
+RE_SPAN_ID_ARTICLE = re.compile(r"[A-Z]+-(\d+)")
+
 # ============================================================
 # Metadata detection
 # ============================================================
@@ -129,7 +140,7 @@ def _is_metadata(block):
     for kw in METADATA_KEYWORDS:
         if kw in text:
             return True
-    if re.match(r"^\d{2}/\d{2}/\d{4},?\s+\d{2}:\d{2}", text):
+    if RE_DATE_TIME_PREFIX.match(text):
         return True
     return False
 
@@ -209,7 +220,7 @@ def classify_block(block):
     # do mesmo span_id (ex: versão revogada + versão vigente).
     # Indicador textual "Vigência encerrada" é marcado no bloco para uso
     # posterior no dedup (Pass 2.7) como tiebreaker.
-    if "vigência encerrada" in re.sub(r"\s+", " ", text).lower():
+    if "vigência encerrada" in RE_WHITESPACE.sub(" ", text).lower():
         block["has_vigencia_encerrada"] = True
 
     # PASSO 1: Dispositivos normativos (PRIORIDADE MÁXIMA)
@@ -255,7 +266,7 @@ def classify_block(block):
     # PASSO 2: Metadata por conteúdo (keywords, regex de data, paginação)
     if _is_metadata(block):
         return "metadata", None, "Keyword estática"
-    if re.match(r"^(p[áa]ginas?|p[áa]g\.?|fls?\.?)?\s*\d+(?:\s*(?:/|de)\s*\d+)?\s*$", text, re.IGNORECASE):
+    if RE_PAGINATION.match(text):
         return "metadata", None, "Paginação solta"
 
     # PASSO 3: Filtros editoriais
@@ -279,7 +290,7 @@ def classify_block(block):
 # ============================================================
 
 def _extract_article_number(identifier):
-    m = re.search(r"(\d+)", identifier or "")
+    m = RE_FIRST_NUMBER.search(identifier or "")
     return int(m.group(1)) if m else 0
 
 def _extract_article_parts(identifier):
@@ -291,7 +302,7 @@ def _extract_article_parts(identifier):
     """
     if not identifier:
         return 0, ""
-    m = re.search(r"(\d+(?:\.\d+)*)(?:[º°o])?(-[A-Za-z]+)?", identifier)
+    m = RE_ARTICLE_PARTS.search(identifier)
     if not m:
         return 0, ""
     num = int(m.group(1).replace(".", ""))
@@ -301,12 +312,12 @@ def _extract_article_parts(identifier):
 def _extract_paragraph_number(identifier):
     if identifier and ("único" in identifier.lower() or "unico" in identifier.lower()):
         return 0
-    m = re.search(r"(\d+)", identifier or "")
+    m = RE_FIRST_NUMBER.search(identifier or "")
     return int(m.group(1)) if m else 0
 
 def _extract_article_number_from_span_id(span_id):
     """Extrai o numero do artigo de qualquer span_id: ART-005 -> 5, INC-003-II -> 3"""
-    m = re.match(r"[A-Z]+-(\d+)", span_id or "")
+    m = RE_SPAN_ID_ARTICLE.match(span_id or "")
     return int(m.group(1)) if m else 0
 
 def _build_span_id(device_type, identifier, parent_chain):
@@ -341,6 +352,35 @@ def _build_span_id(device_type, identifier, parent_chain):
     return None
 
 
+# Header de browser no INÍCIO de um bloco (Pass 0.5)
+RE_BROWSER_HEADER_PREFIX = re.compile(
+    r"^("
+    r"(?:\d{2}/\d{2}/\d{4},?\s+\d{2}:\d{2}[^\n]*\n)"  # data/hora
+    r"(?:[^\n]*(?:https?://|\.gov\.br|\.htm)[^\n]*\n)?"  # URL (opcional)
+    r"(?:[^\n]*\d+\s*/\s*\d+[^\n]*\n)?"                  # paginação (opcional)
+    r")"
+)
+
+# Device que termina com sentença incompleta (Pass 2.5)
+RE_INCOMPLETE_SENTENCE = re.compile(
+    r"""(?:
+        [,]\s*$                                # vírgula no fim
+        | \b(?:e|ou|a|o|os|as|de|do|da|dos|das
+              |no|na|nos|nas|ao|aos|à|às
+              |em|com|por|para|que|se|como
+              |sobre|entre|sob|sem|até
+              |pelo|pela|pelos|pelas
+              |seu|sua|seus|suas
+              |um|uma|uns|umas
+              |cujo|cuja|cujos|cujas
+              |quando|onde|qual|quais
+              |conforme|mediante|perante
+        )\s*$
+    )""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
 # ============================================================
 # Classificacao do documento inteiro
 # ============================================================
@@ -365,13 +405,6 @@ def classify_document(pages):
     # bloco inteiro e o texto de continuação se perde.
     # Solução: detectar header de browser no INÍCIO do bloco e, se houver texto
     # legal substancial depois, splittar em dois blocos.
-    RE_BROWSER_HEADER_PREFIX = re.compile(
-        r"^("
-        r"(?:\d{2}/\d{2}/\d{4},?\s+\d{2}:\d{2}[^\n]*\n)"  # data/hora
-        r"(?:[^\n]*(?:https?://|\.gov\.br|\.htm)[^\n]*\n)?"  # URL (opcional)
-        r"(?:[^\n]*\d+\s*/\s*\d+[^\n]*\n)?"                  # paginação (opcional)
-        r")"
-    )
     split_blocks = []
     blocks_split_count = 0
     for block in all_blocks:
@@ -573,35 +606,22 @@ def classify_document(pages):
     #   2. Gap > 1500 mas device anterior termina com sentença incompleta
     #      (preposição, conjunção, vírgula): merge mesmo assim — é quase
     #      certamente continuação do dispositivo, apenas com gap inflado.
-    _INCOMPLETE_SENTENCE_RE = re.compile(
-        r"""(?:
-            [,]\s*$                                # vírgula no fim
-            | \b(?:e|ou|a|o|os|as|de|do|da|dos|das
-                  |no|na|nos|nas|ao|aos|à|às
-                  |em|com|por|para|que|se|como
-                  |sobre|entre|sob|sem|até
-                  |pelo|pela|pelos|pelas
-                  |seu|sua|seus|suas
-                  |um|uma|uns|umas
-                  |cujo|cuja|cujos|cujas
-                  |quando|onde|qual|quais
-                  |conforme|mediante|perante
-            )\s*$
-        )""",
-        re.IGNORECASE | re.VERBOSE,
-    )
 
-    merged_indices = []
+    merged_indices = set()
     if unclassified and devices:
         devices.sort(key=lambda d: d["char_start"])
 
+        # Índices para atribuição O(log n) por órfão:
+        #   (page_number, block_index) → bloco original (primeira ocorrência)
+        #   char_start dos devices (ordenado) → bisect do device anterior
+        block_by_key = {}
+        for block in all_blocks:
+            block_by_key.setdefault((block["page_number"], block["block_index"]), block)
+        device_starts = [d["char_start"] for d in devices]
+
         for i, orphan in enumerate(unclassified):
             # Recuperar o bloco original para obter texto e offsets completos
-            orphan_block = None
-            for block in all_blocks:
-                if block["block_index"] == orphan["block_index"] and block["page_number"] == orphan["page_number"]:
-                    orphan_block = block
-                    break
+            orphan_block = block_by_key.get((orphan["page_number"], orphan["block_index"]))
             if not orphan_block:
                 continue
 
@@ -610,14 +630,10 @@ def classify_document(pages):
                 continue
 
             # Encontrar o device imediatamente anterior por char_start
-            prev_device = None
-            for d in reversed(devices):
-                if d["char_start"] < orphan_block["char_start"]:
-                    prev_device = d
-                    break
-
-            if prev_device is None:
+            pos = bisect.bisect_left(device_starts, orphan_block["char_start"])
+            if pos == 0:
                 continue
+            prev_device = devices[pos - 1]
 
             # Verificar proximidade: gap entre fim do device anterior e início do órfão.
             # PDFs browser-print do Planalto injetam headers (URL, data, paginação)
@@ -630,7 +646,7 @@ def classify_document(pages):
             if gap > 1500:
                 # Só faz merge se o device anterior termina com sentença incompleta
                 prev_text = prev_device["full_text"].strip()
-                if not _INCOMPLETE_SENTENCE_RE.search(prev_text):
+                if not RE_INCOMPLETE_SENTENCE.search(prev_text):
                     continue
 
             # Merge: append texto do órfão ao conteúdo semântico.
@@ -639,7 +655,7 @@ def classify_document(pages):
             # slice canonical_text[start:end] incluir lixo (URLs, datas, paginação)
             # que apareceria no highlight da evidência.
             prev_device["full_text"] = prev_device["full_text"] + "\n" + orphan_text
-            merged_indices.append(i)
+            merged_indices.add(i)
 
         # Remover órfãos que foram mergeados
         unclassified = [u for i, u in enumerate(unclassified) if i not in merged_indices]
@@ -652,7 +668,6 @@ def classify_document(pages):
     #   2. Se todas têm indicadores, manter a ÚLTIMA (a vigente aparece
     #      por último no layout do Planalto)
     # Indicadores de revogação: has_strikethrough OU has_vigencia_encerrada
-    from collections import defaultdict
     span_id_occurrences = defaultdict(list)
     for idx, device in enumerate(devices):
         span_id_occurrences[device["span_id"]].append(idx)
@@ -726,27 +741,37 @@ def classify_document(pages):
 # Interface para o pipeline de producao
 # ============================================================
 
+def _to_classified_device(d: dict) -> ClassifiedDevice:
+    return ClassifiedDevice(
+        device_type=d["device_type"],
+        span_id=d["span_id"],
+        parent_span_id=d["parent_span_id"] or "",
+        children_span_ids=list(d.get("children_span_ids", [])),
+        text=d["full_text"],
+        text_preview=d["text_preview"],
+        identifier=d["identifier"] or "",
+        article_number=_extract_article_number_from_span_id(d["span_id"]),
+        hierarchy_depth=d["hierarchy_depth"],
+        char_start=d["char_start"],
+        char_end=d["char_end"],
+        page_number=d["page_number"],
+        bbox=d["bbox"],
+    )
+
+
+def classify_with_devices(pages_data) -> tuple[dict, list[ClassifiedDevice]]:
+    """
+    Passe único para o pipeline: o resultado de classify_document() (snapshot
+    de inspeção) e a List[ClassifiedDevice] (chunks) derivada dele.
+    """
+    result = classify_document(pages_data)
+    return result, [_to_classified_device(d) for d in result["devices"]]
+
+
 def classify_to_devices(pages_data) -> list[ClassifiedDevice]:
     """
     Interface principal para o pipeline.py.
     Chama classify_document() e converte para List[ClassifiedDevice].
+    Se o resultado completo também for necessário, use classify_with_devices().
     """
-    result = classify_document(pages_data)
-    devices = []
-    for d in result["devices"]:
-        devices.append(ClassifiedDevice(
-            device_type=d["device_type"],
-            span_id=d["span_id"],
-            parent_span_id=d["parent_span_id"] or "",
-            children_span_ids=d.get("children_span_ids", []),
-            text=d["full_text"],
-            text_preview=d["text_preview"],
-            identifier=d["identifier"] or "",
-            article_number=_extract_article_number_from_span_id(d["span_id"]),
-            hierarchy_depth=d["hierarchy_depth"],
-            char_start=d["char_start"],
-            char_end=d["char_end"],
-            page_number=d["page_number"],
-            bbox=d["bbox"],
-        ))
-    return devices
+    return classify_with_devices(pages_data)[1]
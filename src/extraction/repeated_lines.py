@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Repeated Lines — remoção de cabeçalhos/rodapés repetidos entre páginas.
+
+PDFs do Planalto impressos pelo browser trazem o mesmo cabeçalho e rodapé
+em todas as páginas (data/hora, título da aba, URL, "1/50"). Esse texto
+entra no canonical_text, passa por todas as fases (regex classifier,
+citações, embeddings) e polui os chunks.
+
+Detecção por posição + frequência:
+- Posição: só linhas na borda da página são candidatas. Páginas nativas
+  (PyMuPDF): primeiras/últimas linhas de blocos contidos na faixa
+  superior/inferior da página. Páginas VLM OCR (blocos sintéticos sem
+  bbox): primeiras/últimas linhas não vazias do texto da página. No modo
+  híbrido cada página usa o critério da sua origem e a contagem é única.
+- Frequência: a linha (com dígitos colapsados em "#", para casar "1/50"
+  com "2/50") precisa aparecer na borda de pelo menos min_pages páginas e
+  de min_ratio das páginas com texto.
+- Linhas que iniciam dispositivo legal (Art., §, incisos, alíneas) nunca
+  são removidas.
+
+As linhas são removidas ANTES da canonicalização: os blocos e o texto das
+páginas são reconstruídos com offsets locais e o chamador recalcula os
+offsets globais com PyMuPDFExtractor.relayout_pages().
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple
+
+from .vlm_models import PageData
+
+logger = logging.getLogger(__name__)
+
+# Faixa superior/inferior da página (fração da altura) onde ficam header/footer
+DEFAULT_BAND = 0.12
+# Linhas da borda (por bloco nativo / por página OCR) consideradas candidatas
+DEFAULT_EDGE_LINES = 3
+# Mínimo absoluto e fração das páginas com texto em que a linha deve repetir
+DEFAULT_MIN_PAGES = 3
+DEFAULT_MIN_RATIO = 0.5
+# Linhas longas são texto corrido, nunca header/footer
+MAX_LINE_CHARS = 200
+
+_RE_DIGITS = re.compile(r"\d+")
+_RE_WHITESPACE = re.compile(r"\s+")
+
+# Início de dispositivo legal: nunca remover, mesmo se repetido
+_RE_PROTECTED = re.compile(
+    r"^\s*(?:Art\.?\s*\d|§|Par[áa]grafo\s+[úu]nico|[IVXLCDM]+\s*[-–—]\s|[a-z]\)\s)"
+)
+
+
+@dataclass
+class RepeatedLinesReport:
+    """O que foi removido por strip_repeated_block_lines()."""
+    patterns: List[str] = field(default_factory=list)   # chaves repetidas (dígitos → #)
+    samples: List[str] = field(default_factory=list)    # 1ª ocorrência de cada chave removida
+    dropped_lines: int = 0
+    dropped_chars: int = 0
+    pages_affected: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "patterns": list(self.patterns),
+            "samples": list(self.samples),
+            "dropped_lines": self.dropped_lines,
+            "dropped_chars": self.dropped_chars,
+            "pages_affected": self.pages_affected,
+        }
+
+    def log(self, document_id: str, source: str) -> None:
+        if not self.dropped_lines:
+            return
+        logger.info(
+            f"[{document_id}] Header/footer repetidos ({source}): "
+            f"{self.dropped_lines} linhas ({self.dropped_chars} chars) removidas "
+            f"em {self.pages_affected} páginas; exemplos: {self.samples[:5]}"
+        )
+
+
+def line_key(line: str) -> str:
+    """Chave de frequência: casefold, whitespace colapsado, dígitos → '#'."""
+    key = _RE_WHITESPACE.sub(" ", line.strip()).casefold()
+    return _RE_DIGITS.sub("#", key)
+
+
+def _is_candidate(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and len(stripped) <= MAX_LINE_CHARS and not _RE_PROTECTED.match(line)
+
+
+def _repeated_keys(
+    candidates_per_page: List[dict],
+    pages_with_text: int,
+    min_pages: int,
+    min_ratio: float,
+) -> set:
+    """Chaves presentes na borda de >= max(min_pages, min_ratio * páginas) páginas."""
+    threshold = max(min_pages, math.ceil(min_ratio * pages_with_text))
+    counts: dict[str, int] = {}
+    for candidates in candidates_per_page:
+        for key in set(candidates.values()):
+            counts[key] = counts.get(key, 0) + 1
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def _edge_positions(n_lines: int, edge_lines: int, top: bool, bottom: bool) -> Sequence[int]:
+    """Índices das primeiras/últimas edge_lines linhas (sem repetir índices)."""
+    if top and bottom:
+        if n_lines <= 2 * edge_lines:
+            return range(n_lines)
+        return [*range(edge_lines), *range(n_lines - edge_lines, n_lines)]
+    if top:
+        return range(min(edge_lines, n_lines))
+    if bottom:
+        return range(max(0, n_lines - edge_lines), n_lines)
+    return range(0)
+
+
+def _page_candidates(page: PageData, band: float, edge_lines: int) -> dict:
+    """
+    Linhas candidatas da página: {(índice do bloco, índice da linha): chave}.
+
+    Blocos com bbox (nativos) são avaliados pela faixa da página; sem bbox
+    (OCR sintético), vale a posição da linha no texto da página.
+    """
+    candidates: dict[Tuple[int, int], str] = {}
+    block_lines = [block.text.split("\n") for block in page.blocks]
+
+    if all(len(block.bbox_pdf) == 4 for block in page.blocks) and page.height > 0:
+        top_limit = page.height * band
+        bottom_limit = page.height * (1.0 - band)
+        for b_idx, (block, lines) in enumerate(zip(page.blocks, block_lines)):
+            _, y0, _, y1 = block.bbox_pdf
+            # Só blocos inteiros na faixa: corpo que só encosta nela não é candidato
+            top, bottom = y1 <= top_limit, y0 >= bottom_limit
+            for l_idx in _edge_positions(len(lines), edge_lines, top, bottom):
+                if _is_candidate(lines[l_idx]):
+                    candidates[(b_idx, l_idx)] = line_key(lines[l_idx])
+        return candidates
+
+    # Sem bbox: posição da linha no texto da página (ignorando linhas vazias)
+    positions = [
+        (b_idx, l_idx)
+        for b_idx, lines in enumerate(block_lines)
+        for l_idx, line in enumerate(lines)
+        if line.strip()
+    ]
+    for p_idx in _edge_positions(len(positions), edge_lines, True, True):
+        b_idx, l_idx = positions[p_idx]
+        line = block_lines[b_idx][l_idx]
+        if _is_candidate(line):
+            candidates[(b_idx, l_idx)] = line_key(line)
+    return candidates
+
+
+def strip_repeated_block_lines(
+    pages: List[PageData],
+    band: float = DEFAULT_BAND,
+    edge_lines: int = DEFAULT_EDGE_LINES,
+    min_pages: int = DEFAULT_MIN_PAGES,
+    min_ratio: float = DEFAULT_MIN_RATIO,
+) -> RepeatedLinesReport:
+    """
+    Remove header/footer repetidos dos blocos das páginas (in-place).
+
+    Blocos que ficam vazios são descartados; texto e offsets de cada página
+    alterada são reconstruídos a partir de page.char_start (mesmo separador
+    "\\n" entre blocos do extractor). BlockData.lines acompanha as linhas
+    que ficam: no perfil full há uma entrada por linha; no lean, só as
+    primeiras linhas (LEAN_LINES), então a primeira linha que sobra no topo
+    ainda tem span (negrito/fonte para o RegexClassifier).
+
+    Returns:
+        RepeatedLinesReport (vazio se nada foi removido). Se dropped_lines > 0
+        o chamador deve recalcular offsets globais (relayout_pages).
+    """
+    report = RepeatedLinesReport()
+    candidates_per_page = [_page_candidates(page, band, edge_lines) for page in pages]
+    pages_with_text = sum(1 for page in pages if page.blocks)
+    repeated = _repeated_keys(candidates_per_page, pages_with_text, min_pages, min_ratio)
+    if not repeated:
+        return report
+
+    report.patterns = sorted(repeated)
+    seen_keys: set = set()
+    for page, candidates in zip(pages, candidates_per_page):
+        drop = {pos for pos, key in candidates.items() if key in repeated}
+        if not drop:
+            continue
+        report.pages_affected += 1
+
+        kept_blocks = []
+        for b_idx, block in enumerate(page.blocks):
+            lines = block.text.split("\n")
+            removed = [l_idx for l_idx in range(len(lines)) if (b_idx, l_idx) in drop]
+            if not removed:
+                kept_blocks.append(block)
+                continue
+            for l_idx in removed:
+                key = candidates[(b_idx, l_idx)]
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    report.samples.append(lines[l_idx].strip())
+                report.dropped_lines += 1
+                report.dropped_chars += len(lines[l_idx])
+
+            removed_set = set(removed)
+            kept = [
+                (l_idx, line) for l_idx, line in enumerate(lines) if l_idx not in removed_set
+            ]
+            # Linhas vazias nas pontas saem junto (mesmo efeito do strip("\n"))
+            while kept and not kept[0][1]:
+                kept.pop(0)
+            while kept and not kept[-1][1]:
+                kept.pop()
+            text = "\n".join(line for _, line in kept)
+            if not text.strip():
+                continue
+            # block.lines é prefixo das linhas (lean) ou todas (full): filtra
+            # pelo índice, e o primeiro span passa a ser o da 1ª linha restante
+            block.lines = [
+                block.lines[l_idx] for l_idx, _ in kept if l_idx < len(block.lines)
+            ]
+            block.text = text
+            kept_blocks.append(block)
+
+        # Reconstrói texto e offsets da página (locais a page.char_start)
+        offset = page.char_start
+        parts = []
+        for block in kept_blocks:
+            if parts:
+                parts.append("\n")
+                offset += 1
+            block.char_start = offset
+            offset += len(block.text)
+            block.char_end = offset
+            parts.append(block.text)
+        page.blocks = kept_blocks
+        page.text = "".join(parts)
+        page.char_end = offset
+
+    return report
+
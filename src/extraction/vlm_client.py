@@ -10,18 +10,33 @@ Este cliente envia imagens de páginas PDF + prompt de extração ao Qwen3-VL
 e retorna JSON estruturado com dispositivos legais identificados.
 """
 
+import asyncio
 import json
 import logging
 import re
 import time
-from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Iterator, Optional, Sequence
 
 import httpx
 
+from ..llm.endpoint_pool import EndpointPool
 from .vlm_prompts import SYSTEM_PROMPT, PAGE_PROMPT_TEMPLATE
 
 logger = logging.getLogger(__name__)
 
+# repetition_penalty da nova tentativa após loop de repetição no OCR
+OCR_LOOP_REPETITION_PENALTY = 1.1
+
+# Saída estruturada de extract_page: response_format (OpenAI json_schema),
+# guided_json (parâmetro extra do vLLM) ou off (texto livre + _extract_json)
+STRUCTURED_OUTPUT_MODES = ("response_format", "guided_json", "off")
+# Trechos do corpo de um HTTP 400 que indicam schema não suportado
+SCHEMA_ERROR_MARKERS = ("response_format", "guided_json", "schema")
+
 
 def _strip_thinking_block(text: str) -> str:
     """Remove bloco <think>...</think> da resposta do Qwen 3.
@@ -57,6 +72,111 @@ def _extract_json(text: str) -> dict:
         raise ValueError(f"Não foi possível parsear JSON da resposta VLM: {text[:200]}")
 
 
+@lru_cache(maxsize=1)
+def page_response_schema() -> dict:
+    """JSON Schema da resposta de extract_page (VLMPageResponse)."""
+    from .vlm_models import VLMPageResponse
+
+    return VLMPageResponse.model_json_schema()
+
+
+@dataclass
+class VLMCallStats:
+    """Contadores de chamadas ao VLM (acumulado do cliente ou por documento)."""
+    requests: int = 0            # requests HTTP enviadas ao vLLM
+    retries: int = 0             # novas tentativas (erro, JSON inválido, loop, orçamento)
+    parse_failures: int = 0      # JSON irrecuperável mesmo com o fallback regex
+    schema_fallbacks: int = 0    # servidor rejeitou o schema: volta ao texto livre
+    streamed: int = 0
+    loops_aborted: int = 0
+    truncated_pages: int = 0     # loop persistente: texto cortado no início da repetição
+    budget_escalations: int = 0
+    completion_tokens: int = 0
+    wasted_tokens: int = 0       # tokens de respostas descartadas (geradas de novo)
+
+    def add(self, **counts: int) -> None:
+        for name, value in counts.items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# Contadores do escopo atual (ex: um documento) — ver collect_vlm_stats()
+_current_stats: ContextVar[Optional[VLMCallStats]] = ContextVar("vlm_call_stats", default=None)
+
+
+@contextmanager
+def collect_vlm_stats(stats: Optional[VLMCallStats] = None) -> Iterator[VLMCallStats]:
+    """
+    Acumula em `stats` as chamadas ao VLM feitas dentro do bloco.
+
+    Vale para tasks asyncio criadas dentro do bloco e para asyncio.run()
+    chamado dentro dele (ambos copiam o contexto), então um cliente
+    compartilhado entre documentos ainda separa os números de cada um.
+    """
+    stats = stats if stats is not None else VLMCallStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class OCRText(str):
+    """
+    Texto de ocr_page (um str comum para quem só usa o texto).
+
+    truncated=True: o loop de repetição persistiu mesmo com
+    repetition_penalty e o texto foi cortado no início da repetição — a
+    página fica marcada (PageData.ocr_truncated) e não entra no cache de OCR.
+    """
+
+    def __new__(cls, text: str = "", truncated: bool = False):
+        obj = super().__new__(cls, text)
+        obj.truncated = truncated
+        return obj
+
+
+@dataclass
+class _OCRCompletion:
+    """Resultado bruto de uma chamada de OCR."""
+    content: str
+    finish_reason: Optional[str] = None
+    completion_tokens: Optional[int] = None
+    looped: bool = False  # abortada pelo RepetitionGuard (content já sem a repetição)
+
+
+# aclose() agendados por _close_clients no loop em execução (referência forte)
+_closing_tasks: set = set()
+
+
+def _close_clients(clients: Sequence[httpx.AsyncClient]) -> None:
+    """
+    Fecha httpx.AsyncClient substituídos por reset_client().
+
+    Com event loop rodando, agenda aclose() nele; sem loop, fecha num loop
+    descartável. Conexões abertas num loop que já terminou não podem mais
+    ser fechadas (o erro é ignorado) — por isso quem usa asyncio.run()
+    fecha o cliente antes de o loop acabar (IngestionPipeline._run_vlm).
+    """
+    pending = [client for client in clients if not client.is_closed]
+    if not pending:
+        return
+
+    async def close_all():
+        await asyncio.gather(*(client.aclose() for client in pending), return_exceptions=True)
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(close_all())
+        return
+    task = loop.create_task(close_all())
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
+
+
 class VLMClient:
     """Cliente assíncrono para Qwen3.5-27B via vLLM (multimodal)."""
 
@@ -67,6 +187,11 @@ class VLMClient:
         timeout: float = 120.0,
         max_retries: int = 3,
         retry_delay: float = 2.0,
+        ocr_stream: bool = False,
+        ocr_max_tokens: int = 8192,
+        base_urls: Optional[Sequence[str]] = None,
+        endpoint_cooloff_seconds: float = 30.0,
+        structured_output: str = "response_format",
     ):
         """
         Args:
@@ -75,26 +200,77 @@ class VLMClient:
             timeout: Timeout por request em segundos
             max_retries: Número máximo de tentativas por página
             retry_delay: Delay base entre retries (multiplica por tentativa)
+            ocr_stream: OCR em streaming com aborto em loop de repetição
+            ocr_max_tokens: Teto de max_tokens do OCR por página
+            base_urls: Réplicas vLLM (default: só base_url); cada request vai
+                para a com menos requests em voo (EndpointPool)
+            endpoint_cooloff_seconds: Tempo fora do pool após falhas seguidas
+            structured_output: Como extract_page restringe a saída ao schema
+                (STRUCTURED_OUTPUT_MODES); "off" = só _extract_json
         """
-        self.base_url = base_url
+        if structured_output not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(
+                f"structured_output inválido: {structured_output!r} "
+                f"(esperado: {', '.join(STRUCTURED_OUTPUT_MODES)})"
+            )
+        self.endpoints = EndpointPool(
+            base_urls or [base_url], cooloff_seconds=endpoint_cooloff_seconds,
+        )
+        self.base_url = self.endpoints.urls[0]
         self.model = model
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.ocr_stream = ocr_stream
+        self.ocr_max_tokens = ocr_max_tokens
+        self.structured_output = structured_output
+        # Contadores acumulados do cliente (por documento: collect_vlm_stats)
+        self.stats = VLMCallStats()
         self._timeout = timeout
-        self._client = self._make_client()
-        logger.info(f"VLMClient inicializado: {base_url} (model={model})")
+        self.reset_client()
+        logger.info(
+            f"VLMClient inicializado: {', '.join(self.endpoints.urls)} (model={model})"
+        )
 
-    def _make_client(self) -> httpx.AsyncClient:
+    def _make_client(self, base_url: str) -> httpx.AsyncClient:
         """Cria um httpx.AsyncClient novo (desvinculado de event loops anteriores)."""
         return httpx.AsyncClient(
-            base_url=self.base_url,
+            base_url=base_url,
             timeout=self._timeout,
             headers={"Content-Type": "application/json"},
         )
 
     def reset_client(self) -> None:
-        """Recria o httpx.AsyncClient para uso em um novo event loop."""
-        self._client = self._make_client()
+        """
+        Recria os httpx.AsyncClient (um por endpoint) para um novo event loop
+        e fecha os substituídos (_close_clients).
+        """
+        replaced = list(getattr(self, "_clients", {}).values())
+        self._clients = {url: self._make_client(url) for url in self.endpoints.urls}
+        self._client = self._clients[self.base_url]
+        _close_clients(replaced)
+
+    def _count(self, **counts: int) -> None:
+        """Soma nos contadores do cliente e do escopo atual (collect_vlm_stats)."""
+        self.stats.add(**counts)
+        scoped = _current_stats.get()
+        if scoped is not None and scoped is not self.stats:
+            scoped.add(**counts)
+
+    async def _backoff(self, attempt: int) -> None:
+        """Espera antes da próxima tentativa (se houver) e conta o retry."""
+        if attempt < self.max_retries - 1:
+            self._count(retries=1)
+            await asyncio.sleep(self.retry_delay * (attempt + 1))
+
+    async def _post(self, payload: dict) -> httpx.Response:
+        """POST /chat/completions no endpoint com menos requests em voo."""
+        self._count(requests=1)
+        with self.endpoints.lease() as endpoint:
+            response = await self._clients[endpoint.url].post(
+                "/chat/completions", json=payload,
+            )
+            response.raise_for_status()
+            return response
 
     async def extract_page(
         self,
@@ -102,15 +278,17 @@ class VLMClient:
         prompt: Optional[str] = None,
         temperature: float = 0.0,
         max_tokens: int = 8192,
+        image_mime: str = "image/png",
     ) -> dict:
         """
         Envia imagem de uma página + prompt ao Qwen3-VL e retorna JSON.
 
         Args:
-            image_base64: Imagem da página em base64 (PNG)
+            image_base64: Imagem da página em base64
             prompt: Prompt de extração (default: PAGE_PROMPT_TEMPLATE)
             temperature: Temperatura de geração (0.0 para determinístico)
             max_tokens: Máximo de tokens na resposta
+            image_mime: MIME type da imagem (image/png, image/jpeg, image/webp)
 
         Returns:
             Dict com campo "devices" contendo dispositivos extraídos
@@ -129,7 +307,7 @@ class VLMClient:
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{image_base64}",
+                            "url": f"data:{image_mime};base64,{image_base64}",
                         },
                     },
                     {
@@ -146,17 +324,16 @@ class VLMClient:
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
+        self._apply_schema(payload)
 
         last_error = None
-        for attempt in range(self.max_retries):
+        attempt = 0
+        while attempt < self.max_retries:
+            completion_tokens = 0
             try:
                 start_time = time.time()
 
-                response = await self._client.post(
-                    "/chat/completions",
-                    json=payload,
-                )
-                response.raise_for_status()
+                response = await self._post(payload)
 
                 elapsed = time.time() - start_time
                 data = response.json()
@@ -169,13 +346,15 @@ class VLMClient:
 
                 # Log métricas
                 usage = data.get("usage", {})
+                completion_tokens = usage.get("completion_tokens") or 0
+                self._count(completion_tokens=completion_tokens)
                 logger.debug(
                     f"VLM response: {elapsed:.2f}s, "
                     f"prompt_tokens={usage.get('prompt_tokens', '?')}, "
                     f"completion_tokens={usage.get('completion_tokens', '?')}"
                 )
 
-                # Parseia JSON
+                # Parseia JSON (com schema já vem válido; regex é o fallback)
                 result = _extract_json(content)
 
                 # Garante que tem o campo "devices"
@@ -185,61 +364,111 @@ class VLMClient:
                 return result
 
             except httpx.HTTPStatusError as e:
+                if self._drop_schema(payload, e):
+                    continue
                 last_error = e
                 logger.warning(
                     f"VLM HTTP error (attempt {attempt + 1}/{self.max_retries}): "
                     f"{e.response.status_code} - {e.response.text[:200]}"
                 )
-                if attempt < self.max_retries - 1:
-                    import asyncio
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                await self._backoff(attempt)
 
             except httpx.TimeoutException as e:
                 last_error = e
                 logger.warning(
                     f"VLM timeout (attempt {attempt + 1}/{self.max_retries}): {e}"
                 )
-                if attempt < self.max_retries - 1:
-                    import asyncio
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                await self._backoff(attempt)
+
+            except httpx.TransportError as e:
+                # Réplica fora do ar: a próxima tentativa vai para outro endpoint
+                last_error = e
+                logger.warning(
+                    f"VLM erro de conexão (attempt {attempt + 1}/{self.max_retries}): {e}"
+                )
+                await self._backoff(attempt)
 
             except ValueError as e:
-                # JSON parse error — retry com temperatura mais baixa
+                # JSON parse error — a página inteira é gerada de novo
                 last_error = e
+                self._count(parse_failures=1, wasted_tokens=completion_tokens)
                 logger.warning(
                     f"VLM JSON parse error (attempt {attempt + 1}/{self.max_retries}): {e}"
                 )
-                if attempt < self.max_retries - 1:
-                    # Reduz temperatura para tentar resposta mais determinística
-                    payload["temperature"] = 0.0
-                    import asyncio
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                # Reduz temperatura para tentar resposta mais determinística
+                payload["temperature"] = 0.0
+                await self._backoff(attempt)
 
             except Exception as e:
                 last_error = e
                 logger.error(f"VLM unexpected error: {e}")
                 raise
 
+            attempt += 1
+
         raise RuntimeError(
             f"VLM falhou após {self.max_retries} tentativas: {last_error}"
         )
 
+    def _apply_schema(self, payload: dict) -> None:
+        """Restringe a saída de extract_page ao schema (structured_output)."""
+        if self.structured_output == "response_format":
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "vlm_page", "schema": page_response_schema()},
+            }
+        elif self.structured_output == "guided_json":
+            payload["guided_json"] = page_response_schema()
+
+    def _drop_schema(self, payload: dict, error: httpx.HTTPStatusError) -> bool:
+        """
+        HTTP 400 que cita o schema: o servidor não suporta guided decoding.
+        Tira o schema só deste request e repete sem gastar tentativa; os
+        próximos requests tentam o schema de novo (400 por outro motivo —
+        imagem grande demais, contexto estourado — segue como erro HTTP).
+        """
+        if error.response.status_code != 400:
+            return False
+        if "response_format" not in payload and "guided_json" not in payload:
+            return False
+        body = error.response.text.lower()
+        if not any(marker in body for marker in SCHEMA_ERROR_MARKERS):
+            return False
+        logger.warning(
+            f"VLM: servidor rejeitou structured_output={self.structured_output} "
+            f"({error.response.text[:200]}); request repetido em texto livre + _extract_json"
+        )
+        payload.pop("response_format", None)
+        payload.pop("guided_json", None)
+        self._count(schema_fallbacks=1)
+        return True
+
     async def ocr_page(
         self,
         image_base64: str,
         temperature: float = 0.0,
-        max_tokens: int = 8192,
+        max_tokens: Optional[int] = None,
+        image_mime: str = "image/png",
     ) -> str:
         """
         OCR de uma página via VLM. Retorna texto bruto (não JSON).
 
+        Com ocr_stream, a resposta chega em streaming e é abortada assim que
+        o RepetitionGuard detecta loop (a conexão é fechada e o vLLM
+        descarta a request); repete uma vez com repetition_penalty e, se
+        ainda houver loop, fica com o texto até o início da repetição
+        (OCRText.truncated=True).
+
         Args:
-            image_base64: Imagem da página em base64 (PNG)
+            image_base64: Imagem da página em base64
             temperature: Temperatura de geração (0.0 para determinístico)
-            max_tokens: Máximo de tokens na resposta
+            max_tokens: Orçamento de tokens da página (default e teto:
+                ocr_max_tokens). Se a resposta for cortada por um orçamento
+                menor que o teto, repete uma vez com ocr_max_tokens.
+            image_mime: MIME type da imagem (image/png, image/jpeg, image/webp)
 
         Returns:
-            Texto transcrito da página
+            OCRText com o texto transcrito da página
 
         Raises:
             RuntimeError: Se todas as tentativas falharem
@@ -254,7 +483,7 @@ class VLMClient:
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{image_base64}",
+                            "url": f"data:{image_mime};base64,{image_base64}",
                         },
                     },
                     {
@@ -269,38 +498,63 @@ class VLMClient:
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
-            "max_tokens": max_tokens,
+            "max_tokens": min(max_tokens or self.ocr_max_tokens, self.ocr_max_tokens),
         }
 
         last_error = None
-        for attempt in range(self.max_retries):
+        attempt = 0
+        while attempt < self.max_retries:
             try:
                 start_time = time.time()
-
-                response = await self._client.post(
-                    "/chat/completions",
-                    json=payload,
-                )
-                response.raise_for_status()
-
+                completion = await self._ocr_completion(payload)
                 elapsed = time.time() - start_time
-                data = response.json()
-
-                # Extrai conteúdo da resposta
-                content = data["choices"][0]["message"]["content"]
 
-                # Remove bloco <think> se presente
-                content = _strip_thinking_block(content)
-
-                # Log métricas
-                usage = data.get("usage", {})
                 logger.debug(
                     f"VLM OCR response: {elapsed:.2f}s, "
-                    f"prompt_tokens={usage.get('prompt_tokens', '?')}, "
-                    f"completion_tokens={usage.get('completion_tokens', '?')}"
+                    f"max_tokens={payload['max_tokens']}, "
+                    f"completion_tokens={completion.completion_tokens or '?'}, "
+                    f"finish_reason={completion.finish_reason}"
                 )
+                completion_tokens = completion.completion_tokens or 0
+                self._count(completion_tokens=completion_tokens)
+
+                # Orçamento adaptativo curto demais: repete com o teto
+                if (
+                    completion.finish_reason == "length"
+                    and payload["max_tokens"] < self.ocr_max_tokens
+                ):
+                    self._count(
+                        budget_escalations=1, retries=1, wasted_tokens=completion_tokens,
+                    )
+                    logger.info(
+                        f"VLM OCR: resposta cortada em max_tokens={payload['max_tokens']}, "
+                        f"repetindo com {self.ocr_max_tokens}"
+                    )
+                    payload["max_tokens"] = self.ocr_max_tokens
+                    continue
+
+                if completion.looped:
+                    self._count(loops_aborted=1)
+                    if "repetition_penalty" not in payload:
+                        self._count(retries=1, wasted_tokens=completion_tokens)
+                        logger.warning(
+                            f"VLM OCR: loop de repetição abortado após "
+                            f"{len(completion.content)} chars, repetindo com "
+                            f"repetition_penalty={OCR_LOOP_REPETITION_PENALTY}"
+                        )
+                        payload["repetition_penalty"] = OCR_LOOP_REPETITION_PENALTY
+                        continue
+                    self._count(truncated_pages=1)
+                    logger.warning(
+                        "VLM OCR: loop de repetição persistente, mantendo texto "
+                        "até o início da repetição (página truncada)"
+                    )
 
-                return content.strip()
+                # Remove bloco <think> se presente
+                return OCRText(
+                    _strip_thinking_block(completion.content).strip(),
+                    truncated=completion.looped,
+                )
 
             except httpx.HTTPStatusError as e:
                 last_error = e
@@ -308,42 +562,113 @@ class VLMClient:
                     f"VLM OCR HTTP error (attempt {attempt + 1}/{self.max_retries}): "
                     f"{e.response.status_code} - {e.response.text[:200]}"
                 )
-                if attempt < self.max_retries - 1:
-                    import asyncio
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                await self._backoff(attempt)
 
             except httpx.TimeoutException as e:
                 last_error = e
                 logger.warning(
                     f"VLM OCR timeout (attempt {attempt + 1}/{self.max_retries}): {e}"
                 )
-                if attempt < self.max_retries - 1:
-                    import asyncio
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                await self._backoff(attempt)
+
+            except httpx.TransportError as e:
+                # Réplica fora do ar: a próxima tentativa vai para outro endpoint
+                last_error = e
+                logger.warning(
+                    f"VLM OCR erro de conexão (attempt {attempt + 1}/{self.max_retries}): {e}"
+                )
+                await self._backoff(attempt)
 
             except Exception as e:
                 last_error = e
                 logger.error(f"VLM OCR unexpected error: {e}")
                 raise
 
+            attempt += 1
+
         raise RuntimeError(
             f"VLM OCR falhou após {self.max_retries} tentativas: {last_error}"
         )
 
-    async def health_check(self) -> bool:
-        """Verifica se o servidor VLM está respondendo."""
-        try:
-            response = await self._client.get("/models")
-            response.raise_for_status()
+    async def _ocr_completion(self, payload: dict) -> "_OCRCompletion":
+        """Uma chamada /chat/completions de OCR (streaming ou não)."""
+        if not self.ocr_stream:
+            response = await self._post(payload)
             data = response.json()
-            models = [m["id"] for m in data.get("data", [])]
-            return len(models) > 0
-        except Exception:
-            return False
+            choice = data["choices"][0]
+            return _OCRCompletion(
+                content=choice["message"]["content"] or "",
+                finish_reason=choice.get("finish_reason"),
+                completion_tokens=data.get("usage", {}).get("completion_tokens"),
+            )
+
+        from .vlm_ocr import RepetitionGuard
+
+        self._count(requests=1, streamed=1)
+        guard = RepetitionGuard()
+        finish_reason = None
+        usage: dict = {}
+        stream_payload = {
+            **payload,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        with self.endpoints.lease() as endpoint:
+            async with self._clients[endpoint.url].stream(
+                "POST", "/chat/completions", json=stream_payload,
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    for choice in chunk.get("choices", []):
+                        delta = (choice.get("delta") or {}).get("content") or ""
+                        if guard.feed(delta):
+                            # Sair do contexto fecha a conexão: o vLLM aborta a geração
+                            return _OCRCompletion(
+                                content=guard.text(),
+                                completion_tokens=guard.estimated_tokens(),
+                                looped=True,
+                            )
+                        finish_reason = choice.get("finish_reason") or finish_reason
+
+        return _OCRCompletion(
+            content=guard.text(),
+            finish_reason=finish_reason,
+            completion_tokens=usage.get("completion_tokens"),
+        )
+
+    async def endpoint_health(self) -> dict:
+        """GET /models em cada réplica do pool, em paralelo: {url: respondendo}."""
+
+        async def probe(url: str) -> bool:
+            try:
+                response = await self._clients[url].get("/models")
+                response.raise_for_status()
+                return len(response.json().get("data", [])) > 0
+            except Exception as e:
+                logger.warning(f"VLM health check: {url} não respondeu ({e})")
+                return False
+
+        urls = self.endpoints.urls
+        return dict(zip(urls, await asyncio.gather(*(probe(url) for url in urls))))
+
+    async def health_check(self) -> bool:
+        """Verifica se alguma réplica VLM responde (o pool desvia das demais)."""
+        return any((await self.endpoint_health()).values())
 
     async def close(self):
-        """Fecha o cliente HTTP."""
-        await self._client.aclose()
+        """Fecha os clientes HTTP."""
+        for client in self._clients.values():
+            await client.aclose()
 
     async def __aenter__(self):
         return self
@@ -3,12 +3,14 @@ Modelos Pydantic para o pipeline VLM de extração de estrutura.
 
 Define os modelos de dados para:
 - BlockData: bloco de texto PyMuPDF com offset no canonical_text
+- ImagePolicy: política de renderização das imagens de página (DPI/formato)
 - PageData: dados brutos de uma página extraídos via PyMuPDF
 - DeviceExtraction: um dispositivo legal extraído pelo VLM
 - PageExtraction: resultado da extração VLM de uma página
 - DocumentExtraction: resultado completo da extração VLM do documento
 """
 
+import base64
 from dataclasses import dataclass, field
 from pydantic import BaseModel, Field
 
@@ -27,13 +29,41 @@ class BlockData:
     has_strikethrough: bool = False  # True se linhas de riscado cruzam o bloco
 
 
+IMAGE_MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class ImagePolicy:
+    """
+    Política de renderização das imagens de página enviadas ao VLM.
+
+    max_pixels limita width*height do pixmap ao orçamento de visão do modelo:
+    acima disso o DPI efetivo é reduzido proporcionalmente (0 = sem limite).
+    """
+
+    max_pixels: int = 0        # Limite de pixels por página (0 = só o DPI)
+    grayscale: bool = False    # Renderiza em tons de cinza (1 canal)
+    image_format: str = "png"  # png | jpeg | webp
+    quality: int = 85          # Qualidade JPEG/WebP (ignorado para PNG)
+
+    def __post_init__(self):
+        if self.image_format not in IMAGE_MIME_TYPES:
+            raise ValueError(
+                f"image_format inválido: {self.image_format!r} "
+                f"(esperado: {', '.join(IMAGE_MIME_TYPES)})"
+            )
+
+
 @dataclass
 class PageData:
     """Dados brutos de uma página extraídos via PyMuPDF."""
 
     page_number: int           # 1-indexed
-    image_png: bytes           # PNG da página renderizada
-    image_base64: str          # Base64 do PNG
+    image_bytes: bytes         # Imagem da página renderizada (ver image_format)
     text: str                  # Texto concatenado dos blocos desta página
     width: float               # Largura da página em pontos PDF
     height: float              # Altura da página em pontos PDF
@@ -42,6 +72,25 @@ class PageData:
     blocks: list[BlockData] = field(default_factory=list)  # Blocos com offsets
     char_start: int = 0        # Offset do início desta página no canonical_text
     char_end: int = 0          # Offset do fim desta página no canonical_text
+    image_format: str = "png"  # png | jpeg | webp
+    image_coverage: float = 0.0  # Fração da área da página coberta por imagens
+    text_source: str = "native"  # native (PyMuPDF) | ocr (Qwen3-VL)
+    ocr_truncated: bool = False  # OCR cortado por loop de repetição persistente
+
+    @property
+    def image_mime(self) -> str:
+        return IMAGE_MIME_TYPES.get(self.image_format, "image/png")
+
+    @property
+    def image_base64(self) -> str:
+        """Base64 da imagem, gerado sob demanda (não fica retido na página)."""
+        if not self.image_bytes:
+            return ""
+        return base64.b64encode(self.image_bytes).decode("ascii")
+
+    def release_image(self) -> None:
+        """Libera a imagem após o processamento da página pelo VLM."""
+        self.image_bytes = b""
 
 
 @dataclass
@@ -70,6 +119,12 @@ class PageExtraction(BaseModel):
     devices: list[DeviceExtraction] = Field(default_factory=list)
 
 
+class VLMPageResponse(BaseModel):
+    """Resposta de extract_page (schema enviado ao vLLM no guided decoding)."""
+
+    devices: list[DeviceExtraction] = Field(default_factory=list)
+
+
 class DocumentExtraction(BaseModel):
     """Resultado completo da extração VLM do documento."""
 
@@ -80,3 +135,4 @@ class DocumentExtraction(BaseModel):
     total_devices: int = Field(0, description="Total de dispositivos extraídos")
     pages_data: list = Field(default_factory=list, description="list[PageData] com blocos e offsets (não serializado)")
     debug_artifacts: list[dict] = Field(default_factory=list, description="Raw VLM JSON por página (quando debug_artifacts=True)")
+    vlm_stats: dict = Field(default_factory=dict, description="Requests, retries e tokens desperdiçados no VLM (VLMCallStats)")
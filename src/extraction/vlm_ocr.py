@@ -9,10 +9,11 @@ A única variável entre Entrada 1 e 2 é DE ONDE vem o texto:
   - Entrada 2: Qwen3-VL faz OCR das imagens das páginas
 """
 
+import hashlib
 import re
 import logging
 import unicodedata
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from .vlm_models import BlockData, PageData
 
@@ -37,6 +38,12 @@ OCR_PAGE_PROMPT = (
     "Mantenha as quebras de linha entre paragrafos."
 )
 
+# Versão dos prompts OCR (parte da chave do OCRPageCache): muda sozinha
+# quando qualquer prompt é editado, invalidando o texto OCR em cache.
+OCR_PROMPT_VERSION = hashlib.sha256(
+    f"{OCR_SYSTEM_PROMPT}\0{OCR_PAGE_PROMPT}".encode("utf-8")
+).hexdigest()[:16]
+
 # ============================================================================
 # Regex para detectar início de dispositivo legal (split points)
 # ============================================================================
@@ -209,8 +216,8 @@ def ocr_to_pages_data(
 
         pages_data.append(PageData(
             page_number=pn,
-            image_png=pymupdf_page.image_png,
-            image_base64=pymupdf_page.image_base64,
+            image_bytes=pymupdf_page.image_bytes,
+            image_format=pymupdf_page.image_format,
             text=canonical_text[ps:pe] if ps < pe else "",
             width=pymupdf_page.width,
             height=pymupdf_page.height,
@@ -219,11 +226,188 @@ def ocr_to_pages_data(
             blocks=block_data_list,
             char_start=ps,
             char_end=pe,
+            image_coverage=pymupdf_page.image_coverage,
+            text_source="ocr",
         ))
 
     return pages_data
 
 
+def ocr_text_to_page_data(pymupdf_page: PageData, ocr_text: str) -> PageData:
+    """
+    Substitui o texto nativo de uma página pelo texto OCR (modo híbrido).
+
+    Retorna PageData com blocos OCR sintéticos e offsets LOCAIS à página
+    (char_start=0); o chamador recalcula os offsets globais do documento
+    com PyMuPDFExtractor.relayout_pages().
+    """
+    pn = pymupdf_page.page_number
+    blocks, page_text, _ = split_ocr_into_blocks([(pn, ocr_text)])
+    page_text = page_text.rstrip("\n")
+
+    block_data_list = [
+        BlockData(
+            block_index=b["block_index"],
+            char_start=b["char_start"],
+            char_end=b["char_end"],
+            bbox_pdf=[],
+            text=b["text"],
+            page_number=pn,
+            lines=[],
+        )
+        for b in blocks
+    ]
+
+    return PageData(
+        page_number=pn,
+        image_bytes=pymupdf_page.image_bytes,
+        image_format=pymupdf_page.image_format,
+        text=page_text,
+        width=pymupdf_page.width,
+        height=pymupdf_page.height,
+        img_width=pymupdf_page.img_width,
+        img_height=pymupdf_page.img_height,
+        blocks=block_data_list,
+        char_start=0,
+        char_end=len(page_text),
+        image_coverage=pymupdf_page.image_coverage,
+        text_source="ocr",
+    )
+
+
+# ============================================================================
+# Orçamento de tokens e guarda de repetição (OCR em streaming)
+# ============================================================================
+
+# Português jurídico no tokenizer do Qwen: ~3,5-4 chars/token; 3 é conservador
+OCR_CHARS_PER_TOKEN = 3.0
+# Folga sobre a estimativa (OCR costuma sair um pouco maior que o texto nativo)
+OCR_BUDGET_MARGIN = 1.5
+OCR_BUDGET_MIN_TOKENS = 512
+# Página A4 cheia de texto, quando não há texto nativo para medir densidade
+OCR_FULL_PAGE_TOKENS = 2560
+_A4_AREA_PT = 595.0 * 842.0
+# Abaixo disso o texto nativo não mede densidade (página escaneada)
+_NATIVE_MIN_CHARS = 200
+
+
+def ocr_token_budget(page_data: PageData, max_tokens: int) -> int:
+    """
+    max_tokens para o OCR de uma página, em vez do teto fixo.
+
+    Com texto nativo (mesmo ruim, no modo híbrido) a densidade vem do
+    número de caracteres; em páginas escaneadas, da área da página
+    relativa a uma A4 cheia. Se a estimativa for curta demais, o
+    VLMClient detecta finish_reason="length" e repete com max_tokens.
+    """
+    native_chars = len(page_data.text.strip())
+    if native_chars >= _NATIVE_MIN_CHARS:
+        estimate = native_chars / OCR_CHARS_PER_TOKEN
+    else:
+        area = max(page_data.width * page_data.height, 0.0) or _A4_AREA_PT
+        estimate = OCR_FULL_PAGE_TOKENS * area / _A4_AREA_PT
+    budget = int(estimate * OCR_BUDGET_MARGIN) + 256
+    return max(min(budget, max_tokens), min(OCR_BUDGET_MIN_TOKENS, max_tokens))
+
+
+_RE_WORD = re.compile(r"\S+")
+
+
+class RepetitionGuard:
+    """
+    Detecta loop de repetição no texto gerado, incrementalmente.
+
+    O Qwen às vezes entra em loop (mesma linha ou frase repetida até
+    max_tokens). Há loop quando as últimas palavras são k repetições
+    consecutivas de um mesmo n-grama de n palavras, com n <= max_period,
+    k >= min_repeats e n*k >= min_span_words — texto legal real não
+    repete a mesma frase várias vezes seguidas (numerais de incisos e
+    parágrafos mudam). O n-grama repetido precisa ter ao menos
+    min_ngram_chars: pontilhados de sumário (". . . .") e células de
+    tabela ("| - | - |") repetem unidades curtas legitimamente. Uma
+    "palavra" sem espaço maior que max_word_chars também conta como loop.
+
+    Uso: feed(delta) a cada pedaço do stream; True = abortar.
+    text() devolve o texto até o fim da primeira ocorrência do n-grama.
+    """
+
+    def __init__(
+        self,
+        max_period: int = 40,
+        min_repeats: int = 3,
+        min_span_words: int = 64,
+        max_word_chars: int = 1000,
+        min_ngram_chars: int = 16,
+    ):
+        self.max_period = max_period
+        self.min_repeats = min_repeats
+        self.min_span_words = min_span_words
+        self.min_ngram_chars = min_ngram_chars
+        self.max_word_chars = max_word_chars
+        self._buffer: list[str] = []
+        self._length = 0
+        self._pending = ""          # palavra ainda sem whitespace depois
+        self._pending_start = 0
+        self._words: list[str] = []
+        self._word_starts: list[int] = []
+        self._cut: Optional[int] = None
+
+    @property
+    def looped(self) -> bool:
+        return self._cut is not None
+
+    def estimated_tokens(self) -> int:
+        """Tokens recebidos até aqui (estimativa; o stream abortado não traz usage)."""
+        return int(self._length / OCR_CHARS_PER_TOKEN)
+
+    def text(self) -> str:
+        """Texto recebido (sem a parte repetida, se houve loop)."""
+        text = "".join(self._buffer)
+        return text if self._cut is None else text[:self._cut].rstrip()
+
+    def feed(self, delta: str) -> bool:
+        if self._cut is not None or not delta:
+            return self._cut is not None
+        offset = self._length - len(self._pending)
+        self._buffer.append(delta)
+        self._length += len(delta)
+
+        chunk = self._pending + delta
+        self._pending = ""
+        for match in _RE_WORD.finditer(chunk):
+            if match.end() == len(chunk):
+                # Pode continuar no próximo delta
+                self._pending = match.group()
+                self._pending_start = offset + match.start()
+                break
+            if self._add_word(match.group(), offset + match.start()):
+                return True
+
+        if len(self._pending) > self.max_word_chars:
+            self._cut = self._pending_start
+        return self._cut is not None
+
+    def _add_word(self, word: str, start: int) -> bool:
+        words = self._words
+        words.append(word)
+        self._word_starts.append(start)
+        n_words = len(words)
+        for period in range(1, self.max_period + 1):
+            repeats = max(self.min_repeats, -(-self.min_span_words // period))
+            span = period * repeats
+            if span > n_words:
+                continue
+            if all(words[-i] == words[-i - period] for i in range(1, span - period + 1)):
+                # Menor período que casa: os maiores são múltiplos da mesma unidade
+                ngram_chars = sum(len(w) for w in words[-period:]) + period - 1
+                if ngram_chars < self.min_ngram_chars:
+                    return False
+                # Mantém a primeira ocorrência do n-grama
+                self._cut = self._word_starts[n_words - span + period]
+                return True
+        return False
+
+
 # ============================================================================
 # Quality gate para OCR
 # ============================================================================
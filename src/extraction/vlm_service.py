@@ -4,24 +4,28 @@ VLM Extraction Service - Orquestra a extração VLM de documentos legais.
 Pipeline completo:
 1. PyMuPDF: extrai páginas (blocos com offsets + imagens)
 2. canonical_text construído pelos blocos durante extração (offsets nativos)
-3. Qwen3-VL: extrai estrutura de cada página (sequencial, uma por vez)
+3. Qwen3-VL: extrai estrutura de cada página (concorrente, limitado)
 4. Computa canonical_hash
 5. Retorna DocumentExtraction com pages_data embutido
 
-O processamento é SEQUENCIAL (uma página por vez) porque:
-- O --max-model-len 8192 do vLLM limita o contexto
-- Cada página é processada independentemente
-- Evita sobrecarga de VRAM com múltiplas imagens simultâneas
+Cada página é uma request independente (o --max-model-len 8192 do vLLM
+limita o contexto a uma imagem por request). Até `concurrency` páginas
+ficam em voo ao mesmo tempo para aproveitar o continuous batching do vLLM,
+e a renderização da próxima página (PyMuPDF, em thread) se sobrepõe ao OCR
+das páginas já enviadas. Resultados são remontados na ordem das páginas.
 """
 
+import asyncio
 import logging
-from typing import Optional, Callable
+from typing import Any, Awaitable, Optional, Callable
 
 from typing import List, Tuple
 
+from ..utils.cancellation import IngestCancelledError
 from ..utils.canonical_utils import normalize_canonical_text, compute_canonical_hash
+from .ocr_cache import OCRPageCache, image_digest
 from .pymupdf_extractor import PyMuPDFExtractor
-from .vlm_client import VLMClient
+from .vlm_client import VLMClient, collect_vlm_stats
 from .vlm_models import (
     DeviceExtraction,
     DocumentExtraction,
@@ -32,6 +36,100 @@ from .vlm_models import (
 logger = logging.getLogger(__name__)
 
 
+def is_truncated(ocr_text: Optional[str]) -> bool:
+    """True se o OCR da página foi cortado por loop de repetição (OCRText)."""
+    return bool(getattr(ocr_text, "truncated", False))
+
+
+def _consume(fetch: asyncio.Future) -> None:
+    """Marca o erro de um prefetch descartado como lido (evita warning do asyncio)."""
+    if not fetch.cancelled():
+        fetch.exception()
+
+
+class _PageOCR:
+    """
+    OCR por página de um documento: cache em disco + dedupe de imagens idênticas.
+
+    Uma instância por documento — páginas com a mesma imagem aguardam o
+    mesmo OCR em voo em vez de gerar requests duplicadas.
+    """
+
+    def __init__(self, service: "VLMExtractionService"):
+        self.vlm_client = service.vlm_client
+        self.ocr_cache = service.ocr_cache
+        self.token_budget = service.ocr_token_budget
+        self.in_flight: dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "deduped": 0, "truncated": 0}
+
+    async def ocr(self, page_data: PageData) -> str:
+        """
+        OCR da página; falhas retornam "" (página vazia, nunca em cache).
+        Texto truncado por loop (OCRText.truncated) também não vai ao cache.
+        """
+        page_num = page_data.page_number
+        digest = image_digest(page_data.image_bytes)
+        cache_key = self.ocr_cache.make_key(digest) if self.ocr_cache else None
+
+        if cache_key is not None:
+            cached = self.ocr_cache.get(cache_key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                logger.info(f"VLM OCR página {page_num}: cache hit")
+                return cached
+
+        pending = self.in_flight.get(digest)
+        if pending is not None:
+            self.stats["deduped"] += 1
+            logger.info(f"VLM OCR página {page_num}: imagem idêntica em voo")
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[digest] = future
+        self.stats["misses"] += 1
+
+        logger.info(f"VLM OCR: processando página {page_num}")
+        ocr_text = ""
+        kwargs = {}
+        if self.token_budget:
+            from .vlm_ocr import ocr_token_budget
+
+            kwargs["max_tokens"] = ocr_token_budget(page_data, self.vlm_client.ocr_max_tokens)
+        try:
+            ocr_text = await self.vlm_client.ocr_page(
+                page_data.image_base64, image_mime=page_data.image_mime, **kwargs,
+            )
+            logger.info(
+                f"VLM OCR página {page_num}: {len(ocr_text)} chars extraídos"
+            )
+            if is_truncated(ocr_text):
+                self.stats["truncated"] += 1
+                logger.warning(f"VLM OCR página {page_num}: texto truncado (loop), fora do cache")
+            elif cache_key is not None:
+                self.ocr_cache.put(cache_key, ocr_text)
+            return ocr_text
+        except Exception as e:
+            logger.error(
+                f"Erro VLM OCR na página {page_num}: {e}",
+                exc_info=True,
+            )
+            # Página sem texto OCR — registra como vazia
+            return ""
+        finally:
+            self.in_flight.pop(digest, None)
+            future.set_result(ocr_text)
+
+    def log_stats(self) -> None:
+        logger.info(
+            f"VLM OCR: {self.stats['misses']} páginas enviadas ao vLLM, "
+            f"{self.stats['hits']} do cache, {self.stats['deduped']} duplicadas, "
+            f"{self.stats['truncated']} truncadas por loop"
+        )
+        client_stats = getattr(self.vlm_client, "stats", None)
+        if client_stats is not None:
+            logger.info(f"VLM (acumulado do cliente): {client_stats.to_dict()}")
+
+
 class VLMExtractionService:
     """Orquestra extração: PyMuPDF -> Qwen3-VL -> DocumentExtraction."""
 
@@ -39,14 +137,125 @@ class VLMExtractionService:
         self,
         vlm_client: VLMClient,
         pymupdf_extractor: PyMuPDFExtractor,
+        concurrency: int = 4,
+        release_images: bool = True,
+        ocr_cache: Optional[OCRPageCache] = None,
+        ocr_token_budget: bool = False,
     ):
         """
         Args:
             vlm_client: Cliente multimodal para Qwen3-VL
             pymupdf_extractor: Extrator PyMuPDF para páginas
+            concurrency: Máximo de páginas em voo simultaneamente no vLLM
+            release_images: Libera a imagem de cada página assim que o VLM
+                a processa (quem ainda usa as imagens depois — ex: snapshot
+                de inspeção do pipeline — passa False e libera ao final)
+            ocr_cache: Cache em disco de texto OCR por página (opcional)
+            ocr_token_budget: max_tokens do OCR por página, estimado pela
+                densidade do texto nativo ou pela área da página
+                (vlm_ocr.ocr_token_budget); False = teto fixo do cliente
         """
         self.vlm_client = vlm_client
         self.pymupdf_extractor = pymupdf_extractor
+        self.concurrency = max(1, concurrency)
+        self.release_images = release_images
+        self.ocr_cache = ocr_cache
+        self.ocr_token_budget = ocr_token_budget
+
+    async def _process_pages(
+        self,
+        pdf_bytes: bytes,
+        process_page: Callable[[PageData], Awaitable[Any]],
+        on_page_done: Optional[Callable[[int, int], None]] = None,
+    ) -> Tuple[List[PageData], List[Any]]:
+        """
+        Renderiza páginas e as processa com no máximo `concurrency` em voo.
+
+        A renderização (PyMuPDF, CPU) roda em thread e só avança quando há
+        vaga no semáforo, então no máximo `concurrency` páginas renderizadas
+        aguardam resposta do VLM — o uso de memória fica limitado.
+
+        Args:
+            pdf_bytes: Conteúdo binário do PDF
+            process_page: Corrotina por página; deve tratar os próprios erros
+            on_page_done: Callback (concluídas, total) a cada página finalizada
+
+        Returns:
+            Tupla (pages, results) na ordem das páginas
+        """
+        total_pages = await asyncio.to_thread(
+            self.pymupdf_extractor.count_pages, pdf_bytes,
+        )
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pages: List[PageData] = []
+        tasks: List[asyncio.Task] = []
+        completed = 0
+        # Erro do on_page_done (ex: IngestCancelledError): para de enviar páginas
+        aborted: List[BaseException] = []
+
+        async def run(page: PageData) -> Any:
+            nonlocal completed
+            try:
+                return await process_page(page)
+            finally:
+                if self.release_images:
+                    page.release_image()
+                completed += 1
+                try:
+                    if on_page_done and not aborted:
+                        on_page_done(completed, total_pages)
+                except BaseException as e:
+                    aborted.append(e)
+                    raise
+                finally:
+                    semaphore.release()
+
+        page_iter = self.pymupdf_extractor.iter_pages(pdf_bytes)
+        # Renderização em andamento na thread (sobrevive ao cancelamento do await)
+        fetch: Optional[asyncio.Future] = None
+        try:
+            while True:
+                await semaphore.acquire()
+                if aborted:
+                    raise aborted[0]
+                fetch = asyncio.ensure_future(asyncio.to_thread(next, page_iter, None))
+                page = await asyncio.shield(fetch)
+                if page is None:
+                    semaphore.release()
+                    break
+                pages.append(page)
+                tasks.append(asyncio.create_task(run(page)))
+
+            results = await asyncio.gather(*tasks)
+            if aborted:
+                raise aborted[0]
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            await self._close_page_iter(page_iter, fetch)
+
+        return pages, list(results)
+
+    @staticmethod
+    async def _close_page_iter(page_iter, fetch: Optional[asyncio.Future]) -> None:
+        """
+        Fecha o gerador de páginas após a thread de renderização terminar.
+
+        Cancelar o await não interrompe next() na thread; fechar o gerador
+        nesse meio-tempo levantaria "generator already executing".
+        """
+        if fetch is not None and not fetch.done():
+            try:
+                await asyncio.wait({fetch})
+            except asyncio.CancelledError:
+                # Cancelado de novo: fecha quando a thread devolver o controle
+                fetch.add_done_callback(lambda f: (_consume(f), page_iter.close()))
+                raise
+        if fetch is not None:
+            _consume(fetch)
+        page_iter.close()
 
     async def extract_document(
         self,
@@ -59,7 +268,7 @@ class VLMExtractionService:
 
         1. PyMuPDF: extrai páginas (blocos com offsets + imagens)
         2. canonical_text construído pelos blocos (offsets nativos)
-        3. Qwen3-VL: extrai estrutura de cada página (sequencial)
+        3. Qwen3-VL: extrai estrutura de cada página (concorrente, ordem preservada)
         4. Computa canonical_hash
         5. Retorna DocumentExtraction
 
@@ -75,60 +284,33 @@ class VLMExtractionService:
             if progress_callback:
                 try:
                     progress_callback(phase, progress)
+                except IngestCancelledError:
+                    raise  # DELETE /ingest: interrompe o OCR
                 except Exception as e:
                     logger.warning(f"Erro no progress_callback: {e}")
 
-        # === Etapa 1: PyMuPDF (blocos + canonical_text) ===
+        # === Etapa 1+2: PyMuPDF (blocos + canonical_text) → Qwen3-VL ===
+        # Renderização e extração VLM sobrepostas, até `concurrency` páginas em voo
         report("pymupdf_extraction", 0.10)
-        logger.info(f"VLM Pipeline: Etapa 1 - Extraindo páginas com PyMuPDF ({document_id})")
-
-        pages_data, raw_canonical = self.pymupdf_extractor.extract_pages(pdf_bytes)
-        total_pages = len(pages_data)
-
-        if total_pages == 0:
-            logger.warning(f"PyMuPDF retornou 0 páginas para {document_id}")
-            return DocumentExtraction(
-                document_id=document_id,
-                pages=[],
-                canonical_text="",
-                canonical_hash="",
-                total_devices=0,
-                pages_data=[],
-            )
-
-        logger.info(f"PyMuPDF: {total_pages} páginas, {len(raw_canonical)} chars")
-        report("pymupdf_extraction", 0.20)
-
-        # === Etapa 2: Qwen3-VL (sequencial, uma página por vez) ===
-        logger.info(f"VLM Pipeline: Etapa 2 - Extraindo estrutura com Qwen3-VL ({total_pages} páginas)")
+        logger.info(
+            f"VLM Pipeline: Etapas 1-2 - PyMuPDF + Qwen3-VL "
+            f"({document_id}, concurrency={self.concurrency})"
+        )
 
         # Check if debug artifacts should be collected
         from ..config import config as app_config
         collect_debug = app_config.debug_artifacts
 
-        page_extractions: list[PageExtraction] = []
-        debug_artifacts_list: list[dict] = []
-        total_devices = 0
-
-        for i, page_data in enumerate(pages_data):
+        async def extract_one(page_data: PageData) -> Tuple[PageExtraction, Optional[dict]]:
             page_num = page_data.page_number
-            progress = 0.20 + (0.60 * (i / total_pages))
-            report("vlm_extraction", progress)
-
-            logger.info(f"VLM: processando página {page_num}/{total_pages}")
+            logger.info(f"VLM: processando página {page_num}")
 
             try:
                 vlm_result = await self.vlm_client.extract_page(
                     image_base64=page_data.image_base64,
+                    image_mime=page_data.image_mime,
                 )
 
-                # Collect raw VLM response for debug
-                if collect_debug:
-                    debug_artifacts_list.append({
-                        "page_number": page_num,
-                        "raw_response": vlm_result,
-                    })
-
                 # Converte resultado VLM para modelo Pydantic
                 devices = []
                 for raw_device in vlm_result.get("devices", []):
@@ -147,27 +329,51 @@ class VLMExtractionService:
                             f"Erro ao parsear dispositivo VLM na página {page_num}: {e}"
                         )
 
-                page_extraction = PageExtraction(
-                    page_number=page_num,
-                    devices=devices,
-                )
-                page_extractions.append(page_extraction)
-                total_devices += len(devices)
-
                 logger.info(
                     f"VLM página {page_num}: {len(devices)} dispositivos extraídos"
                 )
+                return PageExtraction(page_number=page_num, devices=devices), vlm_result
 
             except Exception as e:
-                logger.error(
-                    f"Erro VLM na página {page_num}/{total_pages}: {e}",
-                    exc_info=True,
-                )
-                # Adiciona página vazia para manter a contagem
-                page_extractions.append(PageExtraction(
-                    page_number=page_num,
-                    devices=[],
-                ))
+                logger.error(f"Erro VLM na página {page_num}: {e}", exc_info=True)
+                # Página vazia para manter a contagem
+                return PageExtraction(page_number=page_num, devices=[]), None
+
+        with collect_vlm_stats() as vlm_stats:
+            pages_data, results = await self._process_pages(
+                pdf_bytes,
+                extract_one,
+                on_page_done=lambda done, total: report(
+                    "vlm_extraction", 0.20 + 0.60 * (done / max(total, 1)),
+                ),
+            )
+        logger.info(f"VLM Pipeline: chamadas ao VLM ({document_id}): {vlm_stats.to_dict()}")
+        total_pages = len(pages_data)
+        raw_canonical = self.pymupdf_extractor.canonical_text_from_pages(pages_data)
+
+        if total_pages == 0:
+            logger.warning(f"PyMuPDF retornou 0 páginas para {document_id}")
+            return DocumentExtraction(
+                document_id=document_id,
+                pages=[],
+                canonical_text="",
+                canonical_hash="",
+                total_devices=0,
+                pages_data=[],
+            )
+
+        page_extractions: list[PageExtraction] = []
+        debug_artifacts_list: list[dict] = []
+        total_devices = 0
+        for page_extraction, vlm_result in results:
+            page_extractions.append(page_extraction)
+            total_devices += len(page_extraction.devices)
+            # Collect raw VLM response for debug
+            if collect_debug and vlm_result is not None:
+                debug_artifacts_list.append({
+                    "page_number": page_extraction.page_number,
+                    "raw_response": vlm_result,
+                })
 
         report("vlm_extraction", 0.80)
 
@@ -193,6 +399,7 @@ class VLMExtractionService:
             total_devices=total_devices,
             pages_data=pages_data,
             debug_artifacts=debug_artifacts_list if collect_debug else [],
+            vlm_stats=vlm_stats.to_dict(),
         )
 
     async def ocr_document(
@@ -224,47 +431,39 @@ class VLMExtractionService:
             if progress_callback:
                 try:
                     progress_callback(phase, progress)
+                except IngestCancelledError:
+                    raise  # DELETE /ingest: interrompe o OCR
                 except Exception as e:
                     logger.warning(f"Erro no progress_callback: {e}")
 
-        # === Etapa 1: PyMuPDF (imagens + dimensões — texto ignorado) ===
+        # === Etapa 1+2: PyMuPDF (imagens — texto ignorado) → Qwen3-VL OCR ===
+        # Renderização e OCR sobrepostos, até `concurrency` páginas em voo
         report("pymupdf_extraction", 0.10)
-        logger.info(f"VLM OCR Pipeline: Etapa 1 - Extraindo imagens com PyMuPDF ({document_id})")
+        logger.info(
+            f"VLM OCR Pipeline: Etapas 1-2 - PyMuPDF + OCR Qwen3-VL "
+            f"({document_id}, concurrency={self.concurrency})"
+        )
+
+        ocr_run = _PageOCR(self)
 
-        pymupdf_pages, _ = self.pymupdf_extractor.extract_pages(pdf_bytes)
+        pymupdf_pages, ocr_texts = await self._process_pages(
+            pdf_bytes,
+            ocr_run.ocr,
+            on_page_done=lambda done, total: report(
+                "vlm_ocr", 0.20 + 0.60 * (done / max(total, 1)),
+            ),
+        )
         total_pages = len(pymupdf_pages)
 
         if total_pages == 0:
             logger.warning(f"PyMuPDF retornou 0 páginas para {document_id}")
             return [], ""
 
-        logger.info(f"PyMuPDF: {total_pages} páginas renderizadas para OCR")
-        report("pymupdf_extraction", 0.20)
-
-        # === Etapa 2: Qwen3-VL OCR (sequencial, uma página por vez) ===
-        logger.info(f"VLM OCR Pipeline: Etapa 2 - OCR com Qwen3-VL ({total_pages} páginas)")
+        ocr_run.log_stats()
 
-        ocr_pages: List[Tuple[int, str]] = []
-        for i, page_data in enumerate(pymupdf_pages):
-            page_num = page_data.page_number
-            progress = 0.20 + (0.60 * (i / total_pages))
-            report("vlm_ocr", progress)
-
-            logger.info(f"VLM OCR: processando página {page_num}/{total_pages}")
-
-            try:
-                ocr_text = await self.vlm_client.ocr_page(page_data.image_base64)
-                ocr_pages.append((page_num, ocr_text))
-                logger.info(
-                    f"VLM OCR página {page_num}: {len(ocr_text)} chars extraídos"
-                )
-            except Exception as e:
-                logger.error(
-                    f"Erro VLM OCR na página {page_num}/{total_pages}: {e}",
-                    exc_info=True,
-                )
-                # Página sem texto OCR — registra como vazia
-                ocr_pages.append((page_num, ""))
+        ocr_pages: List[Tuple[int, str]] = [
+            (page.page_number, text) for page, text in zip(pymupdf_pages, ocr_texts)
+        ]
 
         report("vlm_ocr", 0.80)
 
@@ -290,6 +489,8 @@ class VLMExtractionService:
         pages_data = ocr_to_pages_data(
             pymupdf_pages, blocks, canonical_text, page_boundaries,
         )
+        for page, text in zip(pages_data, ocr_texts):
+            page.ocr_truncated = is_truncated(text)
 
         report("building_canonical", 0.90)
 
@@ -299,3 +500,83 @@ class VLMExtractionService:
         )
 
         return pages_data, canonical_text
+
+    async def hybrid_document(
+        self,
+        pdf_bytes: bytes,
+        document_id: str,
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+    ) -> Tuple[List[PageData], str]:
+        """
+        Extração híbrida: texto nativo PyMuPDF + OCR Qwen3-VL só onde necessário.
+
+        Cada página é avaliada por assess_native_page(): páginas com texto
+        nativo bom mantêm blocos, bboxes e spans do PyMuPDF; páginas
+        escaneadas ou com texto corrompido recebem blocos OCR sintéticos.
+        Os offsets globais são recalculados após a troca de texto, então
+        canonical_text[b.char_start:b.char_end] == b.text para todo bloco.
+
+        Returns:
+            Tupla (pages_data, canonical_text) no mesmo formato de
+            PyMuPDFExtractor.extract_pages(); PageData.text_source indica
+            a origem ("native" ou "ocr") de cada página.
+        """
+        from .page_routing import assess_native_page
+        from .vlm_ocr import ocr_text_to_page_data
+
+        def report(phase: str, progress: float):
+            if progress_callback:
+                try:
+                    progress_callback(phase, progress)
+                except IngestCancelledError:
+                    raise  # DELETE /ingest: interrompe o OCR
+                except Exception as e:
+                    logger.warning(f"Erro no progress_callback: {e}")
+
+        report("pymupdf_extraction", 0.10)
+        logger.info(
+            f"Hybrid Pipeline: PyMuPDF + OCR Qwen3-VL por página "
+            f"({document_id}, concurrency={self.concurrency})"
+        )
+
+        ocr_run = _PageOCR(self)
+
+        async def route_one(page_data: PageData) -> Optional[str]:
+            quality = assess_native_page(page_data)
+            if not quality.needs_ocr:
+                return None
+            logger.info(
+                f"Hybrid: página {page_data.page_number} → OCR ({quality.reason})"
+            )
+            return await ocr_run.ocr(page_data)
+
+        native_pages, ocr_texts = await self._process_pages(
+            pdf_bytes,
+            route_one,
+            on_page_done=lambda done, total: report(
+                "vlm_ocr", 0.20 + 0.60 * (done / max(total, 1)),
+            ),
+        )
+
+        if not native_pages:
+            logger.warning(f"PyMuPDF retornou 0 páginas para {document_id}")
+            return [], ""
+
+        pages_data: List[PageData] = []
+        for page, ocr_text in zip(native_pages, ocr_texts):
+            if ocr_text is not None:
+                page = ocr_text_to_page_data(page, ocr_text)
+                page.ocr_truncated = is_truncated(ocr_text)
+            pages_data.append(page)
+        canonical_text = self.pymupdf_extractor.relayout_pages(pages_data)
+
+        ocr_count = sum(1 for text in ocr_texts if text is not None)
+        if ocr_count:
+            ocr_run.log_stats()
+        logger.info(
+            f"Hybrid Pipeline: {len(pages_data) - ocr_count} páginas nativas, "
+            f"{ocr_count} via OCR, canonical_text={len(canonical_text)} chars"
+        )
+
+        report("building_canonical", 0.90)
+        return pages_data, canonical_text
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoints de fase - retomada de ingestões falhas ou repetidas.
+
+Cada fase cara do pipeline persiste sua saída em disco local, endereçada por:
+    sha256(pdf) + pipeline_version + nome da fase + config relevante da fase
+
+Se a mesma ingestão é reenviada (retry após falha no sink/upload, reprocesso
+sem mudança de versão), a fase encontra o checkpoint e pula o trabalho:
+
+- extraction: pages_data + canonical_text (PyMuPDF, OCR VLM ou híbrido).
+  As imagens das páginas NÃO são persistidas (centenas de MB em PDFs grandes);
+  num hit, o snapshot de inspeção sai sem imagens de página.
+- embedding: vetores dense/sparse indexados por sha256 do texto embeddado.
+  Chunks cujo texto mudou (ou novos) são embeddados normalmente; os demais
+  reaproveitam o vetor do checkpoint.
+
+Classificação regex, chunking e origin classifier são CPU-bound e rápidos
+frente a OCR/embeddings; rodam sempre (garantem que mudanças de código
+sem bump de versão ainda produzam chunks coerentes com o canonical_text).
+
+Armazenamento via DiskCache (utils/disk_cache.py): escrita atômica e
+eviction LRU por tamanho total. Entrada corrompida ou ilegível = miss.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pickle
+from typing import Any, Optional
+
+from ..config import DEFAULT_DATA_DIR
+from ..utils.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = os.path.join(DEFAULT_DATA_DIR, "ingest_checkpoints")
+
+
+def text_digest(text: str) -> str:
+    """SHA256 do texto (chave dos vetores no checkpoint de embedding)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """Checkpoints de fase endereçados por conteúdo em disco local."""
+
+    def __init__(
+        self,
+        cache_dir: str = CHECKPOINT_DIR,
+        max_bytes: int = 2048 * 1024 * 1024,
+    ):
+        """
+        Args:
+            cache_dir: Diretório local dos checkpoints
+            max_bytes: Tamanho máximo total dos checkpoints em disco
+        """
+        self._store = DiskCache(cache_dir, max_bytes, suffix=".pkl")
+
+    @staticmethod
+    def make_key(
+        pdf_hash: str,
+        pipeline_version: str,
+        phase: str,
+        phase_config: Optional[dict] = None,
+    ) -> str:
+        """Chave do checkpoint: qualquer mudança em um dos componentes invalida."""
+        raw = json.dumps(
+            [pdf_hash, pipeline_version, phase, phase_config or {}],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def load(self, key: str) -> Optional[Any]:
+        """Retorna a saída persistida da fase ou None (miss/corrompido)."""
+        data = self._store.get(key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Checkpoint {key[:16]}... ilegível, ignorando: {e}")
+            return None
+
+    def save(self, key: str, value: Any) -> None:
+        """Persiste a saída da fase. Falhas apenas logam warning."""
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Checkpoint {key[:16]}... não serializável: {e}")
+            return
+        self._store.put(key, data)
+
+    # ------------------------------------------------------------------
+    # Fases
+    # ------------------------------------------------------------------
+
+    def load_extraction(self, key: str) -> Optional[tuple[list, str]]:
+        """(pages_data, canonical_text) persistidos ou None."""
+        value = self.load(key)
+        if not isinstance(value, tuple) or len(value) != 2:
+            return None
+        return value
+
+    def save_extraction(self, key: str, pages_data: list, canonical_text: str) -> None:
+        """Persiste a extração sem as imagens das páginas."""
+        pages = [dataclasses.replace(p, image_bytes=b"") for p in pages_data]
+        self.save(key, (pages, canonical_text))
+
+    def load_embeddings(self, key: str) -> dict:
+        """{sha256(texto): (dense, sparse)} persistido (vazio se miss)."""
+        value = self.load(key)
+        return value if isinstance(value, dict) else {}
+
+    def save_embeddings(self, key: str, vectors: dict) -> None:
+        self.save(key, vectors)
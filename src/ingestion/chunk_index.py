@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Chunk Index - Índice de chunks de um documento, construído uma única vez.
+
+Várias fases consultam a lista de chunks por identificador, por pai ou por
+posição no texto canônico. Em vez de cada uma varrer a lista (custo
+quadrático em leis grandes), o pipeline monta um ChunkIndex por documento:
+
+- span_id → chunk / id → chunk
+- pai → filhos diretos (na ordem do documento)
+- intervalos [start, end) no canônico, ordenados (bisect)
+
+Funciona tanto para ProcessedChunk (node_id / parent_node_id /
+canonical_start) quanto para ClassifiedDevice (span_id / parent_span_id /
+char_start), via for_devices().
+"""
+
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, Optional
+
+
+class ChunkIndex:
+    """Índice imutável sobre os chunks (ou devices) de um documento."""
+
+    def __init__(
+        self,
+        chunks: list,
+        *,
+        id_attr: str = "node_id",
+        parent_attr: str = "parent_node_id",
+        start_attr: str = "canonical_start",
+        end_attr: str = "canonical_end",
+    ):
+        self.chunks = list(chunks)
+
+        # Duplicatas: vence o último, como num dict() montado em ordem
+        self._by_span: dict[str, Any] = {}
+        self._by_id: dict[str, Any] = {}
+        self._children: dict[str, list] = {}
+        intervals = []
+        for chunk in self.chunks:
+            self._by_span[getattr(chunk, "span_id", "")] = chunk
+            self._by_id[getattr(chunk, id_attr, "")] = chunk
+            parent = getattr(chunk, parent_attr, "") or ""
+            if parent:
+                self._children.setdefault(parent, []).append(chunk)
+            start = getattr(chunk, start_attr, -1)
+            end = getattr(chunk, end_attr, -1)
+            if start is not None and end is not None and 0 <= start < end:
+                intervals.append((start, end, chunk))
+
+        intervals.sort(key=lambda item: (item[0], item[1]))
+        self._starts = [start for start, _, _ in intervals]
+        self._ends = [end for _, end, _ in intervals]
+        self._interval_chunks = [chunk for _, _, chunk in intervals]
+        # Maior end até cada posição: limita a varredura para trás em overlapping()
+        self._max_end = list(accumulate(self._ends, max))
+
+    @classmethod
+    def for_devices(cls, devices: list) -> "ChunkIndex":
+        """Índice sobre ClassifiedDevice (ids e offsets do RegexClassifier)."""
+        return cls(
+            devices,
+            id_attr="span_id",
+            parent_attr="parent_span_id",
+            start_attr="char_start",
+            end_attr="char_end",
+        )
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def by_span(self, span_id: str) -> Optional[Any]:
+        """Chunk com o span_id, ou None."""
+        return self._by_span.get(span_id)
+
+    def by_id(self, chunk_id: str) -> Optional[Any]:
+        """Chunk com o id (node_id, ou span_id para devices), ou None."""
+        return self._by_id.get(chunk_id)
+
+    def children(self, parent_id: str) -> list:
+        """Filhos diretos do pai, na ordem original da lista."""
+        return list(self._children.get(parent_id, ()))
+
+    def overlapping(self, start: int, end: int) -> list:
+        """Chunks cujo intervalo canônico intersecta [start, end), por posição."""
+        hi = bisect_left(self._starts, end)
+        found = []
+        i = hi - 1
+        while i >= 0 and self._max_end[i] > start:
+            if self._ends[i] > start:
+                found.append(self._interval_chunks[i])
+            i -= 1
+        found.reverse()
+        return found
+
+    def covered_chars(self) -> int:
+        """Total de caracteres do canônico cobertos por algum chunk (união)."""
+        covered = 0
+        cur_start = cur_end = -1
+        for start, end in zip(self._starts, self._ends):
+            if start <= cur_end:
+                cur_end = max(cur_end, end)
+                continue
+            covered += cur_end - cur_start
+            cur_start, cur_end = start, end
+        return covered + (cur_end - cur_start)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Chunk Registry - Última versão ingerida de cada documento (re-ingestão incremental).
+
+Quando uma lei é alterada, o PDF inteiro é re-ingerido. Com o registry, a
+nova versão é comparada chunk a chunk (por node_id) com a anterior:
+
+- new:       node_id não existia → embedding + insert
+- changed:   texto de embedding mudou → embedding + upsert
+- metadata:  mesmo texto de embedding, metadados de conteúdo mudaram
+             (hierarquia, origem, citações...) → upsert reaproveitando os vetores
+- unchanged: conteúdo idêntico → nada a regravar no Milvus
+- removed:   node_id sumiu → delete
+
+Posição não é conteúdo: uma alteração no começo da lei desloca os offsets
+(canonical_start/end), a página/bbox e o canonical_hash de todos os chunks
+seguintes sem mudar nenhum deles. Esses campos ficam fora do row_digest;
+chunks só deslocados continuam "unchanged" e seus novos valores vão em
+`positions` ({node_id: campos de posição}) — um update parcial leve na VPS,
+sem upsert de linha/vetor. O canonical_hash é do documento inteiro e vai uma
+vez só no diff (canonical_hash).
+
+Entrada por documento (chave: document_id):
+    {format, ingest_run_id, document_hash, canonical_hash, model,
+     chunks: {node_id: (text_digest, row_digest, dense, sparse, position_digest)}}
+
+A VPS informa em incremental_base_run_id o ingest_run_id que está de fato
+no Milvus. A entrada é registrada antes do sink: sem a base, ou se ela não
+bater com a versão registrada (ex: sink anterior falhou), a ingestão cai
+para modo completo — o diff seria contra uma base que o Milvus não tem.
+
+Armazenamento via DiskCache (pickle; vetores são grandes demais para JSON).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..config import DEFAULT_DATA_DIR
+from ..utils.disk_cache import DiskCache
+from .checkpoints import text_digest
+
+logger = logging.getLogger(__name__)
+
+CHUNK_REGISTRY_DIR = os.path.join(DEFAULT_DATA_DIR, "chunk_registry")
+
+# Formato da entrada; entradas de outro formato são ignoradas (ingestão completa)
+REGISTRY_FORMAT = 2
+
+# Campos de posição: mudam quando algo antes do chunk muda (ver docstring)
+POSITION_FIELDS = (
+    "canonical_start", "canonical_end", "page_number", "bbox", "bbox_img",
+    "bbox_spans", "img_width", "img_height", "is_cross_page",
+)
+
+# Campos que não fazem parte da linha comparada: vetores (derivados do texto),
+# posição e canonical_hash (do documento, não do chunk)
+_ROW_EXCLUDE = {"dense_vector", "sparse_vector", "thesis_vector", "canonical_hash", *POSITION_FIELDS}
+
+
+def embedding_text(chunk) -> str:
+    """Texto efetivamente embeddado para o chunk."""
+    return chunk.retrieval_text or chunk.text
+
+
+def row_digest(chunk) -> str:
+    """SHA256 da linha do chunk sem vetores (detecta mudança de metadados)."""
+    row = chunk.model_dump(exclude=_ROW_EXCLUDE)
+    raw = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def position_fields(chunk) -> dict:
+    """Campos de posição do chunk (payload do update parcial)."""
+    return chunk.model_dump(include=set(POSITION_FIELDS))
+
+
+def position_digest(chunk) -> str:
+    raw = json.dumps(position_fields(chunk), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ChunkDiff:
+    """Diferença entre a versão nova e a registrada de um documento."""
+
+    base_ingest_run_id: str
+    new: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    metadata: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    # unchanged deslocados: {node_id: campos de posição novos}
+    positions: dict[str, dict] = field(default_factory=dict)
+    canonical_hash: str = ""
+    previous_canonical_hash: str = ""
+
+    @property
+    def upsert(self) -> set[str]:
+        """node_ids que precisam ser gravados no Milvus (linha inteira)."""
+        return set(self.new) | set(self.changed) | set(self.metadata)
+
+    def to_dict(self) -> dict:
+        return {
+            "base_ingest_run_id": self.base_ingest_run_id,
+            "new": self.new,
+            "changed": self.changed,
+            "metadata": self.metadata,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+            "positions": self.positions,
+            "canonical_hash": self.canonical_hash,
+            "previous_canonical_hash": self.previous_canonical_hash,
+        }
+
+
+class ChunkRegistry:
+    """Registry em disco local da última versão ingerida por documento."""
+
+    def __init__(
+        self,
+        cache_dir: str = CHUNK_REGISTRY_DIR,
+        max_bytes: int = 2048 * 1024 * 1024,
+    ):
+        self._store = DiskCache(cache_dir, max_bytes, suffix=".pkl")
+
+    @staticmethod
+    def _key(document_id: str) -> str:
+        return hashlib.sha256(document_id.encode("utf-8")).hexdigest()
+
+    def load(self, document_id: str) -> Optional[dict]:
+        """Entrada registrada do documento ou None."""
+        data = self._store.get(self._key(document_id))
+        if data is None:
+            return None
+        try:
+            entry = pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Chunk registry de {document_id} ilegível, ignorando: {e}")
+            return None
+        if not isinstance(entry, dict) or "chunks" not in entry:
+            return None
+        if entry.get("format") != REGISTRY_FORMAT:
+            logger.info(f"Chunk registry de {document_id} em formato antigo, ignorando")
+            return None
+        return entry
+
+    def save(
+        self,
+        document_id: str,
+        chunks: list,
+        ingest_run_id: str,
+        document_hash: str,
+        canonical_hash: str,
+        model: str,
+    ) -> None:
+        """Registra a versão recém-ingerida (todos os chunks, com vetores)."""
+        entry = {
+            "format": REGISTRY_FORMAT,
+            "ingest_run_id": ingest_run_id,
+            "document_hash": document_hash,
+            "canonical_hash": canonical_hash,
+            "model": model,
+            "chunks": {
+                c.node_id: (
+                    text_digest(embedding_text(c)),
+                    row_digest(c),
+                    c.dense_vector,
+                    c.sparse_vector,
+                    position_digest(c),
+                )
+                for c in chunks
+            },
+        }
+        self._store.put(
+            self._key(document_id),
+            pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+    @staticmethod
+    def previous_vectors(entry: Optional[dict], model: str) -> dict:
+        """{text_digest: (dense, sparse)} da versão registrada (mesmo modelo)."""
+        if not entry or entry.get("model") != model:
+            return {}
+        return {
+            digest: (dense, sparse)
+            for digest, _, dense, sparse, _ in entry["chunks"].values()
+            if dense is not None
+        }
+
+    @staticmethod
+    def diff(chunks: list, entry: dict, canonical_hash: str = "") -> ChunkDiff:
+        """Compara os chunks novos com a versão registrada."""
+        previous = entry["chunks"]
+        result = ChunkDiff(
+            base_ingest_run_id=entry.get("ingest_run_id", ""),
+            canonical_hash=canonical_hash,
+            previous_canonical_hash=entry.get("canonical_hash", ""),
+        )
+        seen = set()
+        for chunk in chunks:
+            node_id = chunk.node_id
+            seen.add(node_id)
+            prev = previous.get(node_id)
+            if prev is None:
+                result.new.append(node_id)
+            elif prev[0] != text_digest(embedding_text(chunk)):
+                result.changed.append(node_id)
+            elif prev[1] != row_digest(chunk):
+                result.metadata.append(node_id)
+            else:
+                result.unchanged.append(node_id)
+                if prev[4] != position_digest(chunk):
+                    result.positions[node_id] = position_fields(chunk)
+        result.removed = [nid for nid in previous if nid not in seen]
+        return result
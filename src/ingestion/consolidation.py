@@ -9,7 +9,9 @@ Regras:
 """
 
 import logging
+from typing import Optional
 
+from .chunk_index import ChunkIndex
 from .models import IngestRequest, ProcessedChunk
 
 logger = logging.getLogger(__name__)
@@ -19,21 +21,29 @@ MAX_CHARS = 2000          # ~500 tokens (4 chars/token)
 OVERLAP_CHILDREN = 1      # Filhos de overlap entre partes
 
 
-def should_consolidate(article_node_id: str, all_chunks: list[ProcessedChunk]) -> list[ProcessedChunk]:
+def should_consolidate(
+    article_node_id: str,
+    all_chunks: list[ProcessedChunk],
+    index: Optional[ChunkIndex] = None,
+) -> list[ProcessedChunk]:
     """
     Retorna filhos diretos do artigo se count >= MIN_CHILDREN.
 
     Args:
         article_node_id: node_id do artigo (ex: leis:LEI-14133-2021#ART-033)
         all_chunks: Todos os chunks do documento
+        index: ChunkIndex dos mesmos chunks (evita varrer a lista por artigo)
 
     Returns:
         Lista de filhos diretos se elegivel, lista vazia caso contrario
     """
-    children = [
-        c for c in all_chunks
-        if c.parent_node_id == article_node_id
-    ]
+    if index is not None:
+        children = index.children(article_node_id)
+    else:
+        children = [
+            c for c in all_chunks
+            if c.parent_node_id == article_node_id
+        ]
     if len(children) >= MIN_CHILDREN:
         return children
     return []
@@ -112,15 +122,22 @@ def build_consolidated_text(
 def compute_child_offsets(
     consolidated_text: str,
     children_sorted: list[ProcessedChunk],
+    search_start: int = 0,
 ) -> list[dict]:
     """
     Calcula offsets de cada filho dentro do texto consolidado.
 
+    Args:
+        consolidated_text: Texto da parte (caput + filhos)
+        children_sorted: Filhos na ordem em que aparecem no texto
+        search_start: Início da busca — len(caput) pula o caput, de modo que
+                      cada find() casa logo após o separador (O(len(filho)))
+                      e um filho cujo texto aparece no caput não é confundido
+
     Returns:
         Lista de dicts: [{"node_id": "...", "start": N, "end": M}, ...]
     """
     offsets = []
-    search_start = 0
     for child in children_sorted:
         if not child.text:
             continue
@@ -203,6 +220,7 @@ def split_consolidated(
 def generate_consolidated_chunks(
     chunks: list[ProcessedChunk],
     request: IngestRequest,
+    index: Optional[ChunkIndex] = None,
 ) -> list[ProcessedChunk]:
     """
     Funcao principal: gera chunks consolidados @FULL para artigos elegiveis.
@@ -212,17 +230,20 @@ def generate_consolidated_chunks(
     Args:
         chunks: Lista de todos os chunks do documento
         request: Request de ingestão
+        index: ChunkIndex dos mesmos chunks (montado aqui se omitido)
 
     Returns:
         Lista de chunks @FULL (novos, para serem adicionados)
     """
     consolidated_chunks: list[ProcessedChunk] = []
+    if index is None:
+        index = ChunkIndex(chunks)
 
     # Filtra artigos
     articles = [c for c in chunks if c.device_type == "article"]
 
     for article in articles:
-        children = should_consolidate(article.node_id, chunks)
+        children = should_consolidate(article.node_id, chunks, index)
         if not children:
             continue
 
@@ -250,7 +271,9 @@ def generate_consolidated_chunks(
             node_id = f"leis:{chunk_id}"
 
             child_node_ids = [c.node_id for c in part_children]
-            child_offsets = compute_child_offsets(part_text, part_children)
+            child_offsets = compute_child_offsets(
+                part_text, part_children, search_start=len(article.text),
+            )
 
             pc = ProcessedChunk(
                 node_id=node_id,
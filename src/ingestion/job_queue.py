@@ -0,0 +1,178 @@
+"""
+Fila de jobs de ingestão: workers limitados, prioridades, cancelamento e dedupe.
+
+Cada POST /ingest vira um IngestJob na fila (em vez de uma thread própria);
+`workers` tasks asyncio no loop do servidor consomem a fila por prioridade
+(high → normal → low) e, dentro da mesma prioridade, por ordem de chegada.
+
+- Posição na fila: position(task_id), 1 = próximo a sair
+- Cancelamento: job na fila sai dela na hora; job rodando recebe
+  cancel_requested, verificado pelo pipeline a cada fronteira de fase
+  (progress_callback → IngestCancelledError)
+- Dedupe: envio idêntico (mesmo sha256 do PDF e mesmos parâmetros) de um job
+  ainda na fila ou rodando devolve o job existente
+- Limite: mais de max_pending jobs na fila → QueueFullError
+
+Uso (no event loop):
+    queue = IngestJobQueue(run_job, workers=1)
+    job, created = queue.submit(task_id, dedupe_key, "normal", payload)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Classe de prioridade → ordem na fila (menor sai primeiro)
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFullError(Exception):
+    """Fila de ingestão cheia (max_pending jobs aguardando)."""
+    pass
+
+
+class IngestJob:
+    """Um job de ingestão na fila."""
+
+    __slots__ = (
+        "task_id", "priority", "seq", "dedupe_key", "payload", "state", "cancel_requested",
+    )
+
+    def __init__(self, task_id: str, priority: str, seq: int, dedupe_key: str, payload: Any):
+        self.task_id = task_id
+        self.priority = priority
+        self.seq = seq
+        self.dedupe_key = dedupe_key
+        self.payload = payload
+        self.state = "queued"  # queued | running | done
+        # threading.Event: lido pelo pipeline em threads do executor
+        self.cancel_requested = threading.Event()
+
+    def __lt__(self, other: "IngestJob") -> bool:
+        return (PRIORITIES[self.priority], self.seq) < (PRIORITIES[other.priority], other.seq)
+
+
+class IngestJobQueue:
+    """Fila por prioridade consumida por `workers` tasks no event loop atual."""
+
+    def __init__(
+        self,
+        run_job: Callable[[IngestJob], Awaitable[None]],
+        workers: int = 1,
+        max_pending: int = 100,
+    ):
+        """
+        Args:
+            run_job: Corrotina que processa um job (erros são logados, não propagam)
+            workers: Jobs rodando ao mesmo tempo
+            max_pending: Máximo de jobs aguardando na fila
+        """
+        self._run_job = run_job
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self._heap: List[IngestJob] = []
+        self._jobs: Dict[str, IngestJob] = {}      # task_id → job ativo (fila ou rodando)
+        self._active: Dict[str, IngestJob] = {}    # dedupe_key → job ativo
+        self._seq = itertools.count()
+        self._available = asyncio.Semaphore(0)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingest-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"IngestJobQueue: {self.workers} workers, max_pending={max_pending}")
+
+    def submit(
+        self,
+        task_id: str,
+        dedupe_key: str,
+        priority: str = "normal",
+        payload: Any = None,
+    ) -> Tuple[IngestJob, bool]:
+        """
+        Enfileira um job; retorna (job, criado). criado=False: envio idêntico
+        a um job ativo, devolvido no lugar do novo.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"Prioridade inválida: {priority!r} (esperado: {', '.join(PRIORITIES)})"
+            )
+        existing = self._active.get(dedupe_key)
+        if existing is not None:
+            return existing, False
+        if len(self._heap) >= self.max_pending:
+            raise QueueFullError(f"Fila de ingestão cheia ({self.max_pending} jobs aguardando)")
+
+        job = IngestJob(task_id, priority, next(self._seq), dedupe_key, payload)
+        heapq.heappush(self._heap, job)
+        self._jobs[task_id] = job
+        self._active[dedupe_key] = job
+        self._available.release()
+        return job, True
+
+    def position(self, task_id: str) -> Optional[int]:
+        """Posição na fila (1 = próximo); None se não está aguardando."""
+        job = self._jobs.get(task_id)
+        if job is None or job.state != "queued":
+            return None
+        return sum(1 for other in self._heap if other < job) + 1
+
+    def cancel(self, task_id: str) -> Optional[str]:
+        """
+        Cancela o job: "queued" (removido da fila), "running" (para na
+        próxima fronteira de fase) ou None (desconhecido/já terminado).
+        """
+        job = self._jobs.get(task_id)
+        if job is None:
+            return None
+        if job.state == "queued":
+            self._heap.remove(job)
+            heapq.heapify(self._heap)
+            self._finish(job)
+            return "queued"
+        job.cancel_requested.set()
+        return "running"
+
+    def _finish(self, job: IngestJob) -> None:
+        job.state = "done"
+        self._jobs.pop(job.task_id, None)
+        if self._active.get(job.dedupe_key) is job:
+            del self._active[job.dedupe_key]
+
+    async def _worker(self) -> None:
+        while True:
+            await self._available.acquire()
+            if not self._heap:
+                continue  # job cancelado enquanto aguardava
+            job = heapq.heappop(self._heap)
+            job.state = "running"
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                logger.exception(f"[Task {job.task_id}] Erro não tratado no job: {e}")
+            finally:
+                self._finish(job)
+
+    def stats(self) -> dict:
+        by_priority = {name: 0 for name in PRIORITIES}
+        for job in self._heap:
+            by_priority[job.priority] += 1
+        return {
+            "workers": self.workers,
+            "queued": len(self._heap),
+            "running": sum(1 for job in self._jobs.values() if job.state == "running"),
+            "queued_by_priority": by_priority,
+            "max_pending": self.max_pending,
+        }
+
+    async def stop(self) -> None:
+        """Cancela os workers (jobs na fila são descartados)."""
+        for job in list(self._jobs.values()):
+            job.cancel_requested.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -53,7 +53,20 @@ class IngestRequest(BaseModel):
     # Modo de extração
     extraction_mode: str = Field(
         "pymupdf_regex",
-        description="Modo de extracao: 'pymupdf_regex' (default) ou 'vlm' (fallback)"
+        description=(
+            "Modo de extracao: 'pymupdf_regex' (default), 'vlm' (fallback) "
+            "ou 'hybrid' (OCR apenas nas paginas sem texto nativo utilizavel)"
+        )
+    )
+
+    # Re-ingestão incremental (ver chunk_registry.py)
+    incremental: bool = Field(
+        False,
+        description="Retorna apenas chunks novos/alterados em relação à versão registrada",
+    )
+    incremental_base_run_id: Optional[str] = Field(
+        None,
+        description="ingest_run_id da versão que está no Milvus (se divergir do registry, ingestão completa)",
     )
 
     # PDF será enviado como multipart/form-data
@@ -18,14 +18,19 @@ import hashlib
 import logging
 import tempfile
 import uuid
-from typing import Optional, List, Tuple, Dict, Any
+import weakref
+from functools import partial
+from typing import Optional, List, Tuple, Dict, Any, Callable
 from datetime import datetime
 from dataclasses import dataclass, field
 from enum import Enum
 
 from .models import IngestRequest, ProcessedChunk, IngestStatus, IngestError
-from ..chunking.citation_extractor import extract_citations_from_chunk
-from ..chunking.canonical_offsets import normalize_canonical_text, compute_canonical_hash
+from .chunk_index import ChunkIndex
+from ..chunking.citation_extractor import extract_citations_batch
+from ..chunking.canonical_offsets import normalize_canonical_text
+from ..utils.cancellation import IngestCancelledError
+from ..utils.canonical_utils import CanonicalText
 
 
 class ExtractionMethod(str, Enum):
@@ -191,6 +196,25 @@ def validate_chunk_invariants(chunks: List["ProcessedChunk"], document_id: str)
     logger.info(f"✓ Invariantes validadas: {len(chunks)} chunks evidence com offsets OK para '{document_id}'")
 
 
+def _make_pymupdf_extractor(app_config):
+    """PyMuPDFExtractor configurado (DPI, workers, perfil e política de imagem)."""
+    from ..extraction.pymupdf_extractor import PyMuPDFExtractor
+    from ..extraction.vlm_models import ImagePolicy
+
+    return PyMuPDFExtractor(
+        dpi=app_config.vlm_page_dpi,
+        workers=app_config.pymupdf_workers,
+        parallel_min_pages=app_config.pymupdf_parallel_min_pages,
+        profile=app_config.pymupdf_profile,
+        image_policy=ImagePolicy(
+            max_pixels=app_config.vlm_image_max_pixels,
+            grayscale=app_config.vlm_image_grayscale,
+            image_format=app_config.vlm_image_format,
+            quality=app_config.vlm_image_quality,
+        ),
+    )
+
+
 @dataclass
 class PipelineResult:
     """Resultado do processamento do pipeline."""
@@ -217,6 +241,14 @@ class PipelineResult:
     manifest: dict = field(default_factory=dict)
     # Snapshot de inspeção para a VPS salvar no PostgreSQL
     inspection_snapshot: dict = field(default_factory=dict)
+    # Fases restauradas de checkpoint (ex: ["extraction", "embedding"])
+    checkpoint_hits: List[str] = field(default_factory=list)
+    # Re-ingestão incremental: diff contra a versão registrada (ver chunk_registry.py)
+    incremental: dict = field(default_factory=dict)
+    # Header/footer repetidos removidos antes da canonicalização (ver repeated_lines.py)
+    repeated_lines: dict = field(default_factory=dict)
+    # Chamadas ao VLM na extração: requests, retries, tokens desperdiçados (VLMCallStats)
+    vlm_stats: dict = field(default_factory=dict)
 
 
 class IngestionPipeline:
@@ -226,6 +258,10 @@ class IngestionPipeline:
         self._embedder = None
         self._artifacts_uploader = None
         self._vlm_service = None
+        # process_async: um serviço VLM por event loop (ver loop_vlm_service)
+        self._loop_vlm_services = weakref.WeakKeyDictionary()
+        self._checkpoints = None
+        self._chunk_registry = None
 
     @property
     def embedder(self):
@@ -247,29 +283,516 @@ class IngestionPipeline:
     def vlm_service(self):
         """VLM Extraction Service - lazy loaded."""
         if self._vlm_service is None:
-            from ..config import config
-            from ..extraction.pymupdf_extractor import PyMuPDFExtractor
-            from ..extraction.vlm_client import VLMClient
-            from ..extraction.vlm_service import VLMExtractionService
+            self._vlm_service = self._make_vlm_service()
+            logger.info("VLMExtractionService inicializado")
+        return self._vlm_service
+
+    def loop_vlm_service(self):
+        """
+        VLM Extraction Service do process_async, preso ao event loop atual.
 
-            vlm_client = VLMClient(
-                base_url=config.vllm_base_url,
+        O httpx.AsyncClient do VLMClient só vale no loop em que foi usado;
+        no loop do servidor o mesmo cliente (e o pool de conexões) atende
+        todos os documentos (o StagedIngestExecutor tem o seu, no loop dele).
+        O caminho síncrono (process + asyncio.run) usa vlm_service, que
+        recria o cliente a cada documento.
+        """
+        loop = asyncio.get_running_loop()
+        service = self._loop_vlm_services.get(loop)
+        if service is None:
+            service = self._loop_vlm_services[loop] = self._make_vlm_service()
+            logger.info("VLMExtractionService (event loop) inicializado")
+        return service
+
+    async def aclose(self) -> None:
+        """Fecha o cliente VLM do event loop atual (shutdown do servidor)."""
+        service = self._loop_vlm_services.pop(asyncio.get_running_loop(), None)
+        if service is not None:
+            await service.vlm_client.close()
+
+    @staticmethod
+    def _make_vlm_service():
+        """VLMClient + VLMExtractionService a partir da config."""
+        from ..config import config
+        from ..extraction.vlm_client import VLMClient
+        from ..extraction.vlm_service import VLMExtractionService
+        from ..llm.endpoint_pool import parse_endpoint_urls
+
+        vlm_client = VLMClient(
+            base_url=config.vllm_base_url,
+            base_urls=parse_endpoint_urls(config.vllm_base_urls, config.vllm_base_url),
+            endpoint_cooloff_seconds=config.vllm_endpoint_cooloff,
+            model=config.vllm_model,
+            max_retries=config.vlm_max_retries,
+            ocr_stream=config.vlm_ocr_stream,
+            ocr_max_tokens=config.vlm_ocr_max_tokens,
+            structured_output=config.vlm_structured_output,
+        )
+        ocr_cache = None
+        if config.ocr_cache_enabled:
+            from ..extraction.ocr_cache import OCRPageCache
+            from ..extraction.vlm_ocr import OCR_PROMPT_VERSION
+
+            ocr_cache = OCRPageCache(
                 model=config.vllm_model,
-                max_retries=config.vlm_max_retries,
+                prompt_version=OCR_PROMPT_VERSION,
+                cache_dir=config.ocr_cache_dir,
+                max_bytes=config.ocr_cache_max_mb * 1024 * 1024,
+            )
+
+        return VLMExtractionService(
+            vlm_client=vlm_client,
+            pymupdf_extractor=_make_pymupdf_extractor(config),
+            concurrency=config.vlm_concurrency,
+            # O snapshot de inspeção ainda usa as imagens: o pipeline as
+            # libera depois de persisti-lo (_release_page_images)
+            release_images=False,
+            ocr_cache=ocr_cache,
+            ocr_token_budget=config.vlm_ocr_token_budget,
+        )
+
+    @property
+    def checkpoints(self):
+        """CheckpointStore de fases - lazy loaded (None se desabilitado)."""
+        from ..config import config
+
+        if not config.checkpoint_enabled:
+            return None
+        if self._checkpoints is None:
+            from .checkpoints import CheckpointStore
+
+            self._checkpoints = CheckpointStore(
+                cache_dir=config.checkpoint_dir,
+                max_bytes=config.checkpoint_max_mb * 1024 * 1024,
             )
-            pymupdf_extractor = PyMuPDFExtractor(dpi=config.vlm_page_dpi)
-            self._vlm_service = VLMExtractionService(
-                vlm_client=vlm_client,
-                pymupdf_extractor=pymupdf_extractor,
+        return self._checkpoints
+
+    def _extract_checkpointed(
+        self,
+        extraction_source: str,
+        result: PipelineResult,
+        extract_fn,
+        extraction: Optional[Callable[[PipelineResult], tuple]] = None,
+    ) -> tuple:
+        """
+        Executa a extração (extract_fn() → pages_data, canonical_text) ou
+        restaura do checkpoint da mesma combinação PDF + versão + config,
+        registra páginas com OCR truncado em quality_issues e remove
+        header/footer repetidos (_strip_repeated_lines).
+
+        extraction: extração já feita no event loop (process_async); substitui
+        extract_fn e o checkpoint, que ela mesma já consultou.
+        """
+        if extraction is not None:
+            pages_data, canonical_text = extraction(result)
+        else:
+            pages_data, canonical_text = self._load_or_extract(extraction_source, result, extract_fn)
+        truncated = [p.page_number for p in pages_data if p.ocr_truncated]
+        if truncated:
+            result.quality_issues.append(
+                f"OCR truncado por loop de repetição em {len(truncated)} página(s): {truncated}"
             )
-            logger.info("VLMExtractionService inicializado")
-        return self._vlm_service
+        return pages_data, self._strip_repeated_lines(pages_data, canonical_text, result)
+
+    def _run_vlm(self, result: PipelineResult, extract_fn, **kwargs):
+        """
+        asyncio.run(extract_fn(**kwargs)) contando as chamadas ao VLM
+        (requests, retries, tokens desperdiçados) em result.vlm_stats.
+        """
+        from ..extraction.vlm_client import collect_vlm_stats
+
+        client = self.vlm_service.vlm_client
+        client.reset_client()
+
+        async def run():
+            try:
+                return await extract_fn(**kwargs)
+            finally:
+                # Conexões do loop só podem ser fechadas antes de ele terminar
+                await client.close()
+
+        with collect_vlm_stats() as stats:
+            try:
+                return asyncio.run(run())
+            finally:
+                result.vlm_stats = stats.to_dict()
+
+    def _strip_repeated_lines(
+        self,
+        pages_data: list,
+        canonical_text: str,
+        result: PipelineResult,
+    ) -> str:
+        """
+        Remove linhas repetidas no topo/rodapé das páginas (in-place em
+        pages_data) e retorna o canonical_text recalculado.
+
+        Roda depois do checkpoint: a extração salva é a bruta, e o filtro
+        (barato) é reaplicado a cada execução.
+        """
+        from ..config import config as app_config
+
+        if not app_config.repeated_lines_filter:
+            return canonical_text
+
+        from ..extraction.pymupdf_extractor import PyMuPDFExtractor
+        from ..extraction.repeated_lines import strip_repeated_block_lines
+
+        report = strip_repeated_block_lines(pages_data)
+        if not report.dropped_lines:
+            return canonical_text
+
+        report.log(result.document_id, "extraction")
+        result.repeated_lines = report.to_dict()
+        return PyMuPDFExtractor.relayout_pages(pages_data)
+
+    def _load_or_extract(
+        self,
+        extraction_source: str,
+        result: PipelineResult,
+        extract_fn,
+    ) -> tuple:
+        """Extração bruta, com checkpoint por PDF + versão + config."""
+        store = self.checkpoints
+        if store is None:
+            return extract_fn()
+
+        key = self._extraction_checkpoint_key(extraction_source, result.document_hash)
+        cached = store.load_extraction(key)
+        if cached is not None:
+            logger.info(
+                f"[{result.document_id}] Checkpoint: extração ({extraction_source}) "
+                f"restaurada, {len(cached[0])} páginas"
+            )
+            result.checkpoint_hits.append("extraction")
+            return cached
+
+        pages_data, canonical_text = extract_fn()
+        store.save_extraction(key, pages_data, canonical_text)
+        return pages_data, canonical_text
+
+    def _extraction_checkpoint_key(self, extraction_source: str, document_hash: str) -> str:
+        """Chave do checkpoint de extração: PDF + versão + config da extração."""
+        from ..config import config as app_config
+
+        phase_config = {
+            "source": extraction_source,
+            "dpi": app_config.vlm_page_dpi,
+            "max_pixels": app_config.vlm_image_max_pixels,
+            # lean descarta spans dos blocos: checkpoint lean não serve ao full
+            "pymupdf_profile": app_config.pymupdf_profile,
+        }
+        if extraction_source != "pymupdf":
+            # O texto OCR depende da imagem enviada, do modelo e do prompt
+            from ..extraction.vlm_ocr import OCR_PROMPT_VERSION
+
+            phase_config.update({
+                "grayscale": app_config.vlm_image_grayscale,
+                "image_format": app_config.vlm_image_format,
+                "image_quality": app_config.vlm_image_quality,
+                "model": app_config.vllm_model,
+                "ocr_prompt_version": OCR_PROMPT_VERSION,
+                "ocr_stream": app_config.vlm_ocr_stream,
+            })
+        return self.checkpoints.make_key(
+            document_hash, app_config.pipeline_version, "extraction", phase_config,
+        )
+
+    def _embed_chunks(
+        self,
+        chunks: List[ProcessedChunk],
+        result: PipelineResult,
+        previous_vectors: Optional[dict] = None,
+    ) -> int:
+        """
+        Gera dense/sparse para cada chunk (retrieval_text ou text).
+
+        Vetores de textos já embeddados numa execução anterior do mesmo
+        PDF + versão + modelo vêm do checkpoint; em modo incremental,
+        previous_vectors ({sha256(texto): (dense, sparse)}) traz os da versão
+        anterior do documento. Retorna quantos foram reaproveitados.
+        """
+        from ..config import config as app_config
+
+        from .checkpoints import text_digest
+
+        store = self.checkpoints
+        key = None
+        previous: dict = dict(previous_vectors or {})
+        if store is not None:
+            key = store.make_key(
+                result.document_hash, app_config.pipeline_version, "embedding",
+                {"model": app_config.embedding_model},
+            )
+            previous.update(store.load_embeddings(key))
+
+        vectors = {}
+        reused = 0
+        digests = []
+        pending = []  # (chunk, texto) sem vetor reaproveitado
+        for chunk in chunks:
+            text_for_embedding = chunk.retrieval_text or chunk.text
+            digest = text_digest(text_for_embedding) if previous or store is not None else None
+            digests.append(digest)
+            cached = previous.get(digest) if digest else None
+            if cached is not None:
+                chunk.dense_vector, chunk.sparse_vector = cached
+                reused += 1
+            else:
+                pending.append((chunk, text_for_embedding))
+
+        # Um encode por lote de textos (não por chunk)
+        batch_size = max(1, app_config.ingest_embed_batch_size)
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            embed_result = self._encode_texts([text for _, text in batch])
+            for i, (chunk, _) in enumerate(batch):
+                chunk.dense_vector = embed_result.dense_embeddings[i]
+                chunk.sparse_vector = (
+                    embed_result.sparse_embeddings[i]
+                    if embed_result.sparse_embeddings
+                    else {}
+                )
+
+        for chunk, digest in zip(chunks, digests):
+            if digest:
+                vectors[digest] = (chunk.dense_vector, chunk.sparse_vector)
+
+        if store is not None:
+            if reused:
+                logger.info(
+                    f"[{result.document_id}] Checkpoint: {reused}/{len(chunks)} "
+                    f"embeddings reaproveitados"
+                )
+            if reused == len(chunks) and chunks:
+                result.checkpoint_hits.append("embedding")
+            if reused < len(chunks):
+                store.save_embeddings(key, vectors)
+        return reused
+
+    def _encode_texts(self, texts: List[str]):
+        """
+        Embeddings de um lote de textos: no StagedIngestExecutor, vai para o
+        batch de GPU compartilhado entre documentos; fora dele, direto ao embedder.
+        """
+        from .staged_executor import current_stages
+
+        stages = current_stages()
+        if stages is not None:
+            return stages.encode(texts)
+        return self.embedder.encode(texts)
+
+    @property
+    def chunk_registry(self):
+        """ChunkRegistry da última versão por documento - lazy loaded (None se desabilitado)."""
+        from ..config import config
+
+        if not config.chunk_registry_enabled:
+            return None
+        if self._chunk_registry is None:
+            from .chunk_registry import ChunkRegistry
+
+            self._chunk_registry = ChunkRegistry(
+                cache_dir=config.chunk_registry_dir,
+                max_bytes=config.chunk_registry_max_mb * 1024 * 1024,
+            )
+        return self._chunk_registry
+
+    def _load_previous_version(self, request: IngestRequest) -> Optional[dict]:
+        """Versão registrada do documento (só em modo incremental)."""
+        registry = self.chunk_registry
+        if not getattr(request, "incremental", False) or registry is None:
+            return None
+        entry = registry.load(request.document_id)
+        if entry is None:
+            logger.info(
+                f"[{request.document_id}] Incremental: nenhuma versão registrada, "
+                f"ingestão completa"
+            )
+        return entry
+
+    @staticmethod
+    def _previous_vectors(previous_version: Optional[dict]) -> dict:
+        from ..config import config
+        from .chunk_registry import ChunkRegistry
+
+        return ChunkRegistry.previous_vectors(previous_version, config.embedding_model)
+
+    def _finalize_chunks(
+        self,
+        chunks: List[ProcessedChunk],
+        request: IngestRequest,
+        result: PipelineResult,
+        previous_version: Optional[dict],
+    ) -> List[ProcessedChunk]:
+        """
+        Registra a versão ingerida e, em modo incremental, retorna apenas os
+        chunks a gravar no Milvus (new/changed/metadata). O diff completo,
+        incluindo node_ids removidos e posições deslocadas, vai em
+        result.incremental.
+
+        A versão é registrada aqui, antes do sink na VPS: o diff só é feito
+        se incremental_base_run_id confirmar que essa base chegou ao Milvus.
+        """
+        from ..config import config as app_config
+        from .chunk_registry import ChunkRegistry
+
+        diff = None
+        if previous_version is not None:
+            base = getattr(request, "incremental_base_run_id", None)
+            registered = previous_version.get("ingest_run_id", "")
+            if not base:
+                logger.warning(
+                    f"[{request.document_id}] Incremental sem incremental_base_run_id "
+                    f"(versão registrada: {registered}), ingestão completa"
+                )
+                result.incremental = {
+                    "mode": "full",
+                    "reason": "incremental_base_run_id não informado",
+                }
+            elif base != registered:
+                logger.warning(
+                    f"[{request.document_id}] Incremental: base informada ({base}) difere "
+                    f"da versão registrada ({registered}), ingestão completa"
+                )
+                result.incremental = {
+                    "mode": "full",
+                    "reason": f"base {base} != registrada {registered}",
+                }
+            else:
+                diff = ChunkRegistry.diff(chunks, previous_version, result.canonical_hash)
+        elif getattr(request, "incremental", False):
+            result.incremental = {"mode": "full", "reason": "sem versão registrada"}
+
+        registry = self.chunk_registry
+        if registry is not None and not request.skip_embeddings:
+            registry.save(
+                request.document_id, chunks,
+                ingest_run_id=result.ingest_run_id,
+                document_hash=result.document_hash,
+                canonical_hash=result.canonical_hash,
+                model=app_config.embedding_model,
+            )
+
+        if diff is None:
+            return chunks
+
+        result.incremental = {"mode": "incremental", **diff.to_dict()}
+        upsert = diff.upsert
+        logger.info(
+            f"[{request.document_id}] Incremental vs {diff.base_ingest_run_id}: "
+            f"{len(diff.new)} novos, {len(diff.changed)} alterados, "
+            f"{len(diff.metadata)} com metadados novos, {len(diff.unchanged)} inalterados "
+            f"({len(diff.positions)} deslocados), {len(diff.removed)} removidos"
+        )
+        return [c for c in chunks if c.node_id in upsert]
+
+    async def process_async(
+        self,
+        pdf_content: bytes,
+        request: IngestRequest,
+        progress_callback=None,
+        executor=None,
+    ) -> PipelineResult:
+        """
+        process() para o event loop do servidor.
+
+        O OCR VLM (modos vlm/hybrid) roda direto no loop, com o VLMClient
+        compartilhado entre documentos (loop_vlm_service): sem asyncio.run
+        nem pool de conexões novo por documento. As fases CPU/GPU (PyMuPDF,
+        classificação, chunks, embeddings) rodam em `executor` (None = o
+        executor padrão do loop), sem bloquear o loop.
+
+        Args:
+            pdf_content, request, progress_callback: como em process()
+            executor: concurrent.futures.Executor das fases síncronas
+
+        Returns:
+            PipelineResult com chunks processados
+        """
+        loop = asyncio.get_running_loop()
+        extraction = None
+        extraction_mode = getattr(request, 'extraction_mode', 'pymupdf_regex')
+        if extraction_mode in ('vlm', 'hybrid'):
+            extraction = await self._extract_vlm_async(
+                pdf_content, request, progress_callback,
+                hybrid=extraction_mode == 'hybrid', executor=executor,
+            )
+        return await loop.run_in_executor(
+            executor,
+            partial(
+                self.process, pdf_content, request,
+                progress_callback=progress_callback, extraction=extraction,
+            ),
+        )
+
+    async def _extract_vlm_async(
+        self,
+        pdf_content: bytes,
+        request: IngestRequest,
+        progress_callback,
+        hybrid: bool,
+        executor=None,
+    ) -> Callable[[PipelineResult], tuple]:
+        """
+        Extração VLM (OCR ou híbrida) no loop atual, com checkpoint lido e
+        gravado no executor.
+
+        Retorna o callable `extraction` de process(): aplica checkpoint_hits
+        e vlm_stats ao PipelineResult e devolve (pages_data, canonical_text)
+        — ou relança o erro da extração, que a fase registra como sempre.
+        """
+        from ..extraction.vlm_client import VLMCallStats, collect_vlm_stats
+
+        loop = asyncio.get_running_loop()
+        source = "hybrid" if hybrid else "vlm_ocr"
+        stats = VLMCallStats()
+        restored = False
+        outcome: Any = None
+
+        try:
+            store = self.checkpoints
+            key = None
+            if store is not None:
+                document_hash = hashlib.sha256(pdf_content).hexdigest()
+                key = self._extraction_checkpoint_key(source, document_hash)
+                outcome = await loop.run_in_executor(executor, store.load_extraction, key)
+                restored = outcome is not None
+            if outcome is None:
+                service = self.loop_vlm_service()
+                extract_fn = service.hybrid_document if hybrid else service.ocr_document
+                with collect_vlm_stats(stats):
+                    outcome = await extract_fn(
+                        pdf_bytes=pdf_content,
+                        document_id=request.document_id,
+                        progress_callback=progress_callback,
+                    )
+                if store is not None:
+                    await loop.run_in_executor(executor, store.save_extraction, key, *outcome)
+        except Exception as e:
+            outcome = e
+
+        def extraction(result: PipelineResult) -> tuple:
+            if stats.requests:
+                result.vlm_stats = stats.to_dict()
+            if isinstance(outcome, Exception):
+                raise outcome
+            if restored:
+                logger.info(
+                    f"[{result.document_id}] Checkpoint: extração ({source}) "
+                    f"restaurada, {len(outcome[0])} páginas"
+                )
+                result.checkpoint_hits.append("extraction")
+            return outcome
+
+        return extraction
 
     def process(
         self,
         pdf_content: bytes,
         request: IngestRequest,
         progress_callback=None,
+        extraction: Optional[Callable[[PipelineResult], tuple]] = None,
     ) -> PipelineResult:
         """
         Processa um PDF e retorna chunks prontos para indexacao.
@@ -279,14 +802,20 @@ class IngestionPipeline:
             request: Metadados do documento
             progress_callback: Funcao callback(phase: str, progress: float)
                                para reportar progresso (0.0 a 1.0)
+            extraction: Extração VLM já feita no event loop (process_async)
 
         Returns:
             PipelineResult com chunks processados
+
+        Raises:
+            IngestCancelledError: progress_callback sinalizou cancelamento
         """
         def report_progress(phase: str, progress: float):
             if progress_callback:
                 try:
                     progress_callback(phase, progress)
+                except IngestCancelledError:
+                    raise
                 except Exception as e:
                     logger.warning(f"Erro no progress_callback: {e}")
 
@@ -319,11 +848,15 @@ class IngestionPipeline:
 
                 if request.tipo_documento == "ACORDAO":
                     # === PIPELINE ACÓRDÃO ===
-                    if extraction_mode == 'vlm':
-                        logger.info(f"Pipeline Acórdão+VLM ativo para {request.document_id}")
+                    if extraction_mode in ('vlm', 'hybrid'):
+                        logger.info(
+                            f"Pipeline Acórdão+VLM ({extraction_mode}) ativo para {request.document_id}"
+                        )
                         report_progress("acordao_vlm_extraction", 0.10)
                         self._phase_acordao_vlm_extraction(
-                            pdf_content, request, result, report_progress
+                            pdf_content, request, result, report_progress,
+                            hybrid=extraction_mode == 'hybrid',
+                            extraction=extraction,
                         )
                     else:
                         logger.info(f"Pipeline Acórdão+Regex ativo para {request.document_id}")
@@ -331,13 +864,15 @@ class IngestionPipeline:
                         self._phase_acordao_extraction(
                             pdf_content, request, result, report_progress
                         )
-                elif extraction_mode == 'vlm':
-                    # === PIPELINE VLM: PyMuPDF + Qwen3-VL ===
-                    logger.info(f"Pipeline VLM ativo para {request.document_id}")
+                elif extraction_mode in ('vlm', 'hybrid'):
+                    # === PIPELINE VLM: PyMuPDF + Qwen3-VL (todas as páginas ou híbrido) ===
+                    logger.info(f"Pipeline VLM ({extraction_mode}) ativo para {request.document_id}")
                     report_progress("vlm_extraction", 0.10)
 
                     self._phase_vlm_extraction(
-                        pdf_content, request, result, report_progress
+                        pdf_content, request, result, report_progress,
+                        hybrid=extraction_mode == 'hybrid',
+                        extraction=extraction,
                     )
                 else:
                     # === PIPELINE PyMuPDF + Regex ===
@@ -359,6 +894,8 @@ class IngestionPipeline:
                 if os.path.exists(temp_path):
                     os.remove(temp_path)
 
+        except IngestCancelledError:
+            raise
         except Exception as e:
             logger.error(f"Erro no pipeline: {e}", exc_info=True)
             result.status = IngestStatus.FAILED
@@ -376,6 +913,8 @@ class IngestionPipeline:
         request: IngestRequest,
         result: PipelineResult,
         report_progress,
+        hybrid: bool = False,
+        extraction: Optional[Callable[[PipelineResult], tuple]] = None,
     ) -> None:
         """
         Pipeline VLM OCR: PyMuPDF (imagens) + Qwen3-VL (OCR) → mesmo regex.
@@ -383,41 +922,53 @@ class IngestionPipeline:
         Entrada 2: a única diferença da Entrada 1 é DE ONDE vem o texto.
         Aqui o texto vem do OCR do Qwen3-VL em vez do PyMuPDF nativo.
         Todo o pipeline downstream (regex classifier, chunks, embeddings) é idêntico.
+
+        hybrid=True: só as páginas sem texto nativo utilizável vão para o OCR;
+        as demais mantêm o texto PyMuPDF (ver extraction/page_routing.py).
         """
         phase_start = time.perf_counter()
+        phase_name = "hybrid_extraction" if hybrid else "vlm_ocr_extraction"
+        extraction_source = "hybrid" if hybrid else "vlm_ocr"
 
         try:
             from ..config import config as app_config
-            from ..extraction.regex_classifier import classify_to_devices
-            from ..extraction.regex_classifier import classify_document as regex_classify_document
+            from ..extraction.regex_classifier import classify_with_devices
             from ..extraction.vlm_ocr import validate_ocr_quality
 
             # 1. VLM OCR: PyMuPDF (imagens) + Qwen3-VL (texto por página)
-            self.vlm_service.vlm_client.reset_client()
-            pages_data, raw_canonical = asyncio.run(
-                self.vlm_service.ocr_document(
+            def run_ocr():
+                extract_fn = (
+                    self.vlm_service.hybrid_document if hybrid
+                    else self.vlm_service.ocr_document
+                )
+                return self._run_vlm(
+                    result, extract_fn,
                     pdf_bytes=pdf_content,
                     document_id=request.document_id,
                     progress_callback=report_progress,
                 )
+
+            pages_data, raw_canonical = self._extract_checkpointed(
+                "hybrid" if hybrid else "vlm_ocr", result, run_ocr, extraction=extraction,
             )
+            ocr_page_count = sum(1 for p in pages_data if p.text_source == "ocr")
 
             report_progress("vlm_extraction", 0.30)
 
             # 2. Idempotency check (offsets nativos devem sobreviver normalize)
+            canonical = CanonicalText(raw_canonical)
             canonical_text = raw_canonical
-            normalized_check = normalize_canonical_text(raw_canonical)
-            if canonical_text != normalized_check:
+            if not canonical.is_normalized:
                 logger.error(
                     f"[{request.document_id}] OFFSET DRIFT: OCR canonical_text "
                     f"diverge de normalize_canonical_text() — offsets seriam inválidos! "
-                    f"raw_len={len(canonical_text)} norm_len={len(normalized_check)}"
+                    f"raw_len={len(canonical_text)} norm_len={len(canonical.text)}"
                 )
                 raise RuntimeError(
                     "VLM OCR canonical_text diverge de normalize_canonical_text(): "
                     "offsets nativos seriam inválidos."
                 )
-            canonical_hash = compute_canonical_hash(canonical_text)
+            canonical_hash = canonical.sha256
 
             result.markdown_content = canonical_text
             result.canonical_hash = canonical_hash
@@ -445,8 +996,7 @@ class IngestionPipeline:
             pages_for_classifier = self._convert_pages_to_classifier_format(pages_data)
 
             # 5. Classificação regex (MESMO classifier da Entrada 1)
-            classification_result = regex_classify_document(pages_for_classifier)
-            devices = classify_to_devices(pages_for_classifier)
+            classification_result, devices = classify_with_devices(pages_for_classifier)
             logger.info(
                 f"[{request.document_id}] VLM OCR + RegexClassifier: {len(devices)} dispositivos"
             )
@@ -464,14 +1014,17 @@ class IngestionPipeline:
             # Registra fase
             extract_duration = round(time.perf_counter() - phase_start, 2)
             result.phases.append({
-                "name": "vlm_ocr_extraction",
+                "name": phase_name,
                 "duration_seconds": extract_duration,
                 "output": (
                     f"Extraídos {len(devices)} dispositivos de "
-                    f"{len(pages_data)} páginas via VLM OCR+Regex"
+                    f"{len(pages_data)} páginas via VLM OCR+Regex "
+                    f"({ocr_page_count} páginas OCR)"
                 ),
                 "success": True,
-                "method": "vlm_ocr+regex",
+                "method": f"{extraction_source}+regex",
+                "ocr_pages": ocr_page_count,
+                "vlm_stats": result.vlm_stats or None,
             })
 
             # 6. Emit inspection snapshot (Redis) — reutiliza formato regex
@@ -479,10 +1032,12 @@ class IngestionPipeline:
                 result.inspection_snapshot = self._emit_regex_inspection_snapshot(
                     classification_result, canonical_text, canonical_hash,
                     extract_duration, request, pages_data,
-                    extraction_source="vlm_ocr",
+                    extraction_source=extraction_source,
+                    canonical=canonical,
                 ) or {}
             except Exception as e:
                 logger.warning(f"Failed to emit inspector snapshot: {e}")
+            self._release_page_images(pages_data)
 
             # 7. Converte ClassifiedDevice -> ProcessedChunk (MESMO da Entrada 1)
             chunks = self._regex_to_processed_chunks(
@@ -511,7 +1066,8 @@ class IngestionPipeline:
 
             # 8.6. Dual Ingestion: gera chunks consolidados @FULL
             from .consolidation import generate_consolidated_chunks
-            consolidated = generate_consolidated_chunks(chunks, request)
+            chunk_index = ChunkIndex(chunks)
+            consolidated = generate_consolidated_chunks(chunks, request, chunk_index)
             if consolidated:
                 logger.info(
                     f"[{request.document_id}] Dual Ingestion (VLM): "
@@ -520,31 +1076,26 @@ class IngestionPipeline:
                 chunks.extend(consolidated)
 
             # 9. Embeddings (se não pular)
+            previous_version = self._load_previous_version(request)
             if not request.skip_embeddings:
                 report_progress("embedding", 0.70)
-                for chunk in chunks:
-                    text_for_embedding = chunk.retrieval_text or chunk.text
-                    embed_result = self.embedder.encode([text_for_embedding])
-                    chunk.dense_vector = embed_result.dense_embeddings[0]
-                    chunk.sparse_vector = (
-                        embed_result.sparse_embeddings[0]
-                        if embed_result.sparse_embeddings
-                        else {}
-                    )
+                reused = self._embed_chunks(
+                    chunks, result,
+                    previous_vectors=self._previous_vectors(previous_version),
+                )
                 report_progress("embedding", 0.88)
 
                 result.phases.append({
                     "name": "embedding",
                     "duration_seconds": round(time.perf_counter() - phase_start - extract_duration, 2),
-                    "output": f"Embeddings para {len(chunks)} chunks VLM OCR",
+                    "output": f"Embeddings para {len(chunks)} chunks VLM OCR ({reused} reaproveitados)",
                     "success": True,
                 })
 
             # 10. Artifacts upload
             report_progress("artifacts_upload", 0.88)
             self._phase_artifacts_upload(
-                pdf_content, canonical_text, canonical_hash,
-                chunks, request, result,
+                pdf_content, canonical, chunks, request, result,
             )
             report_progress("artifacts_upload", 0.94)
 
@@ -563,9 +1114,10 @@ class IngestionPipeline:
             # 13. Manifesto de ingestão
             result.manifest = self._build_manifest(
                 chunks, canonical_text, canonical_hash, request.document_id,
+                chunk_index=chunk_index,
             )
 
-            result.chunks = chunks
+            result.chunks = self._finalize_chunks(chunks, request, result, previous_version)
             result.status = IngestStatus.COMPLETED
 
             report_progress("completed", 1.0)
@@ -576,19 +1128,20 @@ class IngestionPipeline:
                 f"manifest: {result.manifest.get('total_spans')} spans"
             )
 
+        except IngestCancelledError:
+            raise
         except Exception as e:
             logger.error(f"Erro no pipeline VLM OCR: {e}", exc_info=True)
             result.status = IngestStatus.FAILED
             result.errors.append(IngestError(
-                phase="vlm_ocr_extraction",
+                phase=phase_name,
                 message=str(e),
             ))
 
     def _phase_artifacts_upload(
         self,
         pdf_content: bytes,
-        canonical_text: str,
-        canonical_hash: str,
+        canonical: CanonicalText,
         chunks: List[ProcessedChunk],
         request: IngestRequest,
         result: PipelineResult,
@@ -597,13 +1150,26 @@ class IngestionPipeline:
         """
         Upload de artefatos para a VPS.
 
-        Envia PDF original, canonical.md e offsets.json.
+        Envia PDF original, canonical.md e offsets.json. Texto e hash vêm
+        do CanonicalText já calculado pelo caller (sem re-normalizar).
 
         Se o upload falhar, continua o pipeline com warning.
 
         Returns:
             True sempre (nunca aborta o pipeline)
         """
+        from .staged_executor import current_stages
+
+        stages = current_stages()
+        if stages is not None:
+            # StagedIngestExecutor: o upload roda no estágio de sink (outra
+            # thread, sem estágio corrente), liberando o worker de CPU
+            stages.defer_sink(partial(
+                self._phase_artifacts_upload,
+                pdf_content, canonical, chunks, request, result, debug_artifacts,
+            ))
+            return True
+
         phase_start = time.perf_counter()
 
         try:
@@ -629,8 +1195,8 @@ class IngestionPipeline:
             )
 
             # Canonical text normalizado
-            canonical_md = normalize_canonical_text(canonical_text)
-            c_hash = compute_canonical_hash(canonical_md)
+            canonical_md = canonical.text
+            c_hash = canonical.sha256
 
             # Constrói offsets_map a partir dos chunks com offsets resolvidos
             offsets_map: Dict[str, Tuple[int, int]] = {}
@@ -714,6 +1280,15 @@ class IngestionPipeline:
             })
             return True
 
+    @staticmethod
+    def _release_page_images(pages_data: list) -> None:
+        """Libera as imagens das páginas depois do snapshot de inspeção (VLM_RELEASE_IMAGES)."""
+        from ..config import config as app_config
+
+        if app_config.vlm_release_images:
+            for page in pages_data:
+                page.release_image()
+
     def _emit_regex_inspection_snapshot(
         self,
         classification_result: dict,
@@ -723,11 +1298,13 @@ class IngestionPipeline:
         request: IngestRequest,
         pages_data: list,
         extraction_source: str = "pymupdf_native",
+        canonical: Optional[CanonicalText] = None,
     ) -> dict:
         """
         Emite snapshot da classificação regex para o Redis (Inspector).
         Falha silenciosa — não aborta o pipeline.
         Retorna dict do snapshot para inclusão no task.result.
+        Com canonical, o check de idempotência reaproveita a normalização já feita.
         """
         import unicodedata
         from ..inspection.storage import InspectionStorage
@@ -801,8 +1378,6 @@ class IngestionPipeline:
         )
 
         # --- Integrity checks ---
-        from ..chunking.canonical_offsets import normalize_canonical_text as norm_ct
-
         # Check 1: offsets
         # Devices com orphan merge (Pass 2.5) têm full_text mais longo que o
         # slice porque o texto do órfão é concatenado ao conteúdo semântico,
@@ -832,7 +1407,10 @@ class IngestionPipeline:
             ))
 
         # Check 2: normalization idempotent
-        norm_idempotent = canonical_text == norm_ct(canonical_text)
+        if canonical is not None:
+            norm_idempotent = canonical.is_normalized
+        else:
+            norm_idempotent = canonical_text == normalize_canonical_text(canonical_text)
 
         # Check 3: no trailing spaces per line
         trailing_violations = sum(
@@ -901,6 +1479,7 @@ class IngestionPipeline:
                 height=pg.height,
                 blocks=blocks,
                 image_base64=pg.image_base64,
+                image_mime=pg.image_mime,
             ))
 
         pymupdf_artifact = PyMuPDFArtifact(
@@ -1010,15 +1589,15 @@ class IngestionPipeline:
         """
         chunks = []
 
-        # Build span_id → device map for subtree aggregation
-        device_by_span = {d.span_id: d for d in devices}
+        # Índice span_id → device para agregação da subárvore
+        device_index = ChunkIndex.for_devices(devices)
 
         def _build_retrieval_text(article_device):
             """Concatena texto do artigo + toda a subárvore de filhos (recursivo)."""
             parts = [article_device.text or ""]
 
             def collect(span_id):
-                d = device_by_span.get(span_id)
+                d = device_index.by_span(span_id)
                 if d:
                     parts.append(d.text or "")
                     for child_id in d.children_span_ids:
@@ -1029,7 +1608,30 @@ class IngestionPipeline:
 
             return "\n".join(parts)
 
+        from ..config import config as app_config
+
+        # Citações de todos os dispositivos em lote (um extrator por documento)
+        citation_inputs = []
         for device in devices:
+            node_id = f"leis:{request.document_id}#{device.span_id}"
+            parent_node_id = (
+                f"leis:{request.document_id}#{device.parent_span_id}"
+                if device.parent_span_id else ""
+            )
+            citation_inputs.append({
+                "text": device.text or "",
+                "chunk_node_id": node_id,
+                "parent_chunk_id": parent_node_id or None,
+            })
+        all_citations = extract_citations_batch(
+            citation_inputs,
+            document_id=request.document_id,
+            document_type=request.tipo_documento,
+            workers=app_config.citation_workers,
+            parallel_min_chunks=app_config.citation_parallel_min_chunks,
+        )
+
+        for device, citations in zip(devices, all_citations):
             # node_id e chunk_id
             chunk_id = f"{request.document_id}#{device.span_id}"
             node_id = f"leis:{chunk_id}"
@@ -1042,15 +1644,6 @@ class IngestionPipeline:
             # chunk_level
             chunk_level = "article" if device.device_type == "article" else "device"
 
-            # Citações
-            citations = extract_citations_from_chunk(
-                text=device.text or "",
-                document_id=request.document_id,
-                chunk_node_id=node_id,
-                parent_chunk_id=parent_node_id or None,
-                document_type=request.tipo_documento,
-            )
-
             pc = ProcessedChunk(
                 node_id=node_id,
                 chunk_id=chunk_id,
@@ -1112,30 +1705,31 @@ class IngestionPipeline:
 
         try:
             from ..config import config as app_config
-            from ..extraction.pymupdf_extractor import PyMuPDFExtractor
-            from ..extraction.regex_classifier import classify_to_devices
+            from ..extraction.regex_classifier import classify_with_devices
 
             # 1. Extração PyMuPDF (MESMO extrator do VLM path)
-            extractor = PyMuPDFExtractor(dpi=app_config.vlm_page_dpi)
-            pages_data, raw_canonical = extractor.extract_pages(pdf_content)
+            extractor = _make_pymupdf_extractor(app_config)
+            pages_data, raw_canonical = self._extract_checkpointed(
+                "pymupdf", result, lambda: extractor.extract_pages(pdf_content),
+            )
 
             report_progress("pymupdf_regex_extraction", 0.30)
 
             # 2. canonical_text = raw do extractor (já normalizado inline: NFC + rstrip + trailing \n)
             # Os offsets dos blocos são nativos a este texto — NÃO re-normalizar.
+            canonical = CanonicalText(raw_canonical)
             canonical_text = raw_canonical
-            normalized_check = normalize_canonical_text(raw_canonical)
-            if canonical_text != normalized_check:
+            if not canonical.is_normalized:
                 logger.error(
                     f"[{request.document_id}] OFFSET DRIFT: extract_pages() retornou texto "
                     f"que difere de normalize_canonical_text() — offsets seriam inválidos! "
-                    f"raw_len={len(canonical_text)} norm_len={len(normalized_check)}"
+                    f"raw_len={len(canonical_text)} norm_len={len(canonical.text)}"
                 )
                 raise RuntimeError(
                     "extract_pages() output diverge de normalize_canonical_text(): "
                     "offsets nativos seriam inválidos. Verifique normalização inline do extractor."
                 )
-            canonical_hash = compute_canonical_hash(canonical_text)
+            canonical_hash = canonical.sha256
 
             result.markdown_content = canonical_text
             result.canonical_hash = canonical_hash
@@ -1163,9 +1757,7 @@ class IngestionPipeline:
             pages_for_classifier = self._convert_pages_to_classifier_format(pages_data)
 
             # 5. Classificação regex
-            from ..extraction.regex_classifier import classify_document as regex_classify_document
-            classification_result = regex_classify_document(pages_for_classifier)
-            devices = classify_to_devices(pages_for_classifier)
+            classification_result, devices = classify_with_devices(pages_for_classifier)
             logger.info(
                 f"[{request.document_id}] RegexClassifier: {len(devices)} dispositivos"
             )
@@ -1190,9 +1782,11 @@ class IngestionPipeline:
                 result.inspection_snapshot = self._emit_regex_inspection_snapshot(
                     classification_result, canonical_text, canonical_hash,
                     extract_duration, request, pages_data,
+                    canonical=canonical,
                 ) or {}
             except Exception as e:
                 logger.warning(f"Failed to emit inspector snapshot: {e}")
+            self._release_page_images(pages_data)
 
             # 6. Converte ClassifiedDevice -> ProcessedChunk
             chunks = self._regex_to_processed_chunks(
@@ -1221,7 +1815,8 @@ class IngestionPipeline:
 
             # 7.6. Dual Ingestion: gera chunks consolidados @FULL
             from .consolidation import generate_consolidated_chunks
-            consolidated = generate_consolidated_chunks(chunks, request)
+            chunk_index = ChunkIndex(chunks)
+            consolidated = generate_consolidated_chunks(chunks, request, chunk_index)
             if consolidated:
                 logger.info(
                     f"[{request.document_id}] Dual Ingestion: "
@@ -1230,31 +1825,26 @@ class IngestionPipeline:
                 chunks.extend(consolidated)
 
             # 8. Embeddings (se não pular)
+            previous_version = self._load_previous_version(request)
             if not request.skip_embeddings:
                 report_progress("embedding", 0.70)
-                for chunk in chunks:
-                    text_for_embedding = chunk.retrieval_text or chunk.text
-                    embed_result = self.embedder.encode([text_for_embedding])
-                    chunk.dense_vector = embed_result.dense_embeddings[0]
-                    chunk.sparse_vector = (
-                        embed_result.sparse_embeddings[0]
-                        if embed_result.sparse_embeddings
-                        else {}
-                    )
+                reused = self._embed_chunks(
+                    chunks, result,
+                    previous_vectors=self._previous_vectors(previous_version),
+                )
                 report_progress("embedding", 0.88)
 
                 result.phases.append({
                     "name": "embedding",
                     "duration_seconds": round(time.perf_counter() - phase_start - extract_duration, 2),
-                    "output": f"Embeddings para {len(chunks)} chunks Regex",
+                    "output": f"Embeddings para {len(chunks)} chunks Regex ({reused} reaproveitados)",
                     "success": True,
                 })
 
             # 9. Artifacts upload
             report_progress("artifacts_upload", 0.88)
             self._phase_artifacts_upload(
-                pdf_content, canonical_text, canonical_hash,
-                chunks, request, result,
+                pdf_content, canonical, chunks, request, result,
             )
             report_progress("artifacts_upload", 0.94)
 
@@ -1273,9 +1863,10 @@ class IngestionPipeline:
             # 12. Manifesto de ingestão
             result.manifest = self._build_manifest(
                 chunks, canonical_text, canonical_hash, request.document_id,
+                chunk_index=chunk_index,
             )
 
-            result.chunks = chunks
+            result.chunks = self._finalize_chunks(chunks, request, result, previous_version)
             result.status = IngestStatus.COMPLETED
 
             report_progress("completed", 1.0)
@@ -1286,6 +1877,8 @@ class IngestionPipeline:
                 f"manifest: {result.manifest.get('total_spans')} spans"
             )
 
+        except IngestCancelledError:
+            raise
         except Exception as e:
             logger.error(f"Erro no pipeline PyMuPDF+Regex: {e}", exc_info=True)
             result.status = IngestStatus.FAILED
@@ -1301,12 +1894,17 @@ class IngestionPipeline:
         canonical_hash: str,
         document_id: str,
         acordao_metadata: Optional[dict] = None,
+        chunk_index: Optional[ChunkIndex] = None,
     ) -> dict:
         """
         Gera manifesto de ingestão para reconciliação pela VPS.
 
         Inclui contagens, lista de span_ids, cobertura de offsets,
         e material externo detectado.
+
+        chunk_index: índice já montado do documento (a cobertura sai dos
+        intervalos ordenados dele). Chunks fora do índice (ex: @FULL) não
+        têm offsets e não contam para a cobertura.
         """
         span_ids = []
         spans_by_type: Dict[str, int] = {}
@@ -1315,7 +1913,6 @@ class IngestionPipeline:
         external_spans = []
         vehicle_articles = []
         target_documents_set: set = set()
-        covered_intervals = []
 
         for c in chunks:
             sid = c.span_id or ""
@@ -1346,22 +1943,10 @@ class IngestionPipeline:
             if origin_ref and origin_ref not in target_documents_set:
                 target_documents_set.add(origin_ref)
 
-            cs = getattr(c, "canonical_start", -1)
-            ce = getattr(c, "canonical_end", -1)
-            if cs >= 0 and ce > cs:
-                covered_intervals.append((cs, ce))
-
-        # Calcula cobertura de offsets (merge overlapping intervals)
-        covered_chars = 0
-        if covered_intervals:
-            covered_intervals.sort()
-            merged = [covered_intervals[0]]
-            for start, end in covered_intervals[1:]:
-                if start <= merged[-1][1]:
-                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
-                else:
-                    merged.append((start, end))
-            covered_chars = sum(end - start for start, end in merged)
+        # Cobertura de offsets (união dos intervalos canônicos)
+        if chunk_index is None:
+            chunk_index = ChunkIndex(chunks)
+        covered_chars = chunk_index.covered_chars()
 
         total_chars = len(canonical_text) if canonical_text else 0
         coverage_pct = round((covered_chars / total_chars * 100), 1) if total_chars > 0 else 0.0
@@ -1421,11 +2006,12 @@ class IngestionPipeline:
         phase_start = time.perf_counter()
         try:
             from ..config import config as app_config
-            from ..extraction.pymupdf_extractor import PyMuPDFExtractor
 
             # 1. Extração PyMuPDF
-            extractor = PyMuPDFExtractor(dpi=app_config.vlm_page_dpi)
-            pages_data, raw_canonical = extractor.extract_pages(pdf_content)
+            extractor = _make_pymupdf_extractor(app_config)
+            pages_data, raw_canonical = self._extract_checkpointed(
+                "pymupdf", result, lambda: extractor.extract_pages(pdf_content),
+            )
 
             report_progress("acordao_extraction", 0.30)
 
@@ -1435,6 +2021,8 @@ class IngestionPipeline:
                 phase_start, extraction_source="pymupdf_native",
             )
 
+        except IngestCancelledError:
+            raise
         except Exception as e:
             logger.error(f"Erro no pipeline Acórdão: {e}", exc_info=True)
             result.status = IngestStatus.FAILED
@@ -1449,18 +2037,27 @@ class IngestionPipeline:
         request: IngestRequest,
         result: PipelineResult,
         report_progress,
+        hybrid: bool = False,
+        extraction: Optional[Callable[[PipelineResult], tuple]] = None,
     ) -> None:
-        """Pipeline Acórdão + VLM OCR."""
+        """Pipeline Acórdão + VLM OCR (todas as páginas ou híbrido)."""
         phase_start = time.perf_counter()
         try:
             # 1. VLM OCR
-            self.vlm_service.vlm_client.reset_client()
-            pages_data, raw_canonical = asyncio.run(
-                self.vlm_service.ocr_document(
+            def run_ocr():
+                extract_fn = (
+                    self.vlm_service.hybrid_document if hybrid
+                    else self.vlm_service.ocr_document
+                )
+                return self._run_vlm(
+                    result, extract_fn,
                     pdf_bytes=pdf_content,
                     document_id=request.document_id,
                     progress_callback=report_progress,
                 )
+
+            pages_data, raw_canonical = self._extract_checkpointed(
+                "hybrid" if hybrid else "vlm_ocr", result, run_ocr, extraction=extraction,
             )
 
             report_progress("acordao_vlm_extraction", 0.30)
@@ -1468,9 +2065,11 @@ class IngestionPipeline:
             self._process_acordao(
                 pages_data, raw_canonical, pdf_content,
                 request, result, report_progress,
-                phase_start, extraction_source="vlm_ocr",
+                phase_start, extraction_source="hybrid" if hybrid else "vlm_ocr",
             )
 
+        except IngestCancelledError:
+            raise
         except Exception as e:
             logger.error(f"Erro no pipeline Acórdão+VLM: {e}", exc_info=True)
             result.status = IngestStatus.FAILED
@@ -1508,20 +2107,30 @@ class IngestionPipeline:
         from ..extraction.acordao_header_parser import AcordaoHeaderParser
         from ..extraction.acordao_parser import AcordaoParser
 
-        # 2. Idempotency check
+        # 2. Idempotency check (+ page_boundaries para o mapa offset → página)
+        page_boundaries = []
+        for pg in pages_data:
+            if pg.blocks:
+                pg_start = pg.blocks[0].char_start
+                pg_end = pg.blocks[-1].char_end
+            else:
+                pg_start = 0
+                pg_end = 0
+            page_boundaries.append((pg_start, pg_end))
+
+        canonical = CanonicalText(raw_canonical, page_boundaries)
         canonical_text = raw_canonical
-        normalized_check = normalize_canonical_text(raw_canonical)
-        if canonical_text != normalized_check:
+        if not canonical.is_normalized:
             logger.error(
                 f"[{request.document_id}] OFFSET DRIFT: canonical_text "
                 f"diverge de normalize_canonical_text() — offsets inválidos! "
-                f"raw_len={len(canonical_text)} norm_len={len(normalized_check)}"
+                f"raw_len={len(canonical_text)} norm_len={len(canonical.text)}"
             )
             raise RuntimeError(
                 "canonical_text diverge de normalize_canonical_text(): "
                 "offsets nativos seriam inválidos."
             )
-        canonical_hash = compute_canonical_hash(canonical_text)
+        canonical_hash = canonical.sha256
 
         result.markdown_content = canonical_text
         result.canonical_hash = canonical_hash
@@ -1549,20 +2158,9 @@ class IngestionPipeline:
         header_parser = AcordaoHeaderParser()
         header_metadata = header_parser.parse_header(canonical_text)
 
-        # 5. Build page_boundaries
-        page_boundaries = []
-        for pg in pages_data:
-            if pg.blocks:
-                pg_start = pg.blocks[0].char_start
-                pg_end = pg.blocks[-1].char_end
-            else:
-                pg_start = 0
-                pg_end = 0
-            page_boundaries.append((pg_start, pg_end))
-
-        # 6. AcordaoParser
+        # 5. AcordaoParser (páginas exatas via canonical.pages)
         parser = AcordaoParser()
-        acordao_devices = parser.parse(canonical_text, page_boundaries)
+        acordao_devices = parser.parse(canonical_text, canonical.pages)
         logger.info(
             f"[{request.document_id}] AcordaoParser: {len(acordao_devices)} dispositivos"
         )
@@ -1580,6 +2178,7 @@ class IngestionPipeline:
             ),
             "success": True,
             "method": extraction_source,
+            "vlm_stats": result.vlm_stats or None,
         })
 
         # 7. Inspection snapshot (reutiliza formato simplificado para acórdãos)
@@ -1588,9 +2187,11 @@ class IngestionPipeline:
                 acordao_devices, canonical_text, canonical_hash,
                 extract_duration, request, pages_data,
                 extraction_source=extraction_source,
+                canonical=canonical,
             )
         except Exception as e:
             logger.warning(f"Failed to emit acordao inspector snapshot: {e}")
+        self._release_page_images(pages_data)
 
         # 8. Section chunking: AcordaoDevice → ParsedSection → AcordaoChunk → ProcessedChunk
         from ..extraction.acordao_chunker import AcordaoChunker, build_sections
@@ -1611,6 +2212,7 @@ class IngestionPipeline:
                 "natureza": header_metadata.get("natureza", ""),
                 "resultado": header_metadata.get("resultado", ""),
             },
+            pages=canonical.pages,
         )
         chunks = self._acordao_to_processed_chunks(
             acordao_chunks, canonical_text, canonical_hash,
@@ -1624,31 +2226,26 @@ class IngestionPipeline:
         report_progress("acordao_extraction", 0.70)
 
         # 10. Embeddings
+        previous_version = self._load_previous_version(request)
         if not request.skip_embeddings:
             report_progress("embedding", 0.70)
-            for chunk in chunks:
-                text_for_embedding = chunk.retrieval_text or chunk.text
-                embed_result = self.embedder.encode([text_for_embedding])
-                chunk.dense_vector = embed_result.dense_embeddings[0]
-                chunk.sparse_vector = (
-                    embed_result.sparse_embeddings[0]
-                    if embed_result.sparse_embeddings
-                    else {}
-                )
+            reused = self._embed_chunks(
+                chunks, result,
+                previous_vectors=self._previous_vectors(previous_version),
+            )
             report_progress("embedding", 0.88)
 
             result.phases.append({
                 "name": "embedding",
                 "duration_seconds": round(time.perf_counter() - phase_start - extract_duration, 2),
-                "output": f"Embeddings para {len(chunks)} chunks Acórdão",
+                "output": f"Embeddings para {len(chunks)} chunks Acórdão ({reused} reaproveitados)",
                 "success": True,
             })
 
         # 11. Artifacts upload
         report_progress("artifacts_upload", 0.88)
         self._phase_artifacts_upload(
-            pdf_content, canonical_text, canonical_hash,
-            chunks, request, result,
+            pdf_content, canonical, chunks, request, result,
         )
         report_progress("artifacts_upload", 0.94)
 
@@ -1670,7 +2267,7 @@ class IngestionPipeline:
             acordao_metadata=header_metadata,
         )
 
-        result.chunks = chunks
+        result.chunks = self._finalize_chunks(chunks, request, result, previous_version)
         result.status = IngestStatus.COMPLETED
 
         report_progress("completed", 1.0)
@@ -1754,6 +2351,7 @@ class IngestionPipeline:
         request: IngestRequest,
         pages_data: list,
         extraction_source: str = "pymupdf_native",
+        canonical: Optional[CanonicalText] = None,
     ) -> None:
         """
         Emite snapshot da classificação de acórdão para o Redis (Inspector).
@@ -1809,8 +2407,6 @@ class IngestionPipeline:
         )
 
         # Integrity checks
-        from ..chunking.canonical_offsets import normalize_canonical_text as norm_ct
-
         offset_details = []
         offsets_matches = 0
         for d in regex_devices:
@@ -1831,7 +2427,10 @@ class IngestionPipeline:
                 got_preview=sliced[:60],
             ))
 
-        norm_idempotent = canonical_text == norm_ct(canonical_text)
+        if canonical is not None:
+            norm_idempotent = canonical.is_normalized
+        else:
+            norm_idempotent = canonical_text == normalize_canonical_text(canonical_text)
         trailing_violations = sum(
             1 for line in canonical_text.split("\n")
             if line != line.rstrip()
@@ -1894,6 +2493,7 @@ class IngestionPipeline:
                 height=pg.height,
                 blocks=blocks,
                 image_base64=pg.image_base64,
+                image_mime=pg.image_mime,
             ))
 
         pymupdf_artifact = PyMuPDFArtifact(
@@ -4,24 +4,37 @@ Router FastAPI para ingestao de PDFs.
 Versao async com background processing para evitar timeout do Cloudflare.
 
 Endpoints:
-    POST /ingest  - Inicia processamento e retorna task_id imediatamente
-    GET  /ingest/status/{task_id}  - Verifica status do processamento
-    GET  /ingest/health  - Health check do modulo
+    POST   /ingest  - Enfileira o processamento e retorna task_id imediatamente
+    GET    /ingest/status/{task_id}  - Verifica status (e posicao na fila)
+    GET    /ingest/result/{task_id}  - Resultado (completo, paginado ou NDJSON; ETag)
+    GET    /ingest/result/{task_id}/vectors  - Vetores dos chunks em binario
+    DELETE /ingest/{task_id}  - Cancela (na fila: na hora; rodando: na proxima fase)
+    GET    /ingest/health  - Health check do modulo
+
+Jobs passam por uma fila com workers limitados e prioridades (job_queue.py);
+envios identicos (mesmo PDF e parametros) de um job ativo reusam o task_id.
+Status e resultado ficam no task store (SQLite/Redis, task_store.py), com TTL.
 """
 
 import asyncio
+import base64
 import logging
 import hashlib
-import threading
+import json
 import time
-from typing import Optional, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, List
 from datetime import datetime
 
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Header, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
 
-from .models import IngestRequest, ProcessedChunk, IngestStatus, IngestError
-from .pipeline import get_pipeline, PipelineResult
+from .job_queue import PRIORITIES, IngestJob, IngestJobQueue, QueueFullError
+from .models import IngestRequest, IngestStatus
+from .pipeline import IngestCancelledError, get_pipeline, PipelineResult
+from .task_store import chunk_json, get_task_store, vector_record
 from ..utils.normalization import normalize_document_id
 
 logger = logging.getLogger(__name__)
@@ -30,25 +43,20 @@ router = APIRouter(prefix="/ingest", tags=["Ingestion"])
 
 
 # ============================================================================
-# TASK STORAGE (in-memory)
+# TASK STORAGE (SQLite/Redis, ver task_store.py)
 # ============================================================================
 
 class TaskInfo(BaseModel):
-    """Informacoes de uma task de ingestao."""
+    """Informacoes de uma task de ingestao (linha de status; resultado fica a parte)."""
     task_id: str
     document_id: str
     status: str = "processing"  # processing, completed, failed
+    priority: str = "normal"
     progress: float = 0.0
     current_phase: str = "starting"
     started_at: str = ""
     completed_at: Optional[str] = None
     error_message: Optional[str] = None
-    result: Optional[dict] = None
-
-
-# Armazenamento global de tasks (em producao, usar Redis)
-_tasks: Dict[str, TaskInfo] = {}
-_tasks_lock = threading.Lock()
 
 
 def _generate_task_id(document_id: str, pdf_content: bytes) -> str:
@@ -57,59 +65,86 @@ def _generate_task_id(document_id: str, pdf_content: bytes) -> str:
     return hashlib.sha256(hash_input.encode()).hexdigest()[:16]
 
 
+# Escritas no task store: uma thread, fora do event loop e na ordem em que
+# foram feitas (progresso de uma task nunca sobrescreve o status final)
+_store_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-store")
+
+
+async def _store_write(fn, *args, **kwargs):
+    """Executa uma escrita no task store na thread de escrita e espera o fim."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_store_writer, partial(fn, *args, **kwargs))
+
+
+def _post_progress(task_id: str, **kwargs):
+    """Atualizacao de progresso sem bloquear quem chama (loop ou worker)."""
+    _store_writer.submit(_update_task, task_id, **kwargs)
+
+
+def _register_task(task: TaskInfo):
+    """Registra uma task nova no store."""
+    get_task_store().create(task.model_dump())
+
+
 def _get_task(task_id: str) -> Optional[TaskInfo]:
-    """Busca uma task pelo ID."""
-    with _tasks_lock:
-        return _tasks.get(task_id)
+    """Busca uma task pelo ID (so a linha de status)."""
+    data = get_task_store().get(task_id)
+    return TaskInfo(**data) if data else None
 
 
 def _update_task(task_id: str, **kwargs):
     """Atualiza campos de uma task."""
-    with _tasks_lock:
-        if task_id in _tasks:
-            task = _tasks[task_id]
-            for key, value in kwargs.items():
-                if hasattr(task, key):
-                    setattr(task, key, value)
+    get_task_store().update(task_id, **kwargs)
 
 
 def _set_task_result(task_id: str, result: PipelineResult):
-    """Salva o resultado completo de uma task."""
-    with _tasks_lock:
-        if task_id in _tasks:
-            task = _tasks[task_id]
-            task.status = "completed" if result.status == IngestStatus.COMPLETED else "failed"
-            task.progress = 1.0
-            task.completed_at = datetime.now().isoformat()
-            # CORREÇÃO: Define error_message se houver erros (para VPS poder ler)
-            if result.errors:
-                task.error_message = "; ".join([e.message for e in result.errors])
-            task.result = {
-                "success": result.status == IngestStatus.COMPLETED,
-                "document_id": result.document_id,
-                "status": result.status.value,
-                "total_chunks": len(result.chunks),
-                "phases": result.phases,
-                "errors": [{"phase": e.phase, "message": e.message, "details": e.details} for e in result.errors],
-                "total_time_seconds": result.total_time_seconds,
-                "chunks": [
-                    c.model_dump(exclude={"thesis_vector"})
-                    for c in result.chunks
-                ],
-                "document_hash": result.document_hash,
-                "manifest": result.manifest,
-                "inspection_snapshot": result.inspection_snapshot,
-            }
+    """Salva o resultado completo de uma task (chunks e vetores fora do status)."""
+    fields = {
+        "status": "completed" if result.status == IngestStatus.COMPLETED else "failed",
+        "progress": 1.0,
+        "completed_at": datetime.now().isoformat(),
+    }
+    # CORREÇÃO: Define error_message se houver erros (para VPS poder ler)
+    if result.errors:
+        fields["error_message"] = "; ".join([e.message for e in result.errors])
+    meta = {
+        "success": result.status == IngestStatus.COMPLETED,
+        "document_id": result.document_id,
+        "status": result.status.value,
+        "total_chunks": len(result.chunks),
+        "phases": result.phases,
+        "errors": [{"phase": e.phase, "message": e.message, "details": e.details} for e in result.errors],
+        "total_time_seconds": result.total_time_seconds,
+        "document_hash": result.document_hash,
+        "manifest": result.manifest,
+        "inspection_snapshot": result.inspection_snapshot,
+        "ingest_run_id": result.ingest_run_id,
+        "incremental": result.incremental or None,
+        "repeated_lines": result.repeated_lines or None,
+    }
+    chunks = [c.model_dump(mode="json", exclude={"thesis_vector"}) for c in result.chunks]
+    get_task_store().save_result(task_id, meta, chunks, **fields)
+
+
+def _set_task_cancelled(task_id: str):
+    """Marca uma task como cancelada (status failed: a VPS so conhece completed/failed)."""
+    _update_task(
+        task_id,
+        status="failed",
+        current_phase="cancelled",
+        error_message="Cancelado (DELETE /ingest)",
+        completed_at=datetime.now().isoformat(),
+    )
 
 
 def _set_task_error(task_id: str, error_message: str):
     """Marca uma task como falha."""
-    with _tasks_lock:
-        if task_id in _tasks:
-            task = _tasks[task_id]
-            task.status = "failed"
-            task.error_message = error_message
-            task.completed_at = datetime.now().isoformat()
+    _update_task(
+        task_id,
+        status="failed",
+        error_message=error_message,
+        completed_at=datetime.now().isoformat(),
+    )
 
 
 class IngestStartResponse(BaseModel):
@@ -117,6 +152,8 @@ class IngestStartResponse(BaseModel):
     task_id: str
     document_id: str
     message: str = "Processamento iniciado em background"
+    queue_position: Optional[int] = None
+    deduplicated: bool = False
 
 
 class IngestStatusResponse(BaseModel):
@@ -129,6 +166,8 @@ class IngestStatusResponse(BaseModel):
     started_at: str
     completed_at: Optional[str] = None
     error_message: Optional[str] = None
+    priority: str = "normal"
+    queue_position: Optional[int] = None  # 1 = proximo; None = fora da fila
 
 
 class IngestResponse(BaseModel):
@@ -144,35 +183,101 @@ class IngestResponse(BaseModel):
     document_hash: str = ""
     manifest: dict = {}
     inspection_snapshot: Optional[dict] = None
+    ingest_run_id: str = ""
+    incremental: Optional[dict] = None
+    repeated_lines: Optional[dict] = None
+
+
+# Fila de jobs (criada no primeiro /ingest, no event loop do servidor)
+_job_queue: Optional[IngestJobQueue] = None
+
+
+def _get_job_queue() -> IngestJobQueue:
+    global _job_queue
+    if _job_queue is None:
+        from ..config import config
+
+        _job_queue = IngestJobQueue(
+            _background_process,
+            workers=config.ingest_workers,
+            max_pending=config.ingest_queue_max,
+        )
+    return _job_queue
 
 
-def _background_process(task_id: str, pdf_content: bytes, request: IngestRequest):
+async def stop_job_queue() -> None:
+    """Para os workers da fila e espera as escritas pendentes no task store (shutdown)."""
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue = None
+    await _store_write(lambda: None)
+
+
+def _dedupe_key(pdf_content: bytes, request: IngestRequest) -> str:
+    """sha256 do PDF + parametros: mesmo PDF com outro modo/ID e outro job."""
+    digest = hashlib.sha256(pdf_content)
+    digest.update(request.model_dump_json().encode())
+    return digest.hexdigest()
+
+
+async def _background_process(job: IngestJob):
     """
-    Processa o PDF em background (roda em thread separada).
-    Atualiza o status da task conforme progride.
+    Processa o PDF de um job da fila (task no event loop do servidor).
+
+    O OCR VLM roda no proprio loop; as fases sincronas vao para o executor
+    (ver IngestionPipeline.process_async). Atualiza o status da task
+    conforme progride; cancelamento e verificado a cada fase.
     """
+    task_id = job.task_id
+    pdf_content, request = job.payload
+    job.payload = None
     try:
         logger.info(f"[Task {task_id}] Iniciando processamento de {request.document_id}")
-        _update_task(task_id, current_phase="initializing", progress=0.05)
+        _post_progress(task_id, current_phase="initializing", progress=0.05)
 
         pipeline = get_pipeline()
 
-        # Callback para atualizar progresso
+        # Callback para atualizar progresso (e fronteira de cancelamento)
         def progress_callback(phase: str, progress: float):
-            _update_task(task_id, current_phase=phase, progress=progress)
+            if job.cancel_requested.is_set():
+                raise IngestCancelledError(f"Task {task_id} cancelada")
+            _post_progress(task_id, current_phase=phase, progress=progress)
             logger.info(f"[Task {task_id}] {phase}: {progress*100:.1f}%")
 
         # Processa
-        _update_task(task_id, current_phase="processing", progress=0.1)
-        result = pipeline.process(pdf_content, request, progress_callback=progress_callback)
-
-        # Salva resultado
-        _set_task_result(task_id, result)
+        _post_progress(task_id, current_phase="processing", progress=0.1)
+        from ..config import config
+
+        if config.ingest_staged_executor:
+            # Varios documentos em voo: estagios vlm → cpu → gpu → sink
+            from .staged_executor import get_staged_executor
+
+            future = await asyncio.to_thread(
+                get_staged_executor().submit, pdf_content, request, progress_callback,
+            )
+            result = await asyncio.wrap_future(future)
+        else:
+            result = await pipeline.process_async(
+                pdf_content, request, progress_callback=progress_callback,
+            )
+
+        if job.cancel_requested.is_set():
+            await _store_write(_set_task_cancelled, task_id)
+            logger.info(f"[Task {task_id}] Cancelada")
+            return
+
+        # Salva resultado (serializa chunks e vetores: fora do event loop)
+        await _store_write(_set_task_result, task_id, result)
         logger.info(f"[Task {task_id}] Concluido: {len(result.chunks)} chunks")
 
+    except IngestCancelledError:
+        await _store_write(_set_task_cancelled, task_id)
+        logger.info(f"[Task {task_id}] Cancelada")
+
     except Exception as e:
         logger.exception(f"[Task {task_id}] Erro no processamento: {e}")
-        _set_task_error(task_id, str(e))
+        await _store_write(_set_task_error, task_id, str(e))
 
 
 @router.post("", response_model=IngestStartResponse)
@@ -199,7 +304,12 @@ async def ingest_pdf(
     expected_first_article: Optional[int] = Form(None, description="Primeiro artigo esperado (ex: 1)"),
     expected_last_article: Optional[int] = Form(None, description="Ultimo artigo esperado (ex: 193)"),
     # Modo de extracao
-    extraction_mode: str = Form("pymupdf_regex", description="Modo de extracao: pymupdf_regex ou vlm"),
+    extraction_mode: str = Form("pymupdf_regex", description="Modo de extracao: pymupdf_regex, vlm ou hybrid"),
+    # Re-ingestao incremental
+    incremental: bool = Form(False, description="Retorna apenas chunks novos/alterados vs versao registrada"),
+    incremental_base_run_id: Optional[str] = Form(None, description="ingest_run_id da versao presente no Milvus"),
+    # Fila
+    priority: str = Form("normal", description="Prioridade na fila: high, normal ou low"),
 ):
     """
     Inicia processamento de um PDF em background.
@@ -212,6 +322,11 @@ async def ingest_pdf(
     # Valida arquivo
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Arquivo deve ser PDF")
+    if priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Prioridade invalida: {priority} (use {', '.join(PRIORITIES)})",
+        )
 
     # Le conteudo (I/O async do FastAPI)
     pdf_content = await file.read()
@@ -248,36 +363,49 @@ async def ingest_pdf(
         expected_first_article=expected_first_article,
         expected_last_article=expected_last_article,
         extraction_mode=extraction_mode,
+        incremental=incremental,
+        incremental_base_run_id=incremental_base_run_id,
     )
 
-    # Gera task_id
+    # Gera task_id e enfileira (envio identico a um job ativo reusa o task_id)
     task_id = _generate_task_id(normalized_doc_id, pdf_content)
+    queue = _get_job_queue()
+    try:
+        job, created = queue.submit(
+            task_id, _dedupe_key(pdf_content, request), priority, (pdf_content, request),
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    # Registra task
-    with _tasks_lock:
-        _tasks[task_id] = TaskInfo(
-            task_id=task_id,
+    if not created:
+        logger.info(f"Envio identico de {normalized_doc_id}: reusando task {job.task_id}")
+        return IngestStartResponse(
+            task_id=job.task_id,
             document_id=normalized_doc_id,
-            status="processing",
-            progress=0.0,
-            current_phase="queued",
-            started_at=datetime.now().isoformat(),
+            message="Documento identico ja em processamento. Use GET /ingest/status/{task_id} para acompanhar.",
+            queue_position=queue.position(job.task_id),
+            deduplicated=True,
         )
 
-    # Inicia processamento em thread separada
-    thread = threading.Thread(
-        target=_background_process,
-        args=(task_id, pdf_content, request),
-        daemon=True,
-    )
-    thread.start()
+    # Registra task
+    await _store_write(_register_task, TaskInfo(
+        task_id=task_id,
+        document_id=normalized_doc_id,
+        status="processing",
+        priority=priority,
+        progress=0.0,
+        current_phase="queued",
+        started_at=datetime.now().isoformat(),
+    ))
 
-    logger.info(f"Task {task_id} iniciada para {normalized_doc_id}")
+    position = queue.position(task_id)
+    logger.info(f"Task {task_id} enfileirada para {normalized_doc_id} (prioridade {priority}, posicao {position})")
 
     return IngestStartResponse(
         task_id=task_id,
         document_id=normalized_doc_id,
-        message="Processamento iniciado em background. Use GET /ingest/status/{task_id} para acompanhar.",
+        message="Processamento enfileirado. Use GET /ingest/status/{task_id} para acompanhar.",
+        queue_position=position,
     )
 
 
@@ -288,7 +416,7 @@ async def get_ingest_status(task_id: str):
 
     Use este endpoint para polling ate status ser 'completed' ou 'failed'.
     """
-    task = _get_task(task_id)
+    task = await asyncio.to_thread(_get_task, task_id)
 
     if not task:
         raise HTTPException(status_code=404, detail=f"Task {task_id} nao encontrada")
@@ -302,17 +430,68 @@ async def get_ingest_status(task_id: str):
         started_at=task.started_at,
         completed_at=task.completed_at,
         error_message=task.error_message,
+        priority=task.priority,
+        queue_position=_job_queue.position(task_id) if _job_queue is not None else None,
     )
 
 
-@router.get("/result/{task_id}", response_model=IngestResponse)
-async def get_ingest_result(task_id: str):
+@router.delete("/{task_id}")
+async def cancel_ingest(task_id: str):
     """
-    Retorna o resultado completo de uma task de ingestao.
+    Cancela uma task de ingestao.
 
-    So disponivel quando status == 'completed'.
+    Na fila: sai da fila na hora. Rodando: para na proxima fronteira de fase
+    (status vira failed, current_phase cancelled).
     """
-    task = _get_task(task_id)
+    task = await asyncio.to_thread(_get_task, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} nao encontrada")
+
+    state = _job_queue.cancel(task_id) if _job_queue is not None else None
+    if state is None:
+        raise HTTPException(status_code=409, detail=f"Task {task_id} ja terminou ({task.status})")
+    if state == "queued":
+        await _store_write(_set_task_cancelled, task_id)
+    else:
+        await _store_write(_update_task, task_id, current_phase="cancelling")
+    logger.info(f"Task {task_id} cancelada ({state})")
+
+    return {"task_id": task_id, "cancelled": True, "was": state}
+
+
+# Chunks lidos do store por vez ao montar/streamar o resultado
+_RESULT_READ_BATCH = 256
+# Tamanho de pagina quando so o cursor e informado
+_RESULT_DEFAULT_PAGE = 500
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, offset = raw.split(":", 1)
+        if prefix != "o" or int(offset) < 0:
+            raise ValueError(raw)
+        return int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail=f"Cursor invalido: {cursor}")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or f'"{etag}"' in tags
+
+
+async def _load_result_head(task_id: str) -> tuple[str, str, int]:
+    """(JSON dos metadados, ETag, total de chunks) de uma task concluida."""
+    task = await asyncio.to_thread(_get_task, task_id)
 
     if not task:
         raise HTTPException(status_code=404, detail=f"Task {task_id} nao encontrada")
@@ -323,10 +502,136 @@ async def get_ingest_result(task_id: str):
     if task.status == "failed":
         raise HTTPException(status_code=500, detail=f"Processamento falhou: {task.error_message}")
 
-    if not task.result:
+    raw = await asyncio.to_thread(get_task_store().load_result_raw, task_id)
+    if raw is None:
         raise HTTPException(status_code=500, detail="Resultado nao disponivel")
+    meta_json, etag = raw
+    return meta_json, etag, json.loads(meta_json).get("total_chunks", 0)
+
+
+def _iter_rows(task_id: str, offset: int, limit: Optional[int]):
+    """Linhas (row_json, dense, sparse) de [offset, offset+limit), lidas em lotes."""
+    store = get_task_store()
+    remaining = limit
+    while remaining is None or remaining > 0:
+        batch = _RESULT_READ_BATCH if remaining is None else min(_RESULT_READ_BATCH, remaining)
+        rows = store.load_chunks(task_id, offset, batch)
+        yield from rows
+        if len(rows) < batch:
+            return
+        offset += len(rows)
+        if remaining is not None:
+            remaining -= len(rows)
+
 
-    return IngestResponse(**task.result)
+@router.get("/result/{task_id}", response_model=IngestResponse)
+async def get_ingest_result(
+    task_id: str,
+    output_format: str = Query("json", alias="format", description="json ou ndjson"),
+    vectors: bool = Query(True, description="false: chunks sem dense/sparse (ver /vectors)"),
+    cursor: Optional[str] = Query(None, description="next_cursor da pagina anterior"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Chunks por pagina"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Retorna o resultado de uma task de ingestao.
+
+    So disponivel quando status == 'completed'. O payload foi serializado
+    ao concluir a task; aqui so e concatenado e enviado em streaming.
+
+    - Sem cursor/limit: resultado completo (formato de IngestResponse)
+    - Com cursor/limit: pagina com total_chunks, offset, next_cursor e
+      chunks; a primeira pagina (sem cursor) traz tambem os metadados
+    - format=ndjson: primeira linha = metadados (so sem cursor), depois um
+      chunk por linha; proximo cursor no header X-Next-Cursor
+    - vectors=false: chunks sem vetores (buscar em /result/{task_id}/vectors)
+    - ETag / If-None-Match → 304 sem ler os chunks
+    """
+    if output_format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail=f"Formato invalido: {output_format} (use json ou ndjson)")
+    offset = _decode_cursor(cursor)
+    meta_json, etag, total = await _load_result_head(task_id)
+    headers = {"ETag": f'"{etag}"'}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    paginated = cursor is not None or limit is not None
+    if paginated:
+        limit = limit or _RESULT_DEFAULT_PAGE
+        end = min(offset + limit, total)
+        next_cursor = _encode_cursor(end) if end < total else None
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+    else:
+        limit, next_cursor = None, None
+    headers["X-Total-Chunks"] = str(total)
+
+    def chunk_lines():
+        for row in _iter_rows(task_id, offset, limit):
+            yield chunk_json(*row, vectors=vectors)
+
+    if output_format == "ndjson":
+        def body():
+            if offset == 0:
+                yield meta_json + "\n"
+            for line in chunk_lines():
+                yield line + "\n"
+
+        return StreamingResponse(body(), media_type="application/x-ndjson", headers=headers)
+
+    if paginated:
+        page = {
+            **(json.loads(meta_json) if offset == 0 else {}),
+            "task_id": task_id,
+            "total_chunks": total,
+            "offset": offset,
+            "next_cursor": next_cursor,
+        }
+        head = json.dumps(page, ensure_ascii=False)
+    else:
+        head = meta_json
+
+    def body():
+        yield f'{head[:-1]}, "chunks": ['
+        for i, line in enumerate(chunk_lines()):
+            yield line if i == 0 else "," + line
+        yield "]}"
+
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
+
+
+@router.get("/result/{task_id}/vectors")
+async def get_ingest_result_vectors(
+    task_id: str,
+    cursor: Optional[str] = Query(None, description="next_cursor da pagina anterior"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Chunks por pagina"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Vetores dos chunks em binario (application/octet-stream), na ordem dos chunks.
+
+    Um registro por chunk (ver task_store.vector_record): uint32 seq,
+    uint32 n_dense_bytes, dense float32 LE, uint32 n_sparse_bytes, sparse
+    (uint32 n, n x uint32 indices, n x float32 pesos). Paginacao e ETag como
+    em /result/{task_id}; proximo cursor no header X-Next-Cursor.
+    """
+    offset = _decode_cursor(cursor)
+    _, etag, total = await _load_result_head(task_id)
+    headers = {"ETag": f'"{etag}"', "X-Total-Chunks": str(total)}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if cursor is not None or limit is not None:
+        limit = limit or _RESULT_DEFAULT_PAGE
+        end = min(offset + limit, total)
+        if end < total:
+            headers["X-Next-Cursor"] = _encode_cursor(end)
+
+    def body():
+        for seq, (_, dense, sparse) in enumerate(_iter_rows(task_id, offset, limit), start=offset):
+            yield vector_record(seq, dense, sparse)
+
+    return StreamingResponse(body(), media_type="application/octet-stream", headers=headers)
 
 
 @router.get("/health")
@@ -339,11 +644,17 @@ async def ingest_health():
 
     def _do_health_check() -> dict:
         """Executa health check (sync - roda em thread)."""
+        from . import staged_executor
+
         pipeline = get_pipeline()
+        executor = staged_executor._executor
         return {
             "status": "healthy",
             "vlm_service_loaded": pipeline._vlm_service is not None,
             "embedder_loaded": pipeline._embedder is not None,
+            "stages": executor.stats() if executor is not None else None,
+            "queue": _job_queue.stats() if _job_queue is not None else None,
+            "task_store": get_task_store().stats(),
         }
 
     return await asyncio.to_thread(_do_health_check)
@@ -0,0 +1,467 @@
+"""
+Executor de ingestão em estágios — vários documentos em voo.
+
+    submit() ─► [vlm]  OCR no event loop do executor (só modos vlm/hybrid)
+             ─► [cpu]  extração PyMuPDF, classificação, chunks (process())
+                   │ encode() ─► [gpu] embeddings em batch compartilhado entre documentos
+             ─► [sink] upload de artefatos ─► Future com o PipelineResult
+
+Na execução serial a GPU fica ociosa durante parsing/classificação e a CPU
+durante os embeddings; aqui cada estágio atende um documento diferente.
+Os estágios são ligados por filas limitadas: submit() bloqueia com a fila
+da CPU cheia e um worker de CPU espera vaga na fila do sink (backpressure).
+
+Os workers de CPU são threads, não processos: a extração PyMuPDF já
+distribui páginas no pool de processos do extrator (PYMUPDF_WORKERS), e o
+restante do pipeline usa estado em memória (checkpoints, chunk registry,
+embedder) que um pool de processos teria que serializar a cada documento.
+
+stats() traz a utilização de cada estágio — tempo ocupado / (workers ×
+tempo decorrido) — para dimensionar os pools.
+
+Uso:
+    with StagedIngestExecutor(get_pipeline(), cpu_workers=2) as executor:
+        futures = [executor.submit(pdf, request) for pdf, request in docs]
+        results = [f.result() for f in futures]
+        logger.info(executor.stats())
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_VLM_MODES = ("vlm", "hybrid")
+
+
+@dataclass
+class BatchedEmbedding:
+    """Fatia de um batch de GPU (mesmos campos de EmbeddingResult usados no pipeline)."""
+    dense_embeddings: list
+    sparse_embeddings: list
+
+
+class StageStats:
+    """Tempo ocupado, tempo bloqueado e itens processados de um estágio."""
+
+    __slots__ = ("name", "workers", "items", "busy_seconds", "blocked_seconds", "_lock")
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0  # esperando outro estágio (GPU, vaga na fila)
+        self._lock = threading.Lock()
+
+    def record(self, busy: float, items: int = 1, blocked: float = 0.0) -> None:
+        with self._lock:
+            self.items += items
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+
+    def to_dict(self, elapsed: float) -> dict:
+        capacity = self.workers * elapsed
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "blocked_seconds": round(self.blocked_seconds, 2),
+            "utilization": round(self.busy_seconds / capacity, 3) if capacity > 0 else 0.0,
+        }
+
+
+class _EmbedRequest:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+
+
+class EmbeddingBatcher:
+    """
+    Estágio GPU: junta os encode() de vários documentos em um batch.
+
+    Uma thread coleta pedidos até max_batch_size textos ou max_wait_ms de
+    espera, chama embedder.encode() uma vez e devolve a fatia de cada pedido.
+    """
+
+    def __init__(
+        self,
+        get_embedder: Callable,
+        max_batch_size: int = 128,
+        max_wait_ms: float = 20.0,
+        queue_size: int = 16,
+    ):
+        self._get_embedder = get_embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stats = StageStats("gpu", 1)
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="ingest-gpu", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts: List[str]) -> BatchedEmbedding:
+        """Bloqueia até o batch que contém `texts` sair da GPU."""
+        request = _EmbedRequest(list(texts))
+        self._queue.put(request)
+        return request.future.result()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, size = [first], len(first.texts)
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            self._process(batch)
+
+    def _process(self, batch: List[_EmbedRequest]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        start = time.perf_counter()
+        try:
+            result = self._get_embedder().encode(texts)
+        except Exception as e:
+            logger.error(f"[gpu] Erro no batch de {len(texts)} textos: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        finally:
+            self.stats.record(time.perf_counter() - start, items=len(texts))
+
+        self.batches += 1
+        offset = 0
+        for request in batch:
+            end = offset + len(request.texts)
+            request.future.set_result(BatchedEmbedding(
+                dense_embeddings=result.dense_embeddings[offset:end],
+                sparse_embeddings=(
+                    result.sparse_embeddings[offset:end] if result.sparse_embeddings else []
+                ),
+            ))
+            offset = end
+
+
+class _DocumentStages:
+    """Os estágios vistos de dentro do process() de um documento (current_stages())."""
+
+    __slots__ = ("_batcher", "sink_jobs", "gpu_wait")
+
+    def __init__(self, batcher: EmbeddingBatcher):
+        self._batcher = batcher
+        self.sink_jobs: List[Callable[[], object]] = []
+        self.gpu_wait = 0.0
+
+    def encode(self, texts: List[str]) -> BatchedEmbedding:
+        start = time.perf_counter()
+        try:
+            return self._batcher.encode(texts)
+        finally:
+            self.gpu_wait += time.perf_counter() - start
+
+    def defer_sink(self, job: Callable[[], object]) -> None:
+        self.sink_jobs.append(job)
+
+
+_current_stages: ContextVar[Optional[_DocumentStages]] = ContextVar("ingest_stages", default=None)
+
+
+def current_stages() -> Optional[_DocumentStages]:
+    """Estágios do documento em processamento neste worker (None fora do executor)."""
+    return _current_stages.get()
+
+
+class _Job:
+    __slots__ = ("future", "pdf_content", "request", "progress_callback", "extraction")
+
+    def __init__(self, pdf_content: bytes, request, progress_callback):
+        self.future: Future = Future()
+        self.pdf_content = pdf_content
+        self.request = request
+        self.progress_callback = progress_callback
+        self.extraction = None
+
+
+class StagedIngestExecutor:
+    """Ingestão de vários documentos em estágios vlm → cpu (→ gpu) → sink."""
+
+    def __init__(
+        self,
+        pipeline,
+        cpu_workers: int = 2,
+        vlm_documents: int = 2,
+        sink_workers: int = 1,
+        queue_size: int = 4,
+        gpu_batch_size: int = 128,
+        gpu_batch_wait_ms: float = 20.0,
+    ):
+        """
+        Args:
+            pipeline: IngestionPipeline
+            cpu_workers: Documentos em extração/classificação ao mesmo tempo
+            vlm_documents: Documentos em OCR VLM ao mesmo tempo
+            sink_workers: Uploads de artefatos em paralelo
+            queue_size: Capacidade das filas entre estágios
+            gpu_batch_size: Textos por batch de GPU
+            gpu_batch_wait_ms: Espera por mais textos antes de fechar o batch
+        """
+        self.pipeline = pipeline
+        cpu_workers, sink_workers = max(1, cpu_workers), max(1, sink_workers)
+        vlm_documents, queue_size = max(1, vlm_documents), max(1, queue_size)
+        self._stats = {
+            "vlm": StageStats("vlm", vlm_documents),
+            "cpu": StageStats("cpu", cpu_workers),
+            "sink": StageStats("sink", sink_workers),
+        }
+        self._cpu_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._sink_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.embedder = EmbeddingBatcher(
+            lambda: pipeline.embedder,
+            max_batch_size=gpu_batch_size,
+            max_wait_ms=gpu_batch_wait_ms,
+            queue_size=cpu_workers * 2,
+        )
+
+        # OCR VLM: event loop próprio, com um VLMClient para todos os documentos
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._vlm_semaphore: Optional[asyncio.Semaphore] = None
+        self._vlm_capacity = vlm_documents + queue_size
+        self._vlm_slots = threading.BoundedSemaphore(self._vlm_capacity)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._closed = False
+        self._started = time.monotonic()
+        self._cpu_threads = self._start_workers(self._cpu_worker, "ingest-cpu", cpu_workers)
+        self._sink_threads = self._start_workers(self._sink_worker, "ingest-sink", sink_workers)
+        logger.info(
+            f"StagedIngestExecutor: cpu={cpu_workers} vlm={vlm_documents} "
+            f"sink={sink_workers} fila={queue_size} gpu_batch={gpu_batch_size}"
+        )
+
+    @staticmethod
+    def _start_workers(target, name: str, count: int) -> List[threading.Thread]:
+        threads = [
+            threading.Thread(target=target, name=f"{name}-{i}", daemon=True)
+            for i in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def submit(self, pdf_content: bytes, request, progress_callback=None) -> Future:
+        """
+        Enfileira um documento; o Future resolve com o PipelineResult.
+
+        Bloqueia enquanto a fila do primeiro estágio estiver cheia.
+        """
+        if self._closed:
+            raise RuntimeError("StagedIngestExecutor encerrado")
+        job = _Job(pdf_content, request, progress_callback)
+        with self._lock:
+            self._in_flight += 1
+        job.future.add_done_callback(self._job_done)
+
+        if getattr(request, "extraction_mode", "pymupdf_regex") in _VLM_MODES:
+            self._vlm_slots.acquire()
+            asyncio.run_coroutine_threadsafe(self._vlm_stage(job), self._vlm_loop())
+        else:
+            self._cpu_queue.put(job)
+        return job.future
+
+    def _job_done(self, _future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _vlm_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="ingest-vlm", daemon=True,
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    async def _vlm_stage(self, job: _Job) -> None:
+        try:
+            if not job.future.set_running_or_notify_cancel():
+                return
+            if self._vlm_semaphore is None:
+                self._vlm_semaphore = asyncio.Semaphore(self._stats["vlm"].workers)
+            async with self._vlm_semaphore:
+                start = time.perf_counter()
+                job.extraction = await self.pipeline._extract_vlm_async(
+                    job.pdf_content, job.request, job.progress_callback,
+                    hybrid=job.request.extraction_mode == "hybrid",
+                )
+                self._stats["vlm"].record(time.perf_counter() - start)
+            # put() bloqueante fora do loop: os outros OCRs seguem
+            await asyncio.get_running_loop().run_in_executor(None, self._cpu_queue.put, job)
+        except BaseException as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._vlm_slots.release()
+
+    def _cpu_worker(self) -> None:
+        stats = self._stats["cpu"]
+        while True:
+            job = self._cpu_queue.get()
+            if job is None:
+                return
+            if not job.future.running() and not job.future.set_running_or_notify_cancel():
+                continue
+
+            stages = _DocumentStages(self.embedder)
+            token = _current_stages.set(stages)
+            start = time.perf_counter()
+            try:
+                result = self.pipeline.process(
+                    job.pdf_content, job.request,
+                    progress_callback=job.progress_callback,
+                    extraction=job.extraction,
+                )
+            except BaseException as e:
+                job.future.set_exception(e)
+                stats.record(time.perf_counter() - start - stages.gpu_wait, blocked=stages.gpu_wait)
+                continue
+            finally:
+                _current_stages.reset(token)
+            busy = time.perf_counter() - start - stages.gpu_wait
+
+            put_start = time.perf_counter()
+            self._sink_queue.put((job, result, stages.sink_jobs))
+            stats.record(busy, blocked=stages.gpu_wait + time.perf_counter() - put_start)
+
+    def _sink_worker(self) -> None:
+        stats = self._stats["sink"]
+        while True:
+            item = self._sink_queue.get()
+            if item is None:
+                return
+            job, result, sink_jobs = item
+            start = time.perf_counter()
+            for sink_job in sink_jobs:
+                try:
+                    sink_job()
+                except Exception as e:
+                    logger.warning(f"[{result.document_id}] Sink falhou (continuando): {e}")
+            stats.record(time.perf_counter() - start)
+            job.future.set_result(result)
+
+    def stats(self) -> dict:
+        """Utilização por estágio desde a criação do executor."""
+        elapsed = time.monotonic() - self._started
+        stages = {name: stage.to_dict(elapsed) for name, stage in self._stats.items()}
+        gpu = self.embedder.stats
+        stages["gpu"] = {
+            **gpu.to_dict(elapsed),
+            "batches": self.embedder.batches,
+            "avg_batch_size": round(gpu.items / self.embedder.batches, 1) if self.embedder.batches else 0.0,
+        }
+        return {
+            "elapsed_seconds": round(elapsed, 1),
+            "in_flight": self._in_flight,
+            "queues": {
+                "cpu": self._cpu_queue.qsize(),
+                "gpu": self.embedder.qsize(),
+                "sink": self._sink_queue.qsize(),
+            },
+            "stages": stages,
+        }
+
+    def shutdown(self) -> None:
+        """Termina os documentos já enviados e para os workers."""
+        self._closed = True
+        if self._loop is not None:
+            # Espera os OCRs em voo chegarem à fila da CPU
+            for _ in range(self._vlm_capacity):
+                self._vlm_slots.acquire()
+            asyncio.run_coroutine_threadsafe(self.pipeline.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+        for _ in self._cpu_threads:
+            self._cpu_queue.put(None)
+        for thread in self._cpu_threads:
+            thread.join()
+        for _ in self._sink_threads:
+            self._sink_queue.put(None)
+        for thread in self._sink_threads:
+            thread.join()
+        self.embedder.close()
+        logger.info(f"StagedIngestExecutor encerrado: {self.stats()}")
+
+    def __enter__(self) -> "StagedIngestExecutor":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+
+
+# Singleton (INGEST_STAGED_EXECUTOR=true)
+_executor: Optional[StagedIngestExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_staged_executor() -> StagedIngestExecutor:
+    """Executor em estágios do servidor, criado a partir da config."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from ..config import config
+            from .pipeline import get_pipeline
+
+            _executor = StagedIngestExecutor(
+                get_pipeline(),
+                cpu_workers=config.ingest_cpu_workers,
+                vlm_documents=config.ingest_vlm_documents,
+                sink_workers=config.ingest_sink_workers,
+                queue_size=config.ingest_stage_queue_size,
+                gpu_batch_size=config.ingest_gpu_batch_size,
+                gpu_batch_wait_ms=config.ingest_gpu_batch_wait_ms,
+            )
+        return _executor
+
+
+def shutdown_staged_executor() -> None:
+    """Encerra o singleton (shutdown do servidor), se foi criado."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
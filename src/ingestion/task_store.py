@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+"""
+Task Store - Status e resultado das tasks de /ingest, fora da memória do processo.
+
+Antes as tasks viviam num dict do router, sem eviction, com o model_dump de
+todos os chunks (vetor dense de 1024 floats + sparse) dentro do status:
+memória crescendo sem limite e resultados perdidos a cada restart.
+
+Separação por tamanho:
+- status:   linha pequena por task (o que GET /ingest/status lê)
+- result:   metadados do PipelineResult (fases, manifest, erros...) sem chunks
+- chunks:   uma linha por chunk, JSON sem vetores + vetores em blobs binários
+            (dense: float32 LE; sparse: ver encode_sparse)
+
+Tudo é serializado uma vez, ao concluir a task: /ingest/result só concatena
+os JSONs gravados (chunk_json) e devolve o ETag calculado no save_result.
+
+Backends:
+- SQLiteTaskStore (padrão): arquivo local, WAL, TTL (limpeza periódica numa
+  thread de fundo) + limite de tamanho (remove os resultados mais antigos até
+  ficar abaixo de 90% do limite; um resultado que sozinho excede o limite não
+  é gravado e a task vira failed).
+  Tasks que estavam "processing" quando o servidor caiu viram "failed" ao abrir.
+- RedisTaskStore (opcional): chaves com EXPIRE; limite de tamanho fica a
+  cargo do maxmemory do Redis.
+
+Uso:
+    store = get_task_store()
+    store.create({"task_id": ..., "document_id": ..., "status": "processing"})
+    store.update(task_id, current_phase="chunking", progress=0.4)
+    store.save_result(task_id, meta, chunks, status="completed", progress=1.0)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Campos da linha de status (TaskInfo sem o resultado)
+STATUS_FIELDS = (
+    "task_id", "document_id", "status", "priority", "progress", "current_phase",
+    "started_at", "completed_at", "error_message",
+)
+
+_VECTOR_FIELDS = ("dense_vector", "sparse_vector")
+
+
+# =============================================================================
+# Codificação binária dos vetores
+# =============================================================================
+
+def _le(values: array) -> array:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def encode_dense(vector: Optional[list]) -> Optional[bytes]:
+    """Vetor dense → float32 little-endian (4 bytes/dimensão)."""
+    if vector is None:
+        return None
+    return _le(array("f", vector)).tobytes()
+
+
+def decode_dense(data: Optional[bytes]) -> Optional[list]:
+    if data is None:
+        return None
+    values = array("f")
+    values.frombytes(data)
+    return _le(values).tolist()
+
+
+def encode_sparse(vector: Optional[dict]) -> Optional[bytes]:
+    """Sparse {índice: peso} → uint32 n, n × uint32 índices, n × float32 pesos (LE)."""
+    if vector is None:
+        return None
+    indices = _le(array("I", (int(k) for k in vector)))
+    weights = _le(array("f", vector.values()))
+    return struct.pack("<I", len(indices)) + indices.tobytes() + weights.tobytes()
+
+
+def decode_sparse(data: Optional[bytes]) -> Optional[dict]:
+    if data is None:
+        return None
+    (n,) = struct.unpack_from("<I", data)
+    indices, weights = array("I"), array("f")
+    indices.frombytes(data[4:4 + 4 * n])
+    weights.frombytes(data[4 + 4 * n:4 + 8 * n])
+    return dict(zip(_le(indices).tolist(), _le(weights).tolist()))
+
+
+def split_chunk(chunk: dict) -> tuple[str, Optional[bytes], Optional[bytes]]:
+    """Chunk (model_dump) → (JSON sem vetores, dense, sparse)."""
+    row = {k: v for k, v in chunk.items() if k not in _VECTOR_FIELDS}
+    return (
+        json.dumps(row, ensure_ascii=False, default=str),
+        encode_dense(chunk.get("dense_vector")),
+        encode_sparse(chunk.get("sparse_vector")),
+    )
+
+
+def join_chunk(row: str, dense: Optional[bytes], sparse: Optional[bytes]) -> dict:
+    """Inverso de split_chunk."""
+    chunk = json.loads(row)
+    chunk["dense_vector"] = decode_dense(dense)
+    chunk["sparse_vector"] = decode_sparse(sparse)
+    return chunk
+
+
+def chunk_json(row: str, dense: Optional[bytes], sparse: Optional[bytes], vectors: bool = True) -> str:
+    """
+    JSON do chunk sem re-serializar a linha gravada: vectors=False devolve a
+    linha como está; vectors=True acrescenta dense/sparse decodificados.
+    """
+    if not vectors:
+        return row
+    return (
+        f'{row[:-1]}, "dense_vector": {json.dumps(decode_dense(dense))}, '
+        f'"sparse_vector": {json.dumps(decode_sparse(sparse))}}}'
+    )
+
+
+def vector_record(seq: int, dense: Optional[bytes], sparse: Optional[bytes]) -> bytes:
+    """
+    Registro binário dos vetores de um chunk (GET /ingest/result/{id}/vectors):
+    uint32 seq, uint32 n_dense_bytes, dense (float32 LE), uint32 n_sparse_bytes,
+    sparse (formato de encode_sparse). Vetor ausente → 0 bytes.
+    """
+    dense, sparse = dense or b"", sparse or b""
+    return (
+        struct.pack("<II", seq, len(dense)) + dense
+        + struct.pack("<I", len(sparse)) + sparse
+    )
+
+
+def _result_etag(meta_json: str, rows: list) -> str:
+    digest = hashlib.sha256(meta_json.encode("utf-8"))
+    for row, dense, sparse in rows:
+        digest.update(row.encode("utf-8"))
+        digest.update(dense or b"")
+        digest.update(sparse or b"")
+    return digest.hexdigest()[:32]
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+class TaskStore:
+    """
+    Interface dos backends. Status e resultado são dicts simples; o router
+    converte para TaskInfo/IngestResponse.
+    """
+
+    def create(self, task: dict) -> None:
+        """Registra uma task nova (campos de STATUS_FIELDS)."""
+        raise NotImplementedError
+
+    def get(self, task_id: str) -> Optional[dict]:
+        """Linha de status da task (sem resultado) ou None."""
+        raise NotImplementedError
+
+    def update(self, task_id: str, **fields) -> bool:
+        """Atualiza campos de status; False se a task não existe."""
+        raise NotImplementedError
+
+    def save_result(self, task_id: str, meta: dict, chunks: list, **fields) -> bool:
+        """Grava resultado (meta + chunks com vetores) e campos de status finais."""
+        raise NotImplementedError
+
+    def load_result_raw(self, task_id: str) -> Optional[tuple[str, str]]:
+        """(JSON dos metadados do resultado, ETag) ou None."""
+        raise NotImplementedError
+
+    def load_result(self, task_id: str) -> Optional[dict]:
+        """Metadados do resultado (sem chunks) ou None."""
+        raw = self.load_result_raw(task_id)
+        return json.loads(raw[0]) if raw else None
+
+    def load_chunks(self, task_id: str, offset: int = 0, limit: Optional[int] = None) -> list:
+        """Chunks [offset, offset+limit) como (row_json, dense, sparse), na ordem original."""
+        raise NotImplementedError
+
+    def evict_expired(self) -> int:
+        """Remove tasks vencidas; retorna quantas."""
+        return 0
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__}
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Task store em SQLite local, com TTL e limite de tamanho dos resultados.
+
+    Uma conexão por thread em modo WAL: leituras (polls de status) não
+    esperam escritas. Escritas são transações curtas — os chunks de um
+    resultado entram em lotes de CHUNK_BATCH linhas, e a linha de status só
+    vira "completed" numa última transação pequena, depois dos chunks.
+    """
+
+    # Linhas de task_chunks por transação no save_result
+    CHUNK_BATCH = 500
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: int = 24 * 3600,
+        max_bytes: int = 2048 * 1024 * 1024,
+        evict_interval: float = 0,
+    ):
+        """
+        Args:
+            path: Arquivo SQLite (diretório criado se faltar)
+            ttl_seconds: Tempo de vida de uma task após a última escrita
+            max_bytes: Tamanho máximo somado dos resultados (chunks + vetores)
+            evict_interval: Segundos entre limpezas de tasks vencidas numa
+                thread de fundo (0 = sem thread; chamar evict_expired())
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY, document_id TEXT, status TEXT,
+                    priority TEXT, progress REAL, current_phase TEXT,
+                    started_at TEXT, completed_at TEXT, error_message TEXT,
+                    expires_at REAL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_expires ON tasks(expires_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_results (
+                    task_id TEXT PRIMARY KEY, meta TEXT, total_chunks INTEGER,
+                    bytes INTEGER, created_at REAL, etag TEXT
+                )""")
+            columns = {r[1] for r in conn.execute("PRAGMA table_info(task_results)")}
+            if "etag" not in columns:  # arquivo criado antes do ETag
+                conn.execute("ALTER TABLE task_results ADD COLUMN etag TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_chunks (
+                    task_id TEXT, seq INTEGER, row TEXT, dense BLOB, sparse BLOB,
+                    PRIMARY KEY (task_id, seq)
+                ) WITHOUT ROWID""")
+            # Tasks em andamento não sobrevivem ao processo que as rodava
+            orphans = conn.execute(
+                "UPDATE tasks SET status = 'failed', completed_at = ?, "
+                "error_message = 'Servidor reiniciado durante o processamento' "
+                "WHERE status = 'processing'",
+                (datetime.now().isoformat(),),
+            ).rowcount
+        if orphans:
+            logger.warning(f"Task store: {orphans} tasks em andamento marcadas como failed (restart)")
+        self.evict_expired()
+
+        self._stop = threading.Event()
+        self._janitor = None
+        if evict_interval > 0:
+            self._janitor = threading.Thread(
+                target=self._evict_loop, args=(evict_interval,),
+                name="task-store-janitor", daemon=True,
+            )
+            self._janitor.start()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _evict_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.evict_expired()
+            except sqlite3.Error as e:
+                logger.warning(f"Task store: falha na limpeza periódica: {e}")
+
+    def _expires(self) -> float:
+        return time.time() + self.ttl_seconds
+
+    def create(self, task: dict) -> None:
+        values = [task.get(name) for name in STATUS_FIELDS]
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO tasks ({', '.join(STATUS_FIELDS)}, expires_at) "
+                f"VALUES ({', '.join('?' * len(STATUS_FIELDS))}, ?)",
+                (*values, self._expires()),
+            )
+
+    def get(self, task_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            f"SELECT {', '.join(STATUS_FIELDS)} FROM tasks WHERE task_id = ? AND expires_at > ?",
+            (task_id, time.time()),
+        ).fetchone()
+        return dict(zip(STATUS_FIELDS, row)) if row else None
+
+    def _update(self, conn: sqlite3.Connection, task_id: str, fields: dict) -> bool:
+        fields = {k: v for k, v in fields.items() if k in STATUS_FIELDS and k != "task_id"}
+        assignments = "".join(f"{name} = ?, " for name in fields)
+        return conn.execute(
+            f"UPDATE tasks SET {assignments}expires_at = ? WHERE task_id = ?",
+            (*fields.values(), self._expires(), task_id),
+        ).rowcount > 0
+
+    def update(self, task_id: str, **fields) -> bool:
+        conn = self._conn()
+        with conn:
+            return self._update(conn, task_id, fields)
+
+    def save_result(self, task_id: str, meta: dict, chunks: list, **fields) -> bool:
+        rows = [split_chunk(chunk) for chunk in chunks]
+        meta_json = json.dumps(meta, ensure_ascii=False, default=str)
+        size = len(meta_json) + sum(
+            len(row) + len(dense or b"") + len(sparse or b"") for row, dense, sparse in rows
+        )
+        if size > self.max_bytes:
+            # Sozinho já passa do limite: não grava, mas a task continua visível
+            logger.warning(
+                f"Task store: resultado de {task_id} ({size} bytes) excede o limite "
+                f"({self.max_bytes} bytes), não armazenado"
+            )
+            return self.update(
+                task_id, **{
+                    **fields,
+                    "status": "failed",
+                    "error_message": (
+                        f"Resultado ({size / 1024 / 1024:.1f} MB) excede o limite do task store "
+                        f"({self.max_bytes / 1024 / 1024:.1f} MB, TASK_STORE_MAX_MB)"
+                    ),
+                },
+            )
+
+        etag = _result_etag(meta_json, rows)
+        conn = self._conn()
+        if self.get(task_id) is None:
+            return False
+        with conn:
+            conn.execute("DELETE FROM task_chunks WHERE task_id = ?", (task_id,))
+        # Chunks em lotes: cada transação segura o lock de escrita por pouco tempo
+        for start in range(0, len(rows), self.CHUNK_BATCH):
+            with conn:
+                conn.executemany(
+                    "INSERT INTO task_chunks VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (task_id, seq, *row)
+                        for seq, row in enumerate(rows[start:start + self.CHUNK_BATCH], start=start)
+                    ],
+                )
+        with conn:
+            if not self._update(conn, task_id, fields):
+                conn.execute("DELETE FROM task_chunks WHERE task_id = ?", (task_id,))
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO task_results "
+                "(task_id, meta, total_chunks, bytes, created_at, etag) VALUES (?, ?, ?, ?, ?, ?)",
+                (task_id, meta_json, len(rows), size, time.time(), etag),
+            )
+        with conn:
+            self._enforce_size(conn, keep=task_id)
+        return True
+
+    def load_result_raw(self, task_id: str) -> Optional[tuple[str, str]]:
+        row = self._conn().execute(
+            "SELECT r.meta, r.etag FROM task_results r JOIN tasks t USING (task_id) "
+            "WHERE task_id = ? AND t.expires_at > ?",
+            (task_id, time.time()),
+        ).fetchone()
+        return (row[0], row[1] or "") if row else None
+
+    def load_chunks(self, task_id: str, offset: int = 0, limit: Optional[int] = None) -> list:
+        return self._conn().execute(
+            "SELECT row, dense, sparse FROM task_chunks "
+            "WHERE task_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+            (task_id, offset, -1 if limit is None else limit),
+        ).fetchall()
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, where: str, params: tuple) -> int:
+        ids = [r[0] for r in conn.execute(f"SELECT task_id FROM tasks WHERE {where}", params)]
+        for table in ("task_chunks", "task_results", "tasks"):
+            conn.executemany(f"DELETE FROM {table} WHERE task_id = ?", [(i,) for i in ids])
+        return len(ids)
+
+    def _enforce_size(self, conn: sqlite3.Connection, keep: str) -> None:
+        """
+        Acima de max_bytes: remove as tasks com resultado mais antigo até 90%
+        do limite, nunca a task `keep` (a que acabou de ser gravada).
+        """
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM task_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target, removed = int(self.max_bytes * 0.9), 0
+        for task_id, size in conn.execute(
+            "SELECT task_id, bytes FROM task_results WHERE task_id != ? ORDER BY created_at", (keep,)
+        ).fetchall():
+            if total <= target:
+                break
+            removed += self._delete(conn, "task_id = ?", (task_id,))
+            total -= size
+        logger.info(f"Task store: {removed} resultados removidos (limite de {self.max_bytes} bytes)")
+
+    def evict_expired(self) -> int:
+        conn = self._conn()
+        with conn:
+            removed = self._delete(conn, "expires_at <= ?", (time.time(),))
+        if removed:
+            logger.info(f"Task store: {removed} tasks expiradas removidas")
+        return removed
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        tasks = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        results, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM task_results"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "tasks": tasks,
+            "results": results,
+            "result_bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._janitor is not None:
+            self._janitor.join(timeout=5)
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+
+class RedisTaskStore(TaskStore):
+    """
+    Task store em Redis (várias réplicas do servidor atrás de um balanceador).
+
+    Keys (todas com EXPIRE ttl, renovado a cada escrita):
+        ingest:task:{task_id}      → status (JSON)
+        ingest:result:{task_id}    → metadados do resultado (JSON)
+        ingest:etag:{task_id}      → ETag do resultado
+        ingest:chunks:{task_id}    → lista de chunks (JSON sem vetores)
+        ingest:dense:{task_id}     → lista de blobs dense (mesma ordem)
+        ingest:sparse:{task_id}    → lista de blobs sparse (mesma ordem)
+    """
+
+    def __init__(self, redis_url: str, redis_db: int = 3, ttl_seconds: int = 24 * 3600):
+        import redis
+
+        self.ttl_seconds = ttl_seconds
+        self._redis = redis.Redis.from_url(redis_url, db=redis_db, decode_responses=False)
+        self._lock = threading.Lock()  # read-modify-write do status dentro do processo
+
+    @staticmethod
+    def _key(kind: str, task_id: str) -> str:
+        return f"ingest:{kind}:{task_id}"
+
+    def create(self, task: dict) -> None:
+        status = {name: task.get(name) for name in STATUS_FIELDS}
+        self._redis.set(self._key("task", task["task_id"]), json.dumps(status), ex=self.ttl_seconds)
+
+    def get(self, task_id: str) -> Optional[dict]:
+        data = self._redis.get(self._key("task", task_id))
+        return json.loads(data) if data else None
+
+    def _merged_status(self, task_id: str, fields: dict) -> Optional[dict]:
+        status = self.get(task_id)
+        if status is None:
+            return None
+        status.update({k: v for k, v in fields.items() if k in STATUS_FIELDS and k != "task_id"})
+        return status
+
+    def update(self, task_id: str, **fields) -> bool:
+        with self._lock:
+            status = self._merged_status(task_id, fields)
+            if status is None:
+                return False
+            self._redis.set(self._key("task", task_id), json.dumps(status), ex=self.ttl_seconds)
+        return True
+
+    def save_result(self, task_id: str, meta: dict, chunks: list, **fields) -> bool:
+        import redis
+
+        rows = [split_chunk(chunk) for chunk in chunks]
+        meta_json = json.dumps(meta, ensure_ascii=False, default=str)
+        with self._lock:
+            status = self._merged_status(task_id, fields)
+            if status is None:
+                return False
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.set(self._key("result", task_id), meta_json, ex=self.ttl_seconds)
+            pipe.set(self._key("etag", task_id), _result_etag(meta_json, rows), ex=self.ttl_seconds)
+            for kind, column in (("chunks", 0), ("dense", 1), ("sparse", 2)):
+                key = self._key(kind, task_id)
+                pipe.delete(key)
+                if rows:
+                    # Redis não guarda None: vetor ausente vira blob vazio
+                    pipe.rpush(key, *[row[column] or b"" for row in rows])
+                    pipe.expire(key, self.ttl_seconds)
+            # Status final por último, no mesmo MULTI: "completed" só com resultado gravado
+            pipe.set(self._key("task", task_id), json.dumps(status), ex=self.ttl_seconds)
+            try:
+                pipe.execute()
+            except redis.RedisError as e:
+                logger.error(f"Task store: falha ao gravar resultado de {task_id}: {e}")
+                return False
+        return True
+
+    def load_result_raw(self, task_id: str) -> Optional[tuple[str, str]]:
+        meta, etag = self._redis.mget(self._key("result", task_id), self._key("etag", task_id))
+        return (meta.decode("utf-8"), (etag or b"").decode()) if meta else None
+
+    def load_chunks(self, task_id: str, offset: int = 0, limit: Optional[int] = None) -> list:
+        if limit is not None and limit <= 0:
+            return []
+        end = -1 if limit is None else offset + limit - 1
+        pipe = self._redis.pipeline(transaction=False)
+        for kind in ("chunks", "dense", "sparse"):
+            pipe.lrange(self._key(kind, task_id), offset, end)
+        rows, dense, sparse = pipe.execute()
+        return [
+            (row.decode("utf-8"), d or None, s or None)
+            for row, d, s in zip(rows, dense, sparse)
+        ]
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "ttl_seconds": self.ttl_seconds}
+
+    def close(self) -> None:
+        self._redis.close()
+
+
+# =============================================================================
+# Singleton
+# =============================================================================
+
+_store: Optional[TaskStore] = None
+_store_lock = threading.Lock()
+
+
+def get_task_store() -> TaskStore:
+    """Task store do servidor, criado a partir da config."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from ..config import config
+
+            if config.task_store_backend == "redis":
+                _store = RedisTaskStore(
+                    config.task_store_redis_url,
+                    redis_db=config.task_store_redis_db,
+                    ttl_seconds=config.task_store_ttl_seconds,
+                )
+            else:
+                _store = SQLiteTaskStore(
+                    config.task_store_path,
+                    ttl_seconds=config.task_store_ttl_seconds,
+                    max_bytes=config.task_store_max_mb * 1024 * 1024,
+                    evict_interval=config.task_store_evict_interval_s,
+                )
+            logger.info(f"Task store: {_store.stats()}")
+        return _store
+
+
+def close_task_store() -> None:
+    """Fecha o singleton (shutdown do servidor), se foi criado."""
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
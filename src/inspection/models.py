@@ -114,7 +114,7 @@ class RegexClassificationArtifact(BaseModel):
     canonical_hash: str = Field("")
     canonical_length: int = Field(0)
     duration_ms: float = Field(0.0)
-    extraction_source: str = Field("pymupdf_native", description="pymupdf_native ou vlm_ocr")
+    extraction_source: str = Field("pymupdf_native", description="pymupdf_native, vlm_ocr ou hybrid")
 
 
 # ============================================================================
@@ -199,7 +199,8 @@ class PyMuPDFPageResult(BaseModel):
     width: float = Field(..., description="Largura da página em pontos")
     height: float = Field(..., description="Altura da página em pontos")
     blocks: list[PyMuPDFBlock] = Field(default_factory=list)
-    image_base64: str = Field("", description="Imagem PNG da página (base64)")
+    image_base64: str = Field("", description="Imagem da página (base64)")
+    image_mime: str = Field("image/png", description="MIME type da imagem (image/png, image/jpeg, image/webp)")
 
 
 class PyMuPDFArtifact(BaseModel):
@@ -4,6 +4,7 @@ Modulo de integracao com LLMs.
 Clientes para vLLM e Ollama com API OpenAI-compatible.
 """
 
+from .endpoint_pool import EndpointPool
 from .vllm_client import VLLMClient, LLMConfig
 
-__all__ = ["VLLMClient", "LLMConfig"]
+__all__ = ["VLLMClient", "LLMConfig", "EndpointPool"]
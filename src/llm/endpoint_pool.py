@@ -0,0 +1,152 @@
+"""
+Pool de endpoints vLLM com balanceamento least-outstanding-requests.
+
+Com duas ou mais réplicas do vLLM (ex: uma por GPU), cada request vai para
+o endpoint com menos requests em voo; empate desempata pelo que recebeu
+menos requests no total (round-robin natural com carga igual).
+
+Falhas de endpoint (erro de conexão, timeout, HTTP 5xx) contam em
+sequência; ao atingir max_failures o endpoint é ejetado por
+cooloff_seconds. Passado o cool-off ele volta em modo de sonda: recebe no
+máximo uma request por vez; sucesso o reintegra, nova falha o ejeta de
+novo. Se todos estiverem ejetados, o que foi ejetado há mais tempo é usado
+mesmo assim — o pool nunca recusa uma request (com um único endpoint o
+comportamento é o de antes).
+
+Thread-safe: serve ao VLLMClient (síncrono, várias threads) e ao
+VLMClient (asyncio) — acquire/release não bloqueiam.
+
+Uso:
+    pool = EndpointPool(["http://gpu0:8002/v1", "http://gpu1:8002/v1"])
+    with pool.lease() as endpoint:
+        client_for(endpoint.url).post(...)
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def parse_endpoint_urls(value: str, default: str = "") -> list[str]:
+    """Lista de URLs separadas por vírgula (ex: VLLM_BASE_URLS); vazia → [default]."""
+    urls = [url.strip().rstrip("/") for url in (value or "").split(",") if url.strip()]
+    if not urls and default:
+        urls = [default.rstrip("/")]
+    return urls
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """Erro que indica endpoint indisponível (não erro da própria request)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class Endpoint:
+    """Estado de um endpoint no pool."""
+
+    __slots__ = ("url", "in_flight", "requests", "failures", "ejected_until")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0          # falhas consecutivas
+        self.ejected_until = 0.0   # monotonic; 0 = nunca ejetado
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected": self.ejected_until > time.monotonic(),
+        }
+
+
+class EndpointPool:
+    """Endpoints vLLM com seleção least-outstanding-requests e ejeção."""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        max_failures: int = 2,
+        cooloff_seconds: float = 30.0,
+    ):
+        """
+        Args:
+            urls: URLs base dos endpoints (ex: http://localhost:8002/v1)
+            max_failures: Falhas consecutivas até ejetar o endpoint
+            cooloff_seconds: Tempo ejetado antes de voltar como sonda
+        """
+        if not urls:
+            raise ValueError("EndpointPool precisa de ao menos um endpoint")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.max_failures = max(1, max_failures)
+        self.cooloff_seconds = cooloff_seconds
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self) -> list[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def acquire(self) -> Endpoint:
+        """Escolhe o endpoint e conta a request como em voo."""
+        with self._lock:
+            now = time.monotonic()
+            candidates = []
+            for endpoint in self.endpoints:
+                if endpoint.failures < self.max_failures:
+                    candidates.append(endpoint)
+                elif endpoint.ejected_until <= now and endpoint.in_flight == 0:
+                    candidates.append(endpoint)  # sonda após o cool-off
+            if candidates:
+                chosen = min(candidates, key=lambda e: (e.in_flight, e.requests))
+            else:
+                chosen = min(self.endpoints, key=lambda e: (e.ejected_until, e.in_flight))
+            chosen.in_flight += 1
+            chosen.requests += 1
+            return chosen
+
+    def release(self, endpoint: Endpoint, error: Optional[BaseException] = None) -> None:
+        """Fecha a request; error de endpoint (is_endpoint_failure) conta falha."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            if error is not None and not isinstance(error, Exception):
+                return  # cancelamento (asyncio.CancelledError etc.): neutro
+            if error is None or not is_endpoint_failure(error):
+                if endpoint.failures >= self.max_failures:
+                    logger.info(f"Endpoint vLLM reintegrado: {endpoint.url}")
+                endpoint.failures = 0
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.max_failures:
+                endpoint.ejected_until = time.monotonic() + self.cooloff_seconds
+                logger.warning(
+                    f"Endpoint vLLM ejetado por {self.cooloff_seconds:.0f}s "
+                    f"({endpoint.failures} falhas seguidas): {endpoint.url} — {error}"
+                )
+
+    @contextmanager
+    def lease(self) -> Iterator[Endpoint]:
+        """acquire() + release() com a exceção (se houver) do bloco."""
+        endpoint = self.acquire()
+        try:
+            yield endpoint
+        except BaseException as e:
+            self.release(endpoint, e)
+            raise
+        self.release(endpoint)
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
@@ -26,6 +26,8 @@ from dataclasses import dataclass, field
 from typing import Optional, Any
 import httpx
 
+from .endpoint_pool import EndpointPool, parse_endpoint_urls
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,12 +47,20 @@ def _strip_thinking_block(text: str) -> str:
 # CONFIGURACAO
 # =============================================================================
 
+def _env_base_url() -> str:
+    return os.getenv("VLLM_BASE_URL", "http://localhost:8002/v1")
+
+
 @dataclass
 class LLMConfig:
     """Configuracao do cliente LLM."""
 
     # Conexao
-    base_url: str = field(default_factory=lambda: os.getenv("VLLM_BASE_URL", "http://localhost:8002/v1"))
+    base_url: str = field(default_factory=_env_base_url)
+    # Réplicas vLLM (VLLM_BASE_URLS separado por vírgula); vazio = só base_url.
+    # O env só vale quando base_url também veio do env/default (__post_init__)
+    base_urls: list = field(default_factory=list)
+    endpoint_cooloff_seconds: float = 30.0  # Endpoint com falhas fica fora por este tempo
     api_key: str = "not-needed"  # vLLM nao precisa de API key
     timeout: float = 120.0  # segundos
 
@@ -69,6 +79,11 @@ class LLMConfig:
     max_retries: int = 3
     retry_delay: float = 1.0
 
+    def __post_init__(self):
+        # base_url explícito (ex: Ollama, outro servidor) não vira réplica do env
+        if not self.base_urls and self.base_url == _env_base_url():
+            self.base_urls = parse_endpoint_urls(os.getenv("VLLM_BASE_URLS", ""))
+
     @classmethod
     def for_enrichment(cls, model: str = None) -> "LLMConfig":
         """Config otimizada para enriquecimento de chunks (no_think)."""
@@ -194,18 +209,39 @@ class VLLMClient:
         for key, value in kwargs.items():
             if hasattr(self.config, key):
                 setattr(self.config, key, value)
-
-        self._client = httpx.Client(
-            base_url=self.config.base_url,
-            timeout=self.config.timeout,
-            headers={
-                "Authorization": f"Bearer {self.config.api_key}",
-                "Content-Type": "application/json",
-            }
+        if "base_url" in kwargs and "base_urls" not in kwargs:
+            # base_url explícito tem precedência sobre VLLM_BASE_URLS
+            self.config.base_urls = []
+
+        # Uma conexão por réplica; cada request vai para a menos ocupada
+        self.endpoints = EndpointPool(
+            self.config.base_urls or [self.config.base_url],
+            cooloff_seconds=self.config.endpoint_cooloff_seconds,
         )
+        self._clients = {
+            url: httpx.Client(
+                base_url=url,
+                timeout=self.config.timeout,
+                headers={
+                    "Authorization": f"Bearer {self.config.api_key}",
+                    "Content-Type": "application/json",
+                }
+            )
+            for url in self.endpoints.urls
+        }
+        self._client = self._clients[self.endpoints.urls[0]]
 
         thinking_mode = "thinking" if self.config.enable_thinking else "no_think"
-        logger.info(f"VLLMClient inicializado: {self.config.base_url} (mode={thinking_mode})")
+        logger.info(
+            f"VLLMClient inicializado: {', '.join(self.endpoints.urls)} (mode={thinking_mode})"
+        )
+
+    def _post(self, payload: dict) -> httpx.Response:
+        """POST /chat/completions no endpoint com menos requests em voo."""
+        with self.endpoints.lease() as endpoint:
+            response = self._clients[endpoint.url].post("/chat/completions", json=payload)
+            response.raise_for_status()
+            return response
 
     def _prepare_messages(
         self,
@@ -280,8 +316,7 @@ class VLLMClient:
             try:
                 start_time = time.time()
 
-                response = self._client.post("/chat/completions", json=payload)
-                response.raise_for_status()
+                response = self._post(payload)
 
                 elapsed = time.time() - start_time
                 data = response.json()
@@ -316,6 +351,14 @@ class VLLMClient:
                 else:
                     raise
 
+            except httpx.TransportError as e:
+                # Réplica fora do ar: a próxima tentativa vai para outro endpoint
+                logger.warning(f"Erro de conexao (attempt {attempt+1}): {e}")
+                if attempt < self.config.max_retries - 1:
+                    time.sleep(self.config.retry_delay * (attempt + 1))
+                else:
+                    raise
+
             except Exception as e:
                 logger.error(f"Erro inesperado: {e}")
                 raise
@@ -368,8 +411,7 @@ class VLLMClient:
             try:
                 start_time = time.time()
 
-                response = self._client.post("/chat/completions", json=payload)
-                response.raise_for_status()
+                response = self._post(payload)
 
                 elapsed = time.time() - start_time
                 data = response.json()
@@ -421,6 +463,14 @@ class VLLMClient:
                 else:
                     raise
 
+            except httpx.TransportError as e:
+                # Réplica fora do ar: a próxima tentativa vai para outro endpoint
+                logger.warning(f"Erro de conexao (attempt {attempt+1}): {e}")
+                if attempt < self.config.max_retries - 1:
+                    time.sleep(self.config.retry_delay * (attempt + 1))
+                else:
+                    raise
+
             except Exception as e:
                 logger.error(f"Erro inesperado: {e}")
                 raise
@@ -540,8 +590,7 @@ class VLLMClient:
             try:
                 start_time = time.time()
 
-                response = self._client.post("/chat/completions", json=payload)
-                response.raise_for_status()
+                response = self._post(payload)
 
                 elapsed = time.time() - start_time
                 data = response.json()
@@ -570,6 +619,14 @@ class VLLMClient:
                 else:
                     raise
 
+            except httpx.TransportError as e:
+                # Réplica fora do ar: a próxima tentativa vai para outro endpoint
+                logger.warning(f"Erro de conexao (attempt {attempt+1}): {e}")
+                if attempt < self.config.max_retries - 1:
+                    time.sleep(self.config.retry_delay * (attempt + 1))
+                else:
+                    raise
+
             except json.JSONDecodeError as e:
                 # Fallback: tenta extrair JSON valido da resposta
                 logger.warning(f"JSON invalido com json_schema, tentando extrair: {e}")
@@ -601,17 +658,27 @@ class VLLMClient:
             logger.error(f"Erro ao listar modelos: {e}")
             return []
 
+    def endpoint_health(self) -> dict:
+        """GET /models em cada réplica do pool: {url: respondendo}."""
+        health = {}
+        for url, client in self._clients.items():
+            try:
+                response = client.get("/models")
+                response.raise_for_status()
+                health[url] = len(response.json().get("data", [])) > 0
+            except Exception as e:
+                logger.warning(f"Health check: {url} nao respondeu ({e})")
+                health[url] = False
+        return health
+
     def health_check(self) -> bool:
-        """Verifica se o servidor esta respondendo."""
-        try:
-            models = self.list_models()
-            return len(models) > 0
-        except Exception:
-            return False
+        """Verifica se alguma replica esta respondendo (o pool desvia das demais)."""
+        return any(self.endpoint_health().values())
 
     def close(self):
-        """Fecha o cliente HTTP."""
-        self._client.close()
+        """Fecha os clientes HTTP."""
+        for client in self._clients.values():
+            client.close()
 
     def __enter__(self):
         return self
@@ -37,7 +37,7 @@ from .batch_collector import (
     create_rerank_batch_processor,
 )
 from .auth import APIKeyAuthMiddleware, DISABLE_DOCS
-from .ingestion.router import router as ingestion_router
+from .ingestion.router import router as ingestion_router, stop_job_queue
 from .inspection.router import router as inspection_router
 from .middleware.rate_limit import RateLimitMiddleware, InMemoryRateLimiter
 
@@ -425,6 +425,16 @@ async def lifespan(app: FastAPI):
     if RERANK_COLLECTOR:
         await RERANK_COLLECTOR.stop()
 
+    logger.info("Parando fila de ingestao...")
+    await stop_job_queue()
+    from .ingestion.task_store import close_task_store
+    close_task_store()
+
+    logger.info("Fechando cliente VLM do pipeline...")
+    await get_pipeline().aclose()
+    from .ingestion.staged_executor import shutdown_staged_executor
+    await asyncio.to_thread(shutdown_staged_executor)
+
     logger.info("Encerrando ThreadPoolExecutor...")
     GPU_EXECUTOR.shutdown(wait=True, cancel_futures=False)
     logger.info("=== Shutdown completo ===")
@@ -7,6 +7,8 @@ from .canonical_utils import (
     normalize_canonical_text,
     compute_canonical_hash,
     validate_offsets_hash,
+    CanonicalText,
+    PageMap,
 )
 
 __all__ = [
@@ -14,4 +16,6 @@ __all__ = [
     "normalize_canonical_text",
     "compute_canonical_hash",
     "validate_offsets_hash",
+    "CanonicalText",
+    "PageMap",
 ]
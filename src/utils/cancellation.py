@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+Cancelamento de ingestão (DELETE /ingest).
+
+O router sinaliza o cancelamento levantando IngestCancelledError de dentro do
+progress_callback; quem chama o callback (pipeline, serviço VLM) deve deixar
+a exceção passar em vez de tratá-la como erro de callback.
+"""
+
+
+class IngestCancelledError(Exception):
+    """Ingestão cancelada (DELETE /ingest): levantada pelo progress_callback."""
+    pass
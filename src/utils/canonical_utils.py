@@ -12,6 +12,8 @@ no novo pipeline VLM (Fase 0 da migração SpanParser → Qwen3-VL).
 
 import hashlib
 import unicodedata
+from bisect import bisect_right
+from typing import Iterable, Optional, Tuple
 
 
 def normalize_canonical_text(text: str) -> str:
@@ -94,3 +96,113 @@ def validate_offsets_hash(
     current_hash = compute_canonical_hash(normalized)
 
     return stored_hash == current_hash
+
+
+class PageMap:
+    """
+    Mapa offset → página (1-indexed) por busca binária.
+
+    Construído a partir de page_boundaries: lista de (char_start, char_end)
+    por página, na ordem do documento (page_boundaries[0] = página 1).
+    Páginas vazias (start == end) são ignoradas na busca, mas mantêm a
+    numeração das demais.
+    """
+
+    __slots__ = ("_starts", "_ends", "_numbers", "page_count")
+
+    def __init__(self, page_boundaries: Iterable[Tuple[int, int]] = ()):
+        starts, ends, numbers = [], [], []
+        page_count = 0
+        for page_number, (start, end) in enumerate(page_boundaries, start=1):
+            page_count = page_number
+            if end > start:
+                starts.append(start)
+                ends.append(end)
+                numbers.append(page_number)
+        self._starts = starts
+        self._ends = ends
+        self._numbers = numbers
+        self.page_count = page_count
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def page_for_offset(self, offset: int) -> int:
+        """
+        Página (1-indexed) que contém o offset.
+
+        Offset entre duas páginas (separador) pertence à página anterior;
+        antes da primeira, à primeira; após o fim da última, à última.
+        """
+        if not self._starts:
+            return 1
+        if offset >= self._ends[-1]:
+            return self.page_count
+        i = bisect_right(self._starts, offset) - 1
+        return self._numbers[max(i, 0)]
+
+
+class CanonicalText:
+    """
+    Texto canônico imutável: normalização e SHA256 calculados uma única vez.
+
+    Substitui as chamadas repetidas a normalize_canonical_text() e
+    compute_canonical_hash() espalhadas pelo pipeline (checagem de
+    idempotência, upload de artefatos, manifesto). Também expõe mapas
+    offset → página e offset → linha por bisect.
+
+    Attributes:
+        raw: Texto recebido do extrator.
+        text: Texto normalizado (normalize_canonical_text).
+        sha256: Hash do texto normalizado (compute_canonical_hash).
+        is_normalized: True se raw já estava normalizado, isto é, offsets
+            nativos do extrator valem para text.
+        pages: PageMap construído a partir de page_boundaries.
+    """
+
+    __slots__ = ("raw", "text", "sha256", "is_normalized", "pages", "_line_starts")
+
+    def __init__(
+        self,
+        raw: str,
+        page_boundaries: Iterable[Tuple[int, int]] = (),
+    ):
+        text = normalize_canonical_text(raw)
+        _set = object.__setattr__
+        _set(self, "raw", raw)
+        _set(self, "text", text)
+        _set(self, "sha256", compute_canonical_hash(text))
+        _set(self, "is_normalized", raw == text)
+        _set(self, "pages", PageMap(page_boundaries))
+        _set(self, "_line_starts", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CanonicalText é imutável")
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def page_for_offset(self, offset: int) -> int:
+        """Página (1-indexed) do offset no texto normalizado."""
+        return self.pages.page_for_offset(offset)
+
+    def line_for_offset(self, offset: int) -> int:
+        """Linha (1-indexed) do offset no texto normalizado."""
+        starts = self._line_starts
+        if starts is None:
+            # Cache preguiçoso: só documentos que consultam linhas pagam o custo
+            starts = [0]
+            find = self.text.find
+            pos = find("\n")
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = find("\n", pos + 1)
+            object.__setattr__(self, "_line_starts", starts)
+        return bisect_right(starts, offset)
+
+    def matches(self, stored_hash: Optional[str]) -> bool:
+        """Equivalente a validate_offsets_hash(stored_hash, raw), sem recomputar."""
+        return bool(stored_hash) and stored_hash == self.sha256
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Disk Cache - Armazenamento chave→bytes em disco local com eviction por tamanho.
+
+Base comum dos caches locais do pipeline (OCRPageCache, CheckpointStore).
+
+Layout: {cache_dir}/{key[:2]}/{key}{suffix}
+- Escrita atômica (tmp + os.replace): processos concorrentes podem
+  compartilhar o diretório sem ler entradas parciais
+- Diretório privado (0700): entradas podem ser pickles (CheckpointStore),
+  que não devem ser graváveis por outros usuários da máquina
+- Thread-safe: o tamanho corrente e a eviction ficam sob um lock (a mesma
+  instância é usada pelas threads do executor e pelos workers da fila)
+- LRU por mtime: cada hit atualiza o mtime da entrada
+- Ao exceder max_bytes, remove as entradas menos recentemente usadas
+  até ficar abaixo de 90% do limite
+
+Falhas de I/O nunca abortam o pipeline: leitura falha → miss, escrita
+falha → warning.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Cache chave→bytes em disco local com eviction LRU por tamanho total."""
+
+    def __init__(self, cache_dir: str, max_bytes: int, suffix: str = ".bin"):
+        """
+        Args:
+            cache_dir: Diretório local do cache
+            max_bytes: Tamanho máximo total das entradas em disco
+            suffix: Extensão dos arquivos de entrada
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._size: Optional[int] = None  # calculado sob demanda
+        self._lock = threading.Lock()  # _size e _evict
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Retorna o conteúdo da entrada ou None se ausente."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Disk cache: falha ao ler {path}: {e}")
+            return None
+
+        try:
+            os.utime(path)  # marca como recentemente usado (LRU)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Grava a entrada (escrita atômica) e aplica eviction se necessário."""
+        path = self.path(key)
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                with self._lock:
+                    try:
+                        replaced = os.path.getsize(path)  # sobrescrita: sai do _size
+                    except OSError:
+                        replaced = 0
+                    os.replace(tmp_path, path)
+                    self._account(len(data) - replaced)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Disk cache: falha ao gravar {path}: {e}")
+
+    def _account(self, delta: int) -> None:
+        """Atualiza o tamanho corrente e aplica eviction (chamar com _lock)."""
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += delta
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """Lista (mtime, size, path) de todas as entradas do cache."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove entradas menos recentemente usadas até 90% de max_bytes (com _lock)."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        if removed:
+            logger.info(
+                f"Disk cache {self.cache_dir}: {removed} entradas removidas "
+                f"({total / 1024 / 1024:.1f} MB restantes)"
+            )
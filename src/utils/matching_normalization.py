@@ -15,6 +15,8 @@ NORMALIZATION_VERSION deve ser incrementada ao mudar regras (invalida cache).
 
 import re
 import unicodedata
+from functools import lru_cache
+from typing import Union
 
 # Incrementar ao mudar qualquer regra de normalização
 NORMALIZATION_VERSION = 1
@@ -59,6 +61,31 @@ _HYPHEN_BREAK_RE = re.compile(r"-\s*\n\s*")
 # Padrão para colapso de whitespace
 _MULTI_WHITESPACE_RE = re.compile(r"\s+")
 
+# Whitespace colapsado por normalize_with_offset_map (char a char)
+_WHITESPACE_CHARS = frozenset(" \t\n\r\x0b\x0c")
+
+# Fase 2 de normalize_with_offset_map: grupo 1 = hífen de quebra de linha;
+# grupo 2 = trecho que a normalização altera: run de 2+ chars de whitespace
+# e/ou da tabela OCR, um desses chars isolado (exceto o espaço simples, que
+# fica igual) ou um espaço logo antes de um hífen de quebra (o estado de
+# colapso atravessa a remoção). O hífen ASCII não está nas classes, então os
+# hífens de quebra casam exatamente como em _HYPHEN_BREAK_RE.finditer().
+_PHASE2_CHARS = "".join(sorted(_WHITESPACE_CHARS | set(_OCR_REPLACEMENTS)))
+_PHASE2_TOKEN_RE = re.compile(
+    r"(-\s*\n\s*)"
+    r"|((?:[" + re.escape(_PHASE2_CHARS) + r"]{2,}"
+    r"|[" + re.escape(_PHASE2_CHARS.replace(" ", "")) + r"]"
+    r"| (?=-\s*\n)))"
+)
+
+# NFKC dos caracteres Latin-1 (U+0080..U+00FF) que mudam: tabela fixa para
+# o caminho rápido de documentos em português
+_LATIN1_NFKC = {
+    code: nfkc
+    for code in range(0x80, 0x100)
+    if (nfkc := unicodedata.normalize("NFKC", chr(code))) != chr(code)
+}
+
 
 def normalize_for_matching(text: str) -> str:
     """
@@ -116,6 +143,11 @@ def normalize_with_offset_map(text: str) -> tuple[str, list[int]]:
     - Substituição 1:1 (dashes, quotes):
       mapeia diretamente
 
+    Trechos sem nenhum caractere afetado pelas regras (o grosso de um
+    documento em português) são copiados em bloco, junto com o trecho
+    correspondente do mapa; só os caracteres que mudam passam pelo
+    tratamento char a char.
+
     Args:
         text: Texto original a normalizar
 
@@ -127,82 +159,56 @@ def normalize_with_offset_map(text: str) -> tuple[str, list[int]]:
     if not text:
         return ("", [])
 
-    # Phase 1: NFKC com mapeamento char-a-char
-    # Processamos cada char original, aplicando NFKC e registrando a expansão
-    nfkc_chars: list[str] = []
-    nfkc_map: list[int] = []  # nfkc_map[i] = índice no texto original
-
-    for orig_idx, ch in enumerate(text):
-        nfkc = unicodedata.normalize("NFKC", ch)
-        for expanded_ch in nfkc:
-            nfkc_chars.append(expanded_ch)
-            nfkc_map.append(orig_idx)
-
-    # Phase 2: Tabela OCR + remoção de hífens de quebra + colapso whitespace
-    # Trabalhamos sobre nfkc_chars/nfkc_map
-    nfkc_text = "".join(nfkc_chars)
-
-    # Primeiro: marca posições que devem ser removidas por hífens de quebra
-    # Padrão: "-\s*\n\s*" → remove tudo
-    hyphen_break_positions: set[int] = set()
-    for m in _HYPHEN_BREAK_RE.finditer(nfkc_text):
-        for pos in range(m.start(), m.end()):
-            hyphen_break_positions.add(pos)
-
-    # Agora processamos char por char aplicando OCR replacements,
-    # removendo hífens de quebra e colapsando whitespace
-    norm_chars: list[str] = []
+    # Phase 1: NFKC por caractere (não por sequência), com mapeamento.
+    # Apenas os chars cuja forma NFKC difere são expandidos; o resto do
+    # texto e do mapa é copiado em bloco.
+    nfkc_text, nfkc_map = _nfkc_per_char(text)
+
+    # Phase 2: Tabela OCR + remoção de hífens de quebra + colapso whitespace.
+    # _PHASE2_TOKEN_RE casa apenas o que muda: hífens de quebra ("-\s*\n\s*",
+    # removidos por inteiro) e runs de whitespace/chars da tabela OCR. Espaços
+    # simples entre palavras ficam nos trechos copiados em bloco.
+    norm_parts: list[str] = []
     norm2orig: list[int] = []
     in_whitespace = False
 
-    i = 0
-    while i < len(nfkc_chars):
-        if i in hyphen_break_positions:
-            # Skip: parte de um hífen de quebra de linha
-            i += 1
+    pos = 0
+    for m in _PHASE2_TOKEN_RE.finditer(nfkc_text):
+        start = m.start()
+        if start > pos:
+            # Run de caracteres normais: copia em bloco
+            norm_parts.append(nfkc_text[pos:start])
+            norm2orig.extend(nfkc_map[pos:start])
+            in_whitespace = False
+        pos = m.end()
+
+        if m.lastindex == 1:
+            # Hífen de quebra de linha: remove tudo, sem mexer em in_whitespace
             continue
 
-        ch = nfkc_chars[i]
-        orig_idx = nfkc_map[i]
-
-        # Tabela OCR
-        if ch in _OCR_REPLACEMENTS:
-            replacement = _OCR_REPLACEMENTS[ch]
-            if not replacement:
-                # Remoção (soft hyphen, ZWS, etc.)
-                i += 1
-                continue
-            # Substituição (pode ser multi-char, ex: ellipsis → "...")
+        for i in range(start, pos):
+            ch = nfkc_text[i]
+            orig_idx = nfkc_map[i]
+            replacement = _OCR_REPLACEMENTS.get(ch, ch)
+            # Remoção (soft hyphen, ZWS, etc.) não emite nada; substituições
+            # podem ser multi-char (ex: ellipsis → "...")
             for rc in replacement:
-                if rc == " " or rc in ("\t", "\n", "\r"):
+                if rc in _WHITESPACE_CHARS:
                     if not in_whitespace:
-                        norm_chars.append(" ")
+                        norm_parts.append(" ")
                         norm2orig.append(orig_idx)
                         in_whitespace = True
                 else:
                     in_whitespace = False
-                    norm_chars.append(rc)
+                    norm_parts.append(rc)
                     norm2orig.append(orig_idx)
-            i += 1
-            continue
-
-        # Whitespace collapsing
-        if ch in (" ", "\t", "\n", "\r", "\x0b", "\x0c"):
-            if not in_whitespace:
-                norm_chars.append(" ")
-                norm2orig.append(orig_idx)
-                in_whitespace = True
-            i += 1
-            continue
 
-        # Normal character
-        in_whitespace = False
-        norm_chars.append(ch)
-        norm2orig.append(orig_idx)
-        i += 1
+    if pos < len(nfkc_text):
+        norm_parts.append(nfkc_text[pos:])
+        norm2orig.extend(nfkc_map[pos:])
 
     # Strip leading/trailing spaces
-    norm_text = "".join(norm_chars)
+    norm_text = "".join(norm_parts)
     stripped = norm_text.strip()
 
     if not stripped:
@@ -216,3 +222,55 @@ def normalize_with_offset_map(text: str) -> tuple[str, list[int]]:
     final_map = norm2orig[leading:end_idx]
 
     return (stripped, final_map)
+
+
+@lru_cache(maxsize=None)
+def _nfkc_char(ch: str) -> str:
+    """NFKC de um único caractere (memoizado: o alfabeto de um documento é pequeno)."""
+    return unicodedata.normalize("NFKC", ch)
+
+
+def _nfkc_per_char(text: str) -> tuple[str, Union[range, list[int]]]:
+    """
+    Aplica NFKC caractere a caractere, retornando (texto, mapa → original).
+
+    ASCII é invariante sob NFKC; para o resto, a tabela de substituição é
+    montada só com os chars distintos do texto que mudam (Latin-1 já vem
+    pré-computado em _LATIN1_NFKC). O texto é remontado por trechos entre
+    as ocorrências desses chars. Se nenhuma substituição muda o tamanho
+    (ex: º → o), o mapa é a identidade (range, sem materializar lista).
+    """
+    if text.isascii():
+        return text, range(len(text))
+
+    table: dict[str, str] = {}
+    for ch in set(text):
+        code = ord(ch)
+        if code < 0x80:
+            continue
+        nfkc = _LATIN1_NFKC.get(code, ch) if code <= 0xFF else _nfkc_char(ch)
+        if nfkc != ch:
+            table[ch] = nfkc
+    if not table:
+        return text, range(len(text))
+
+    changed_re = re.compile("[" + "".join(re.escape(ch) for ch in table) + "]")
+    same_length = all(len(nfkc) == 1 for nfkc in table.values())
+
+    parts: list[str] = []
+    nfkc_map: list[int] = []
+    pos = 0
+    for m in changed_re.finditer(text):
+        idx = m.start()
+        nfkc = table[m.group()]
+        parts.append(text[pos:idx])
+        parts.append(nfkc)
+        if not same_length:
+            nfkc_map.extend(range(pos, idx))
+            nfkc_map.extend([idx] * len(nfkc))
+        pos = idx + 1
+    parts.append(text[pos:])
+    if same_length:
+        return "".join(parts), range(len(text))
+    nfkc_map.extend(range(pos, len(text)))
+    return "".join(parts), nfkc_map
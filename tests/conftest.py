@@ -3,12 +3,20 @@ Configuração global do pytest para testes do rag-gpu-server.
 
 PR3 v2 - Hard Reset RAG Architecture
 
-Este arquivo configura o PYTHONPATH para que os imports funcionem corretamente.
+Este arquivo configura o PYTHONPATH para que os imports funcionem corretamente
+e define o fixture vllm_stub (servidor vLLM local compartilhado pelos testes
+dos clientes VLM/LLM).
 """
 
+import json
 import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
+import pytest
+
 # Adiciona o diretório src ao path para que os imports funcionem
 src_path = Path(__file__).parent.parent / "src"
 if str(src_path) not in sys.path:
@@ -18,3 +26,125 @@ if str(src_path) not in sys.path:
 root_path = Path(__file__).parent.parent
 if str(root_path) not in sys.path:
     sys.path.insert(0, str(root_path))
+
+
+# =============================================================================
+# Servidor vLLM stub (VLMClient / VLLMClient contra HTTP de verdade)
+# =============================================================================
+
+class _StubVLLM(ThreadingHTTPServer):
+    """
+    vLLM local em 127.0.0.1 (porta livre).
+
+    Cada POST /chat/completions consome o próximo item do roteiro, um dict
+    com content (str ou lista de deltas do stream), finish_reason, status e
+    tokens (default: número de deltas). Sem roteiro, responde
+    "porta <porta>" com o status do servidor. Registra os payloads, o total
+    de requests e quantos pedaços de cada stream foram enviados antes de o
+    cliente desconectar. GET /models responde com o status do servidor.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, script=(), delay=0.0, status=200):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.script = list(script)
+        self.delay = delay
+        self.status = status
+        self.payloads = []
+        self.requests = 0
+        self.chunks_sent = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def next_reply(self) -> dict:
+        if self.script:
+            return self.script.pop(0)
+        return {"content": f"porta {self.server_address[1]}", "status": self.status}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json(self.server.status, {"data": [{"id": "stub"}]})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.payloads.append(payload)
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+
+        reply = self.server.next_reply()
+        content = reply.get("content", "")
+        deltas = [content] if isinstance(content, str) else list(content)
+        status = reply.get("status", 200)
+        finish_reason = reply.get("finish_reason", "stop")
+        usage = {"completion_tokens": reply.get("tokens", len(deltas))}
+
+        if status != 200:
+            self._send_json(status, {"error": {"message": "".join(deltas)}})
+            return
+        if not payload.get("stream"):
+            self._send_json(200, {
+                "choices": [{
+                    "message": {"content": "".join(deltas)},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        sent = 0
+        try:
+            for i, delta in enumerate(deltas):
+                last = i == len(deltas) - 1
+                chunk = {"choices": [{
+                    "delta": {"content": delta},
+                    "finish_reason": finish_reason if last else None,
+                }]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                sent += 1
+                time.sleep(0.002)
+            tail = {"choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(tail)}\n\ndata: [DONE]\n\n".encode())
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.chunks_sent.append(sent)
+
+
+@pytest.fixture
+def vllm_stub():
+    """Fábrica de servidores stub: vllm_stub(script=..., delay=..., status=...)."""
+    servers = []
+
+    def start(script=(), **kwargs):
+        server = _StubVLLM(script, **kwargs)
+        threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True,
+        ).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: CanonicalText e PageMap (canonical_utils).
+
+Verifica:
+- Normalização e hash calculados uma vez, iguais às funções soltas
+- Objeto imutável
+- offset → página por bisect igual à varredura linear dentro das páginas
+- Separadores entre páginas pertencem à página anterior
+- offset → linha
+- AcordaoChunker com PageMap usa páginas exatas
+"""
+
+import random
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+import pytest
+
+from src.utils.canonical_utils import (
+    CanonicalText,
+    PageMap,
+    compute_canonical_hash,
+    normalize_canonical_text,
+)
+
+
+def _linear_page(offset, page_boundaries):
+    """Implementação anterior de AcordaoParser._page_for_offset."""
+    if not page_boundaries:
+        return 1
+    for i, (start, end) in enumerate(page_boundaries):
+        if start <= offset < end:
+            return i + 1
+    return len(page_boundaries)
+
+
+class TestCanonicalText:
+
+    def test_normalization_and_hash(self):
+        raw = "Art. 1º  \r\nTextó \n\n\n"
+        canonical = CanonicalText(raw)
+        assert canonical.text == normalize_canonical_text(raw)
+        assert canonical.sha256 == compute_canonical_hash(canonical.text)
+        assert not canonical.is_normalized
+        assert CanonicalText(canonical.text).is_normalized
+        assert canonical.matches(canonical.sha256)
+        assert not canonical.matches("")
+
+    def test_immutable(self):
+        canonical = CanonicalText("Art. 1º\n")
+        with pytest.raises(AttributeError):
+            canonical.text = "outro"
+
+    def test_line_for_offset(self):
+        canonical = CanonicalText("linha um\nlinha dois\n\nlinha quatro\n")
+        text = canonical.text
+        for offset in range(len(text)):
+            assert canonical.line_for_offset(offset) == text.count("\n", 0, offset) + 1
+
+
+class TestPageMap:
+
+    def test_matches_linear_scan_inside_pages(self):
+        rng = random.Random(39)
+        for _ in range(50):
+            boundaries, pos = [], 0
+            for _ in range(rng.randint(1, 12)):
+                if rng.random() < 0.15:
+                    boundaries.append((0, 0))  # página sem blocos
+                    continue
+                length = rng.randint(1, 300)
+                boundaries.append((pos, pos + length))
+                pos += length + rng.randint(0, 3)
+            pages = PageMap(boundaries)
+            for start, end in boundaries:
+                for offset in range(start, end):
+                    assert pages.page_for_offset(offset) == _linear_page(offset, boundaries)
+
+    def test_gaps_and_edges(self):
+        pages = PageMap([(0, 10), (0, 0), (12, 20)])
+        assert len(pages) == 3
+        assert pages.page_for_offset(10) == 1   # separador → página anterior
+        assert pages.page_for_offset(11) == 1
+        assert pages.page_for_offset(12) == 3
+        assert pages.page_for_offset(500) == 3
+        assert PageMap().page_for_offset(42) == 1
+
+    def test_acordao_chunker_exact_pages(self):
+        from src.extraction.acordao_chunker import AcordaoChunker, ParsedSection
+
+        text = "Parágrafo do relatório com texto corrido.\n\n" * 400
+        section = ParsedSection("relatorio", text, 0, len(text))
+        third = len(text) // 3
+        pages = PageMap([(0, third), (third, 2 * third), (2 * third, len(text))])
+
+        chunks = AcordaoChunker().chunk([section], "doc-1", "hash-1", {}, pages=pages)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.page_number == pages.page_for_offset(chunk.canonical_start)
+        assert chunks[-1].page_number == 3
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para os checkpoints de fase (CheckpointStore + pipeline).
+
+Verifica:
+- Chave muda com pdf_hash, pipeline_version, fase e config
+- Extração restaurada do checkpoint sem re-executar (imagens não persistidas)
+- Embeddings reaproveitados por texto; textos alterados são re-embeddados
+- Entrada corrompida = miss
+"""
+
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.config import config
+from src.extraction.vlm_models import PageData
+from src.ingestion.checkpoints import CheckpointStore
+from src.ingestion.models import IngestStatus, ProcessedChunk
+from src.ingestion.pipeline import IngestionPipeline, PipelineResult
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        from types import SimpleNamespace
+        self.calls.extend(texts)
+        return SimpleNamespace(
+            dense_embeddings=[[float(len(t))] for t in texts],
+            sparse_embeddings=[{len(t): 1.0} for t in texts],
+        )
+
+
+def _pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "checkpoint_enabled", True)
+    monkeypatch.setattr(config, "checkpoint_dir", str(tmp_path))
+    pipeline = IngestionPipeline()
+    pipeline._embedder = FakeEmbedder()
+    return pipeline
+
+
+def _result():
+    return PipelineResult(
+        status=IngestStatus.PROCESSING, document_id="LEI-1", document_hash="ab" * 32,
+    )
+
+
+def _chunk(span_id, text):
+    return ProcessedChunk(
+        node_id=f"leis:LEI-1#{span_id}", chunk_id=f"LEI-1#{span_id}", span_id=span_id,
+        parent_node_id="", device_type="article", chunk_level="article",
+        text=text, retrieval_text=text,
+        document_id="LEI-1", tipo_documento="LEI", numero="1", ano=2020,
+        article_number="1",
+    )
+
+
+class TestCheckpointStore:
+
+    def test_key_components(self):
+        base = CheckpointStore.make_key("h", "1.0", "extraction", {"dpi": 300})
+        assert base == CheckpointStore.make_key("h", "1.0", "extraction", {"dpi": 300})
+        assert base != CheckpointStore.make_key("h2", "1.0", "extraction", {"dpi": 300})
+        assert base != CheckpointStore.make_key("h", "1.1", "extraction", {"dpi": 300})
+        assert base != CheckpointStore.make_key("h", "1.0", "embedding", {"dpi": 300})
+        assert base != CheckpointStore.make_key("h", "1.0", "extraction", {"dpi": 150})
+
+    def test_corrupted_entry_is_miss(self, tmp_path):
+        store = CheckpointStore(cache_dir=str(tmp_path))
+        key = store.make_key("h", "1.0", "extraction")
+        store.save(key, {"ok": True})
+        with open(store._store.path(key), "wb") as f:
+            f.write(b"not a pickle")
+        assert store.load(key) is None
+
+
+class TestPipelineCheckpoints:
+
+    def test_extraction_restored_without_images(self, tmp_path, monkeypatch):
+        pipeline = _pipeline(tmp_path, monkeypatch)
+        page = PageData(page_number=1, image_bytes=b"\x89PNG...", text="Art. 1º",
+                        width=595.0, height=842.0, char_start=0, char_end=7)
+        calls = []
+
+        def extract():
+            calls.append(1)
+            return [page], "Art. 1º\n"
+
+        first = _result()
+        pages, text = pipeline._extract_checkpointed("pymupdf", first, extract)
+        assert pages[0].image_bytes == b"\x89PNG..."
+        assert first.checkpoint_hits == []
+
+        second = _result()
+        pages, text = pipeline._extract_checkpointed("pymupdf", second, extract)
+        assert len(calls) == 1
+        assert text == "Art. 1º\n"
+        assert pages[0].text == "Art. 1º" and pages[0].image_bytes == b""
+        assert second.checkpoint_hits == ["extraction"]
+
+        # Outra fonte de extração não compartilha o checkpoint
+        pipeline._extract_checkpointed("vlm_ocr", _result(), extract)
+        assert len(calls) == 2
+
+        # Outro perfil PyMuPDF (spans completos) também não
+        monkeypatch.setattr(config, "pymupdf_profile", "full")
+        pipeline._extract_checkpointed("pymupdf", _result(), extract)
+        assert len(calls) == 3
+
+    def test_embeddings_reused_by_text(self, tmp_path, monkeypatch):
+        pipeline = _pipeline(tmp_path, monkeypatch)
+        chunks = [_chunk("ART-001", "Art. 1º Um."), _chunk("ART-002", "Art. 2º Dois.")]
+        assert pipeline._embed_chunks(chunks, _result()) == 0
+        assert len(pipeline._embedder.calls) == 2
+
+        retry = [_chunk("ART-001", "Art. 1º Um."), _chunk("ART-002", "Art. 2º Alterado.")]
+        result = _result()
+        assert pipeline._embed_chunks(retry, result) == 1
+        assert pipeline._embedder.calls[2:] == ["Art. 2º Alterado."]
+        assert retry[0].dense_vector == chunks[0].dense_vector
+        assert retry[0].sparse_vector == chunks[0].sparse_vector
+        assert result.checkpoint_hits == []
+
+        again = _result()
+        pipeline._embed_chunks(
+            [_chunk("ART-001", "Art. 1º Um."), _chunk("ART-002", "Art. 2º Alterado.")], again,
+        )
+        assert len(pipeline._embedder.calls) == 3
+        assert again.checkpoint_hits == ["embedding"]
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        pipeline = _pipeline(tmp_path, monkeypatch)
+        monkeypatch.setattr(config, "checkpoint_enabled", False)
+        chunks = [_chunk("ART-001", "Art. 1º Um.")]
+        pipeline._embed_chunks(chunks, _result())
+        pipeline._embed_chunks(chunks, _result())
+        assert len(pipeline._embedder.calls) == 2
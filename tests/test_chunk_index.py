@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do ChunkIndex (índice de chunks por documento) e do seu uso na
+consolidação @FULL e no manifesto.
+"""
+
+import random
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.ingestion.chunk_index import ChunkIndex
+from src.ingestion.consolidation import (
+    compute_child_offsets,
+    generate_consolidated_chunks,
+    should_consolidate,
+)
+from src.ingestion.models import IngestRequest, ProcessedChunk
+from src.ingestion.pipeline import IngestionPipeline
+
+
+def _chunk(span_id, text, parent="", start=-1, end=-1, device_type="article"):
+    return ProcessedChunk(
+        node_id=f"leis:LEI-1#{span_id}", chunk_id=f"LEI-1#{span_id}", span_id=span_id,
+        parent_node_id=f"leis:LEI-1#{parent}" if parent else "",
+        device_type=device_type, chunk_level="article" if device_type == "article" else "device",
+        text=text, document_id="LEI-1", tipo_documento="LEI", numero="1", ano=2020,
+        canonical_start=start, canonical_end=end,
+    )
+
+
+def _law(n_articles):
+    chunks, pos = [], 0
+    for a in range(1, n_articles + 1):
+        art = f"ART-{a:03d}"
+        text = f"Art. {a}º Caput do artigo {a}."
+        chunks.append(_chunk(art, text, start=pos, end=pos + len(text)))
+        pos += len(text) + 1
+        for i in ["I", "II", "III"][: a % 4]:
+            text = f"{i} - inciso {i} do artigo {a};"
+            chunks.append(_chunk(f"INC-{a:03d}-{i}", text, parent=art,
+                                 start=pos, end=pos + len(text), device_type="inciso"))
+            pos += len(text) + 1
+    return chunks
+
+
+class TestChunkIndex:
+
+    def test_lookups(self):
+        chunks = _law(5)
+        index = ChunkIndex(chunks)
+        assert index.by_span("ART-003").text.startswith("Art. 3º")
+        assert index.by_id("leis:LEI-1#INC-002-II").span_id == "INC-002-II"
+        assert [c.span_id for c in index.children("leis:LEI-1#ART-003")] == [
+            "INC-003-I", "INC-003-II", "INC-003-III",
+        ]
+        assert index.children("leis:LEI-1#ART-004") == []
+
+    def test_overlapping_and_coverage_match_brute_force(self):
+        rng = random.Random(1)
+        chunks = [
+            _chunk(f"X-{i}", "t", start=s, end=s + rng.randint(1, 60))
+            for i, s in enumerate(rng.randint(0, 500) for _ in range(200))
+        ]
+        index = ChunkIndex(chunks)
+        for _ in range(200):
+            a = rng.randint(0, 560)
+            b = a + rng.randint(1, 80)
+            expected = {c.span_id for c in chunks if c.canonical_start < b and c.canonical_end > a}
+            assert {c.span_id for c in index.overlapping(a, b)} == expected
+
+        covered = set()
+        for c in chunks:
+            covered.update(range(c.canonical_start, c.canonical_end))
+        assert index.covered_chars() == len(covered)
+
+    def test_manifest_coverage(self):
+        chunks = _law(10)
+        canonical = "x" * (chunks[-1].canonical_end + 10)
+        manifest = IngestionPipeline._build_manifest(chunks, canonical, "h", "LEI-1")
+        assert manifest["offsets_coverage"]["covered_chars"] == sum(
+            c.canonical_end - c.canonical_start for c in chunks
+        )
+
+
+class TestConsolidationWithIndex:
+
+    def test_children_same_as_scan(self):
+        chunks = _law(12)
+        index = ChunkIndex(chunks)
+        for article in (c for c in chunks if c.device_type == "article"):
+            assert should_consolidate(article.node_id, chunks, index) == \
+                should_consolidate(article.node_id, chunks)
+
+    def test_generate(self):
+        request = IngestRequest(document_id="LEI-1", tipo_documento="LEI", numero="1", ano=2020)
+        full = generate_consolidated_chunks(_law(12), request)
+        assert [c.span_id for c in full] == ["ART-002", "ART-003", "ART-006", "ART-007", "ART-010", "ART-011"]
+        for c in full:
+            for off, node_id in zip(c.child_offsets, c.child_node_ids):
+                assert off["node_id"] == node_id
+                assert c.text[off["start"]:off["end"]].endswith(";")
+
+    def test_child_offsets_skip_caput(self):
+        caput = _chunk("ART-001", "Art. 1º Aplica-se o inciso I - a;")
+        child = _chunk("INC-001-I", "I - a;", parent="ART-001", device_type="inciso")
+        text = caput.text + "\n" + child.text
+        offsets = compute_child_offsets(text, [child], search_start=len(caput.text))
+        assert offsets[0]["start"] == len(caput.text) + 1
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para re-ingestão incremental (ChunkRegistry + pipeline).
+
+Verifica:
+- Classificação new/changed/metadata/unchanged/removed por node_id
+- Offsets/hash deslocados não contam como mudança: vão em positions
+- Vetores da versão anterior reaproveitados para textos inalterados
+- Apenas chunks new/changed/metadata retornados em modo incremental
+- Base ausente ou divergente (sink anterior falhou) cai para ingestão completa
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.config import config
+from src.ingestion.chunk_registry import ChunkRegistry
+from src.ingestion.models import IngestRequest, IngestStatus, ProcessedChunk
+from src.ingestion.pipeline import IngestionPipeline, PipelineResult
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        from types import SimpleNamespace
+        self.calls.extend(texts)
+        return SimpleNamespace(
+            dense_embeddings=[[float(len(t))] for t in texts],
+            sparse_embeddings=[{len(t): 1.0} for t in texts],
+        )
+
+
+def _chunk(span_id, text, start=0):
+    return ProcessedChunk(
+        node_id=f"leis:LEI-1#{span_id}", chunk_id=f"LEI-1#{span_id}", span_id=span_id,
+        device_type="article", chunk_level="article",
+        text=text, retrieval_text=text,
+        document_id="LEI-1", tipo_documento="LEI", numero="1", ano=2020,
+        canonical_start=start, canonical_end=start + len(text),
+    )
+
+
+def _version(texts, shift=0):
+    chunks, pos = [], 0
+    for i, text in enumerate(texts, start=1):
+        chunks.append(_chunk(f"ART-{i:03d}", text, start=pos + shift))
+        pos += len(text) + 1
+    return chunks
+
+
+def _request(**kwargs):
+    return IngestRequest(document_id="LEI-1", tipo_documento="LEI", numero="1", ano=2020, **kwargs)
+
+
+def _incremental(base_run_id):
+    return _request(incremental=True, incremental_base_run_id=base_run_id)
+
+
+def _result(run_id):
+    return PipelineResult(
+        status=IngestStatus.PROCESSING, document_id="LEI-1", ingest_run_id=run_id,
+    )
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "checkpoint_enabled", False)
+    monkeypatch.setattr(config, "chunk_registry_enabled", True)
+    monkeypatch.setattr(config, "chunk_registry_dir", str(tmp_path))
+    p = IngestionPipeline()
+    p._embedder = FakeEmbedder()
+    return p
+
+
+def _ingest(pipeline, chunks, request, run_id):
+    result = _result(run_id)
+    previous = pipeline._load_previous_version(request)
+    pipeline._embed_chunks(chunks, result, previous_vectors=pipeline._previous_vectors(previous))
+    return pipeline._finalize_chunks(chunks, request, result, previous), result
+
+
+class TestChunkDiff:
+
+    def test_categories(self, tmp_path):
+        registry = ChunkRegistry(cache_dir=str(tmp_path))
+        old = _version(["Art. 1º Um.", "Art. 2º Dois.", "Art. 3º Três."])
+        registry.save("LEI-1", old, "run-1", "pdf", "canon", "bge")
+
+        new = [
+            _chunk("ART-001", "Art. 1º Um.", start=0),             # unchanged
+            _chunk("ART-002", "Art. 2º Dois (redação nova).", 12),  # changed
+            _chunk("ART-004", "Art. 4º Quatro.", 60),               # new
+        ]
+        diff = ChunkRegistry.diff(new, registry.load("LEI-1"))
+        assert diff.base_ingest_run_id == "run-1"
+        assert diff.unchanged == ["leis:LEI-1#ART-001"]
+        assert diff.changed == ["leis:LEI-1#ART-002"]
+        assert diff.new == ["leis:LEI-1#ART-004"]
+        assert diff.removed == ["leis:LEI-1#ART-003"]
+        assert diff.metadata == []
+
+    def test_shifted_offsets_are_positions_only(self, tmp_path):
+        registry = ChunkRegistry(cache_dir=str(tmp_path))
+        registry.save("LEI-1", _version(["Art. 1º Um."]), "run-1", "pdf", "canon", "bge")
+        shifted = _version(["Art. 1º Um."], shift=5)
+        for chunk in shifted:
+            chunk.canonical_hash = "canon-2"
+        diff = ChunkRegistry.diff(shifted, registry.load("LEI-1"), "canon-2")
+        assert diff.unchanged == ["leis:LEI-1#ART-001"]
+        assert diff.upsert == set()
+        assert diff.positions["leis:LEI-1#ART-001"]["canonical_start"] == 5
+        assert (diff.previous_canonical_hash, diff.canonical_hash) == ("canon", "canon-2")
+
+    def test_metadata_change_upserts(self, tmp_path):
+        registry = ChunkRegistry(cache_dir=str(tmp_path))
+        registry.save("LEI-1", _version(["Art. 1º Um."]), "run-1", "pdf", "canon", "bge")
+        relabeled = _version(["Art. 1º Um."])
+        relabeled[0].origin_type = "external"
+        diff = ChunkRegistry.diff(relabeled, registry.load("LEI-1"))
+        assert diff.metadata == ["leis:LEI-1#ART-001"]
+        assert diff.upsert == {"leis:LEI-1#ART-001"}
+
+
+class TestIncrementalPipeline:
+
+    def test_amendment_embeds_only_changed(self, pipeline):
+        texts = [f"Art. {i}º Texto do artigo {i}." for i in range(1, 51)]
+        chunks, first = _ingest(pipeline, _version(texts), _request(), "run-1")
+        assert len(chunks) == 50
+        assert first.incremental == {}
+        assert len(pipeline._embedder.calls) == 50
+
+        amended = list(texts)
+        amended[9] = "Art. 10. Texto do artigo 10 com redação dada pela Lei nova."
+        upsert, second = _ingest(
+            pipeline, _version(amended), _incremental("run-1"), "run-2",
+        )
+        # Só o artigo alterado é embeddado e regravado
+        assert pipeline._embedder.calls[50:] == [amended[9]]
+        assert second.incremental["mode"] == "incremental"
+        assert second.incremental["changed"] == ["leis:LEI-1#ART-010"]
+        assert len(second.incremental["unchanged"]) == 49
+        # Artigos após o alterado só têm offsets deslocados → update parcial
+        assert len(second.incremental["positions"]) == 40
+        assert [c.node_id for c in upsert] == ["leis:LEI-1#ART-010"]
+        assert all(c.dense_vector is not None for c in upsert)
+
+    def test_early_insertion_leaves_rest_unchanged(self, pipeline):
+        texts = [f"Art. {i}º Texto do artigo {i}." for i in range(1, 31)]
+        _ingest(pipeline, _version(texts), _request(), "run-1")
+
+        # Artigo novo inserido logo no início: desloca tudo que vem depois
+        inserted = "Art. 1º-A. Dispositivo incluído pela Lei nova."
+        chunks, pos = [], 0
+        for span_id, text in [("ART-001", texts[0]), ("ART-001-A", inserted)] + [
+            (f"ART-{i:03d}", texts[i - 1]) for i in range(2, 31)
+        ]:
+            chunk = _chunk(span_id, text, start=pos)
+            chunk.canonical_hash = "canon-2"
+            chunks.append(chunk)
+            pos += len(text) + 1
+
+        upsert, result = _ingest(pipeline, chunks, _incremental("run-1"), "run-2")
+        assert [c.node_id for c in upsert] == ["leis:LEI-1#ART-001-A"]
+        assert result.incremental["new"] == ["leis:LEI-1#ART-001-A"]
+        assert len(result.incremental["unchanged"]) == 30
+        assert result.incremental["changed"] == result.incremental["metadata"] == []
+        assert len(result.incremental["positions"]) == 29
+        assert pipeline._embedder.calls[30:] == [inserted]
+
+    def test_base_mismatch_falls_back_to_full(self, pipeline):
+        texts = ["Art. 1º Um.", "Art. 2º Dois."]
+        _ingest(pipeline, _version(texts), _request(), "run-1")
+        chunks, result = _ingest(
+            pipeline, _version(texts),
+            _request(incremental=True, incremental_base_run_id="run-0"), "run-2",
+        )
+        assert len(chunks) == 2
+        assert result.incremental["mode"] == "full"
+
+    def test_missing_base_falls_back_to_full(self, pipeline):
+        texts = ["Art. 1º Um.", "Art. 2º Dois."]
+        _ingest(pipeline, _version(texts), _request(), "run-1")
+        chunks, result = _ingest(pipeline, _version(texts), _request(incremental=True), "run-2")
+        assert len(chunks) == 2
+        assert result.incremental["mode"] == "full"
+
+    def test_no_previous_version(self, pipeline):
+        chunks, result = _ingest(
+            pipeline, _version(["Art. 1º Um."]), _request(incremental=True), "run-1",
+        )
+        assert len(chunks) == 1
+        assert result.incremental == {"mode": "full", "reason": "sem versão registrada"}
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: extração de citações em lote (extract_citations_batch).
+
+O lote (sequencial ou via pool de processos) deve produzir exatamente o
+mesmo resultado de extract_citations_from_chunk() chamado por chunk.
+"""
+
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.chunking.citation_extractor import (
+    extract_citations_batch,
+    extract_citations_from_chunk,
+)
+
+TEXTS = [
+    "Art. 1º Esta Instrução Normativa dispõe sobre o procedimento.",
+    "conforme art. 9º da Lei 14.133/2021 e arts. 28, 29 e 33 da LC 101/2000",
+    "nos termos do Decreto-Lei 200/67, art. 5, inciso II, alínea 'a'",
+    "observado o disposto nos arts. 62 a 70 desta Lei e no art. 37 da CF/88",
+    "Acórdão 2450/2025 - Plenário; IN SEGES 58/2022; MP 1.047",
+    "",
+    "§ 1º O disposto no art. 3º aplica-se ao art. 3º.",
+]
+
+CHUNKS = [
+    {
+        "text": text,
+        "chunk_node_id": f"leis:IN-65-2021#ART-{i + 1:03d}",
+        "parent_chunk_id": "leis:IN-65-2021#ART-001" if i % 2 else None,
+    }
+    for i, text in enumerate(TEXTS)
+]
+
+
+def _expected():
+    return [
+        extract_citations_from_chunk(
+            text=c["text"],
+            document_id="IN-65-2021",
+            chunk_node_id=c["chunk_node_id"],
+            parent_chunk_id=c["parent_chunk_id"],
+            document_type="IN",
+        )
+        for c in CHUNKS
+    ]
+
+
+class TestCitationBatch:
+
+    def test_sequential_matches_per_chunk(self):
+        result = extract_citations_batch(CHUNKS, document_id="IN-65-2021", document_type="IN")
+        assert result == _expected()
+        assert any(result)
+
+    def test_pool_matches_per_chunk(self):
+        result = extract_citations_batch(
+            CHUNKS, document_id="IN-65-2021", document_type="IN",
+            workers=2, parallel_min_chunks=1,
+        )
+        assert result == _expected()
+
+    def test_custom_known_documents_not_shared(self):
+        plain = extract_citations_from_chunk("art. 5 da Lei 8.666/93", document_id="X")
+        custom = extract_citations_from_chunk(
+            "art. 5 da Lei 8.666/93", document_id="X", known_documents={"foo": "LEI-1-2000"},
+        )
+        assert plain == custom
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: pré-filtro por âncoras do CitationExtractor.
+
+Com ou sem pré-filtro, extract() deve devolver exatamente as mesmas
+referências — inclusive com caracteres que o IGNORECASE equipara a ASCII.
+"""
+
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.chunking.citation_extractor import CitationExtractor, NormativeType
+
+TEXTS = [
+    "Art. 1º Esta Instrução Normativa dispõe sobre o procedimento.",
+    "conforme art. 9º da Lei 14.133/2021 e arts. 28, 29 e 33 da LC 101/2000",
+    "nos termos do Decreto-Lei 200/67, art. 5, inciso II, alínea 'a'",
+    "observado o disposto nos arts. 62 a 70 desta Lei e no art. 37 da CF/88",
+    "ACÓRDÃO 2450/2025 - Plenário; IN SEGES 58/2022; MP\n1.047; ec 95",
+    "Medida Provisória nº 1.047 e Emenda Constitucional 95 e Resolução 3",
+    "texto sem citação alguma, apenas descrição do procedimento",
+    "Reſolução 5, ıN 7 e LEİ 8.666 — ARTIGO 5",
+    "Portaria SEGES nº 8.678, de 2021, e Decreto 10.024/2019",
+]
+
+
+class TestCitationPrefilter:
+
+    def test_same_references_as_full_scan(self):
+        fast = CitationExtractor(current_document_id="IN-65-2021")
+        full = CitationExtractor(current_document_id="IN-65-2021", use_prefilter=False)
+        for text in TEXTS:
+            assert fast.extract(text) == full.extract(text), text
+
+    def test_active_families(self):
+        extractor = CitationExtractor()
+        families, has_articles = extractor._active_families("sem citação alguma")
+        assert families == set() and not has_articles
+
+        families, has_articles = extractor._active_families("art. 5 da Lei 8.666/93")
+        assert has_articles
+        assert families == {NormativeType.LEI, NormativeType.LEI_COMPLEMENTAR}
+
+    def test_casefold_extra_characters(self):
+        # "ſ" casa com "s" sob IGNORECASE, mas "ſ".lower() não contém "s"
+        families, _ = CitationExtractor()._active_families("Reſolução 5")
+        assert NormativeType.RESOLUCAO in families
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: EndpointPool (várias réplicas vLLM) e failover dos clientes.
+
+Verifica:
+- Seleção least-outstanding-requests (empate → menos requests no total)
+- Ejeção após falhas seguidas, sonda única após o cool-off, reintegração
+- Erros 4xx / cancelamento não ejetam
+- VLMClient distribui OCR concorrente entre dois servidores stub
+- VLMClient e VLLMClient fazem failover de um endpoint fora do ar
+- health_check consulta todas as réplicas do pool
+- base_url explícito tem precedência sobre VLLM_BASE_URLS
+- reset_client fecha os clientes substituídos
+"""
+
+import asyncio
+import socket
+import time
+
+import httpx
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.extraction.vlm_client import VLMClient
+from src.llm.endpoint_pool import EndpointPool, parse_endpoint_urls
+from src.llm.vllm_client import LLMConfig, VLLMClient
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://stub/v1/chat/completions")
+    return httpx.HTTPStatusError(
+        "erro", request=request, response=httpx.Response(status, request=request),
+    )
+
+
+class TestEndpointPool:
+
+    def test_parse_urls(self):
+        assert parse_endpoint_urls(" http://a/v1/, http://b/v1 ") == ["http://a/v1", "http://b/v1"]
+        assert parse_endpoint_urls("", "http://a/v1") == ["http://a/v1"]
+        with pytest.raises(ValueError):
+            EndpointPool([])
+
+    def test_least_outstanding(self):
+        pool = EndpointPool(["a", "b", "c"])
+        first = [pool.acquire() for _ in range(3)]
+        assert sorted(e.url for e in first) == ["a", "b", "c"]
+
+        pool.release(first[1])                       # b fica livre
+        assert pool.acquire().url == "b"
+        pool.release(first[0])
+        pool.release(first[2])
+        # a e c com 0 em voo; a tem menos requests no total que b
+        assert pool.acquire().url in {"a", "c"}
+
+    def test_eject_probe_and_reinstate(self):
+        pool = EndpointPool(["a", "b"], max_failures=2, cooloff_seconds=0.05)
+        a = pool.endpoints[0]
+        for _ in range(2):
+            a.in_flight += 1
+            a.requests += 1
+            pool.release(a, httpx.ConnectError("recusada"))
+        assert pool.stats()[0]["ejected"]
+        assert all(pool.acquire().url == "b" for _ in range(5))
+
+        time.sleep(0.06)
+        probe = pool.acquire()
+        assert probe.url == "a"                      # sonda após o cool-off
+        assert pool.acquire().url == "b"             # uma sonda por vez
+        pool.release(probe)
+        assert a.failures == 0 and not pool.stats()[0]["ejected"]
+
+    def test_probe_failure_ejects_again(self):
+        pool = EndpointPool(["a", "b"], max_failures=1, cooloff_seconds=0.05)
+        a = pool.endpoints[0]
+        a.in_flight, a.requests = 1, 1
+        pool.release(a, _status_error(503))
+        time.sleep(0.06)
+        while (probe := pool.acquire()).url != "a":
+            pass
+        pool.release(probe, httpx.ReadTimeout("timeout"))
+        assert pool.stats()[0]["ejected"]
+
+    def test_client_errors_do_not_eject(self):
+        pool = EndpointPool(["a"], max_failures=1)
+        for error in (_status_error(400), ValueError("json"), asyncio.CancelledError()):
+            pool.release(pool.acquire(), error)
+        assert pool.endpoints[0].failures == 0
+        assert pool.endpoints[0].in_flight == 0
+
+    def test_all_ejected_still_serves(self):
+        pool = EndpointPool(["a", "b"], max_failures=1, cooloff_seconds=60)
+        for endpoint in pool.endpoints:
+            endpoint.in_flight = 1
+            pool.release(endpoint, httpx.ConnectError("recusada"))
+        assert pool.acquire().url == "a"             # ejetado há mais tempo
+
+
+# =============================================================================
+# Clientes contra servidores stub (vllm_stub, conftest.py)
+# =============================================================================
+
+def _dead_url() -> str:
+    """URL de uma porta local sem servidor (conexão recusada)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+class TestClientsWithPool:
+
+    def test_vlm_ocr_spread_across_replicas(self, vllm_stub):
+        first, second = vllm_stub(delay=0.05), vllm_stub(delay=0.05)
+
+        async def run():
+            async with VLMClient(
+                base_urls=[first.base_url, second.base_url], model="stub",
+            ) as client:
+                await asyncio.gather(*(client.ocr_page("aW1n") for _ in range(8)))
+                return client.endpoints.stats()
+
+        stats = asyncio.run(run())
+        assert first.requests == second.requests == 4
+        assert all(s["in_flight"] == 0 for s in stats)
+
+    def test_vlm_failover_from_dead_endpoint(self, vllm_stub):
+        live = vllm_stub()
+
+        async def run():
+            async with VLMClient(
+                base_urls=[_dead_url(), live.base_url], model="stub", retry_delay=0.0,
+            ) as client:
+                texts = [await client.ocr_page("aW1n") for _ in range(4)]
+                return texts, client.endpoints.stats()
+
+        texts, stats = asyncio.run(run())
+        assert all(text.startswith("porta") for text in texts)
+        assert live.requests == 4
+        assert stats[0]["requests"] <= 2            # ejetado após max_failures
+
+    def test_vllm_client_failover_and_5xx(self, vllm_stub):
+        broken, live = vllm_stub(status=503), vllm_stub()
+        config = LLMConfig(
+            base_urls=[broken.base_url, _dead_url(), live.base_url],
+            retry_delay=0.0, max_retries=3,
+        )
+        with VLLMClient(config=config) as client:
+            answers = [client.chat([{"role": "user", "content": "oi"}]) for _ in range(6)]
+            stats = client.endpoints.stats()
+
+        assert all(answer.startswith("porta") for answer in answers)
+        assert live.requests == 6
+        assert stats[0]["ejected"] and stats[1]["ejected"]
+
+    def test_health_check_probes_every_endpoint(self, vllm_stub):
+        live, dead = vllm_stub(), _dead_url()
+
+        async def run():
+            async with VLMClient(base_urls=[dead, live.base_url], model="stub") as client:
+                return await client.endpoint_health(), await client.health_check()
+
+        health, healthy = asyncio.run(run())
+        assert health == {dead: False, live.base_url: True} and healthy
+
+        with VLLMClient(config=LLMConfig(base_urls=[live.base_url, dead])) as client:
+            assert client.endpoint_health() == {live.base_url: True, dead: False}
+            assert client.health_check()
+        with VLLMClient(config=LLMConfig(base_urls=[dead])) as client:
+            assert not client.health_check()
+
+    def test_explicit_base_url_wins_over_env(self, monkeypatch):
+        monkeypatch.setenv("VLLM_BASE_URLS", "http://a/v1,http://b/v1")
+        assert LLMConfig().base_urls == ["http://a/v1", "http://b/v1"]
+        assert LLMConfig(base_url="http://ollama/v1").base_urls == []
+        with VLLMClient(base_url="http://x/v1") as client:
+            assert client.endpoints.urls == ["http://x/v1"]
+
+    def test_reset_client_closes_replaced(self):
+        client = VLMClient(base_urls=["http://a/v1", "http://b/v1"], model="stub")
+        replaced = list(client._clients.values())
+        client.reset_client()
+        assert all(c.is_closed for c in replaced)
+        assert not any(c.is_closed for c in client._clients.values())
+
+        async def in_loop():
+            current = list(client._clients.values())
+            client.reset_client()
+            await asyncio.sleep(0)
+            return current
+
+        assert all(c.is_closed for c in asyncio.run(in_loop()))
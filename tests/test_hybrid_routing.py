@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o modo híbrido nativo/OCR por página.
+
+Verifica:
+- assess_native_page: nativa boa, escaneada, corrompida, em branco
+- hybrid_document: só páginas escaneadas vão ao OCR, offsets consistentes
+"""
+
+import asyncio
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.chunking.canonical_offsets import normalize_canonical_text
+from src.extraction.page_routing import assess_native_page
+from src.extraction.vlm_models import PageData
+
+
+def _page(text="", image_coverage=0.0):
+    return PageData(
+        page_number=1, image_bytes=b"", text=text,
+        width=595.0, height=842.0, image_coverage=image_coverage,
+    )
+
+
+NATIVE_TEXT = (
+    "Art. 1º Esta Lei estabelece normas gerais de licitação e contratação "
+    "para as Administrações Públicas diretas, autárquicas e fundacionais.\n"
+) * 5
+
+
+class TestAssessNativePage:
+
+    def test_good_native_page(self):
+        assert not assess_native_page(_page(NATIVE_TEXT)).needs_ocr
+
+    def test_scanned_page(self):
+        quality = assess_native_page(_page("", image_coverage=0.95))
+        assert quality.needs_ocr
+        assert "escaneada" in quality.reason
+
+    def test_scanned_page_with_native_header(self):
+        quality = assess_native_page(_page("Diário Oficial da União - Seção 1", 0.9))
+        assert quality.needs_ocr
+
+    def test_garbled_text(self):
+        garbled = "�� " * 40
+        quality = assess_native_page(_page(garbled))
+        assert quality.needs_ocr
+        assert "corrompido" in quality.reason
+
+    def test_blank_page_stays_native(self):
+        assert not assess_native_page(_page("")).needs_ocr
+
+    def test_short_native_page_stays_native(self):
+        assert not assess_native_page(_page("Brasília, 1º de abril de 2021.")).needs_ocr
+
+
+from src.extraction.pymupdf_extractor import PyMuPDFExtractor
+from src.extraction.vlm_service import VLMExtractionService
+
+
+def _make_hybrid_pdf() -> bytes:
+    """Página 1 e 3 nativas; página 2 é só uma imagem (escaneada)."""
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Art. 1º Texto nativo da primeira página.")
+    page = doc.new_page()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 60, 80), 0)
+    pix.clear_with(200)
+    page.insert_image(page.rect, pixmap=pix)
+    page = doc.new_page()
+    page.insert_text((72, 72), "Art. 3º Texto nativo da terceira página.")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class FakeOCRClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def ocr_page(self, image_base64, image_mime="image/png"):
+        self.calls += 1
+        return "Art. 2º Texto OCR da página escaneada,\ncom duas linhas.  \n\n§ 1º Parágrafo."
+
+
+class TestHybridDocument:
+
+    def _run(self):
+        client = FakeOCRClient()
+        service = VLMExtractionService(
+            vlm_client=client, pymupdf_extractor=PyMuPDFExtractor(dpi=36),
+        )
+        pages, text = asyncio.run(service.hybrid_document(_make_hybrid_pdf(), "TEST"))
+        return client, pages, text
+
+    def test_only_scanned_page_is_ocrd(self):
+        client, pages, _ = self._run()
+        assert client.calls == 1
+        assert [p.text_source for p in pages] == ["native", "ocr", "native"]
+        assert pages[0].blocks[0].lines  # nativa mantém spans PyMuPDF
+
+    def test_offsets_consistent(self):
+        _, pages, text = self._run()
+        assert text == normalize_canonical_text(text)
+        assert "Art. 2º Texto OCR" in text
+        for page in pages:
+            assert text[page.char_start:page.char_end] == page.text
+            for block in page.blocks:
+                assert text[block.char_start:block.char_end] == block.text
+        assert pages[1].char_start == pages[0].char_end + 1
+        assert pages[2].char_start == pages[1].char_end + 1
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para ImagePolicy (imagens de página compactas para o VLM).
+
+Verifica:
+- Orçamento de pixels reduz o DPI efetivo
+- Codificação JPEG/WebP/cinza com MIME correto
+- Base64 gerado sob demanda e imagem liberada após o OCR
+- Pipeline: imagens mantidas até o snapshot de inspeção (com o MIME da página)
+"""
+
+import asyncio
+import base64
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+fitz = pytest.importorskip("fitz")
+
+from src.extraction.pymupdf_extractor import PyMuPDFExtractor
+from src.extraction.vlm_models import ImagePolicy, PageData
+from src.extraction.vlm_service import VLMExtractionService
+
+
+def _make_pdf(total_pages: int = 2) -> bytes:
+    doc = fitz.open()
+    for i in range(total_pages):
+        page = doc.new_page()  # A4-ish: 595 x 842 pts
+        page.insert_text((72, 72), f"Art. {i + 1}º Texto.")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestImagePolicy:
+
+    def test_invalid_format_rejected(self):
+        with pytest.raises(ValueError):
+            ImagePolicy(image_format="gif")
+
+    def test_positional_fields(self):
+        policy = ImagePolicy(0, True, "jpeg", 70)
+        assert (policy.grayscale, policy.image_format, policy.quality) == (True, "jpeg", 70)
+
+    def test_max_pixels_caps_resolution(self):
+        policy = ImagePolicy(max_pixels=500_000)
+        pages, _ = PyMuPDFExtractor(dpi=300, image_policy=policy).extract_pages(_make_pdf(1))
+        page = pages[0]
+        assert page.img_width * page.img_height <= 500_000 * 1.01
+        # Sem limite, 300 DPI dariam ~8.7M pixels
+        assert page.img_width < 595 * 300 / 72
+
+    def test_text_and_offsets_independent_of_policy(self):
+        pdf = _make_pdf()
+        _, text_png = PyMuPDFExtractor(dpi=72).extract_pages(pdf)
+        _, text_jpg = PyMuPDFExtractor(
+            dpi=72, image_policy=ImagePolicy(image_format="jpeg", grayscale=True),
+        ).extract_pages(pdf)
+        assert text_png == text_jpg
+
+    @pytest.mark.parametrize("image_format,magic,mime", [
+        ("png", b"\x89PNG", "image/png"),
+        ("jpeg", b"\xff\xd8", "image/jpeg"),
+        ("webp", b"RIFF", "image/webp"),
+    ])
+    def test_encoding(self, image_format, magic, mime):
+        policy = ImagePolicy(image_format=image_format, grayscale=True)
+        pages, _ = PyMuPDFExtractor(dpi=72, image_policy=policy).extract_pages(_make_pdf(1))
+        page = pages[0]
+        assert page.image_bytes.startswith(magic)
+        assert page.image_mime == mime
+        assert base64.b64decode(page.image_base64) == page.image_bytes
+
+
+class TestLazyBase64AndRelease:
+
+    def test_base64_not_stored(self):
+        page = PageData(page_number=1, image_bytes=b"abc", text="", width=1, height=1)
+        assert page.image_base64 == base64.b64encode(b"abc").decode("ascii")
+        page.release_image()
+        assert page.image_bytes == b""
+        assert page.image_base64 == ""
+
+    def test_images_released_after_ocr(self):
+        class FakeClient:
+            async def ocr_page(self, image_base64, image_mime="image/png"):
+                assert image_base64
+                return "Art. 1º Texto."
+
+        service = VLMExtractionService(
+            vlm_client=FakeClient(),
+            pymupdf_extractor=PyMuPDFExtractor(dpi=36),
+        )
+        pages, _ = asyncio.run(service.ocr_document(_make_pdf(), "TEST"))
+        assert all(p.image_bytes == b"" for p in pages)
+
+        service.release_images = False
+        pages, _ = asyncio.run(service.ocr_document(_make_pdf(), "TEST"))
+        assert all(p.image_bytes for p in pages)
+
+    def test_pipeline_keeps_images_for_snapshot(self, monkeypatch):
+        from src.config import config
+        from src.ingestion.pipeline import IngestionPipeline
+        from src.inspection.models import PyMuPDFPageResult
+
+        assert IngestionPipeline._make_vlm_service().release_images is False
+        assert PyMuPDFPageResult(page_number=1, width=1, height=1).image_mime == "image/png"
+
+        pages = [PageData(page_number=1, image_bytes=b"abc", text="", width=1, height=1,
+                          image_format="webp")]
+        assert pages[0].image_mime == "image/webp"
+        monkeypatch.setattr(config, "vlm_release_images", False)
+        IngestionPipeline._release_page_images(pages)
+        assert pages[0].image_bytes == b"abc"
+        monkeypatch.setattr(config, "vlm_release_images", True)
+        IngestionPipeline._release_page_images(pages)
+        assert pages[0].image_bytes == b""
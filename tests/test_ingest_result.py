@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: GET /ingest/result (resultado completo, paginado, NDJSON, vetores binários).
+
+O resultado é gravado pelo caminho real do router (_set_task_result) num
+SQLiteTaskStore temporário; as requisições passam pelo TestClient.
+
+Verifica:
+- Sem parâmetros: mesmo formato de IngestResponse, vetores inline
+- Paginação: cursor opaco, next_cursor, metadados só na primeira página
+- format=ndjson: metadados + um chunk por linha
+- vectors=false + /vectors: registros binários na ordem dos chunks
+- ETag / If-None-Match → 304; cursor inválido → 400
+"""
+
+import json
+import struct
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.ingestion import router, task_store
+from src.ingestion.models import IngestStatus, ProcessedChunk
+from src.ingestion.pipeline import PipelineResult
+from src.ingestion.task_store import SQLiteTaskStore, decode_dense, decode_sparse
+
+N_CHUNKS = 5
+
+
+def _chunk(i):
+    return ProcessedChunk(
+        node_id=f"leis:LEI-1#ART-{i:03d}", chunk_id=f"LEI-1#ART-{i:03d}", span_id=f"ART-{i:03d}",
+        parent_node_id="", device_type="article", chunk_level="article",
+        text=f"Art. {i}º Texto", document_id="LEI-1", tipo_documento="LEI",
+        numero="1", ano=2020, dense_vector=[i + 0.5, 0.25], sparse_vector={i: 0.5},
+    )
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_store, "_store", SQLiteTaskStore(str(tmp_path / "tasks.db")))
+    result = PipelineResult(
+        status=IngestStatus.COMPLETED, document_id="LEI-1",
+        chunks=[_chunk(i) for i in range(N_CHUNKS)], ingest_run_id="run-1",
+    )
+    router._register_task(router.TaskInfo(task_id="t1", document_id="LEI-1"))
+    router._set_task_result("t1", result)
+    router._register_task(router.TaskInfo(task_id="t-running", document_id="LEI-2"))
+
+    app = FastAPI()
+    app.include_router(router.router)
+    return TestClient(app)
+
+
+class TestIngestResult:
+
+    def test_full_result_compatible(self, client):
+        response = client.get("/ingest/result/t1")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["success"] and body["total_chunks"] == N_CHUNKS
+        assert body["ingest_run_id"] == "run-1"
+        assert [c["chunk_id"] for c in body["chunks"]] == [f"LEI-1#ART-{i:03d}" for i in range(N_CHUNKS)]
+        assert body["chunks"][1]["dense_vector"] == [1.5, 0.25]
+        assert body["chunks"][1]["sparse_vector"] == {"1": 0.5}
+        assert router.IngestResponse(**body).total_chunks == N_CHUNKS
+
+    def test_pagination(self, client):
+        first = client.get("/ingest/result/t1", params={"limit": 2, "vectors": "false"}).json()
+        assert first["document_id"] == "LEI-1" and first["offset"] == 0
+        assert [c["span_id"] for c in first["chunks"]] == ["ART-000", "ART-001"]
+        assert "dense_vector" not in first["chunks"][0]
+
+        seen, cursor = list(first["chunks"]), first["next_cursor"]
+        while cursor:
+            page = client.get("/ingest/result/t1", params={"cursor": cursor, "limit": 2}).json()
+            assert "document_id" not in page and page["total_chunks"] == N_CHUNKS
+            seen += page["chunks"]
+            cursor = page["next_cursor"]
+        assert [c["span_id"] for c in seen] == [f"ART-{i:03d}" for i in range(N_CHUNKS)]
+
+    def test_ndjson(self, client):
+        response = client.get("/ingest/result/t1", params={"format": "ndjson", "limit": 3})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["total_chunks"] == N_CHUNKS and "chunks" not in lines[0]
+        assert [line["span_id"] for line in lines[1:]] == ["ART-000", "ART-001", "ART-002"]
+        assert "X-Next-Cursor" in response.headers
+
+    def test_binary_vectors(self, client):
+        data = client.get("/ingest/result/t1/vectors", params={"cursor": router._encode_cursor(3)}).content
+        records, pos = [], 0
+        while pos < len(data):
+            seq, n_dense = struct.unpack_from("<II", data, pos)
+            dense = data[pos + 8:pos + 8 + n_dense]
+            (n_sparse,) = struct.unpack_from("<I", data, pos + 8 + n_dense)
+            start = pos + 12 + n_dense
+            records.append((seq, decode_dense(dense), decode_sparse(data[start:start + n_sparse])))
+            pos = start + n_sparse
+        assert records == [(3, [3.5, 0.25], {3: 0.5}), (4, [4.5, 0.25], {4: 0.5})]
+
+    def test_etag_not_modified(self, client):
+        first = client.get("/ingest/result/t1", params={"limit": 1})
+        etag = first.headers["etag"]
+        again = client.get("/ingest/result/t1", headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b""
+        assert client.get("/ingest/result/t1/vectors", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_errors(self, client):
+        assert client.get("/ingest/result/t1", params={"cursor": "!!"}).status_code == 400
+        assert client.get("/ingest/result/t1", params={"format": "xml"}).status_code == 400
+        assert client.get("/ingest/result/t-running").status_code == 202
+        assert client.get("/ingest/result/nope").status_code == 404
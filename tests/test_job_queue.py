@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: IngestJobQueue (fila de ingestão com prioridades) e o job do router.
+
+Verifica:
+- Ordem de saída: high → normal → low, FIFO dentro da prioridade
+- position(): 1 = próximo; None depois de sair da fila
+- Cancelamento na fila (sai na hora) e rodando (cancel_requested)
+- Dedupe: envio idêntico de job ativo devolve o job existente
+- Fila cheia → QueueFullError; prioridade inválida → ValueError
+- Router: cancelamento rodando para na próxima fase (status failed/cancelled)
+"""
+
+import asyncio
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.config import config
+from src.ingestion import router, task_store
+from src.ingestion.job_queue import IngestJobQueue, QueueFullError
+from src.ingestion.models import IngestRequest, IngestStatus
+from src.ingestion.pipeline import IngestCancelledError, PipelineResult
+
+
+class TestIngestJobQueue:
+
+    def test_priority_order_and_position(self):
+        async def run():
+            gate = asyncio.Event()
+            order = []
+
+            async def run_job(job):
+                order.append(job.task_id)
+                await gate.wait()
+
+            queue = IngestJobQueue(run_job, workers=1)
+            queue.submit("first", "k0")
+            await asyncio.sleep(0)                       # worker pega "first"
+            queue.submit("low", "k1", "low")
+            queue.submit("normal-a", "k2")
+            queue.submit("high", "k3", "high")
+            queue.submit("normal-b", "k4")
+            positions = {t: queue.position(t) for t in ("first", "high", "normal-a", "normal-b", "low")}
+            gate.set()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            stats = queue.stats()
+            await queue.stop()
+            return order, positions, stats
+
+        order, positions, stats = asyncio.run(run())
+        assert order == ["first", "high", "normal-a", "normal-b", "low"]
+        assert positions == {"first": None, "high": 1, "normal-a": 2, "normal-b": 3, "low": 4}
+        assert stats["queued"] == 0 and stats["running"] == 0
+
+    def test_cancel_queued_and_running(self):
+        async def run():
+            gate = asyncio.Event()
+            ran = []
+
+            async def run_job(job):
+                ran.append(job.task_id)
+                await gate.wait()
+
+            queue = IngestJobQueue(run_job, workers=1)
+            running, _ = queue.submit("running", "k0")
+            await asyncio.sleep(0)
+            queue.submit("queued", "k1")
+            states = (queue.cancel("queued"), queue.cancel("running"), queue.cancel("nope"))
+            flagged = running.cancel_requested.is_set()
+            gate.set()
+            for _ in range(5):
+                await asyncio.sleep(0)
+            await queue.stop()
+            return ran, states, flagged
+
+        ran, states, flagged = asyncio.run(run())
+        assert ran == ["running"]
+        assert states == ("queued", "running", None)
+        assert flagged
+
+    def test_dedupe_and_limits(self):
+        async def run():
+            gate = asyncio.Event()
+
+            async def run_job(job):
+                await gate.wait()
+
+            queue = IngestJobQueue(run_job, workers=1, max_pending=1)
+            first, created = queue.submit("t1", "same")
+            again, created_again = queue.submit("t2", "same")
+            with pytest.raises(QueueFullError):
+                queue.submit("t3", "other")
+            with pytest.raises(ValueError):
+                queue.submit("t4", "other", "urgent")
+            gate.set()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            _, created_after = queue.submit("t5", "same")       # job anterior terminou
+            await queue.stop()
+            return first, created, again, created_again, created_after
+
+        first, created, again, created_again, created_after = asyncio.run(run())
+        assert created and not created_again and again is first
+        assert created_after
+
+
+class CancellablePipeline:
+    """process_async que emite duas fases; o teste cancela entre elas."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.resume = asyncio.Event()
+        self.phases = []
+
+    async def process_async(self, pdf_content, request, progress_callback=None):
+        progress_callback("extraction", 0.2)
+        self.phases.append("extraction")
+        self.started.set()
+        await self.resume.wait()
+        try:
+            progress_callback("chunking", 0.5)        # fronteira de fase
+            self.phases.append("chunking")
+        except IngestCancelledError:
+            # Como process(): a fase registra a falha e o resultado sai FAILED
+            return PipelineResult(status=IngestStatus.FAILED, document_id=request.document_id)
+        return PipelineResult(status=IngestStatus.COMPLETED, document_id=request.document_id)
+
+
+class TestRouterCancel:
+
+    def test_running_job_stops_at_phase_boundary(self, tmp_path, monkeypatch):
+        pipeline = CancellablePipeline()
+        monkeypatch.setattr(task_store, "_store", task_store.SQLiteTaskStore(str(tmp_path / "tasks.db")))
+        monkeypatch.setattr(router, "get_pipeline", lambda: pipeline)
+        monkeypatch.setattr(config, "ingest_staged_executor", False)
+        request = IngestRequest(document_id="LEI-1", tipo_documento="LEI", numero="1", ano=2020)
+
+        async def run():
+            queue = router._get_job_queue()
+            router._register_task(router.TaskInfo(task_id="t-cancel", document_id="LEI-1"))
+            queue.submit("t-cancel", router._dedupe_key(b"%PDF-", request), "normal", (b"%PDF-", request))
+            await pipeline.started.wait()
+            response = await router.cancel_ingest("t-cancel")
+            pipeline.resume.set()
+            for _ in range(200):
+                if queue.stats()["running"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            status = await router.get_ingest_status("t-cancel")
+            await router.stop_job_queue()
+            return response, status
+
+        response, status = asyncio.run(run())
+
+        assert response == {"task_id": "t-cancel", "cancelled": True, "was": "running"}
+        assert pipeline.phases == ["extraction"]
+        assert status.status == "failed" and status.current_phase == "cancelled"
+        assert status.queue_position is None
@@ -7,8 +7,13 @@ Cobre normalização agressiva para matching VLM ↔ PyMuPDF:
 - Hífens de quebra de linha
 - Colapso de whitespace
 - Offset map round-trip
+- Caminho rápido de normalize_with_offset_map ≡ implementação char a char
 """
 
+import random
+import re
+import unicodedata
+
 import pytest
 import sys
 sys.path.insert(0, '/workspace/rag-gpu-server')
@@ -18,6 +23,7 @@ from src.utils.matching_normalization import (
     normalize_with_offset_map,
     NORMALIZATION_VERSION,
 )
+from src.utils.matching_normalization import _OCR_REPLACEMENTS
 
 
 class TestNormalizeForMatching:
@@ -246,3 +252,91 @@ class TestNormalizeWithOffsetMap:
         assert norm == '"texto"'
         assert offmap[0] == 0  # " (de U+201C)
         assert offmap[6] == 6  # " (de U+201D)
+
+
+def _reference_normalize_with_offset_map(text):
+    """Implementação original (char a char) de normalize_with_offset_map."""
+    if not text:
+        return ("", [])
+
+    nfkc_chars, nfkc_map = [], []
+    for orig_idx, ch in enumerate(text):
+        for expanded_ch in unicodedata.normalize("NFKC", ch):
+            nfkc_chars.append(expanded_ch)
+            nfkc_map.append(orig_idx)
+
+    nfkc_text = "".join(nfkc_chars)
+    hyphen_break_positions = set()
+    for m in re.finditer(r"-\s*\n\s*", nfkc_text):
+        hyphen_break_positions.update(range(m.start(), m.end()))
+
+    norm_chars, norm2orig = [], []
+    in_whitespace = False
+    for i, ch in enumerate(nfkc_chars):
+        if i in hyphen_break_positions:
+            continue
+        orig_idx = nfkc_map[i]
+        if ch in _OCR_REPLACEMENTS:
+            for rc in _OCR_REPLACEMENTS[ch]:
+                if rc in (" ", "\t", "\n", "\r"):
+                    if not in_whitespace:
+                        norm_chars.append(" ")
+                        norm2orig.append(orig_idx)
+                        in_whitespace = True
+                else:
+                    in_whitespace = False
+                    norm_chars.append(rc)
+                    norm2orig.append(orig_idx)
+            continue
+        if ch in (" ", "\t", "\n", "\r", "\x0b", "\x0c"):
+            if not in_whitespace:
+                norm_chars.append(" ")
+                norm2orig.append(orig_idx)
+                in_whitespace = True
+            continue
+        in_whitespace = False
+        norm_chars.append(ch)
+        norm2orig.append(orig_idx)
+
+    norm_text = "".join(norm_chars)
+    stripped = norm_text.strip()
+    if not stripped:
+        return ("", [])
+    leading = len(norm_text) - len(norm_text.lstrip())
+    trailing = len(norm_text) - len(norm_text.rstrip())
+    end_idx = len(norm2orig) - trailing if trailing > 0 else len(norm2orig)
+    return (stripped, norm2orig[leading:end_idx])
+
+
+# Alfabeto adversarial: ASCII, Latin-1 que muda sob NFKC (º ª ½ ² ´ NBSP),
+# tabela OCR, ligaturas, combinantes, whitespace Unicode e hífens de quebra
+_ALPHABET = list(
+    "ab -\n\t\r\x0b\x0c\x85çãé\u00ad\u00a0\u2013\u2014\u2026\ufb01\ufb03"
+    "ºª°½²´\u200b\ufeff\u201c\u2019«»\u3000\u0301\u2028\u017fİ"
+)
+
+
+class TestOffsetMapFastPath:
+    """Propriedade: caminho rápido ≡ implementação original char a char."""
+
+    def test_random_texts_match_reference(self):
+        rng = random.Random(40)
+        for _ in range(5000):
+            text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 30)))
+            assert normalize_with_offset_map(text) == _reference_normalize_with_offset_map(text), repr(text)
+
+    @pytest.mark.parametrize("text", [
+        "a -\n\u00ad\tb",            # espaço antes de hífen de quebra + remoção
+        "Art. 1\u00ba Lei n\u00ba 14.133",  # º → o sem mudar tamanho
+        "o\ufb01cial \u00bd",         # expansões NFKC
+        "texto em ASCII puro, com espa\u00e7os simples",
+    ])
+    def test_edge_cases_match_reference(self, text):
+        assert normalize_with_offset_map(text) == _reference_normalize_with_offset_map(text)
+
+    def test_document_sized_text_matches_reference(self):
+        text = (
+            "Art. 1\u00ba Esta Lei estabelece normas gerais de licita\u00e7\u00e3o \u2014 "
+            "para as adminis-\ntra\u00e7\u00f5es p\u00fablicas \u201cdiretas\u201d.\n\n"
+        ) * 200
+        assert normalize_with_offset_map(text) == _reference_normalize_with_offset_map(text)
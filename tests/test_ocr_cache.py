@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para OCRPageCache (cache em disco do OCR por página).
+
+Verifica:
+- Chave depende de imagem, modelo e versão do prompt
+- Round-trip get/put e eviction por tamanho (LRU); sobrescrita não infla o tamanho
+- Tamanho corrente consistente com várias threads gravando na mesma instância
+- Diretório privado (0700), fora de /tmp por padrão
+- ocr_document reutiliza o cache e deduplica páginas idênticas
+- Página com OCR truncado (loop) fica marcada e fora do cache
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.extraction.ocr_cache import OCR_CACHE_DIR, OCRPageCache, image_digest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OCRPageCache(model="qwen", prompt_version="v1", cache_dir=str(tmp_path))
+
+
+class TestOCRPageCache:
+
+    def test_miss_then_hit(self, cache):
+        key = cache.make_key(image_digest(b"page"))
+        assert cache.get(key) is None
+        cache.put(key, "Art. 1º Texto.")
+        assert cache.get(key) == "Art. 1º Texto."
+
+    def test_empty_text_is_cacheable(self, cache):
+        key = cache.make_key(image_digest(b"blank"))
+        cache.put(key, "")
+        assert cache.get(key) == ""
+
+    def test_key_depends_on_model_and_prompt(self, tmp_path):
+        digest = image_digest(b"page")
+        a = OCRPageCache("qwen", "v1", str(tmp_path)).make_key(digest)
+        b = OCRPageCache("qwen", "v2", str(tmp_path)).make_key(digest)
+        c = OCRPageCache("other", "v1", str(tmp_path)).make_key(digest)
+        assert len({a, b, c}) == 3
+
+    def test_overwrite_does_not_grow_size(self, tmp_path):
+        cache = OCRPageCache("qwen", "v1", str(tmp_path), max_bytes=2500)
+        keys = [cache.make_key(image_digest(bytes([i]))) for i in range(2)]
+        cache.put(keys[0], "x" * 1000)
+        for _ in range(5):
+            cache.put(keys[1], "y" * 1000)
+        assert cache._store._size == 2000
+        assert cache.get(keys[0]) is not None
+
+    def test_concurrent_puts_keep_size(self, tmp_path):
+        cache = OCRPageCache("qwen", "v1", str(tmp_path), max_bytes=10_000)
+        keys = [cache.make_key(image_digest(bytes([i]))) for i in range(8)]
+        cache.put(keys[0], "x")  # inicializa _size
+
+        def writer(offset):
+            for i in range(200):
+                cache.put(keys[(i + offset) % len(keys)], "y" * (100 + i % 50))
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        store = cache._store
+        assert store._size == sum(size for _, size, _ in store._entries())
+
+    def test_private_directory(self, tmp_path):
+        cache = OCRPageCache("qwen", "v1", str(tmp_path / "ocr"))
+        key = cache.make_key(image_digest(b"page"))
+        cache.put(key, "Art. 1º")
+        assert os.stat(tmp_path / "ocr").st_mode & 0o077 == 0
+        assert os.stat(os.path.dirname(cache._store.path(key))).st_mode & 0o077 == 0
+        assert not OCR_CACHE_DIR.startswith("/tmp")
+
+    def test_eviction_removes_least_recently_used(self, tmp_path):
+        cache = OCRPageCache("qwen", "v1", str(tmp_path), max_bytes=2500)
+        keys = [cache.make_key(image_digest(bytes([i]))) for i in range(3)]
+        for i, key in enumerate(keys[:2]):
+            cache.put(key, "x" * 1000)
+            past = time.time() - 100 + i
+            os.utime(cache._store.path(key), (past, past))
+        cache.get(keys[0])  # keys[0] passa a ser o mais recente
+        cache.put(keys[2], "x" * 1000)
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[2]) is not None
+
+
+from src.extraction.pymupdf_extractor import PyMuPDFExtractor
+from src.extraction.vlm_client import OCRText
+from src.extraction.vlm_service import VLMExtractionService
+
+
+def _make_pdf(texts) -> bytes:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def ocr_page(self, image_base64, image_mime="image/png"):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return f"Art. {self.calls}º Texto."
+
+
+class TruncatingClient(CountingClient):
+    async def ocr_page(self, image_base64, image_mime="image/png"):
+        text = await super().ocr_page(image_base64, image_mime)
+        return OCRText(text, truncated=True)
+
+
+class TestOCRDocumentWithCache:
+
+    def test_rerun_hits_cache(self, tmp_path):
+        pdf = _make_pdf(["Art. 1º Um.", "Art. 2º Dois.", "Art. 3º Três."])
+        client = CountingClient()
+        service = VLMExtractionService(
+            vlm_client=client,
+            pymupdf_extractor=PyMuPDFExtractor(dpi=36),
+            ocr_cache=OCRPageCache("qwen", "v1", str(tmp_path)),
+        )
+        _, first = asyncio.run(service.ocr_document(pdf, "TEST"))
+        assert client.calls == 3
+        _, second = asyncio.run(service.ocr_document(pdf, "TEST"))
+        assert client.calls == 3
+        assert second == first
+
+    def test_identical_pages_deduplicated(self, tmp_path):
+        pdf = _make_pdf(["", "Art. 1º Um.", "", ""])
+        client = CountingClient()
+        service = VLMExtractionService(
+            vlm_client=client,
+            pymupdf_extractor=PyMuPDFExtractor(dpi=36),
+            concurrency=4,
+            ocr_cache=OCRPageCache("qwen", "v1", str(tmp_path)),
+        )
+        asyncio.run(service.ocr_document(pdf, "TEST"))
+        assert client.calls == 2
+
+    def test_truncated_page_flagged_not_cached(self, tmp_path):
+        pdf = _make_pdf(["Art. 1º Um.", "Art. 2º Dois."])
+        client = TruncatingClient()
+        service = VLMExtractionService(
+            vlm_client=client,
+            pymupdf_extractor=PyMuPDFExtractor(dpi=36),
+            ocr_cache=OCRPageCache("qwen", "v1", str(tmp_path)),
+        )
+        pages, _ = asyncio.run(service.ocr_document(pdf, "TEST"))
+        assert [p.ocr_truncated for p in pages] == [True, True]
+        asyncio.run(service.ocr_document(pdf, "TEST"))
+        assert client.calls == 4
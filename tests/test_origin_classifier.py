@@ -8,8 +8,11 @@ Groups:
 - TestResolveReference (4)
 - TestComputeConfidence (3)
 - TestClassifyDocument (5)
+- TestDocumentContextIndex (3)
 """
 
+import copy
+
 import pytest
 from dataclasses import dataclass, field as dc_field
 from src.classification.origin_classifier import (
@@ -21,6 +24,9 @@ from src.classification.origin_classifier import (
     classify_document,
     assign_origin,
     ClassifierState,
+    DocumentContextIndex,
+    REFERENCE_PATTERNS,
+    TRIGGER_PHRASES,
     T_ENTER,
     T_EXIT,
     TTL_CHUNKS,
@@ -429,3 +435,71 @@ class TestClassifyDocument:
         sentinel = [c for c in result if c.chunk_id == "sentinel"][0]
         assert sentinel.origin_type == "self"
         assert sentinel.is_external_material is False
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# TestDocumentContextIndex
+# ═══════════════════════════════════════════════════════════════════════
+
+INDEX_CANONICAL = (
+    "Art. 177. Texto. O Título XI do Decreto-Lei nº 2.848, de 7 de dezembro de 1940 "
+    "(Código Penal), passa a vigorar acrescido do seguinte Capítulo II-B: "
+    "\u201CCAPÍTULO II-B Art. 337-E. Contratação direta ilegal\u201D (NR) "
+    "Art. 179. O art. 2º da Lei nº 8.987, de 13 de fevereiro de 1995, passa a vigorar "
+    "com a seguinte redação: \u201CArt. 2º Nova redação.\u201D (NR) "
+    "Art. 180. Na forma da Medida Provisória nº 1.047 e da Lei Complementar nº 123."
+)
+
+
+def _groups(matches):
+    return [m.groups() if m else None for m in matches]
+
+
+class TestDocumentContextIndex:
+    def test_windows_match_slice_search(self):
+        """Índice == busca direta na fatia, para toda janela do documento."""
+        index = DocumentContextIndex(INDEX_CANONICAL)
+        n = len(INDEX_CANONICAL)
+        for start in range(0, n, 7):
+            for end in range(start, n + 1, 11):
+                window = INDEX_CANONICAL[start:end]
+                assert index.has_trigger(start, end) == any(
+                    p in window.lower() for p in TRIGGER_PHRASES
+                )
+                assert _groups(index.reference_matches(start, end)) == _groups(
+                    [p.search(window) for p in REFERENCE_PATTERNS]
+                )
+
+    def test_short_precomputed_span(self, monkeypatch):
+        """Janelas maiores que o match pré-computado refazem a busca."""
+        monkeypatch.setattr("src.classification.origin_classifier._REFERENCE_SPAN", 20)
+        index = DocumentContextIndex(INDEX_CANONICAL)
+        n = len(INDEX_CANONICAL)
+        assert _groups(index.reference_matches(0, n)) == _groups(
+            [p.search(INDEX_CANONICAL) for p in REFERENCE_PATTERNS]
+        )
+
+    def test_classify_same_with_and_without_index(self):
+        """Chunks fora do índice (texto != fatia canônica) dão o mesmo resultado."""
+        chunks, offset = [], 0
+        for i, part in enumerate(INDEX_CANONICAL.split(" Art. ")):
+            text = part if i == 0 else "Art. " + part
+            if i:
+                offset += 1
+            chunks.append(FakeChunk(
+                text=text, chunk_id=f"c{i}",
+                canonical_start=offset, canonical_end=offset + len(text),
+            ))
+            offset += len(text)
+        assert all(INDEX_CANONICAL[c.canonical_start:c.canonical_end] == c.text for c in chunks)
+
+        indexed = classify_document(copy.deepcopy(chunks), INDEX_CANONICAL, "LEI-X")
+        # Sufixo invisível ao classificador força o caminho sem índice
+        plain = copy.deepcopy(chunks)
+        for c in plain:
+            c.text += " "
+        fallback = classify_document(plain, INDEX_CANONICAL, "LEI-X")
+        assert [(c.origin_type, c.origin_reference, c.origin_reason) for c in indexed] == [
+            (c.origin_type, c.origin_reference, c.origin_reason) for c in fallback
+        ]
+        assert any(c.origin_type == "external" for c in indexed)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: IngestionPipeline.process_async (OCR VLM no event loop do servidor).
+
+O serviço VLM é um fake (sem vLLM) e process() é substituído por um que só
+aplica a extração recebida — o foco é o encadeamento loop → executor.
+
+Verifica:
+- Um único serviço VLM atende vários documentos no mesmo loop
+- OCR roda no loop; a parte síncrona roda fora dele (executor)
+- Erro do OCR chega à fase síncrona (a fase registra a falha)
+- Checkpoint: segunda execução restaura sem chamar o VLM
+- vlm_stats do documento chega ao PipelineResult
+- IngestCancelledError dentro de uma fase sai de process() (não vira FAILED)
+"""
+
+import asyncio
+import threading
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.config import config
+from src.extraction.vlm_client import VLMClient
+from src.extraction.vlm_models import PageData
+from src.ingestion.models import IngestRequest, IngestStatus
+from src.ingestion.pipeline import IngestionPipeline, PipelineResult
+from src.utils.cancellation import IngestCancelledError
+
+
+class FakeVLMService:
+    def __init__(self, fail=False):
+        self.vlm_client = VLMClient(model="stub")
+        self.fail = fail
+        self.calls = []
+
+    async def ocr_document(self, pdf_bytes, document_id, progress_callback=None):
+        self.calls.append((document_id, asyncio.get_running_loop(), threading.get_ident()))
+        if self.fail:
+            raise RuntimeError("vLLM fora do ar")
+        self.vlm_client._count(requests=2, completion_tokens=50)
+        page = PageData(page_number=1, image_bytes=b"", text="Art. 1º",
+                        width=595.0, height=842.0, char_start=0, char_end=7)
+        return [page], "Art. 1º\n"
+
+    hybrid_document = ocr_document
+
+
+def _request(document_id="LEI-1"):
+    return IngestRequest(
+        document_id=document_id, tipo_documento="LEI", numero="1", ano=2020,
+        extraction_mode="vlm",
+    )
+
+
+def _pipeline(monkeypatch, service):
+    monkeypatch.setattr(config, "checkpoint_enabled", False)
+    pipeline = IngestionPipeline()
+    created = []
+
+    def make_service():
+        created.append(service)
+        return service
+
+    pipeline._make_vlm_service = make_service
+
+    def process(pdf_content, request, progress_callback=None, extraction=None):
+        result = PipelineResult(status=IngestStatus.COMPLETED, document_id=request.document_id)
+        result.thread = threading.get_ident()
+        try:
+            result.extracted = pipeline._extract_checkpointed(
+                "vlm_ocr", result, lambda: pytest.fail("asyncio.run no caminho async"),
+                extraction=extraction,
+            )
+        except RuntimeError as e:
+            result.status = IngestStatus.FAILED
+            result.extracted = str(e)
+        return result
+
+    pipeline.process = process
+    return pipeline, created
+
+
+class TestProcessAsync:
+
+    def test_shared_service_on_server_loop(self, monkeypatch):
+        service = FakeVLMService()
+        pipeline, created = _pipeline(monkeypatch, service)
+
+        async def run():
+            results = [
+                await pipeline.process_async(b"%PDF-" + bytes([i]), _request(f"LEI-{i}"))
+                for i in range(3)
+            ]
+            await pipeline.aclose()
+            return results, asyncio.get_running_loop(), threading.get_ident()
+
+        results, loop, loop_thread = asyncio.run(run())
+
+        assert len(created) == 1
+        assert [doc for doc, _, _ in service.calls] == ["LEI-0", "LEI-1", "LEI-2"]
+        assert all(call_loop is loop and tid == loop_thread for _, call_loop, tid in service.calls)
+        assert all(r.thread != loop_thread for r in results)
+        assert results[0].extracted[1] == "Art. 1º\n"
+        assert results[0].vlm_stats["requests"] == 2
+        assert not pipeline._loop_vlm_services
+
+    def test_ocr_error_reaches_phase(self, monkeypatch):
+        pipeline, _ = _pipeline(monkeypatch, FakeVLMService(fail=True))
+        result = asyncio.run(pipeline.process_async(b"%PDF-", _request()))
+        assert result.status == IngestStatus.FAILED
+        assert result.extracted == "vLLM fora do ar"
+
+    def test_checkpoint_restores_without_vlm(self, tmp_path, monkeypatch):
+        service = FakeVLMService()
+        pipeline, _ = _pipeline(monkeypatch, service)
+        monkeypatch.setattr(config, "checkpoint_enabled", True)
+        monkeypatch.setattr(config, "checkpoint_dir", str(tmp_path))
+
+        first = asyncio.run(pipeline.process_async(b"%PDF-x", _request()))
+        second = asyncio.run(pipeline.process_async(b"%PDF-x", _request()))
+
+        assert len(service.calls) == 1
+        assert first.checkpoint_hits == [] and second.checkpoint_hits == ["extraction"]
+        assert second.extracted[1] == first.extracted[1]
+        assert second.vlm_stats == {}
+
+    def test_new_loop_gets_new_service(self, monkeypatch):
+        pipeline, created = _pipeline(monkeypatch, FakeVLMService())
+        asyncio.run(pipeline.process_async(b"%PDF-", _request()))
+        asyncio.run(pipeline.process_async(b"%PDF-", _request()))
+        assert len(created) == 2
+
+
+class TestCancellation:
+
+    @pytest.mark.parametrize("tipo", ["LEI", "ACORDAO"])
+    @pytest.mark.parametrize("mode", ["pymupdf_regex", "vlm"])
+    def test_cancel_inside_phase_propagates(self, monkeypatch, tipo, mode):
+        fitz = pytest.importorskip("fitz")
+        monkeypatch.setattr(config, "checkpoint_enabled", False)
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "Art. 1º Texto.")
+        pdf = doc.tobytes()
+        doc.close()
+        page = PageData(page_number=1, image_bytes=b"", text="Art. 1º",
+                        width=595.0, height=842.0, char_start=0, char_end=7)
+        phases = []
+
+        def progress(phase, value):
+            phases.append(phase)
+            if value > 0.10:
+                raise IngestCancelledError("cancelada")
+
+        request = IngestRequest(
+            document_id="LEI-1", tipo_documento=tipo, numero="1", ano=2020,
+            extraction_mode=mode,
+        )
+        with pytest.raises(IngestCancelledError):
+            IngestionPipeline().process(
+                pdf, request, progress_callback=progress,
+                extraction=lambda result: ([page], "Art. 1º\n"),
+            )
+        assert phases[-1] != "initializing"
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Testes dos perfis de extração PyMuPDF (full vs lean).
+
+Verifica:
+- lean produz texto, offsets e has_strikethrough idênticos ao full
+- lean guarda só o primeiro span das primeiras LEAN_LINES linhas do bloco
+- índice de strikethrough ≡ varredura de todas as linhas da página
+- perfil é propagado ao modo paralelo
+"""
+
+import random
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+fitz = pytest.importorskip("fitz")
+
+from src.extraction.pymupdf_extractor import (
+    LEAN_LINES,
+    PROFILE_FULL,
+    PROFILE_LEAN,
+    PyMuPDFExtractor,
+    _StrikethroughIndex,
+)
+
+PARAGRAPH = (
+    "Art. {n}º Fica estabelecido que a administração pública direta, autárquica "
+    "e fundacional observará o disposto nesta Lei, inclusive quanto às contratações."
+)
+
+
+def _make_pdf(total_pages: int = 6) -> bytes:
+    """Blocos com várias linhas, negrito, página sem texto e riscados (line e rect fino)."""
+    doc = fitz.open()
+    for i in range(total_pages):
+        page = doc.new_page()
+        if i == 3:
+            page.draw_line((60, 75), (400, 75))  # desenho sem texto
+            continue
+        y = 50
+        for j in range(3):
+            fontname = "hebo" if j == 0 else "helv"
+            page.insert_textbox(
+                fitz.Rect(60, y, 540, y + 90), PARAGRAPH.format(n=i * 3 + j) * 2,
+                fontname=fontname, fontsize=9,
+            )
+            if (i + j) % 2 == 0:
+                page.draw_line((60, y + 6), (540, y + 6), width=0.5)
+            y += 120
+        if i == 1:
+            page.draw_rect((60, 400, 540, 401.5), fill=(0, 0, 0))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _snapshot(pages):
+    return [
+        (p.page_number, p.char_start, p.char_end, p.text,
+         [(b.char_start, b.char_end, b.text, b.bbox_pdf, b.has_strikethrough) for b in p.blocks])
+        for p in pages
+    ]
+
+
+class TestProfiles:
+
+    def test_lean_matches_full(self):
+        pdf = _make_pdf()
+        full_pages, full_text = PyMuPDFExtractor(dpi=36, profile=PROFILE_FULL).extract_pages(pdf)
+        lean_pages, lean_text = PyMuPDFExtractor(dpi=36, profile=PROFILE_LEAN).extract_pages(pdf)
+
+        assert lean_text == full_text
+        assert _snapshot(lean_pages) == _snapshot(full_pages)
+        assert any(b.has_strikethrough for p in full_pages for b in p.blocks)
+
+    def test_lean_keeps_only_first_span(self):
+        pdf = _make_pdf()
+        full_pages, _ = PyMuPDFExtractor(dpi=36, profile=PROFILE_FULL).extract_pages(pdf)
+        lean_pages, _ = PyMuPDFExtractor(dpi=36, profile=PROFILE_LEAN).extract_pages(pdf)
+
+        for full_page, lean_page in zip(full_pages, lean_pages):
+            for full_block, lean_block in zip(full_page.blocks, lean_page.blocks):
+                assert len(full_block.lines) > 1
+                assert len(lean_block.lines) == min(len(full_block.lines), LEAN_LINES)
+                for full_line, lean_line in zip(full_block.lines, lean_block.lines):
+                    assert lean_line["spans"] == full_line["spans"][:1]
+
+    def test_parallel_propagates_profile(self):
+        pdf = _make_pdf()
+        seq_pages, _ = PyMuPDFExtractor(dpi=36, profile=PROFILE_LEAN).extract_pages(pdf)
+        par_pages, _ = PyMuPDFExtractor(
+            dpi=36, workers=2, parallel_min_pages=1, profile=PROFILE_LEAN,
+        ).extract_pages(pdf)
+        assert _snapshot(par_pages) == _snapshot(seq_pages)
+        assert all(1 <= len(b.lines) <= LEAN_LINES for p in par_pages for b in p.blocks)
+
+    def test_invalid_profile(self):
+        with pytest.raises(ValueError):
+            PyMuPDFExtractor(profile="minimal")
+
+
+class TestStrikethroughIndex:
+
+    @staticmethod
+    def _brute(lines, bbox):
+        bx0, by0, bx1, by1 = bbox
+        for lx0, ly, lx1, _ in lines:
+            if by0 <= ly <= by1:
+                overlap = min(bx1, lx1) - max(bx0, lx0)
+                block_width = bx1 - bx0
+                if block_width > 0 and overlap / block_width > 0.3:
+                    return True
+        return False
+
+    def test_matches_brute_force(self):
+        rng = random.Random(41)
+        for _ in range(200):
+            lines = []
+            for _ in range(rng.randint(0, 30)):
+                x0 = rng.uniform(0, 500)
+                y = rng.choice([rng.uniform(0, 800), 100.0, 150.0])
+                lines.append((x0, y, x0 + rng.uniform(21, 400), y))
+            index = _StrikethroughIndex(lines)
+            for _ in range(20):
+                x0, y0 = rng.uniform(0, 500), rng.choice([rng.uniform(0, 800), 100.0])
+                bbox = [x0, y0, x0 + rng.uniform(-5, 300), y0 + rng.choice([0.0, 50.0])]
+                assert index.crosses(bbox) == self._brute(lines, bbox)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do passe único do RegexClassifier (classify_with_devices).
+
+Verifica:
+- Resultado e devices consistentes com classify_document/classify_to_devices
+- Órfão de continuação é anexado ao device imediatamente anterior
+- Órfão antes de qualquer device permanece não classificado
+"""
+
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.extraction.regex_classifier import (
+    classify_document,
+    classify_to_devices,
+    classify_with_devices,
+)
+
+
+def _pages(page_texts):
+    pages, offset = [], 0
+    for page_number, texts in enumerate(page_texts, start=1):
+        blocks = []
+        for idx, text in enumerate(texts):
+            blocks.append({
+                "block_index": idx, "text": text,
+                "char_start": offset, "char_end": offset + len(text),
+                "bbox": [0.0, 0.0, 1.0, 1.0], "lines": [],
+            })
+            offset += len(text) + 1
+        pages.append({"page_number": page_number, "blocks": blocks})
+    return pages
+
+
+PAGES = _pages([
+    [
+        "continuação solta antes de qualquer artigo do texto legal",
+        "Art. 1º Esta Lei estabelece normas gerais de licitação para",
+        "I - a administração pública direta;",
+    ],
+    [
+        "as autarquias e fundações da União, dos Estados e dos Municípios.",
+        "Art. 2º Aplica-se esta Lei a:",
+        "§ 1º Parágrafo do artigo segundo.",
+    ],
+])
+
+
+class TestSinglePass:
+
+    def test_matches_separate_calls(self):
+        result, devices = classify_with_devices(PAGES)
+        assert result == classify_document(PAGES)
+        assert devices == classify_to_devices(PAGES)
+        assert [d.span_id for d in devices] == ["ART-001", "INC-001-I", "ART-002", "PAR-002-1"]
+
+    def test_children_lists_not_shared(self):
+        result, devices = classify_with_devices(PAGES)
+        devices[0].children_span_ids.append("X")
+        assert "X" not in result["devices"][0]["children_span_ids"]
+
+    def test_orphan_attribution(self):
+        result, devices = classify_with_devices(PAGES)
+        inciso = next(d for d in devices if d.span_id == "INC-001-I")
+        assert inciso.text.endswith("\nas autarquias e fundações da União, dos Estados e dos Municípios.")
+        assert result["stats"]["orphans_merged"] == 1
+        assert [u["text_preview"][:20] for u in result["unclassified"]] == ["continuação solta an"]
@@ -428,5 +428,40 @@ class TestPrecedence:
         assert rel_type == "EXCEPCIONA"
 
 
+
+class TestKeywordGating:
+    """Filtro por keywords não pode mudar a classificação."""
+
+    SAMPLES = [
+        "Ficam revogados expressamente os arts. 1º a 5º.",
+        "Revogam-se o art. 3º e o § 2º do art. 4º.",
+        "O art. 1º passa a vigorar com a seguinte redação:",
+        "Dá nova redação ao art. 12 da Lei 8.666.",
+        "Este Decreto regulamenta a Lei nº 14.133, de 2021.",
+        "salvo o disposto no art. 5º; exceto nos casos do art. 6º",
+        "Ressalvado o previsto no art. 7º, com exceção do inciso II",
+        "nos termos do art. 9º, na forma do regulamento, observado o § 1º",
+        "atendidos os requisitos, em consonância com o art. 2º",
+        "conforme o art. 10; vide art. 11; mencionado no art. 12",
+        "a que se refere o art. 13 desta Lei",
+    ]
+
+    def test_keywords_present_in_every_match(self):
+        for text in self.SAMPLES:
+            lowered = text.lower()
+            for pattern in REL_TYPE_PATTERNS:
+                match = pattern.pattern.search(lowered)
+                if match:
+                    assert any(k in match.group(0) for k in pattern.keywords), (
+                        pattern.description, text
+                    )
+
+    def test_casefold_extra_characters(self):
+        """"ſ" casa com "s" sob IGNORECASE: não pode ser filtrado por keyword."""
+        text = "Aplica-se, ſalvo o diſposto no art. 5º."
+        rel_type, _ = classify_rel_type(text, start=30, end=38)
+        assert rel_type == "EXCEPCIONA"
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: remoção de header/footer repetidos entre páginas (repeated_lines).
+
+Verifica:
+- Cabeçalho/rodapé nativos (por bbox) removidos, com numeração "1/5" → "#/#"
+- Páginas OCR (sem bbox) usam a posição da linha no texto da página
+- Linhas de dispositivo (Art., §) nunca são removidas
+- Repetição abaixo do limiar não é removida
+- Offsets: canonical[b.char_start:b.char_end] == b.text após relayout
+- Perfil lean: a 1ª linha restante do bloco mantém o span (negrito)
+"""
+
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.extraction.pymupdf_extractor import LEAN_LINES, PyMuPDFExtractor
+from src.extraction.repeated_lines import line_key, strip_repeated_block_lines
+from src.extraction.vlm_models import BlockData, PageData
+
+HEADER = "18/10/2026, 10:42 L14133 - Planalto"
+URL = "https://www.planalto.gov.br/ccivil_03/_ato2019-2022/2021/lei/l14133.htm"
+
+
+def _page(page_number, blocks, ocr=False):
+    """blocks: [(texto, y0, y1)] — sem bbox quando ocr=True. Offsets locais."""
+    block_data, offset = [], 0
+    for i, (text, y0, y1) in enumerate(blocks):
+        block_data.append(BlockData(
+            block_index=i,
+            char_start=offset,
+            char_end=offset + len(text),
+            bbox_pdf=[] if ocr else [50.0, y0, 550.0, y1],
+            text=text,
+            page_number=page_number,
+            lines=[{"spans": [{"text": line}]} for line in text.split("\n")],
+        ))
+        offset += len(text) + 1
+    return PageData(
+        page_number=page_number, image_bytes=b"",
+        text="\n".join(text for text, _, _ in blocks), width=600.0, height=800.0,
+        blocks=block_data, char_end=max(offset - 1, 0),
+        text_source="ocr" if ocr else "native",
+    )
+
+
+def _native_document(total=5):
+    pages = []
+    for n in range(1, total + 1):
+        pages.append(_page(n, [
+            (HEADER, 10, 20),
+            (f"Art. {n}º Texto do artigo {n}.\nContinuação do artigo.", 100, 300),
+            (f"{URL}\n{n}/{total}", 770, 790),
+        ]))
+    return pages
+
+
+def _assert_offsets(pages, canonical):
+    for page in pages:
+        assert canonical[page.char_start:page.char_end] == page.text
+        for block in page.blocks:
+            assert canonical[block.char_start:block.char_end] == block.text
+
+
+class TestRepeatedLines:
+
+    def test_line_key_collapses_digits(self):
+        assert line_key("  1/50 ") == line_key("12/50") == "#/#"
+
+    def test_native_header_footer_removed(self):
+        pages = _native_document()
+        canonical = PyMuPDFExtractor.relayout_pages(pages)
+        assert HEADER in canonical
+
+        report = strip_repeated_block_lines(pages)
+        canonical = PyMuPDFExtractor.relayout_pages(pages)
+
+        assert report.dropped_lines == 15
+        assert report.pages_affected == 5
+        assert HEADER not in canonical and URL not in canonical
+        assert "3/5" not in canonical
+        assert "Art. 3º Texto do artigo 3." in canonical
+        assert all(len(p.blocks) == 1 for p in pages)
+        assert report.to_dict()["samples"][0] == HEADER
+        _assert_offsets(pages, canonical)
+
+    def test_ocr_pages_by_line_position(self):
+        pages = []
+        for n, name in enumerate(["primeira", "segunda", "terceira", "quarta"], 1):
+            text = (
+                f"{HEADER}\nArt. {n}º Texto OCR.\n\nParágrafo da {name} página.\n"
+                f"Outro parágrafo da {name}.\nPágina {n} de 4"
+            )
+            pages.append(_page(n, [(text, 0, 0)], ocr=True))
+        PyMuPDFExtractor.relayout_pages(pages)
+
+        report = strip_repeated_block_lines(pages)
+        canonical = PyMuPDFExtractor.relayout_pages(pages)
+
+        assert report.dropped_lines == 8
+        assert "Página" not in canonical and HEADER not in canonical
+        assert pages[0].text == (
+            "Art. 1º Texto OCR.\n\nParágrafo da primeira página.\nOutro parágrafo da primeira."
+        )
+        _assert_offsets(pages, canonical)
+
+    def test_devices_and_body_kept(self):
+        pages = []
+        for n in range(1, 5):
+            # Mesmo "Art. 1º" e mesmo parágrafo em todas as páginas, mas
+            # protegido (dispositivo), fora da faixa ou só encostando nela
+            pages.append(_page(n, [
+                ("Art. 1º Revogam-se as disposições em contrário.", 10, 20),
+                ("Texto repetido no meio da página.", 400, 420),
+                ("Corpo que começa na faixa.\nE continua abaixo dela.", 80, 300),
+            ]))
+        PyMuPDFExtractor.relayout_pages(pages)
+
+        report = strip_repeated_block_lines(pages)
+        assert report.dropped_lines == 0
+        assert all(len(p.blocks) == 3 for p in pages)
+
+    def test_below_threshold_kept(self):
+        pages = _native_document(total=6)
+        # Cabeçalho só em 2 páginas (< min_pages e < 50%)
+        for page in pages[2:]:
+            page.blocks = page.blocks[1:2]
+        PyMuPDFExtractor.relayout_pages(pages)
+
+        report = strip_repeated_block_lines(pages)
+        assert report.dropped_lines == 0
+        assert pages[0].blocks[0].text == HEADER
+
+    def test_partial_block_keeps_lines(self):
+        pages = []
+        for n in range(1, 5):
+            pages.append(_page(n, [
+                (f"{HEADER}\nLEI Nº 14.133, DE 1º DE ABRIL DE 2021\nTítulo {'ABCD'[n - 1]}", 10, 60),
+            ]))
+        PyMuPDFExtractor.relayout_pages(pages)
+
+        strip_repeated_block_lines(pages)
+        canonical = PyMuPDFExtractor.relayout_pages(pages)
+
+        assert pages[1].blocks[0].text == "Título B"
+        assert [line["spans"][0]["text"] for line in pages[1].blocks[0].lines] == ["Título B"]
+        _assert_offsets(pages, canonical)
+
+    def test_lean_block_keeps_first_span(self):
+        pages = []
+        for n in range(1, 5):
+            page = _page(n, [
+                (f"{HEADER}\nCAPÍTULO {'ABCD'[n - 1]}\nDas disposições gerais\nTexto", 10, 60),
+            ])
+            block = page.blocks[0]
+            # Perfil lean: 1º span das primeiras linhas, com flags de negrito
+            block.lines = [
+                {"spans": [{"text": line, "flags": 16}]}
+                for line in block.text.split("\n")[:LEAN_LINES]
+            ]
+            pages.append(page)
+        PyMuPDFExtractor.relayout_pages(pages)
+
+        strip_repeated_block_lines(pages)
+
+        block = pages[2].blocks[0]
+        # Cabeçalho e subtítulo repetidos saem; entradas de lines acompanham
+        assert block.text == "CAPÍTULO C\nTexto"
+        assert [line["spans"][0]["text"] for line in block.lines] == ["CAPÍTULO C", "Texto"]
+        assert block.lines[0]["spans"][0]["flags"] == 16
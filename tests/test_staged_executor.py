@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: StagedIngestExecutor (vários documentos em voo, estágios cpu → gpu → sink).
+
+process() é substituído por uma versão mínima que usa os pontos reais de
+integração do pipeline: _embed_chunks (→ batch de GPU compartilhado) e
+_phase_artifacts_upload (→ estágio de sink).
+
+Verifica:
+- Embeddings de documentos concorrentes saem no mesmo batch de GPU
+- Upload de artefatos roda no estágio de sink, fora do worker de CPU
+- Vetores corretos por chunk depois do fatiamento do batch
+- Erro do embedder chega a todos os documentos do batch
+- Modo vlm: OCR no loop do executor, um serviço VLM para todos os documentos
+- stats(): itens e utilização por estágio
+- Fora do executor, _embed_chunks faz um encode por lote de textos
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.config import config
+from src.ingestion.models import IngestRequest, IngestStatus, ProcessedChunk
+from src.ingestion.pipeline import IngestionPipeline, PipelineResult
+from src.ingestion.staged_executor import StagedIngestExecutor
+from src.utils.canonical_utils import CanonicalText
+
+
+class FakeEmbedder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("CUDA out of memory")
+        return SimpleNamespace(
+            dense_embeddings=[[float(len(t))] for t in texts],
+            sparse_embeddings=[{len(t): 1.0} for t in texts],
+        )
+
+
+class FakeUploader:
+    def __init__(self):
+        self.threads = []
+
+    def is_configured(self):
+        return True
+
+    def upload(self, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        return SimpleNamespace(success=True, message="ok", storage_paths={}, retries=0)
+
+
+def _chunk(document_id, span_id, text):
+    return ProcessedChunk(
+        node_id=f"leis:{document_id}#{span_id}", chunk_id=f"{document_id}#{span_id}",
+        span_id=span_id, parent_node_id="", device_type="article", chunk_level="article",
+        text=text, retrieval_text=text,
+        document_id=document_id, tipo_documento="LEI", numero="1", ano=2020,
+        article_number="1",
+    )
+
+
+class MiniPipeline(IngestionPipeline):
+    """process() mínimo: chunks → embeddings → upload."""
+
+    def __init__(self, embedder):
+        super().__init__()
+        self._embedder = embedder
+        self._artifacts_uploader = FakeUploader()
+        self.cpu_threads = []
+
+    def process(self, pdf_content, request, progress_callback=None, extraction=None):
+        self.cpu_threads.append(threading.current_thread().name)
+        result = PipelineResult(status=IngestStatus.PROCESSING, document_id=request.document_id)
+        if extraction is not None:
+            result.markdown_content = extraction(result)[1]
+        chunks = [
+            _chunk(request.document_id, f"ART-{i:03d}", f"Art. {i}º " + "x" * i)
+            for i in range(1, 6)
+        ]
+        try:
+            self._embed_chunks(chunks, result)
+        except RuntimeError as e:
+            result.status = IngestStatus.FAILED
+            result.errors.append(str(e))
+            return result
+        self._phase_artifacts_upload(
+            pdf_content, CanonicalText("Art. 1º\n"), chunks, request, result,
+        )
+        result.chunks = chunks
+        result.status = IngestStatus.COMPLETED
+        return result
+
+
+class FakeVLMService:
+    def __init__(self):
+        self.threads = set()
+        self.vlm_client = SimpleNamespace(close=self._close)
+        self.closed = False
+
+    async def _close(self):
+        self.closed = True
+
+    async def ocr_document(self, pdf_bytes, document_id, progress_callback=None):
+        self.threads.add(threading.current_thread().name)
+        return [], f"OCR {document_id}\n"
+
+
+def _request(document_id, extraction_mode="pymupdf_regex"):
+    return IngestRequest(
+        document_id=document_id, tipo_documento="LEI", numero="1", ano=2020,
+        extraction_mode=extraction_mode,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_checkpoints(monkeypatch):
+    monkeypatch.setattr(config, "checkpoint_enabled", False)
+    monkeypatch.setattr(config, "chunk_registry_enabled", False)
+
+
+class TestStagedExecutor:
+
+    def test_documents_share_gpu_batches(self):
+        embedder = FakeEmbedder()
+        pipeline = MiniPipeline(embedder)
+        with StagedIngestExecutor(
+            pipeline, cpu_workers=4, gpu_batch_size=64, gpu_batch_wait_ms=100,
+        ) as executor:
+            futures = [executor.submit(b"%PDF-", _request(f"LEI-{i}")) for i in range(4)]
+            results = [f.result(timeout=10) for f in futures]
+            stats = executor.stats()
+
+        assert all(r.status == IngestStatus.COMPLETED for r in results)
+        assert sum(len(b) for b in embedder.batches) == 20
+        assert len(embedder.batches) < 4                  # ao menos dois documentos juntos
+        for result in results:
+            for chunk in result.chunks:
+                assert chunk.dense_vector == [float(len(chunk.text))]
+
+        assert stats["stages"]["gpu"]["items"] == 20
+        assert stats["stages"]["cpu"]["items"] == 4 and stats["stages"]["sink"]["items"] == 4
+        assert 0.0 < stats["stages"]["gpu"]["utilization"] <= 1.0
+        assert stats["in_flight"] == 0
+
+    def test_upload_runs_in_sink_stage(self):
+        pipeline = MiniPipeline(FakeEmbedder())
+        with StagedIngestExecutor(pipeline, cpu_workers=1) as executor:
+            result = executor.submit(b"%PDF-", _request("LEI-1")).result(timeout=10)
+
+        assert pipeline.cpu_threads[0].startswith("ingest-cpu")
+        assert pipeline._artifacts_uploader.threads == ["ingest-sink-0"]
+        assert [p["name"] for p in result.phases] == ["artifacts_upload"]
+
+    def test_vlm_stage_on_executor_loop(self):
+        pipeline = MiniPipeline(FakeEmbedder())
+        services = []
+        pipeline._make_vlm_service = lambda: services.append(FakeVLMService()) or services[-1]
+        with StagedIngestExecutor(pipeline, cpu_workers=2, vlm_documents=2) as executor:
+            futures = [executor.submit(b"%PDF-", _request(f"LEI-{i}", "vlm")) for i in range(3)]
+            results = [f.result(timeout=10) for f in futures]
+            stats = executor.stats()
+
+        assert [r.markdown_content for r in results] == ["OCR LEI-0\n", "OCR LEI-1\n", "OCR LEI-2\n"]
+        assert len(services) == 1 and services[0].threads == {"ingest-vlm"}
+        assert services[0].closed
+        assert stats["stages"]["vlm"]["items"] == 3
+
+    def test_embedder_error_reaches_documents(self):
+        pipeline = MiniPipeline(FakeEmbedder(fail=True))
+        with StagedIngestExecutor(pipeline, cpu_workers=2, gpu_batch_wait_ms=50) as executor:
+            futures = [executor.submit(b"%PDF-", _request(f"LEI-{i}")) for i in range(2)]
+            results = [f.result(timeout=10) for f in futures]
+
+        assert all(r.status == IngestStatus.FAILED for r in results)
+        assert all("CUDA out of memory" in r.errors[0] for r in results)
+
+    def test_submit_after_shutdown(self):
+        executor = StagedIngestExecutor(MiniPipeline(FakeEmbedder()))
+        executor.shutdown()
+        with pytest.raises(RuntimeError):
+            executor.submit(b"%PDF-", _request("LEI-1"))
+
+
+class TestEmbedChunksBatching:
+
+    def test_one_encode_per_batch(self, monkeypatch):
+        monkeypatch.setattr(config, "ingest_embed_batch_size", 2)
+        embedder = FakeEmbedder()
+        pipeline = MiniPipeline(embedder)
+        chunks = [_chunk("LEI-1", f"ART-{i:03d}", f"Art. {i}º" + "y" * i) for i in range(1, 6)]
+
+        pipeline._embed_chunks(chunks, PipelineResult(status=IngestStatus.PROCESSING, document_id="LEI-1"))
+
+        assert [len(b) for b in embedder.batches] == [2, 2, 1]
+        assert all(c.dense_vector == [float(len(c.text))] for c in chunks)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: SQLiteTaskStore (status/resultado das tasks de /ingest fora da memória).
+
+Verifica:
+- Vetores dense/sparse ida e volta pelo formato binário (float32)
+- Status é uma linha pequena; resultado e chunks ficam em tabelas à parte
+- Chunks paginados por offset/limit, na ordem original
+- TTL: task vencida some do status e do resultado
+- Limite de tamanho: resultados mais antigos removidos primeiro, nunca o
+  recém-gravado; resultado maior que o limite → task failed (não some)
+- Escrita em andamento não bloqueia leitura de status (WAL)
+- Limpeza periódica de tasks vencidas na thread de fundo
+- Restart: tasks "processing" viram "failed"; resultados concluídos persistem
+- ETag: calculado no save_result, muda com o conteúdo
+- Diretório do SQLite criado privado (0700)
+- Redis: status final só no mesmo MULTI do resultado; falha na escrita não o altera
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.ingestion import task_store
+from src.ingestion.task_store import (
+    RedisTaskStore, SQLiteTaskStore, decode_dense, decode_sparse, encode_dense, encode_sparse,
+)
+
+
+def _task(task_id, status="processing"):
+    return {"task_id": task_id, "document_id": "LEI-1", "status": status, "progress": 0.0}
+
+
+def _chunks(n, dim=4):
+    return [
+        {
+            "chunk_id": f"LEI-1#ART-{i:03d}", "text": f"Art. {i}º",
+            "dense_vector": [i + 0.5] * dim, "sparse_vector": {i: 0.25, 1000 + i: 0.75},
+        }
+        for i in range(n)
+    ]
+
+
+class TestVectorEncoding:
+
+    def test_round_trip(self):
+        dense = [0.125, -1.5, 3.0]
+        sparse = {7: 0.5, 250002: 0.25}
+        assert decode_dense(encode_dense(dense)) == dense
+        assert decode_sparse(encode_sparse(sparse)) == sparse
+        assert len(encode_dense([0.0] * 1024)) == 4096
+        assert encode_dense(None) is None and decode_sparse(None) is None
+
+
+class TestSQLiteTaskStore:
+
+    def test_status_and_result_separate(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"))
+        store.create(_task("t1"))
+        store.update("t1", current_phase="chunking", progress=0.5, result="ignorado")
+
+        assert store.get("t1")["current_phase"] == "chunking"
+        assert store.load_result("t1") is None
+        assert not store.update("nope", progress=1.0)
+
+        assert store.save_result("t1", {"total_chunks": 3}, _chunks(3), status="completed", progress=1.0)
+        status = store.get("t1")
+        assert status["status"] == "completed" and "chunks" not in status
+        assert store.load_result("t1") == {"total_chunks": 3}
+
+        rows = store.load_chunks("t1", offset=1, limit=5)
+        assert len(rows) == 2
+        chunk = task_store.join_chunk(*rows[0])
+        assert chunk["chunk_id"] == "LEI-1#ART-001"
+        assert chunk["dense_vector"] == [1.5] * 4 and chunk["sparse_vector"] == {1: 0.25, 1001: 0.75}
+
+    def test_ttl_eviction(self, tmp_path, monkeypatch):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), ttl_seconds=60)
+        store.create(_task("t1"))
+        assert store.get("t1") is not None
+
+        now = time.time()
+        monkeypatch.setattr(task_store.time, "time", lambda: now + 61)
+        assert store.get("t1") is None
+        assert store.evict_expired() == 1
+        assert store.stats()["tasks"] == 0
+
+    def test_size_limit_drops_oldest(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), max_bytes=6000)
+        for task_id in ("t1", "t2", "t3"):
+            store.create(_task(task_id))
+            store.save_result(task_id, {}, _chunks(4, dim=256), status="completed")
+
+        assert store.get("t1") is None and store.load_chunks("t1") == []
+        assert store.get("t3")["status"] == "completed"
+        assert store.stats()["result_bytes"] <= 6000
+
+    def test_size_limit_keeps_current_task(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), max_bytes=6000)
+        store.create(_task("old"))
+        store.save_result("old", {}, _chunks(2, dim=256), status="completed")
+        store.create(_task("new"))
+        assert store.save_result("new", {}, _chunks(4, dim=256), status="completed")
+
+        assert store.get("old") is None
+        assert store.get("new")["status"] == "completed"
+        assert store.load_result_raw("new") is not None
+
+    def test_oversized_result_marks_failed(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), max_bytes=5000)
+        store.create(_task("a"))
+        assert store.save_result("a", {}, _chunks(6, dim=256), status="completed", progress=1.0)
+
+        status = store.get("a")
+        assert status["status"] == "failed" and status["progress"] == 1.0
+        assert "TASK_STORE_MAX_MB" in status["error_message"]
+        assert store.load_result_raw("a") is None and store.load_chunks("a") == []
+
+    def test_status_read_during_write(self, tmp_path):
+        path = str(tmp_path / "tasks.db")
+        store = SQLiteTaskStore(path)
+        store.create(_task("t1"))
+
+        writer = sqlite3.connect(path)
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO task_chunks VALUES ('x', 0, '{}', NULL, NULL)")
+        seen = []
+        reader = threading.Thread(target=lambda: seen.append(store.get("t1")))
+        reader.start()
+        reader.join(timeout=2)
+        writer.rollback()
+        writer.close()
+        assert seen and seen[0]["task_id"] == "t1"
+
+    def test_periodic_eviction(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), ttl_seconds=0, evict_interval=0.02)
+        store.create(_task("t1"))
+        for _ in range(100):
+            remaining = store.stats()["tasks"]
+            if remaining == 0:
+                break
+            time.sleep(0.02)
+        store.close()
+        assert remaining == 0
+        assert not store._janitor.is_alive()
+
+    def test_restart(self, tmp_path):
+        path = str(tmp_path / "tasks.db")
+        store = SQLiteTaskStore(path)
+        store.create(_task("running"))
+        store.create(_task("done"))
+        store.save_result("done", {"total_chunks": 1}, _chunks(1), status="completed")
+        store.close()
+
+        reopened = SQLiteTaskStore(path)
+        assert reopened.get("running")["status"] == "failed"
+        assert reopened.get("done")["status"] == "completed"
+        assert len(reopened.load_chunks("done")) == 1
+
+    def test_etag_follows_content(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"))
+        for task_id in ("t1", "t2", "t3"):
+            store.create(_task(task_id))
+        store.save_result("t1", {"total_chunks": 2}, _chunks(2), status="completed")
+        store.save_result("t2", {"total_chunks": 2}, _chunks(2), status="completed")
+        store.save_result("t3", {"total_chunks": 3}, _chunks(3), status="completed")
+
+        etags = [store.load_result_raw(t)[1] for t in ("t1", "t2", "t3")]
+        assert etags[0] == etags[1] != etags[2]
+        assert store.load_result("t1") == {"total_chunks": 2}
+
+    def test_private_directory(self, tmp_path):
+        directory = tmp_path / "ingest_tasks"
+        SQLiteTaskStore(str(directory / "tasks.db")).close()
+        assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+class FakeRedis:
+    """Redis em memória: só os comandos usados pelo RedisTaskStore."""
+
+    def __init__(self):
+        self.data = {}
+        self.fail_execute = False
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    """MULTI: comandos enfileirados, aplicados juntos no execute()."""
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._ops = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._ops.append((name, args, kwargs))
+
+    def execute(self):
+        redis = pytest.importorskip("redis")
+        if self._redis.fail_execute:
+            raise redis.ConnectionError("conexão perdida")
+        results = []
+        for name, args, kwargs in self._ops:
+            if name == "lrange":
+                key, start, end = args
+                items = self._redis.data.get(key, [])
+                results.append(items[start:None if end == -1 else end + 1])
+            elif name == "set":
+                self._redis.set(*args, **kwargs)
+            elif name == "delete":
+                self._redis.data.pop(args[0], None)
+            elif name == "rpush":
+                self._redis.data.setdefault(args[0], []).extend(
+                    v.encode("utf-8") if isinstance(v, str) else v for v in args[1:]
+                )
+        self._redis.writes = [args[0] for name, args, _ in self._ops if name == "set"]
+        return results
+
+
+class TestRedisTaskStore:
+
+    @pytest.fixture
+    def store(self):
+        pytest.importorskip("redis")
+        store = RedisTaskStore.__new__(RedisTaskStore)
+        store.ttl_seconds = 60
+        store._redis = FakeRedis()
+        store._lock = threading.Lock()
+        return store
+
+    def test_status_written_after_result(self, store):
+        store.create(_task("t1"))
+        assert store.save_result("t1", {"total_chunks": 2}, _chunks(2), status="completed")
+
+        # Status final é o último comando do MULTI, depois do resultado
+        assert store._redis.writes[-1] == "ingest:task:t1"
+        assert store.get("t1")["status"] == "completed"
+        assert store.load_result("t1") == {"total_chunks": 2}
+        assert len(store.load_chunks("t1")) == 2
+
+    def test_failed_write_keeps_status(self, store):
+        store.create(_task("t1"))
+        store._redis.fail_execute = True
+        assert not store.save_result("t1", {"total_chunks": 1}, _chunks(1), status="completed")
+        assert store.get("t1")["status"] == "processing"
+        assert store.load_result_raw("t1") is None
+
+    def test_unknown_task(self, store):
+        assert not store.save_result("nope", {}, _chunks(1), status="completed")
+        assert store._redis.data == {}
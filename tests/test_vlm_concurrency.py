@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para OCR VLM concorrente (VLMExtractionService).
+
+Verifica:
+- Limite de páginas em voo respeitado (semáforo)
+- Ordem das páginas preservada mesmo com respostas fora de ordem
+- Falha em uma página mantém semântica de "página vazia"
+- IngestCancelledError no progress_callback interrompe o OCR no meio
+- Cancelar durante a renderização fecha o gerador só após a thread terminar
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+fitz = pytest.importorskip("fitz")
+
+from src.extraction.pymupdf_extractor import PyMuPDFExtractor
+from src.extraction.vlm_service import VLMExtractionService
+from src.utils.cancellation import IngestCancelledError
+
+
+def _make_pdf(total_pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(total_pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Art. {i + 1}º Página {i + 1}.")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class FakeVLMClient:
+    """Responde OCR com atraso aleatório e registra o pico de concorrência."""
+
+    def __init__(self, fail_pages=()):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.fail_pages = set(fail_pages)
+        self._rng = random.Random(42)
+
+    async def ocr_page(self, image_base64: str, image_mime: str = "image/png") -> str:
+        self.calls += 1
+        call = self.calls
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self._rng.uniform(0.0, 0.02))
+            if call in self.fail_pages:
+                raise RuntimeError("vLLM indisponível")
+            return f"Art. {call}º Texto OCR da chamada {call}."
+        finally:
+            self.in_flight -= 1
+
+
+class SlowRenderExtractor(PyMuPDFExtractor):
+    """Segura a renderização da página 2 na thread e registra o fechamento."""
+
+    def __init__(self):
+        super().__init__(dpi=36)
+        self.rendering = threading.Event()
+        self.closed = False
+
+    def iter_pages(self, pdf_bytes):
+        try:
+            for page in super().iter_pages(pdf_bytes):
+                if page.page_number == 2:
+                    self.rendering.set()
+                    time.sleep(0.2)
+                yield page
+        finally:
+            self.closed = True
+
+
+def _service(client, concurrency, extractor=None):
+    return VLMExtractionService(
+        vlm_client=client,
+        pymupdf_extractor=extractor or PyMuPDFExtractor(dpi=36),
+        concurrency=concurrency,
+    )
+
+
+class TestConcurrentOCR:
+
+    def test_in_flight_bounded(self):
+        client = FakeVLMClient()
+        service = _service(client, concurrency=3)
+        pages, _ = asyncio.run(service.ocr_document(_make_pdf(10), "TEST"))
+        assert len(pages) == 10
+        assert client.calls == 10
+        assert 1 < client.max_in_flight <= 3
+
+    def test_page_order_preserved(self):
+        client = FakeVLMClient()
+        service = _service(client, concurrency=4)
+        pages, text = asyncio.run(service.ocr_document(_make_pdf(8), "TEST"))
+        # Chamadas são iniciadas em ordem de página (renderização sequencial)
+        assert [p.page_number for p in pages] == list(range(1, 9))
+        for i, page in enumerate(pages, start=1):
+            assert page.text == f"Art. {i}º Texto OCR da chamada {i}."
+            assert text[page.char_start:page.char_end] == page.text
+
+    def test_failed_page_is_empty(self):
+        client = FakeVLMClient(fail_pages={2})
+        service = _service(client, concurrency=2)
+        pages, text = asyncio.run(service.ocr_document(_make_pdf(3), "TEST"))
+        assert [p.page_number for p in pages] == [1, 2, 3]
+        assert pages[1].text == ""
+        assert pages[1].blocks == []
+        assert "chamada 3" in text
+
+    def test_sequential_when_concurrency_one(self):
+        client = FakeVLMClient()
+        service = _service(client, concurrency=1)
+        asyncio.run(service.ocr_document(_make_pdf(4), "TEST"))
+        assert client.max_in_flight == 1
+
+    def test_cancel_mid_ocr(self):
+        client = FakeVLMClient()
+        service = _service(client, concurrency=2)
+        calls = []
+
+        def progress(phase, progress):
+            if phase == "vlm_ocr":
+                calls.append(progress)
+                raise IngestCancelledError("cancelada")
+
+        with pytest.raises(IngestCancelledError):
+            asyncio.run(service.ocr_document(_make_pdf(20), "TEST", progress_callback=progress))
+        assert len(calls) == 1
+        assert client.calls <= 3
+
+    def test_cancel_during_render_waits_for_thread(self):
+        extractor = SlowRenderExtractor()
+        service = _service(FakeVLMClient(), concurrency=4, extractor=extractor)
+
+        async def run():
+            task = asyncio.create_task(service.ocr_document(_make_pdf(4), "TEST"))
+            await asyncio.to_thread(extractor.rendering.wait, 5)
+            task.cancel()
+            # Sem esperar a thread, close() levantaria "generator already executing"
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        assert extractor.closed
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: OCR VLM em streaming (VLMClient.ocr_page) contra um servidor stub.
+
+O stub (vllm_stub, conftest.py) é um servidor HTTP local que responde
+/chat/completions com um roteiro fixo de respostas (SSE ou JSON),
+registrando os payloads recebidos e quantos pedaços do stream conseguiu
+enviar antes do cliente desconectar.
+
+Verifica:
+- Streaming remonta o texto e ignora o bloco <think>
+- Loop de repetição aborta o stream cedo e repete com repetition_penalty
+- Loop persistente devolve o texto até o início da repetição, marcado
+  como truncado (OCRText.truncated, truncated_pages)
+- Orçamento adaptativo cortado (finish_reason=length) repete com o teto
+- RepetitionGuard não dispara em texto legal com incisos numerados,
+  pontilhados ou células de tabela (n-grama curto)
+- ocr_token_budget: densidade do texto nativo / área da página
+"""
+
+import asyncio
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.extraction.vlm_client import OCR_LOOP_REPETITION_PENALTY, VLMClient
+from src.extraction.vlm_models import PageData
+from src.extraction.vlm_ocr import RepetitionGuard, ocr_token_budget
+
+PAGE_TEXT = (
+    "Art. 1º Esta Lei estabelece normas gerais de licitação.\n"
+    "Parágrafo único. Aplica-se aos órgãos da administração direta."
+)
+LOOP_LINE = "O contratado deverá manter a regularidade fiscal. "
+
+
+@pytest.fixture
+def stub(vllm_stub):
+    """vllm_stub com roteiro em tuplas (deltas, finish_reason)."""
+    return lambda script: vllm_stub([
+        {"content": deltas, "finish_reason": finish_reason} for deltas, finish_reason in script
+    ])
+
+
+def _words(text):
+    return [word + " " for word in text.split(" ")]
+
+
+def _ocr(server, stream=True, max_tokens=None, ocr_max_tokens=8192):
+    async def run():
+        async with VLMClient(
+            base_url=server.base_url, model="stub", retry_delay=0.0,
+            ocr_stream=stream, ocr_max_tokens=ocr_max_tokens,
+        ) as client:
+            text = await client.ocr_page("aW1n", max_tokens=max_tokens)
+            return text, client.stats.to_dict()
+    return asyncio.run(run())
+
+
+class TestStreamingOCR:
+
+    def test_stream_reassembles_text(self, stub):
+        server = stub([(["<think>ok</think>\n"] + _words(PAGE_TEXT), "stop")])
+        text, stats = _ocr(server)
+        assert text == PAGE_TEXT
+        assert server.payloads[0]["stream"] is True
+        assert stats["streamed"] == 1 and stats["completion_tokens"] > 0
+
+    def test_loop_aborts_and_retries_with_penalty(self, stub):
+        looping = _words(PAGE_TEXT + " " + LOOP_LINE * 400)
+        server = stub([(looping, "length"), (_words(PAGE_TEXT), "stop")])
+        text, stats = _ocr(server)
+
+        assert text == PAGE_TEXT and not text.truncated
+        assert stats["loops_aborted"] == 1 and stats["truncated_pages"] == 0
+        assert server.chunks_sent[0] < len(looping) // 4
+        assert "repetition_penalty" not in server.payloads[0]
+        assert server.payloads[1]["repetition_penalty"] == OCR_LOOP_REPETITION_PENALTY
+
+    def test_persistent_loop_keeps_text_before_repetition(self, stub):
+        looping = _words(PAGE_TEXT + " " + LOOP_LINE * 400)
+        server = stub([(looping, "length"), (looping, "length")])
+        text, stats = _ocr(server)
+
+        assert text == PAGE_TEXT + " " + LOOP_LINE.strip()
+        assert text.truncated
+        assert stats["loops_aborted"] == 2 and stats["truncated_pages"] == 1
+        assert len(server.payloads) == 2
+
+    @pytest.mark.parametrize("stream", [True, False])
+    def test_short_budget_escalates_to_cap(self, stub, stream):
+        server = stub([(_words("Art. 1º Texto"), "length"), (_words(PAGE_TEXT), "stop")])
+        text, stats = _ocr(server, stream=stream, max_tokens=600, ocr_max_tokens=4096)
+
+        assert text == PAGE_TEXT
+        assert [p["max_tokens"] for p in server.payloads] == [600, 4096]
+        assert stats["budget_escalations"] == 1
+
+    def test_length_at_cap_is_final(self, stub):
+        server = stub([(_words(PAGE_TEXT), "length")])
+        text, stats = _ocr(server, max_tokens=9999, ocr_max_tokens=4096)
+        assert text == PAGE_TEXT
+        assert [p["max_tokens"] for p in server.payloads] == [4096]
+        assert stats["budget_escalations"] == 0
+
+
+class TestRepetitionGuard:
+
+    def test_legal_lists_do_not_trigger(self):
+        numerals = "I II III IV V VI VII VIII IX X XI XII XIII XIV XV XVI XVII XVIII XIX XX".split()
+        text = "\n".join(f"{n} - (VETADO);" for n in numerals * 5)
+        text += "\n" + "\n".join(f"§ {i}º (Revogado)." for i in range(1, 60))
+        guard = RepetitionGuard()
+        assert not any(guard.feed(text[i:i + 3]) for i in range(0, len(text), 3))
+        assert guard.text() == text
+
+    def test_short_units_do_not_trigger(self):
+        # Pontilhado de sumário e células de tabela: unidade curta repetida
+        for text in ("Sumário " + ". " * 400, "| --- | --- |\n" * 100):
+            guard = RepetitionGuard()
+            assert not any(guard.feed(text[i:i + 5]) for i in range(0, len(text), 5))
+        guard = RepetitionGuard()
+        assert guard.feed(LOOP_LINE * 40)
+
+    def test_giant_word_triggers(self):
+        guard = RepetitionGuard(max_word_chars=50)
+        assert not guard.feed("Art. 1º ")
+        assert guard.feed("a" * 60)
+        assert guard.text() == "Art. 1º"
+
+
+class TestTokenBudget:
+
+    @staticmethod
+    def _page(text="", width=595.0, height=842.0):
+        return PageData(page_number=1, image_bytes=b"", text=text, width=width, height=height)
+
+    def test_native_density(self):
+        sparse = ocr_token_budget(self._page("Art. 1º " * 40), 8192)
+        dense = ocr_token_budget(self._page("Art. 1º " * 600), 8192)
+        assert 512 <= sparse < dense <= 8192
+
+    def test_scanned_page_uses_area(self):
+        a4 = ocr_token_budget(self._page(), 8192)
+        a3 = ocr_token_budget(self._page(width=842.0, height=1191.0), 8192)
+        assert a4 < a3
+        assert ocr_token_budget(self._page(width=842.0, height=1191.0), 2048) == 2048
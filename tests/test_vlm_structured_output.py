@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Testes: saída estruturada do VLMClient.extract_page (JSON schema / guided_json).
+
+O stub (vllm_stub, conftest.py) responde /chat/completions com um roteiro
+fixo (status, conteúdo, completion_tokens) e registra os payloads recebidos.
+
+Verifica:
+- response_format / guided_json levam o schema de VLMPageResponse
+- HTTP 400 citando o schema: repete só aquele request sem o schema
+- HTTP 400 por outro motivo: erro HTTP normal (tentativa gasta)
+- structured_output="off": JSON em texto livre ainda passa por _extract_json
+- JSON inválido conta parse_failures, retries e wasted_tokens
+- collect_vlm_stats separa as chamadas de cada documento
+"""
+
+import asyncio
+import json
+
+import pytest
+import sys
+sys.path.insert(0, '/workspace/rag-gpu-server')
+
+from src.extraction.vlm_client import VLMClient, collect_vlm_stats, page_response_schema
+
+DEVICES = {"devices": [{
+    "device_type": "artigo", "identifier": "Art. 1º",
+    "text": "Art. 1º Esta Lei estabelece normas gerais.", "confidence": 0.9,
+}]}
+
+
+@pytest.fixture
+def stub(vllm_stub):
+    """vllm_stub com roteiro em tuplas (status, conteúdo, completion_tokens)."""
+    return lambda script: vllm_stub([
+        {"status": status, "content": content, "tokens": tokens}
+        for status, content, tokens in script
+    ])
+
+
+def _extract(server, structured_output="response_format", pages=1):
+    async def run():
+        async with VLMClient(
+            base_url=server.base_url, model="stub", retry_delay=0.0,
+            structured_output=structured_output,
+        ) as client:
+            with collect_vlm_stats() as stats:
+                results = [await client.extract_page("aW1n") for _ in range(pages)]
+            return results, stats.to_dict(), client
+    return asyncio.run(run())
+
+
+class TestStructuredOutput:
+
+    def test_response_format_sends_schema(self, stub):
+        server = stub([(200, json.dumps(DEVICES), 40)])
+        (result,), stats, _ = _extract(server)
+
+        assert result == DEVICES
+        response_format = server.payloads[0]["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["schema"] == page_response_schema()
+        assert "devices" in page_response_schema()["properties"]
+        assert stats["requests"] == 1 and stats["retries"] == 0
+        assert stats["completion_tokens"] == 40 and stats["wasted_tokens"] == 0
+
+    def test_guided_json(self, stub):
+        server = stub([(200, json.dumps(DEVICES), 40)])
+        _extract(server, structured_output="guided_json")
+        assert server.payloads[0]["guided_json"] == page_response_schema()
+        assert "response_format" not in server.payloads[0]
+
+    def test_rejected_schema_falls_back_to_regex(self, stub):
+        wrapped = f"Segue o JSON:\n```json\n{json.dumps(DEVICES)}\n```"
+        server = stub([
+            (400, "response_format json_schema não suportado", 0),
+            (200, wrapped, 50),
+            (200, json.dumps(DEVICES), 50),
+        ])
+        results, stats, client = _extract(server, pages=2)
+
+        assert results == [DEVICES, DEVICES]
+        assert "response_format" in server.payloads[0]
+        assert "response_format" not in server.payloads[1]
+        # Fallback vale só para o request rejeitado
+        assert "response_format" in server.payloads[2]
+        assert client.structured_output == "response_format"
+        assert stats["schema_fallbacks"] == 1 and stats["retries"] == 0
+
+    def test_unrelated_400_keeps_schema(self, stub):
+        server = stub([
+            (400, "image too large", 0),
+            (200, json.dumps(DEVICES), 40),
+        ])
+        (result,), stats, _ = _extract(server)
+
+        assert result == DEVICES
+        assert all("response_format" in p for p in server.payloads)
+        assert stats["schema_fallbacks"] == 0 and stats["retries"] == 1
+
+    def test_invalid_json_counts_wasted_tokens(self, stub):
+        server = stub([(200, "sem json nenhum", 30), (200, json.dumps(DEVICES), 40)])
+        (result,), stats, _ = _extract(server, structured_output="off")
+
+        assert result == DEVICES
+        assert "response_format" not in server.payloads[0]
+        assert server.payloads[1]["temperature"] == 0.0
+        assert stats["parse_failures"] == 1 and stats["retries"] == 1
+        assert stats["wasted_tokens"] == 30 and stats["completion_tokens"] == 70
+
+    def test_stats_scoped_per_document(self, stub):
+        server = stub([(200, json.dumps(DEVICES), 10)] * 3)
+
+        async def run():
+            async with VLMClient(base_url=server.base_url, model="stub") as client:
+                with collect_vlm_stats() as first:
+                    await client.extract_page("aW1n")
+                with collect_vlm_stats() as second:
+                    await asyncio.gather(client.extract_page("aW1n"), client.extract_page("aW1n"))
+                return first, second, client.stats
+
+        first, second, total = asyncio.run(run())
+        assert (first.requests, second.requests, total.requests) == (1, 2, 3)
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            VLMClient(model="stub", structured_output="xml")